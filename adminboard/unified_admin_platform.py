@@ -4,11 +4,13 @@
 解決路由衝突和函數重複問題
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import json
+import queue
 import logging
 from datetime import datetime
 import asyncio
@@ -34,18 +36,31 @@ SERVICES = {
     'system_monitor': {'port': 5006, 'name': 'System Monitor', 'type': 'Dashboard'}
 }
 
-def check_service_health(service_name, config):
-    """檢查單個服務健康狀態"""
+# 嘗試不同的健康檢查端點
+HEALTH_ENDPOINTS = ['/', '/health', '/status', '/api/health']
+
+def check_service_health(service_name, config, session=None, preferred_endpoint=None,
+                         host='localhost', timeout=5):
+    """檢查單個服務健康狀態
+    
+    優先探測上次成功的端點，其餘端點按默認順序依次嘗試；
+    返回 (狀態記錄, 成功的端點, 發出的請求數)。
+    """
+    http = session or requests
+    url = f"http://{host}:{config['port']}"
+    endpoints = HEALTH_ENDPOINTS
+    if preferred_endpoint in HEALTH_ENDPOINTS:
+        endpoints = [preferred_endpoint] + [e for e in HEALTH_ENDPOINTS if e != preferred_endpoint]
+    
+    probes = 0
     try:
         start_time = time.time()
-        url = f"http://localhost:{config['port']}"
         
-        # 嘗試不同的健康檢查端點
-        health_endpoints = ['/', '/health', '/status', '/api/health']
-        
-        for endpoint in health_endpoints:
+        for endpoint in endpoints:
             try:
-                response = requests.get(f"{url}{endpoint}", timeout=5)
+                probes += 1
+                response = http.get(f"{url}{endpoint}", timeout=timeout)
+                response.close()
                 response_time = round((time.time() - start_time) * 1000, 2)
                 
                 if response.status_code == 200:
@@ -58,8 +73,8 @@ def check_service_health(service_name, config):
                         'response_time': f"{response_time}ms",
                         'url': url,
                         'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    }
-            except:
+                    }, endpoint, probes
+            except Exception:
                 continue
                 
         # 如果所有端點都失敗，返回離線狀態
@@ -72,7 +87,7 @@ def check_service_health(service_name, config):
             'response_time': 'N/A',
             'url': url,
             'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        }, None, probes
         
     except Exception as e:
         logger.error(f"檢查服務 {service_name} 時發生錯誤: {str(e)}")
@@ -83,10 +98,162 @@ def check_service_health(service_name, config):
             'status': 'error',
             'status_code': 0,
             'response_time': 'Error',
-            'url': f"http://localhost:{config['port']}",
+            'url': url,
             'error': str(e),
             'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        }, None, probes
+
+class ServiceHealthCollector:
+    """
+    後台服務健康採集器
+    
+    - 單一後台線程按各服務自己的間隔探測，與儀表板客戶端數量無關
+    - 共享連接池的 requests.Session，並記住每個服務上次成功的端點
+    - 狀態穩定且健康時探測間隔逐步加倍到 max_interval，狀態變化時回到 min_interval，
+      離線服務按 offline_interval 重試
+    - 狀態變化推送給訂閱者（SSE）
+    """
+    
+    def __init__(self, services, host='localhost', min_interval=2.0, max_interval=30.0,
+                 offline_interval=10.0, timeout=2.0):
+        self.services = services
+        self.host = host
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.offline_interval = offline_interval
+        self.timeout = timeout
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(services)), pool_maxsize=4)
+        self.session.mount('http://', adapter)
+        
+        self.snapshot = {}          # service_name -> 狀態記錄
+        self.checked_at = {}        # service_name -> 探測完成時間
+        self.intervals = {name: min_interval for name in services}
+        self.next_due = {name: 0.0 for name in services}
+        self.preferred_endpoints = {}
+        self.probe_count = 0
+        self.version = 0
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._ready = threading.Event()
+        self._subscribers = []
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(services)),
+                                            thread_name_prefix='health-probe')
+        self._thread = None
+        self._running = False
+    
+    def start(self):
+        """啟動後台採集（可重複調用）"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='health-collector', daemon=True)
+            self._thread.start()
+    
+    def stop(self):
+        with self._wakeup:
+            self._running = False
+            self._wakeup.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+        self.session.close()
+    
+    def wait_ready(self, timeout=None):
+        """等待第一輪探測完成"""
+        return self._ready.wait(timeout)
+    
+    def _run(self):
+        while True:
+            with self._wakeup:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                due = [name for name, at in self.next_due.items() if at <= now]
+                if not due:
+                    self._wakeup.wait(min(self.next_due.values()) - now if self.next_due else None)
+                    continue
+            
+            futures = {
+                self._executor.submit(check_service_health, name, self.services[name], self.session,
+                                      self.preferred_endpoints.get(name), self.host, self.timeout): name
+                for name in due
+            }
+            for future, name in futures.items():
+                try:
+                    record, endpoint, probes = future.result()
+                except Exception as e:
+                    logger.error(f"檢查服務 {name} 失敗: {str(e)}")
+                    continue
+                self._update(name, record, endpoint, probes)
+            self._ready.set()
+    
+    def _update(self, name, record, endpoint, probes):
+        with self._lock:
+            self.probe_count += probes
+            previous = self.snapshot.get(name)
+            changed = previous is None or previous['status'] != record['status']
+            
+            if endpoint:
+                self.preferred_endpoints[name] = endpoint
+            if changed:
+                interval = self.min_interval
+            elif record['status'] == 'healthy':
+                interval = min(self.intervals[name] * 2, self.max_interval)
+            else:
+                interval = self.offline_interval
+            
+            record['probe_interval'] = interval
+            self.intervals[name] = interval
+            self.snapshot[name] = record
+            self.checked_at[name] = time.time()
+            self.next_due[name] = time.monotonic() + interval
+            
+            if changed:
+                self.version += 1
+                event = {'service': name, 'version': self.version, 'status': dict(record)}
+                for subscriber in self._subscribers:
+                    subscriber.put(event)
+    
+    def get_snapshot(self):
+        """返回緩存的狀態快照，附帶每個服務的數據陳舊時間"""
+        now = time.time()
+        with self._lock:
+            services_status = []
+            for name, config in self.services.items():
+                record = self.snapshot.get(name)
+                if record is None:
+                    record = {
+                        'name': config['name'],
+                        'port': config['port'],
+                        'type': config['type'],
+                        'status': 'unknown',
+                        'status_code': 0,
+                        'response_time': 'N/A',
+                        'url': f"http://{self.host}:{config['port']}",
+                        'last_check': None
+                    }
+                record = dict(record)
+                record['staleness_seconds'] = round(now - self.checked_at[name], 2) if name in self.checked_at else None
+                services_status.append(record)
+            return services_status, self.version
+    
+    def subscribe(self):
+        """訂閱狀態變化，返回事件隊列"""
+        subscriber = queue.Queue()
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+health_collector = ServiceHealthCollector(SERVICES)
 
 @app.route('/')
 def index():
@@ -95,35 +262,11 @@ def index():
 
 @app.route('/api/services/status')
 def get_services_status():
-    """獲取所有服務狀態 - 修復版本"""
+    """獲取所有服務狀態 - 返回後台採集器的緩存快照"""
     try:
-        services_status = []
-        
-        # 使用線程池並行檢查所有服務
-        with ThreadPoolExecutor(max_workers=len(SERVICES)) as executor:
-            future_to_service = {
-                executor.submit(check_service_health, name, config): name 
-                for name, config in SERVICES.items()
-            }
-            
-            for future in future_to_service:
-                try:
-                    service_status = future.result(timeout=10)
-                    services_status.append(service_status)
-                except Exception as e:
-                    service_name = future_to_service[future]
-                    logger.error(f"檢查服務 {service_name} 超時: {str(e)}")
-                    services_status.append({
-                        'name': SERVICES[service_name]['name'],
-                        'port': SERVICES[service_name]['port'],
-                        'type': SERVICES[service_name]['type'],
-                        'status': 'timeout',
-                        'status_code': 0,
-                        'response_time': 'Timeout',
-                        'url': f"http://localhost:{SERVICES[service_name]['port']}",
-                        'error': 'Health check timeout',
-                        'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
+        health_collector.start()
+        health_collector.wait_ready(timeout=10)
+        services_status, version = health_collector.get_snapshot()
         
         # 計算統計信息
         total_services = len(services_status)
@@ -139,6 +282,7 @@ def get_services_status():
                 'offline': offline_services,
                 'health_percentage': health_percentage
             },
+            'version': version,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         })
         
@@ -149,6 +293,29 @@ def get_services_status():
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }), 500
 
+@app.route('/api/services/stream')
+def stream_services_status():
+    """以SSE推送服務狀態變化：先發送完整快照，之後只發送變化的服務"""
+    health_collector.start()
+    subscriber = health_collector.subscribe()
+    
+    def generate():
+        try:
+            services_status, version = health_collector.get_snapshot()
+            yield f"event: snapshot\ndata: {json.dumps({'services': services_status, 'version': version}, ensure_ascii=False)}\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        finally:
+            health_collector.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/service/<service_name>/restart', methods=['POST'])
 def restart_service(service_name):
     """重啟指定服務"""
@@ -227,7 +394,9 @@ if __name__ == '__main__':
     print("🚀 統一管理平台啟動中...")
     print("📊 管理界面: http://localhost:9001")
     print("🔧 API端點: http://localhost:9001/api/services/status")
+    print("📡 狀態推送: http://localhost:9001/api/services/stream")
     print("=" * 50)
     
-    app.run(host='0.0.0.0', port=9001, debug=True)
+    health_collector.start()
+    app.run(host='0.0.0.0', port=9001, debug=True, threaded=True)
 
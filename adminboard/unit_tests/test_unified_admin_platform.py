@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+unified_admin_platform 單元測試
+用本地樁HTTP服務驗證後台健康採集：探測次數與儀表板客戶端數量無關、
+記住可用端點、間隔自適應與SSE變化推送
+"""
+
+import unittest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+import sys
+
+# 添加模塊路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import unified_admin_platform
+from unified_admin_platform import ServiceHealthCollector
+
+
+def start_stub_server(healthy_paths):
+    """啟動只在指定路徑返回200的樁服務（路徑集合可在測試中修改），記錄收到的請求路徑"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            hits.append(self.path)
+            body = b'ok' if self.path in healthy_paths else b'missing'
+            self.send_response(200 if self.path in healthy_paths else 404)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+
+class TestServiceHealthCollector(unittest.TestCase):
+    """ServiceHealthCollector 測試"""
+
+    def setUp(self):
+        self.root_healthy_paths = {'/'}
+        self.root_server, self.root_hits = start_stub_server(self.root_healthy_paths)
+        self.health_server, self.health_hits = start_stub_server({'/health'})
+        self.services = {
+            'root_service': {'port': self.root_server.server_port, 'name': 'Root', 'type': 'API'},
+            'health_service': {'port': self.health_server.server_port, 'name': 'Health', 'type': 'Web'},
+        }
+        self.collectors = []
+
+    def tearDown(self):
+        for collector in self.collectors:
+            collector.stop()
+        for server in (self.root_server, self.health_server):
+            server.shutdown()
+            server.server_close()
+
+    def make_collector(self, **kwargs):
+        collector = ServiceHealthCollector(self.services, host='127.0.0.1', **kwargs)
+        self.collectors.append(collector)
+        collector.start()
+        self.assertTrue(collector.wait_ready(5))
+        return collector
+
+    def test_probe_count_independent_of_dashboard_clients(self):
+        """TC001: 大量儀表板請求只讀快照，不增加對服務的探測"""
+        collector = self.make_collector(min_interval=60)
+        unified_admin_platform.health_collector = collector
+        probes = collector.probe_count
+        hits = len(self.root_hits) + len(self.health_hits)
+
+        client = unified_admin_platform.app.test_client()
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            responses = list(pool.map(lambda _: client.get('/api/services/status').get_json(), range(200)))
+
+        self.assertEqual(collector.probe_count, probes)
+        self.assertEqual(len(self.root_hits) + len(self.health_hits), hits)
+        summary = responses[-1]['summary']
+        self.assertEqual((summary['total'], summary['healthy']), (2, 2))
+        self.assertTrue(all(s['staleness_seconds'] is not None for s in responses[-1]['services']))
+
+    def test_remembers_working_endpoint_and_backs_off(self):
+        """TC002: 記住成功端點後每次只發一個請求，健康且穩定時間隔加倍"""
+        collector = self.make_collector(min_interval=0.05, max_interval=0.2)
+        self.assertEqual(self.health_hits[:2], ['/', '/health'])
+        self.assertEqual(collector.preferred_endpoints['health_service'], '/health')
+
+        first_hits = len(self.health_hits)
+        threading.Event().wait(0.6)
+        self.assertTrue(all(path == '/health' for path in self.health_hits[first_hits:]))
+        self.assertEqual(collector.intervals['health_service'], 0.2)
+
+    def test_stream_pushes_status_changes(self):
+        """TC003: 服務不可用後訂閱者收到變化事件"""
+        collector = self.make_collector(min_interval=0.05, offline_interval=0.05)
+        subscriber = collector.subscribe()
+
+        self.root_healthy_paths.clear()
+        event = subscriber.get(timeout=5)
+        self.assertEqual(event['service'], 'root_service')
+        self.assertEqual(event['status']['status'], 'offline')
+        self.assertEqual(collector.get_snapshot()[1], event['version'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,8 +10,8 @@ import asyncio
 import json
 import time
 import socket
-import requests
-from typing import Dict, List, Set, Optional, Tuple
+import aiohttp
+from typing import Dict, List, Set, Optional, Tuple, AsyncIterator
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 import logging
@@ -55,8 +55,11 @@ class NeuralDiscoveryEngine:
     4. 學習發現模式
     """
     
-    def __init__(self, scan_range: Tuple[int, int] = (8090, 8099)):
+    def __init__(self, scan_range: Tuple[int, int] = (8090, 8099), host: str = 'localhost',
+                 max_concurrency: int = 100, connect_timeout: float = 0.5, probe_timeout: float = 2.0,
+                 service_cache_ttl: float = 60.0):
         self.scan_range = scan_range
+        self.host = host
         self.discovered_neurons: Dict[str, MCPNeuron] = {}
         self.discovery_patterns: List[Dict] = []
         self.scan_interval = 30  # 秒
@@ -67,6 +70,17 @@ class NeuralDiscoveryEngine:
         self.discovery_success_threshold = 0.8
         self.neuron_timeout = 300  # 5分鐘無響應視為離線
         
+        # 併發掃描參數
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.probe_timeout = probe_timeout
+        self.service_cache_ttl = service_cache_ttl
+        # 最近一次探測成功的服務：端口 -> (過期時間, 服務信息)，過期前不重新探測
+        self.service_cache: Dict[int, Tuple[float, Dict]] = {}
+        self.scan_stats = {
+            'ports_scanned': 0, 'open_ports': 0, 'http_probes': 0, 'cache_hits': 0, 'services_found': 0
+        }
+        
     async def start_discovery(self):
         """啟動持續發現過程"""
         self.is_running = True
@@ -104,36 +118,91 @@ class NeuralDiscoveryEngine:
     
     async def scan_port_range(self) -> List[MCPNeuron]:
         """掃描端口範圍發現新的 MCP 組件"""
-        new_neurons = []
+        return [neuron async for neuron in self.scan_port_range_stream()]
+    
+    async def scan_port_range_stream(self) -> AsyncIterator[MCPNeuron]:
+        """併發掃描端口範圍，每發現一個新神經元立即產出"""
+        async for port, neuron_info in self.iter_port_scan():
+            neuron_id = f"mcp_{port}"
+            
+            # 如果是新神經元
+            if neuron_id not in self.discovered_neurons:
+                logger.info(f"🆕 發現新神經元: {neuron_id} (端口 {port})")
+                yield MCPNeuron(
+                    id=neuron_id,
+                    host=self.host,
+                    port=port,
+                    capabilities=neuron_info.get('capabilities', []),
+                    last_seen=datetime.now()
+                )
+            else:
+                # 更新已知神經元的最後見到時間
+                self.discovered_neurons[neuron_id].last_seen = datetime.now()
+    
+    async def iter_port_scan(self, ports: Optional[List[int]] = None) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        併發探測端口，按完成順序產出 (端口, 服務信息)
+        
+        最多 max_concurrency 個端口同時探測；先做 TCP 連接預檢，端口開放才發 HTTP 探測；
+        緩存未過期的服務直接產出，不再探測。
+        """
+        ports = list(ports) if ports is not None else list(range(self.scan_range[0], self.scan_range[1] + 1))
+        if not ports:
+            return
         
-        for port in range(self.scan_range[0], self.scan_range[1] + 1):
+        pending_ports = iter(ports)
+        results: asyncio.Queue = asyncio.Queue()
+        timeout = aiohttp.ClientTimeout(total=self.probe_timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        
+        async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+            async def worker():
+                try:
+                    for port in pending_ports:
+                        try:
+                            neuron_info = await self._probe_port(session, port)
+                        except Exception as e:
+                            logger.debug(f"掃描端口 {port} 時出錯: {e}")
+                            continue
+                        if neuron_info:
+                            await results.put((port, neuron_info))
+                finally:
+                    await results.put(None)
+            
+            workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, len(ports)))]
             try:
-                # 檢查端口是否開放
-                if await self.is_port_open('localhost', port):
-                    # 嘗試獲取 MCP 信息
-                    neuron_info = await self.probe_mcp_service(port)
-                    if neuron_info:
-                        neuron_id = f"mcp_{port}"
-                        
-                        # 如果是新神經元
-                        if neuron_id not in self.discovered_neurons:
-                            neuron = MCPNeuron(
-                                id=neuron_id,
-                                host='localhost',
-                                port=port,
-                                capabilities=neuron_info.get('capabilities', []),
-                                last_seen=datetime.now()
-                            )
-                            new_neurons.append(neuron)
-                            logger.info(f"🆕 發現新神經元: {neuron_id} (端口 {port})")
-                        else:
-                            # 更新已知神經元的最後見到時間
-                            self.discovered_neurons[neuron_id].last_seen = datetime.now()
-                            
-            except Exception as e:
-                logger.debug(f"掃描端口 {port} 時出錯: {e}")
+                remaining = len(workers)
+                while remaining:
+                    item = await results.get()
+                    if item is None:
+                        remaining -= 1
+                    else:
+                        yield item
+            finally:
+                # 調用方提前停止迭代時取消尚未完成的探測
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+    
+    async def _probe_port(self, session: aiohttp.ClientSession, port: int) -> Optional[Dict]:
+        """探測單個端口，優先使用未過期的服務緩存"""
+        self.scan_stats['ports_scanned'] += 1
+        cached = self.service_cache.get(port)
+        if cached and cached[0] > time.monotonic():
+            self.scan_stats['cache_hits'] += 1
+            return cached[1]
         
-        return new_neurons
+        neuron_info = None
+        if await self.is_port_open(self.host, port, timeout=self.connect_timeout):
+            self.scan_stats['open_ports'] += 1
+            neuron_info = await self.probe_mcp_service(port, session)
+        
+        if neuron_info:
+            self.scan_stats['services_found'] += 1
+            self.service_cache[port] = (time.monotonic() + self.service_cache_ttl, neuron_info)
+        else:
+            self.service_cache.pop(port, None)
+        return neuron_info
     
     async def is_port_open(self, host: str, port: int, timeout: float = 1.0) -> bool:
         """檢查端口是否開放"""
@@ -148,34 +217,39 @@ class NeuralDiscoveryEngine:
         except:
             return False
     
-    async def probe_mcp_service(self, port: int) -> Optional[Dict]:
+    async def probe_mcp_service(self, port: int, session: Optional[aiohttp.ClientSession] = None) -> Optional[Dict]:
         """探測 MCP 服務信息"""
+        if session is None:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.probe_timeout)) as session:
+                return await self.probe_mcp_service(port, session)
+        
         try:
             # 嘗試常見的健康檢查端點
             health_endpoints = ['/api/health', '/health', '/status', '/']
             
             for endpoint in health_endpoints:
                 try:
-                    response = requests.get(
-                        f"http://localhost:{port}{endpoint}",
-                        timeout=2
-                    )
-                    if response.status_code == 200:
-                        data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
-                        
-                        # 提取 MCP 能力信息
-                        capabilities = []
-                        if 'capabilities' in data:
-                            capabilities = data['capabilities']
-                        elif 'service' in data:
-                            capabilities = [data['service']]
-                        
-                        return {
-                            'capabilities': capabilities,
-                            'service_info': data,
-                            'endpoint': endpoint
-                        }
-                except:
+                    self.scan_stats['http_probes'] += 1
+                    async with session.get(f"http://{self.host}:{port}{endpoint}") as response:
+                        if response.status == 200:
+                            data = await response.json(content_type=None) if response.headers.get('content-type', '').startswith('application/json') else {}
+                            
+                            # 提取 MCP 能力信息
+                            capabilities = []
+                            if 'capabilities' in data:
+                                capabilities = data['capabilities']
+                            elif 'service' in data:
+                                capabilities = [data['service']]
+                            
+                            return {
+                                'capabilities': capabilities,
+                                'service_info': data,
+                                'endpoint': endpoint
+                            }
+                except asyncio.TimeoutError:
+                    # 端口開放但在超時內不響應 HTTP，不再逐個端點等待超時
+                    break
+                except Exception:
                     continue
                     
         except Exception as e:
@@ -187,53 +261,60 @@ class NeuralDiscoveryEngine:
         """驗證已知神經元的狀態"""
         current_time = datetime.now()
         inactive_neurons = []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
         
-        for neuron_id, neuron in self.discovered_neurons.items():
-            try:
-                # 檢查神經元是否仍然活躍
-                if await self.is_port_open(neuron.host, neuron.port, timeout=0.5):
-                    neuron.last_seen = current_time
-                    neuron.is_active = True
-                else:
-                    # 檢查是否超時
-                    if (current_time - neuron.last_seen).seconds > self.neuron_timeout:
-                        neuron.is_active = False
-                        inactive_neurons.append(neuron_id)
-                        
-            except Exception as e:
-                logger.debug(f"驗證神經元 {neuron_id} 時出錯: {e}")
+        async def check(neuron: MCPNeuron) -> bool:
+            async with semaphore:
+                return await self.is_port_open(neuron.host, neuron.port, timeout=0.5)
+        
+        neurons = list(self.discovered_neurons.items())
+        results = await asyncio.gather(*(check(neuron) for _, neuron in neurons), return_exceptions=True)
+        for (neuron_id, neuron), is_open in zip(neurons, results):
+            if isinstance(is_open, Exception):
+                logger.debug(f"驗證神經元 {neuron_id} 時出錯: {is_open}")
+                continue
+            # 檢查神經元是否仍然活躍
+            if is_open:
+                neuron.last_seen = current_time
+                neuron.is_active = True
+            else:
+                # 檢查是否超時
+                if (current_time - neuron.last_seen).seconds > self.neuron_timeout:
+                    neuron.is_active = False
+                    inactive_neurons.append(neuron_id)
         
         # 移除不活躍的神經元
         for neuron_id in inactive_neurons:
             logger.info(f"🔴 神經元離線: {neuron_id}")
-            del self.discovered_neurons[neuron_id]
+            self.service_cache.pop(self.discovered_neurons.pop(neuron_id).port, None)
     
     async def evaluate_neuron(self, neuron: MCPNeuron):
         """評估新神經元的能力和特性"""
         try:
             # 測試響應時間
             start_time = time.time()
-            response = requests.get(f"http://{neuron.host}:{neuron.port}/api/health", timeout=5)
-            neuron.response_time = time.time() - start_time
-            
-            if response.status_code == 200:
-                neuron.success_rate = 1.0
-                
-                # 嘗試獲取更詳細的能力信息
-                try:
-                    data = response.json()
-                    if 'capabilities' in data:
-                        neuron.capabilities.extend(data['capabilities'])
-                    neuron.capabilities = list(set(neuron.capabilities))  # 去重
-                except:
-                    pass
-                
-                # 註冊新神經元
-                self.discovered_neurons[neuron.id] = neuron
-                logger.info(f"✅ 神經元註冊成功: {neuron.id}")
-                
-            else:
-                logger.warning(f"⚠️ 神經元響應異常: {neuron.id} (狀態碼: {response.status_code})")
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+                async with session.get(f"http://{neuron.host}:{neuron.port}/api/health") as response:
+                    neuron.response_time = time.time() - start_time
+                    
+                    if response.status == 200:
+                        neuron.success_rate = 1.0
+                        
+                        # 嘗試獲取更詳細的能力信息
+                        try:
+                            data = await response.json(content_type=None)
+                            if 'capabilities' in data:
+                                neuron.capabilities.extend(data['capabilities'])
+                            neuron.capabilities = list(set(neuron.capabilities))  # 去重
+                        except:
+                            pass
+                        
+                        # 註冊新神經元
+                        self.discovered_neurons[neuron.id] = neuron
+                        logger.info(f"✅ 神經元註冊成功: {neuron.id}")
+                        
+                    else:
+                        logger.warning(f"⚠️ 神經元響應異常: {neuron.id} (狀態碼: {response.status})")
                 
         except Exception as e:
             logger.error(f"❌ 評估神經元 {neuron.id} 失敗: {e}")
@@ -300,6 +381,8 @@ class NeuralDiscoveryEngine:
             'active_neurons': len(active_neurons),
             'discovery_patterns': len(self.discovery_patterns),
             'scan_interval': self.scan_interval,
+            'scan_stats': dict(self.scan_stats),
+            'cached_services': len(self.service_cache),
             'capabilities': list(set(cap for neuron in active_neurons.values() for cap in neuron.capabilities)),
             'last_discovery': max([neuron.last_seen for neuron in active_neurons.values()]) if active_neurons else None
         }
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+自進化學習器進化循環基準
+
+對不同的行為歷史規模，先填滿 behavior_history，再在每輪記錄一批新行為後執行進化循環，
+對比舊實現（每輪重新掃描整個歷史提取模式）與增量計數器的單輪耗時，並校驗兩者提取結果一致。
+
+用法:
+    python self_evolution_benchmark.py --sizes 1000 10000 100000 --batch 100
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from statistics import fmean
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from self_evolution_learner import SelfEvolutionLearner
+
+WORKFLOWS = ["smartui_development", "requirement_analysis", "code_review", "deployment"]
+COMPONENTS = ["product_orchestrator", "smartui_mcp", "kilocode_mcp", "test_manager", "release_manager"]
+
+
+def random_behavior(rng: random.Random) -> Dict[str, Any]:
+    """生成一條模擬行為"""
+    kind = rng.random()
+    if kind < 0.4:
+        return {'action': 'workflow_step', 'workflow': rng.choice(WORKFLOWS[:2] if rng.random() < 0.8 else WORKFLOWS),
+                'component': rng.choice(COMPONENTS), 'response_time': rng.expovariate(1.0),
+                'success': rng.random() < 0.9}
+    if kind < 0.8:
+        source, target = rng.sample(COMPONENTS, 2)
+        return {'action': 'mcp_call', 'source': source, 'target': target,
+                'response_time': rng.expovariate(0.5), 'success': rng.random() < 0.8}
+    return {'action': 'ui_event', 'component': rng.choice(COMPONENTS)}
+
+
+def legacy_extract(history) -> Dict[str, Any]:
+    """舊實現：每輪重新掃描整個歷史"""
+    recent = list(history)[-50:]
+    workflow_sequences = defaultdict(int)
+    for i in range(len(recent) - 2):
+        sequence = [recent[i + j]['data']['workflow'] for j in range(3) if 'workflow' in recent[i + j]['data']]
+        if len(sequence) == 3:
+            workflow_sequences[' -> '.join(sequence)] += 1
+
+    connection_pairs = defaultdict(int)
+    hourly_usage = defaultdict(int)
+    component_usage = defaultdict(int)
+    response_times = []
+    success_rates = defaultdict(list)
+    for behavior in history:
+        data = behavior['data']
+        if 'source' in data and 'target' in data:
+            connection_pairs[f"{data['source']} -> {data['target']}"] += 1
+        hourly_usage[behavior['timestamp'].hour] += 1
+        if 'component' in data:
+            component_usage[data['component']] += 1
+        if 'response_time' in data:
+            response_times.append(data['response_time'])
+        if 'component' in data and 'success' in data:
+            success_rates[data['component']].append(data['success'])
+
+    return {
+        'workflow_sequences': dict(workflow_sequences),
+        'connection_pairs': dict(connection_pairs),
+        'component_usage': dict(component_usage),
+        'avg_time': fmean(response_times) if response_times else None,
+        'success_rates': {c: sum(s) / len(s) for c, s in success_rates.items()}
+    }
+
+
+def incremental_extract(learner: SelfEvolutionLearner) -> Dict[str, Any]:
+    """從增量計數器讀出與 legacy_extract 相同的字段"""
+    count = len(learner._response_times)
+    return {
+        'workflow_sequences': dict(learner.workflow_sequences),
+        'connection_pairs': dict(learner.connection_pairs),
+        'component_usage': dict(learner.component_usage),
+        'avg_time': learner._response_time_sum / count if count else None,
+        'success_rates': {c: s / t for c, (s, t) in learner.component_success.items()}
+    }
+
+
+def check_consistent(learner: SelfEvolutionLearner):
+    expected = legacy_extract(learner.behavior_history)
+    actual = incremental_extract(learner)
+    for key in ('workflow_sequences', 'connection_pairs', 'component_usage'):
+        if expected[key] != actual[key]:
+            raise AssertionError(f"{key} 不一致")
+    if abs(expected['avg_time'] - actual['avg_time']) > 1e-6:
+        raise AssertionError("avg_time 不一致")
+    for component, rate in expected['success_rates'].items():
+        if abs(rate - actual['success_rates'][component]) > 1e-9:
+            raise AssertionError("success_rates 不一致")
+
+
+def run_size(history_size: int, batch: int, cycles: int) -> Dict[str, Any]:
+    """填滿歷史後，每輪記錄 batch 條新行為再執行一次進化循環"""
+    rng = random.Random(history_size)
+    learner = SelfEvolutionLearner(history_size=history_size)
+    for _ in range(history_size):
+        learner.record_behavior(random_behavior(rng))
+    check_consistent(learner)
+
+    record_seconds = 0.0
+    cycle_seconds = 0.0
+    legacy_seconds = 0.0
+    for _ in range(cycles):
+        start = time.perf_counter()
+        for _ in range(batch):
+            learner.record_behavior(random_behavior(rng))
+        record_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        asyncio.run(learner.evolution_cycle())
+        cycle_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_extract(learner.behavior_history)
+        legacy_seconds += time.perf_counter() - start
+    check_consistent(learner)
+
+    return {
+        "history_size": history_size,
+        "record_us": record_seconds / (cycles * batch) * 1e6,
+        "cycle_ms": cycle_seconds / cycles * 1000,
+        "legacy_extract_ms": legacy_seconds / cycles * 1000
+    }
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化基準結果"""
+    lines = [f"{'history':>9} {'record us':>10} {'cycle ms':>10} {'legacy extract ms':>18}"]
+    for row in rows:
+        lines.append(f"{row['history_size']:>9} {row['record_us']:>10.2f} "
+                     f"{row['cycle_ms']:>10.3f} {row['legacy_extract_ms']:>18.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自進化學習器進化循環基準")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="behavior_history 容量")
+    parser.add_argument("--batch", type=int, default=100, help="每輪新增行為數")
+    parser.add_argument("--cycles", type=int, default=20, help="進化循環次數")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report([run_size(size, args.batch, args.cycles) for size in args.sizes]))
+
+
+if __name__ == "__main__":
+    main()
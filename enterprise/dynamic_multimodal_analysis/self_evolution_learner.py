@@ -9,11 +9,14 @@ Self-Evolution Learner for MCP Neural Network
 import asyncio
 import json
 import time
+import bisect
+import math
 import numpy as np
+from itertools import islice
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import deque, Counter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -50,12 +53,31 @@ class SelfEvolutionLearner:
     2. 識別和強化成功模式
     3. 自動適應新的需求
     4. 優化整體系統性能
+    
+    模式提取所需的計數（工作流3步序列、連接對、每小時分佈、組件使用、
+    響應時間分位數、組件成功率）在 record_behavior 中隨滑動窗口增量維護，
+    進化循環只讀取計數器，不再重新掃描 behavior_history。
     """
     
-    def __init__(self):
+    # 工作流序列只統計最近若干條行為
+    WORKFLOW_WINDOW = 50
+    
+    def __init__(self, history_size: int = 1000):
         self.learned_patterns: Dict[str, LearningPattern] = {}
         self.evolution_events: List[EvolutionEvent] = []
-        self.behavior_history: deque = deque(maxlen=1000)
+        self.behavior_history: deque = deque(maxlen=history_size)
+        
+        # 滑動窗口計數器
+        self._recent_workflows: deque = deque()       # 最近 WORKFLOW_WINDOW 條行為的 workflow（無則為None）
+        self._workflow_ngram_keys: deque = deque()    # 以每個位置開頭的3步序列鍵（不完整為None）
+        self.workflow_sequences: Counter = Counter()
+        self.connection_pairs: Counter = Counter()
+        self.hourly_usage: Counter = Counter()
+        self.component_usage: Counter = Counter()
+        self._response_times: deque = deque()         # 按時間順序
+        self._sorted_response_times: List[float] = [] # 有序，用於分位數
+        self._response_time_sum = 0.0
+        self.component_success: Dict[str, List[int]] = {}  # component -> [成功次數, 總次數]
         
         # 學習參數
         self.learning_threshold = 0.7
@@ -132,7 +154,10 @@ class SelfEvolutionLearner:
             'data': behavior_data
         }
         
+        if len(self.behavior_history) == self.behavior_history.maxlen:
+            self._remove_from_counters(self.behavior_history[0])
         self.behavior_history.append(behavior_entry)
+        self._add_to_counters(behavior_entry)
         logger.debug(f"📝 記錄行為: {behavior_data.get('action', 'unknown')}")
     
     async def analyze_behavior_patterns(self):
@@ -156,28 +181,81 @@ class SelfEvolutionLearner:
         
         logger.info(f"📊 發現模式: 工作流={len(workflow_patterns)}, 連接={len(connection_patterns)}, 使用={len(usage_patterns)}, 性能={len(performance_patterns)}")
     
+    def _add_to_counters(self, behavior: Dict[str, Any]):
+        """新行為進入窗口時更新計數器"""
+        data = behavior['data']
+        
+        self._recent_workflows.append(data.get('workflow') if 'workflow' in data else None)
+        if len(self._recent_workflows) >= 3:
+            sequence = list(islice(reversed(self._recent_workflows), 3))[::-1]
+            sequence_key = ' -> '.join(sequence) if None not in sequence else None
+            self._workflow_ngram_keys.append(sequence_key)
+            if sequence_key is not None:
+                self.workflow_sequences[sequence_key] += 1
+        if len(self._recent_workflows) > self.WORKFLOW_WINDOW:
+            self._recent_workflows.popleft()
+            expired_key = self._workflow_ngram_keys.popleft()
+            if expired_key is not None:
+                self._decrement(self.workflow_sequences, expired_key)
+        
+        if 'source' in data and 'target' in data:
+            self.connection_pairs[f"{data['source']} -> {data['target']}"] += 1
+        
+        self.hourly_usage[behavior['timestamp'].hour] += 1
+        if 'component' in data:
+            self.component_usage[data['component']] += 1
+        
+        if 'response_time' in data:
+            response_time = data['response_time']
+            self._response_times.append(response_time)
+            bisect.insort(self._sorted_response_times, response_time)
+            self._response_time_sum += response_time
+        
+        if 'component' in data and 'success' in data:
+            counts = self.component_success.setdefault(data['component'], [0, 0])
+            counts[0] += data['success']
+            counts[1] += 1
+    
+    def _remove_from_counters(self, behavior: Dict[str, Any]):
+        """最舊的行為移出 behavior_history 時回退計數器（工作流窗口單獨滑動）"""
+        data = behavior['data']
+        
+        if 'source' in data and 'target' in data:
+            self._decrement(self.connection_pairs, f"{data['source']} -> {data['target']}")
+        
+        self._decrement(self.hourly_usage, behavior['timestamp'].hour)
+        if 'component' in data:
+            self._decrement(self.component_usage, data['component'])
+        
+        if 'response_time' in data:
+            response_time = self._response_times.popleft()
+            del self._sorted_response_times[bisect.bisect_left(self._sorted_response_times, response_time)]
+            self._response_time_sum -= response_time
+        
+        if 'component' in data and 'success' in data:
+            counts = self.component_success[data['component']]
+            counts[0] -= data['success']
+            counts[1] -= 1
+            if counts[1] == 0:
+                del self.component_success[data['component']]
+    
+    @staticmethod
+    def _decrement(counter: Counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+    
+    def get_response_time_percentile(self, percentile: float) -> Optional[float]:
+        """窗口內響應時間的分位數（最近秩法）"""
+        if not self._sorted_response_times:
+            return None
+        rank = max(0, math.ceil(percentile / 100.0 * len(self._sorted_response_times)) - 1)
+        return self._sorted_response_times[rank]
+    
     def extract_workflow_patterns(self) -> List[Dict]:
-        """提取工作流模式"""
-        workflow_sequences = defaultdict(int)
-        
-        # 分析最近的行為序列
-        recent_behaviors = list(self.behavior_history)[-50:]
-        
-        for i in range(len(recent_behaviors) - 2):
-            sequence = []
-            for j in range(3):  # 3步序列
-                if i + j < len(recent_behaviors):
-                    behavior = recent_behaviors[i + j]['data']
-                    if 'workflow' in behavior:
-                        sequence.append(behavior['workflow'])
-            
-            if len(sequence) == 3:
-                sequence_key = ' -> '.join(sequence)
-                workflow_sequences[sequence_key] += 1
-        
-        # 識別頻繁模式
+        """提取工作流模式（最近 WORKFLOW_WINDOW 條行為中的3步序列）"""
         patterns = []
-        for sequence, count in workflow_sequences.items():
+        for sequence, count in self.workflow_sequences.items():
             if count >= self.min_pattern_occurrences:
                 patterns.append({
                     'sequence': sequence,
@@ -189,16 +267,8 @@ class SelfEvolutionLearner:
     
     def extract_connection_patterns(self) -> List[Dict]:
         """提取連接模式"""
-        connection_pairs = defaultdict(int)
-        
-        for behavior in self.behavior_history:
-            data = behavior['data']
-            if 'source' in data and 'target' in data:
-                pair = f"{data['source']} -> {data['target']}"
-                connection_pairs[pair] += 1
-        
         patterns = []
-        for pair, count in connection_pairs.items():
+        for pair, count in self.connection_pairs.items():
             if count >= self.min_pattern_occurrences:
                 patterns.append({
                     'connection': pair,
@@ -210,22 +280,10 @@ class SelfEvolutionLearner:
     
     def extract_usage_patterns(self) -> List[Dict]:
         """提取使用模式"""
-        hourly_usage = defaultdict(int)
-        component_usage = defaultdict(int)
-        
-        for behavior in self.behavior_history:
-            timestamp = behavior['timestamp']
-            hour = timestamp.hour
-            hourly_usage[hour] += 1
-            
-            data = behavior['data']
-            if 'component' in data:
-                component_usage[data['component']] += 1
-        
         patterns = []
         
         # 時間模式
-        peak_hours = sorted(hourly_usage.items(), key=lambda x: x[1], reverse=True)[:3]
+        peak_hours = self.hourly_usage.most_common(3)
         if peak_hours:
             patterns.append({
                 'type': 'time_pattern',
@@ -234,7 +292,7 @@ class SelfEvolutionLearner:
             })
         
         # 組件使用模式
-        popular_components = sorted(component_usage.items(), key=lambda x: x[1], reverse=True)[:5]
+        popular_components = self.component_usage.most_common(5)
         if popular_components:
             patterns.append({
                 'type': 'component_usage',
@@ -246,39 +304,30 @@ class SelfEvolutionLearner:
     
     def extract_performance_patterns(self) -> List[Dict]:
         """提取性能模式"""
-        response_times = []
-        success_rates = defaultdict(list)
-        
-        for behavior in self.behavior_history:
-            data = behavior['data']
-            
-            if 'response_time' in data:
-                response_times.append(data['response_time'])
-            
-            if 'component' in data and 'success' in data:
-                success_rates[data['component']].append(data['success'])
-        
         patterns = []
         
         # 響應時間模式
-        if response_times:
-            avg_response_time = np.mean(response_times)
+        sample_count = len(self._response_times)
+        if sample_count:
+            avg_response_time = self._response_time_sum / sample_count
+            recent_avg = sum(islice(reversed(self._response_times), 10)) / min(10, sample_count)
             patterns.append({
                 'type': 'response_time',
                 'avg_time': avg_response_time,
-                'trend': 'improving' if len(response_times) > 10 and np.mean(response_times[-10:]) < avg_response_time else 'stable',
+                'p50_time': self.get_response_time_percentile(50),
+                'p95_time': self.get_response_time_percentile(95),
+                'trend': 'improving' if sample_count > 10 and recent_avg < avg_response_time else 'stable',
                 'confidence': 0.6
             })
         
         # 成功率模式
-        for component, successes in success_rates.items():
-            if len(successes) >= 5:
-                success_rate = sum(successes) / len(successes)
+        for component, (successes, total) in self.component_success.items():
+            if total >= 5:
                 patterns.append({
                     'type': 'success_rate',
                     'component': component,
-                    'rate': success_rate,
-                    'confidence': min(1.0, len(successes) / 20.0)
+                    'rate': successes / total,
+                    'confidence': min(1.0, total / 20.0)
                 })
         
         return patterns
@@ -325,7 +374,7 @@ class SelfEvolutionLearner:
         candidates = []
         
         # 基於最近行為生成候選模式
-        recent_behaviors = list(self.behavior_history)[-20:]
+        recent_behaviors = list(islice(reversed(self.behavior_history), 20))[::-1]
         
         # 工作流序列候選
         for i in range(len(recent_behaviors) - 1):
@@ -412,8 +461,9 @@ class SelfEvolutionLearner:
         if len(self.behavior_history) < 20:
             return 'stable'
         
-        recent_behaviors = list(self.behavior_history)[-20:]
-        older_behaviors = list(self.behavior_history)[-40:-20] if len(self.behavior_history) >= 40 else []
+        last_behaviors = list(islice(reversed(self.behavior_history), 40))[::-1]
+        recent_behaviors = last_behaviors[-20:]
+        older_behaviors = last_behaviors[:-20] if len(last_behaviors) >= 40 else []
         
         if not older_behaviors:
             return 'stable'
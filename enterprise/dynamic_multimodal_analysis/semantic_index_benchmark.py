@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+語義相似度索引查詢基準
+
+構造按主題聚類的文本庫（每個主題一組核心詞，文本替換其中部分詞並混入常用詞），
+對不同的文本數量對比：
+- 舊實現：對每段文本調用 _semantic_similarity（每次比較重新分詞）取最相似的 top_k
+- SemanticSimilarityIndex：MinHash/LSH 篩選候選後精確重排
+報告單次查詢耗時，以及相對精確結果的 recall@k（分數並列時按分數判斷命中）。
+
+用法:
+    python semantic_index_benchmark.py --sizes 10000 100000 1000000 --queries 50
+"""
+
+import argparse
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from intelligent_semantic_engine import SemanticSimilarityIndex, _jaccard, _token_set
+
+COMMON_WORDS = ["流程", "處理", "時間", "人力", "比率", "系統", "需求", "分析"]
+
+
+class TopicCorpus:
+    """主題聚類文本生成器"""
+
+    def __init__(self, vocab_size: int = 50000, seed: int = 7):
+        self.rng = random.Random(seed)
+        self.vocab = [f"詞{i}" for i in range(vocab_size)]
+        self.topics: List[List[str]] = []
+
+    def new_topic(self) -> List[str]:
+        topic = self.rng.sample(self.vocab, 12)
+        self.topics.append(topic)
+        return topic
+
+    def variant(self, topic: List[str]) -> str:
+        """保留大部分核心詞，替換約三成，再混入常用詞"""
+        words = [word if self.rng.random() < 0.7 else self.rng.choice(self.vocab) for word in topic]
+        words += self.rng.sample(COMMON_WORDS, self.rng.randint(1, 3))
+        self.rng.shuffle(words)
+        return " ".join(words)
+
+    def texts(self, count: int, per_topic: int = 20) -> List[str]:
+        texts = []
+        while len(texts) < count:
+            topic = self.new_topic()
+            texts.extend(self.variant(topic) for _ in range(min(per_topic, count - len(texts))))
+        return texts
+
+    def queries(self, count: int) -> List[str]:
+        return [self.variant(self.rng.choice(self.topics)) for _ in range(count)]
+
+
+def legacy_similarity(text1: str, text2: str) -> float:
+    """舊版 _semantic_similarity：每次比較重新分詞"""
+    words1 = set(text1.lower().split())
+    words2 = set(text2.lower().split())
+    if not words1 or not words2:
+        return 0.0
+    return len(words1.intersection(words2)) / len(words1.union(words2))
+
+
+def legacy_top_k(query: str, texts: List[str], top_k: int) -> List[Tuple[str, float]]:
+    """舊實現：逐段文本計算相似度後排序"""
+    scored = [(legacy_similarity(query, text), text) for text in texts]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [(text, score) for score, text in scored[:top_k] if score > 0]
+
+
+def exact_top_k(index: SemanticSimilarityIndex, query: str, top_k: int) -> List[float]:
+    """用索引緩存的詞彙集合精確計算 top_k 分數，作為 recall 基準"""
+    tokens = _token_set(query)
+    scores = sorted((_jaccard(tokens, token_set) for token_set in index.token_sets), reverse=True)
+    return [score for score in scores[:top_k] if score > 0]
+
+
+def recall(expected: List[float], found: List[Tuple[str, float]]) -> float:
+    """命中數 / 期望數；分數不低於第 k 個精確分數的結果都算命中"""
+    if not expected:
+        return 1.0
+    cutoff = expected[-1]
+    return min(len(expected), sum(1 for _, score in found if score >= cutoff)) / len(expected)
+
+
+def run_size(size: int, query_count: int, legacy_queries: int, top_k: int) -> Dict[str, Any]:
+    corpus = TopicCorpus()
+    texts = corpus.texts(size)
+    queries = corpus.queries(query_count)
+
+    start = time.perf_counter()
+    index = SemanticSimilarityIndex()
+    index.add_many(texts)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [index.query(query, top_k) for query in queries]
+    index_ms = (time.perf_counter() - start) * 1000 / query_count
+
+    start = time.perf_counter()
+    legacy_results = [legacy_top_k(query, texts, top_k) for query in queries[:legacy_queries]]
+    legacy_ms = (time.perf_counter() - start) * 1000 / legacy_queries
+
+    recalls, top1 = [], []
+    for query, found in zip(queries, results):
+        expected = exact_top_k(index, query, top_k)
+        recalls.append(recall(expected, found))
+        top1.append(recall(expected[:1], found[:1]))
+    for query, legacy in zip(queries, legacy_results):
+        if [score for _, score in legacy] != exact_top_k(index, query, top_k):
+            raise AssertionError("舊實現與精確分數不一致")
+
+    return {"size": size, "build_s": build_s, "legacy_ms": legacy_ms, "index_ms": index_ms,
+            "recall": sum(recalls) / len(recalls), "top1": sum(top1) / len(top1),
+            "candidates": index.stats["candidates"] / max(1, index.stats["queries"])}
+
+
+def format_report(rows: List[Dict[str, Any]], top_k: int) -> str:
+    lines = [f"{'texts':>9} {'build s':>8} {'legacy ms':>10} {'index ms':>9} {'candidates':>11} "
+             f"{f'recall@{top_k}':>10} {'recall@1':>9}"]
+    for row in rows:
+        lines.append(f"{row['size']:>9,} {row['build_s']:>8.1f} {row['legacy_ms']:>10.1f} {row['index_ms']:>9.3f} "
+                     f"{row['candidates']:>11.0f} {row['recall']:>10.3f} {row['top1']:>9.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="語義相似度索引查詢基準")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000], help="文本數量")
+    parser.add_argument("--queries", type=int, default=50, help="每種規模的查詢數")
+    parser.add_argument("--legacy-queries", type=int, default=3, help="舊實現計時的查詢數")
+    parser.add_argument("--top-k", type=int, default=10, help="返回結果數")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    rows = [run_size(size, args.queries, args.legacy_queries, args.top_k) for size in args.sizes]
+    print(format_report(rows, args.top_k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+增量引擎測試 - 校驗深層路徑的變更報告、列表插入/刪除對齊，以及派生版本的校驗和與完整構建一致
+"""
+
+import asyncio
+import copy
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from incremental_engine import IncrementalEngine, ChangeType
+
+
+def make_content():
+    return {
+        "modules": {
+            "login": {
+                "owner": "alice",
+                "steps": [{"name": f"step{i}", "priority": i} for i in range(5)]
+            },
+            "report": {"owner": "bob", "pages": 3}
+        },
+        "items": [{"id": i, "title": f"條目{i}"} for i in range(10)],
+        "summary": "依賴 modules 的說明"
+    }
+
+
+def analyze(engine: IncrementalEngine, old_id: str, new_id: str):
+    return asyncio.run(engine.analyze_incremental_changes(old_id, new_id)).changes
+
+
+def test_deep_path_reporting():
+    """測試深層修改與新增只報告精確路徑，未變化的子樹整棵跳過"""
+    engine = IncrementalEngine()
+    content = make_content()
+    base = engine.create_version(content)
+
+    updated = copy.deepcopy(content)
+    updated["modules"]["login"]["steps"][1]["priority"] = 9
+    updated["modules"]["report"]["reviewer"] = "carol"
+    changes = analyze(engine, base, engine.create_version(updated))
+
+    reported = {change.component: change for change in changes}
+    assert set(reported) == {"modules.login.steps[1].priority", "modules.report.reviewer"}, reported.keys()
+    priority = reported["modules.login.steps[1].priority"]
+    assert priority.change_type == ChangeType.MODIFICATION
+    assert (priority.old_value, priority.new_value) == (1, 9)
+    reviewer = reported["modules.report.reviewer"]
+    assert reviewer.change_type == ChangeType.ADDITION
+    assert (reviewer.old_value, reviewer.new_value) == (None, "carol")
+    # 依賴檢測以頂層組件為單位
+    assert priority.affected_components == ["summary"]
+    assert engine.diff_stats["skipped_subtrees"] > 0
+
+    assert analyze(engine, base, engine.create_version(copy.deepcopy(content))) == []
+    print("✅ 深層路徑報告測試通過")
+
+
+def test_list_insert_delete_alignment():
+    """測試列表中間插入或刪除元素時只報告該元素，後續元素不被誤報為修改"""
+    engine = IncrementalEngine()
+    content = make_content()
+    base = engine.create_version(content)
+
+    inserted = copy.deepcopy(content)
+    inserted["items"].insert(3, {"id": 100, "title": "新條目"})
+    changes = analyze(engine, base, engine.create_version(inserted))
+    assert [(c.change_type, c.component) for c in changes] == [(ChangeType.ADDITION, "items[3]")]
+    assert changes[0].new_value == {"id": 100, "title": "新條目"}
+
+    deleted = copy.deepcopy(content)
+    del deleted["items"][5]
+    changes = analyze(engine, base, engine.create_version(deleted))
+    assert [(c.change_type, c.component) for c in changes] == [(ChangeType.DELETION, "items[5]")]
+    assert changes[0].old_value == {"id": 5, "title": "條目5"}
+
+    # 刪除與修改同時發生：修改按新列表中的位置報告
+    mixed = copy.deepcopy(content)
+    del mixed["items"][2]
+    mixed["items"][6]["title"] = "改名"
+    changes = analyze(engine, base, engine.create_version(mixed))
+    assert sorted((c.change_type.value, c.component) for c in changes) == [
+        ("deletion", "items[2]"), ("modification", "items[6].title")
+    ], changes
+    print("✅ 列表插入/刪除對齊測試通過")
+
+
+def test_derive_version_checksum():
+    """測試派生版本的內容與校驗和與完整創建的版本一致，且不修改源版本"""
+    engine = IncrementalEngine()
+    content = make_content()
+    content["config"] = {"a.b": 1}
+    base = engine.create_version(content)
+
+    derived = engine.derive_version(base, {
+        "modules.login.steps[1].priority": 9,
+        "modules.report": IncrementalEngine.DELETED,
+        "modules.audit.owner": "dave",
+        "items[10]": {"id": 10, "title": "追加"},
+        "items[0]": IncrementalEngine.DELETED,
+        ("config", "a.b"): 2
+    })
+
+    expected = copy.deepcopy(content)
+    expected["modules"]["login"]["steps"][1]["priority"] = 9
+    del expected["modules"]["report"]
+    expected["modules"]["audit"] = {"owner": "dave"}
+    expected["items"].append({"id": 10, "title": "追加"})
+    del expected["items"][0]
+    expected["config"]["a.b"] = 2
+
+    assert engine.versions[derived].content == expected
+    assert engine.versions[derived].checksum == engine.versions[engine.create_version(expected)].checksum
+    assert engine.versions[base].content == content
+    assert engine.versions[base].checksum == engine.versions[engine.create_version(content)].checksum
+
+    # modules 的鍵變化過半記為結構重組；追加的條目按新列表中的位置報告
+    changes = analyze(engine, base, derived)
+    assert {(c.change_type, c.component) for c in changes} == {
+        (ChangeType.RESTRUCTURE, "modules"), (ChangeType.DELETION, "items[0]"),
+        (ChangeType.ADDITION, "items[9]"), (ChangeType.MODIFICATION, "config.a.b")
+    }, [c.component for c in changes]
+
+    for path in ["", "items[20]", "summary.text"]:
+        try:
+            engine.derive_version(base, {path: 1})
+        except ValueError:
+            continue
+        raise AssertionError(f"無效路徑未報錯: {path}")
+    print("✅ 派生版本校驗和測試通過")
+
+
+if __name__ == "__main__":
+    logging.disable(logging.INFO)
+    test_deep_path_reporting()
+    test_list_insert_delete_alignment()
+    test_derive_version_checksum()
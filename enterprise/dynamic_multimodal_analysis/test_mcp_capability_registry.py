@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+MCP 能力註冊中心意圖匹配測試 - 校驗關鍵詞自動機的分數與逐詞子串判斷一致
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mcp_capability_registry import MCPCapabilityRegistry, WorkflowMCPConfig, KeywordAutomaton
+from capability_registry_benchmark import legacy_scores, legacy_find, make_vocabulary, make_workflows, make_inputs
+
+
+def make_workflow(name: str, keywords) -> WorkflowMCPConfig:
+    return WorkflowMCPConfig(name=name, port=9000, capabilities=[], adapters=[],
+                             description=name, intent_keywords=list(keywords))
+
+
+def assert_same_as_legacy(registry: MCPCapabilityRegistry, text: str):
+    expected = {name: score for name, score in legacy_scores(registry, text).items() if score}
+    assert registry.score_workflows_by_intent(text) == expected, text
+    assert registry.find_workflow_by_intent(text) is legacy_find(registry, text), text
+
+
+def test_overlapping_keywords():
+    """測試互相包含、重疊的關鍵詞，重複關鍵詞，大小寫與空關鍵詞"""
+    automaton = KeywordAutomaton()
+    for keyword in ["需求", "需求分析", "求分", "分析", "析", "she", "he", "hers"]:
+        automaton.add(keyword)
+    assert automaton.find_all("做需求分析") == {"需求", "需求分析", "求分", "分析", "析"}
+    assert automaton.find_all("ushers") == {"she", "he", "hers"}
+    assert automaton.find_all("無關") == set()
+
+    registry = MCPCapabilityRegistry()
+    registry.register_workflow_mcp(make_workflow("overlap_mcp", ["需求分析", "求分", "需求", "需求"]))
+    registry.register_workflow_mcp(make_workflow("case_mcp", ["API", "api", "Api接口"]))
+    registry.register_workflow_mcp(make_workflow("empty_mcp", [""]))
+    for text in ["需要做需求分析", "需求", "設計 API 接口", "api接口", "部署到生產環境", "", "我想開發貪吃蛇遊戲"]:
+        assert_same_as_legacy(registry, text)
+    print("✅ 重疊關鍵詞測試通過")
+
+
+def test_reregistration_and_ties():
+    """測試同名工作流重新註冊時替換關鍵詞，並保持同分時先註冊優先"""
+    registry = MCPCapabilityRegistry()
+    registry.register_workflow_mcp(make_workflow("first_mcp", ["貪吃蛇"]))
+    registry.register_workflow_mcp(make_workflow("second_mcp", ["遊戲"]))
+    assert_same_as_legacy(registry, "貪吃蛇遊戲")
+    assert registry.find_workflow_by_intent("貪吃蛇遊戲").name == "first_mcp"
+
+    registry.register_workflow_mcp(make_workflow("first_mcp", ["俄羅斯方塊"]))
+    assert "first_mcp" not in registry.score_workflows_by_intent("貪吃蛇遊戲")
+    assert registry.find_workflow_by_intent("貪吃蛇遊戲").name == "second_mcp"
+    registry.register_workflow_mcp(make_workflow("second_mcp", ["方塊"]))
+    assert_same_as_legacy(registry, "俄羅斯方塊遊戲")
+    assert registry.find_workflow_by_intent("俄羅斯方塊遊戲").name == "first_mcp"
+    print("✅ 重新註冊測試通過")
+
+
+def test_random_registry_matches_legacy():
+    """測試隨機生成的上千個工作流與舊實現分數一致"""
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(300, rng)
+    registry = MCPCapabilityRegistry()
+    for config in make_workflows(1500, vocabulary, rng):
+        registry.register_workflow_mcp(config)
+        if rng.random() < 0.01:
+            # 註冊過程中穿插查詢，確認增量插入後重建正確
+            assert_same_as_legacy(registry, make_inputs(1, vocabulary, rng)[0])
+    for text in make_inputs(200, vocabulary, rng):
+        assert_same_as_legacy(registry, text)
+    print("✅ 隨機註冊中心一致性測試通過")
+
+
+if __name__ == "__main__":
+    test_overlapping_keywords()
+    test_reregistration_and_ties()
+    test_random_registry_matches_legacy()
@@ -16,6 +16,12 @@ from enum import Enum
 import logging
 import requests
 
+try:
+    from mcp.common.project_scanner import ProjectScanner, RegexRuleAnalyzer, analyze_file
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    from mcp.common.project_scanner import ProjectScanner, RegexRuleAnalyzer, analyze_file
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -57,6 +63,15 @@ class DevelopmentInterventionMCP:
         # 违规检测规则
         self.violation_rules = self._initialize_violation_rules()
         
+        # 扫描时跳过的目录
+        self.skip_patterns = self.config.get("skip_patterns", [
+            "__pycache__",
+            ".git",
+            "venv",
+            "node_modules",
+            ".pytest_cache"
+        ])
+        
         # 统计信息
         self.intervention_stats = {
             "total_scans": 0,
@@ -96,19 +111,19 @@ class DevelopmentInterventionMCP:
     async def scan_project_compliance(self, project_path: str) -> Dict[str, Any]:
         """扫描项目合规性"""
         try:
-            violations = []
-            scanned_files = 0
+            scanner = ProjectScanner(
+                [RegexRuleAnalyzer(self.violation_rules)],
+                max_workers=self.config.get("scan_workers"),
+                skip_patterns=self.skip_patterns,
+                profile=self.config.get("scan_profile", False)
+            )
+            try:
+                report = await scanner.scan(project_path)
+            finally:
+                scanner.shutdown()
             
-            project_root = Path(project_path)
-            
-            # 扫描Python文件
-            for py_file in project_root.rglob("*.py"):
-                if self._should_skip_file(py_file):
-                    continue
-                
-                file_violations = await self._scan_file_compliance(py_file)
-                violations.extend(file_violations)
-                scanned_files += 1
+            violations = [self._finding_to_violation(f) for f in report.findings(RegexRuleAnalyzer.name)]
+            scanned_files = report.files_scanned
             
             # 更新统计
             self.intervention_stats["total_scans"] += 1
@@ -129,51 +144,27 @@ class DevelopmentInterventionMCP:
                 "error": str(e)
             }
     
-    def _should_skip_file(self, file_path: Path) -> bool:
-        """判断是否跳过文件"""
-        skip_patterns = [
-            "__pycache__",
-            ".git",
-            "venv",
-            "node_modules",
-            ".pytest_cache"
-        ]
-        
-        return any(pattern in str(file_path) for pattern in skip_patterns)
+    def _finding_to_violation(self, finding: Dict[str, Any]) -> ViolationReport:
+        """将扫描引擎的规则命中转换为违规报告"""
+        rule_config = self.violation_rules[finding["rule"]]
+        return ViolationReport(
+            violation_type=ViolationType(finding["rule"]),
+            severity=rule_config["severity"],
+            file_path=finding["file"],
+            line_number=finding["line"],
+            description=rule_config["description"],
+            suggestion=rule_config["suggestion"],
+            auto_fixable=True
+        )
     
     async def _scan_file_compliance(self, file_path: Path) -> List[ViolationReport]:
         """扫描单个文件的合规性"""
-        violations = []
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                lines = content.split('\n')
-            
-            # 应用违规检测规则
-            for rule_name, rule_config in self.violation_rules.items():
-                import re
-                for pattern in rule_config["patterns"]:
-                    matches = re.finditer(pattern, content, re.MULTILINE | re.IGNORECASE)
-                    
-                    for match in matches:
-                        line_number = content[:match.start()].count('\n') + 1
-                        
-                        violation = ViolationReport(
-                            violation_type=ViolationType(rule_name),
-                            severity=rule_config["severity"],
-                            file_path=str(file_path),
-                            line_number=line_number,
-                            description=rule_config["description"],
-                            suggestion=rule_config["suggestion"],
-                            auto_fixable=True
-                        )
-                        violations.append(violation)
-            
-        except Exception as e:
-            logger.error(f"扫描文件失败 {file_path}: {e}")
-        
-        return violations
+        result = await asyncio.to_thread(
+            analyze_file, str(file_path), [RegexRuleAnalyzer(self.violation_rules)]
+        )
+        if result.error:
+            logger.error(f"扫描文件失败 {file_path}: {result.error}")
+        return [self._finding_to_violation(f) for f in result.findings.get(RegexRuleAnalyzer.name, [])]
     
     def _calculate_compliance_score(self, violations: List[ViolationReport], total_files: int) -> float:
         """计算合规分数"""
@@ -8,6 +8,10 @@ import os
 import subprocess
 import json
 import time
+import select
+import struct
+import ctypes
+import ctypes.util
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
@@ -44,10 +48,97 @@ class CheckinEvent:
     commit_message: Optional[str] = None
     branch_name: Optional[str] = None
 
+# inotify事件掩码（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_ISDIR = 0x40000000
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+# 工作区中不需要监听的目录
+WORKTREE_SKIP_DIRS = {'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'env', 'dist', 'build', '.tox'}
+
+class InotifyWatcher:
+    """基于inotify的文件系统事件监听（通过ctypes调用libc，仅Linux可用）"""
+    
+    _EVENT_HEADER = struct.Struct("iIII")
+    
+    def __init__(self, max_watches: int = 4096):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.max_watches = max_watches
+        self.watches: Dict[int, str] = {}
+        self.overflowed = False
+    
+    def add_watch(self, path: str) -> bool:
+        """监听目录；超过上限或失败时返回False"""
+        if len(self.watches) >= self.max_watches:
+            self.overflowed = True
+            return False
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            self.overflowed = True
+            return False
+        self.watches[wd] = path
+        return True
+    
+    def add_tree(self, root: str, skip_dirs=WORKTREE_SKIP_DIRS):
+        """递归监听目录树"""
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in skip_dirs]
+            if not self.add_watch(dirpath):
+                return
+    
+    def read_events(self, timeout: float) -> List[tuple]:
+        """等待事件，返回 [(目录, 文件名, 掩码)]；超时返回空列表"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+                offset += self._EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + name_len].rstrip(b"\0"))
+                offset += name_len
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                events.append((self.watches.get(wd, ""), name, mask))
+        return events
+    
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
 class GitMonitor:
-    """Git监控器 - 实时监控Git状态和checkin活动"""
+    """Git监控器 - 实时监控Git状态和checkin活动
     
-    def __init__(self, repository_path: str = "/home/ubuntu/kilocode_integrated_repo"):
+    每次采样只调用一次 `git status --porcelain=v2 --branch`（通过 -C 指定仓库，不切换进程工作目录），
+    最后一次提交的信息按提交哈希缓存，仅在HEAD变化时额外查询。
+    Linux下通过inotify监听 .git/HEAD、index、refs 与工作区目录，只在有文件事件时采样，
+    空闲仓库不产生任何子进程；inotify不可用时退化为stat轮询Git元数据并定期全量采样。
+    回调只在状态实际变化时触发。
+    """
+    
+    def __init__(self, repository_path: str = "/home/ubuntu/kilocode_integrated_repo",
+                 use_inotify: bool = True):
         self.repository_path = repository_path
         self.monitoring = False
         self.monitor_thread = None
@@ -58,6 +149,16 @@ class GitMonitor:
         # 监控配置
         self.monitor_interval = 5  # 秒
         self.max_events_history = 100
+        self.use_inotify = use_inotify
+        self.debounce_interval = 0.05  # 事件合并窗口(秒)
+        self.worktree_poll_interval = 30  # 轮询模式下全量采样工作区的间隔(秒)
+        
+        # 监控统计
+        self.spawn_count = 0
+        self.status_checks = 0
+        self.watch_mode = None
+        self._commit_cache = None
+        self._stop_event = threading.Event()
         
         logger.info(f"🔍 Git监控器初始化: {repository_path}")
     
@@ -71,6 +172,7 @@ class GitMonitor:
                 return {"success": False, "error": "无效的Git仓库"}
             
             self.monitoring = True
+            self._stop_event.clear()
             self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitor_thread.start()
             
@@ -79,7 +181,8 @@ class GitMonitor:
                 "success": True,
                 "message": "Git监控启动成功",
                 "repository_path": self.repository_path,
-                "monitor_interval": self.monitor_interval
+                "monitor_interval": self.monitor_interval,
+                "use_inotify": self.use_inotify
             }
             
         except Exception as e:
@@ -90,6 +193,7 @@ class GitMonitor:
         """停止Git监控"""
         try:
             self.monitoring = False
+            self._stop_event.set()
             if self.monitor_thread:
                 self.monitor_thread.join(timeout=5)
             
@@ -130,6 +234,15 @@ class GitMonitor:
         """添加状态变更回调函数"""
         self.callbacks.append(callback)
     
+    def get_monitor_stats(self) -> Dict[str, Any]:
+        """获取监控统计：子进程启动次数、采样次数和监听模式"""
+        return {
+            "spawn_count": self.spawn_count,
+            "status_checks": self.status_checks,
+            "watch_mode": self.watch_mode,
+            "events_count": len(self.checkin_events)
+        }
+    
     def _validate_git_repository(self) -> bool:
         """验证Git仓库"""
         try:
@@ -142,113 +255,215 @@ class GitMonitor:
         """监控循环"""
         logger.info("🔄 Git监控循环启动")
         
+        watcher = self._create_watcher() if self.use_inotify else None
+        self.watch_mode = "inotify" if watcher else "polling"
+        try:
+            try:
+                self._check_status()
+            except Exception as e:
+                logger.error(f"监控循环错误: {e}")
+            if watcher:
+                self._watch_loop(watcher)
+            else:
+                self._poll_loop()
+        finally:
+            if watcher:
+                watcher.close()
+        
+        logger.info("⏹️ Git监控循环结束")
+    
+    def _create_watcher(self) -> Optional[InotifyWatcher]:
+        """创建inotify监听：.git目录（HEAD、index、packed-refs）、refs目录树和工作区目录树"""
+        git_dir = os.path.join(self.repository_path, ".git")
+        try:
+            watcher = InotifyWatcher()
+            watcher.add_watch(git_dir)
+            watcher.add_tree(os.path.join(git_dir, "refs"), skip_dirs=set())
+            watcher.add_tree(self.repository_path)
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify不可用，改用轮询: {e}")
+            return None
+        
+        if watcher.overflowed:
+            logger.warning("inotify监听数量达到上限，部分工作区目录改由定期采样覆盖")
+        return watcher
+    
+    def _watch_loop(self, watcher: InotifyWatcher):
+        """事件驱动：只在有文件事件时采样"""
+        last_full_check = time.monotonic()
         while self.monitoring:
             try:
-                current_status = self._get_git_status()
+                events = watcher.read_events(timeout=min(self.monitor_interval, 1.0))
+                relevant = [e for e in events if not e[1].endswith(".lock")]
                 
-                # 检测状态变更
-                if self.last_status:
-                    events = self._detect_changes(self.last_status, current_status)
-                    for event in events:
-                        self._handle_checkin_event(event)
+                # 新建的工作区目录加入监听
+                for directory, name, mask in relevant:
+                    if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and name not in WORKTREE_SKIP_DIRS:
+                        watcher.add_tree(os.path.join(directory, name))
                 
-                self.last_status = current_status
+                # 监听不完整时用定期采样兜底
+                due = watcher.overflowed and time.monotonic() - last_full_check >= self.worktree_poll_interval
+                if not relevant and not due:
+                    continue
                 
-                # 通知回调函数
-                for callback in self.callbacks:
-                    try:
-                        callback(current_status)
-                    except Exception as e:
-                        logger.error(f"回调函数执行失败: {e}")
+                # 合并短时间内的连续事件
+                time.sleep(self.debounce_interval)
+                watcher.read_events(timeout=0)
                 
-                time.sleep(self.monitor_interval)
+                self._check_status()
+                last_full_check = time.monotonic()
                 
             except Exception as e:
                 logger.error(f"监控循环错误: {e}")
-                time.sleep(self.monitor_interval)
+                self._stop_event.wait(self.monitor_interval)
+    
+    def _poll_loop(self):
+        """轮询兜底：stat检查Git元数据，变化或到达工作区采样间隔时才启动git进程"""
+        signature = self._git_metadata_signature()
+        last_full_check = time.monotonic()
+        while self.monitoring and not self._stop_event.wait(self.monitor_interval):
+            try:
+                current_signature = self._git_metadata_signature()
+                due = time.monotonic() - last_full_check >= self.worktree_poll_interval
+                if current_signature == signature and not due:
+                    continue
+                signature = current_signature
+                self._check_status()
+                last_full_check = time.monotonic()
+            except Exception as e:
+                logger.error(f"监控循环错误: {e}")
+    
+    def _git_metadata_signature(self) -> tuple:
+        """HEAD、index、packed-refs 和 refs 目录树的 (路径, mtime, 大小) 快照"""
+        git_dir = os.path.join(self.repository_path, ".git")
+        paths = [os.path.join(git_dir, name) for name in ("HEAD", "index", "packed-refs")]
+        for dirpath, _, filenames in os.walk(os.path.join(git_dir, "refs")):
+            paths.append(dirpath)
+            paths.extend(os.path.join(dirpath, name) for name in filenames)
         
-        logger.info("⏹️ Git监控循环结束")
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((path, None, None))
+        return tuple(signature)
+    
+    def _check_status(self):
+        """采样一次Git状态，只有状态变化时才生成事件并通知回调"""
+        current_status = self._get_git_status()
+        self.status_checks += 1
+        if current_status == self.last_status:
+            return
+        
+        # 检测状态变更
+        if self.last_status:
+            events = self._detect_changes(self.last_status, current_status)
+            for event in events:
+                self._handle_checkin_event(event)
+        
+        self.last_status = current_status
+        
+        # 通知回调函数
+        for callback in self.callbacks:
+            try:
+                callback(current_status)
+            except Exception as e:
+                logger.error(f"回调函数执行失败: {e}")
     
     def _get_git_status(self) -> GitStatus:
-        """获取Git状态"""
-        try:
-            # 切换到仓库目录
-            original_cwd = os.getcwd()
-            os.chdir(self.repository_path)
+        """获取Git状态 - 单次 `git status --porcelain=v2 --branch -z`"""
+        output = self._run_git_command([
+            'status', '--porcelain=v2', '--branch', '-z'
+        ])
+        
+        commit_oid = ""
+        current_branch = ""
+        ahead_commits = 0
+        behind_commits = 0
+        uncommitted_changes = []
+        untracked_files = []
+        staged_files = []
+        
+        entries = output.split('\0')
+        index = 0
+        while index < len(entries):
+            entry = entries[index]
+            index += 1
+            if not entry:
+                continue
+            
+            if entry.startswith('# '):
+                header = entry[2:].split(' ')
+                if header[0] == 'branch.oid' and header[1] != '(initial)':
+                    commit_oid = header[1]
+                elif header[0] == 'branch.head' and header[1] != '(detached)':
+                    current_branch = header[1]
+                elif header[0] == 'branch.ab':
+                    ahead_commits = int(header[1].lstrip('+'))
+                    behind_commits = abs(int(header[2]))
+                continue
             
-            # 获取当前分支
-            current_branch = self._run_git_command(['git', 'branch', '--show-current']).strip()
+            kind = entry[0]
+            if kind == '?':
+                untracked_files.append(entry[2:])
+                continue
+            if kind == '1':
+                fields = entry.split(' ', 8)
+            elif kind == '2':
+                fields = entry.split(' ', 9)
+                index += 1  # -z模式下重命名的原路径是单独的一项
+            elif kind == 'u':
+                fields = entry.split(' ', 10)
+            else:
+                continue
             
-            # 获取最后一次提交信息
+            status_code = fields[1]
+            file_path = fields[-1]
+            if status_code[0] != '.':
+                staged_files.append(file_path)
+            if status_code[1] in ['M', 'D']:
+                uncommitted_changes.append(file_path)
+        
+        commit_hash, commit_message, last_commit_time = self._get_commit_info(commit_oid)
+        is_clean = not (uncommitted_changes or untracked_files or staged_files)
+        
+        return GitStatus(
+            repository_path=self.repository_path,
+            current_branch=current_branch,
+            last_commit_hash=commit_hash,
+            last_commit_message=commit_message,
+            last_commit_time=last_commit_time,
+            uncommitted_changes=uncommitted_changes,
+            untracked_files=untracked_files,
+            staged_files=staged_files,
+            is_clean=is_clean,
+            ahead_commits=ahead_commits,
+            behind_commits=behind_commits
+        )
+    
+    def _get_commit_info(self, commit_oid: str) -> tuple:
+        """获取最后一次提交信息，按提交哈希缓存，HEAD不变时不启动git进程"""
+        if self._commit_cache and self._commit_cache[0] == commit_oid:
+            return self._commit_cache[1]
+        
+        info = ("", "", datetime.now())
+        if commit_oid:
             last_commit_info = self._run_git_command([
-                'git', 'log', '-1', '--format=%H|%s|%ct'
+                'log', '-1', '--format=%H|%s|%ct', commit_oid
             ]).strip()
-            
             if last_commit_info:
                 commit_hash, commit_message, commit_timestamp = last_commit_info.split('|', 2)
-                last_commit_time = datetime.fromtimestamp(int(commit_timestamp))
-            else:
-                commit_hash = ""
-                commit_message = ""
-                last_commit_time = datetime.now()
-            
-            # 获取未提交的更改
-            status_output = self._run_git_command(['git', 'status', '--porcelain'])
-            uncommitted_changes = []
-            untracked_files = []
-            staged_files = []
-            
-            for line in status_output.split('\n'):
-                if line.strip():
-                    status_code = line[:2]
-                    file_path = line[3:]
-                    
-                    if status_code[0] in ['M', 'A', 'D', 'R', 'C']:
-                        staged_files.append(file_path)
-                    if status_code[1] in ['M', 'D']:
-                        uncommitted_changes.append(file_path)
-                    if status_code == '??':
-                        untracked_files.append(file_path)
-            
-            # 检查是否有远程跟踪分支
-            ahead_commits = 0
-            behind_commits = 0
-            
-            try:
-                # 获取ahead/behind信息
-                ahead_behind = self._run_git_command([
-                    'git', 'rev-list', '--left-right', '--count', f'{current_branch}...origin/{current_branch}'
-                ]).strip()
-                
-                if ahead_behind:
-                    ahead_str, behind_str = ahead_behind.split('\t')
-                    ahead_commits = int(ahead_str)
-                    behind_commits = int(behind_str)
-            except:
-                # 如果没有远程分支，忽略错误
-                pass
-            
-            is_clean = not (uncommitted_changes or untracked_files or staged_files)
-            
-            return GitStatus(
-                repository_path=self.repository_path,
-                current_branch=current_branch,
-                last_commit_hash=commit_hash,
-                last_commit_message=commit_message,
-                last_commit_time=last_commit_time,
-                uncommitted_changes=uncommitted_changes,
-                untracked_files=untracked_files,
-                staged_files=staged_files,
-                is_clean=is_clean,
-                ahead_commits=ahead_commits,
-                behind_commits=behind_commits
-            )
-            
-        finally:
-            os.chdir(original_cwd)
+                info = (commit_hash, commit_message, datetime.fromtimestamp(int(commit_timestamp)))
+        
+        self._commit_cache = (commit_oid, info)
+        return info
     
-    def _run_git_command(self, command: List[str]) -> str:
-        """执行Git命令"""
+    def _run_git_command(self, args: List[str]) -> str:
+        """在仓库目录执行Git命令（git -C，不修改进程工作目录；不获取可选锁，避免采样本身改写index）"""
+        command = ['git', '--no-optional-locks', '-C', self.repository_path] + args
+        self.spawn_count += 1
         try:
             result = subprocess.run(
                 command,
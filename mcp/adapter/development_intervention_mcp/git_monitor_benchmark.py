@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+GitMonitor 采样开销基准
+
+在临时Git仓库中分别以 inotify 和轮询模式运行 GitMonitor，测量：
+- 空闲期间启动的git子进程数（旧实现每个周期固定启动4个）
+- 修改文件、暂存、提交三种操作从发生到回调触发的检测延迟及对应的子进程数
+
+用法:
+    python git_monitor_benchmark.py --idle 3 --interval 0.5
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from git_monitor import GitMonitor
+
+
+def git(repo: str, *args: str):
+    subprocess.run(["git", "-C", repo] + list(args), check=True, capture_output=True)
+
+
+def create_repo(root: str) -> str:
+    """创建带一次初始提交的临时仓库"""
+    repo = os.path.join(root, "repo")
+    os.makedirs(os.path.join(repo, "src"))
+    git(repo, "init", "-q")
+    git(repo, "config", "user.email", "bench@example.com")
+    git(repo, "config", "user.name", "bench")
+    Path(repo, "src", "app.py").write_text("print('v0')\n", encoding="utf-8")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "initial")
+    return repo
+
+
+def run_mode(use_inotify: bool, idle_seconds: float, interval: float) -> Dict[str, Any]:
+    """在一个模式下测量空闲开销与各操作的检测延迟"""
+    with tempfile.TemporaryDirectory() as root:
+        repo = create_repo(root)
+        monitor = GitMonitor(repo, use_inotify=use_inotify)
+        monitor.monitor_interval = interval
+        monitor.worktree_poll_interval = interval
+
+        changed = threading.Event()
+        monitor.add_status_callback(lambda status: changed.set())
+        monitor.start_monitoring()
+        changed.wait(5)
+        changed.clear()
+
+        spawns_before = monitor.spawn_count
+        time.sleep(idle_seconds)
+        idle_spawns = monitor.spawn_count - spawns_before
+
+        actions = [
+            ("modify", lambda: Path(repo, "src", "app.py").write_text("print('v1')\n", encoding="utf-8")),
+            ("stage", lambda: git(repo, "add", "src/app.py")),
+            ("commit", lambda: git(repo, "commit", "-q", "-m", "update")),
+        ]
+        latencies = {}
+        for name, action in actions:
+            changed.clear()
+            spawns_before = monitor.spawn_count
+            start = time.perf_counter()
+            action()
+            detected = changed.wait(max(5, interval * 4))
+            latencies[name] = {
+                "latency_ms": (time.perf_counter() - start) * 1000 if detected else None,
+                "spawns": monitor.spawn_count - spawns_before
+            }
+
+        stats = monitor.get_monitor_stats()
+        monitor.stop_monitoring()
+
+    return {
+        "mode": stats["watch_mode"],
+        "idle_seconds": idle_seconds,
+        "idle_spawns": idle_spawns,
+        "legacy_idle_spawns": int(idle_seconds / interval) * 4,
+        "actions": latencies,
+        "events": stats["events_count"]
+    }
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化基准结果"""
+    lines = []
+    for row in rows:
+        lines.append(f"[{row['mode']}] 空闲{row['idle_seconds']}s: 子进程 {row['idle_spawns']} "
+                     f"(旧实现约 {row['legacy_idle_spawns']})，事件 {row['events']}")
+        for name, result in row["actions"].items():
+            latency = f"{result['latency_ms']:.1f}ms" if result["latency_ms"] is not None else "未检测到"
+            lines.append(f"    {name:<8} 延迟 {latency:>10}  子进程 {result['spawns']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitMonitor 采样开销基准")
+    parser.add_argument("--idle", type=float, default=3.0, help="空闲观察时长(秒)")
+    parser.add_argument("--interval", type=float, default=0.5, help="monitor_interval(秒)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rows = [run_mode(use_inotify, args.idle, args.interval) for use_inotify in (True, False)]
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+git_monitor 单元测试
+覆盖单次porcelain v2采样解析、提交信息缓存、仅变化时回调与事件驱动检测
+"""
+
+import unittest
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# 添加模块路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from git_monitor import GitMonitor
+
+
+def git(repo, *args):
+    subprocess.run(["git", "-C", repo] + list(args), check=True, capture_output=True)
+
+
+@unittest.skipUnless(shutil.which("git"), "需要git命令")
+class TestGitMonitor(unittest.TestCase):
+    """GitMonitor 测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = self.tmp.name
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "config", "user.email", "test@example.com")
+        git(self.repo, "config", "user.name", "test")
+        self._write("a.py", "a = 1\n")
+        self._write("b file.py", "b = 1\n")
+        self._write("old.py", "old = 1\n")
+        git(self.repo, "add", "-A")
+        git(self.repo, "commit", "-q", "-m", "initial commit")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, content):
+        Path(self.repo, name).write_text(content, encoding="utf-8")
+
+    def test_single_status_call_parses_all_fields(self):
+        """TC001: 一次status调用解析分支、暂存、修改、未跟踪与重命名，不切换工作目录"""
+        self._write("a.py", "a = 2\n")
+        self._write("b file.py", "b = 2\n")
+        git(self.repo, "add", "b file.py")
+        git(self.repo, "mv", "old.py", "new.py")
+        self._write("untracked.py", "")
+
+        monitor = GitMonitor(self.repo)
+        cwd = os.getcwd()
+        status = monitor._get_git_status()
+
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(monitor.spawn_count, 2)  # status + 首次读取提交信息
+        self.assertEqual(status.current_branch, "main")
+        self.assertEqual(status.last_commit_message, "initial commit")
+        self.assertEqual(status.uncommitted_changes, ["a.py"])
+        self.assertEqual(sorted(status.staged_files), ["b file.py", "new.py"])
+        self.assertEqual(status.untracked_files, ["untracked.py"])
+        self.assertFalse(status.is_clean)
+
+        monitor._get_git_status()
+        self.assertEqual(monitor.spawn_count, 3)  # HEAD未变，提交信息走缓存
+
+    def test_callbacks_only_on_change(self):
+        """TC002: 状态未变化时不重复通知回调"""
+        monitor = GitMonitor(self.repo)
+        calls = []
+        monitor.add_status_callback(calls.append)
+
+        monitor._check_status()
+        monitor._check_status()
+        self.assertEqual(len(calls), 1)
+
+        self._write("a.py", "a = 3\n")
+        monitor._check_status()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(monitor.checkin_events[-1].event_type, "file_modified")
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify仅Linux可用")
+    def test_event_driven_detection_without_idle_spawns(self):
+        """TC003: inotify模式下空闲不启动进程，提交后触发回调"""
+        monitor = GitMonitor(self.repo)
+        monitor.monitor_interval = 0.2
+        changed = threading.Event()
+        monitor.add_status_callback(lambda status: changed.set())
+
+        monitor.start_monitoring()
+        try:
+            self.assertTrue(changed.wait(5))
+            self.assertEqual(monitor.watch_mode, "inotify")
+            changed.clear()
+            spawns = monitor.spawn_count
+            self.assertFalse(changed.wait(0.6))
+            self.assertEqual(monitor.spawn_count, spawns)
+
+            self._write("a.py", "a = 4\n")
+            git(self.repo, "commit", "-q", "-am", "second commit")
+            self.assertTrue(changed.wait(5))
+        finally:
+            monitor.stop_monitoring()
+
+
+if __name__ == '__main__':
+    unittest.main()
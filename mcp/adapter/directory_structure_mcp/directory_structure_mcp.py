@@ -5,12 +5,21 @@
 """
 
 import os
+import sys
 import json
+import asyncio
 import logging
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import shutil
 
+try:
+    from mcp.common.project_scanner import ProjectScanner, ProjectTree
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+    from mcp.common.project_scanner import ProjectScanner, ProjectTree
+
 logger = logging.getLogger(__name__)
 
 class DirectoryStructureMcp:
@@ -62,10 +71,13 @@ class DirectoryStructureMcp:
         issues = []
         missing_dirs = []
         
+        # 一次遍历生成目录快照，只需覆盖到 mcp/adapters/<mcp>/ 这一层
+        scanner = ProjectScanner([])
+        tree = await asyncio.to_thread(scanner.snapshot, path, 3)
+        
         # 检查标准目录是否存在
         for dir_path, description in self.standard_structure.items():
-            full_path = os.path.join(path, dir_path)
-            if not os.path.exists(full_path):
+            if not tree.has_dir(dir_path):
                 missing_dirs.append({
                     "path": dir_path,
                     "description": description,
@@ -73,10 +85,8 @@ class DirectoryStructureMcp:
                 })
         
         # 检查MCP目录结构
-        mcp_adapters_path = os.path.join(path, "mcp/adapters")
-        if os.path.exists(mcp_adapters_path):
-            mcp_issues = await self._check_mcp_adapters(mcp_adapters_path)
-            issues.extend(mcp_issues)
+        if tree.has_dir("mcp/adapters"):
+            issues.extend(self._check_mcp_adapters(tree, "mcp/adapters"))
         
         return {
             "total_issues": len(issues) + len(missing_dirs),
@@ -85,24 +95,21 @@ class DirectoryStructureMcp:
             "check_time": datetime.now().isoformat()
         }
     
-    async def _check_mcp_adapters(self, adapters_path: str) -> List[Dict]:
+    def _check_mcp_adapters(self, tree: ProjectTree, adapters_path: str) -> List[Dict]:
         """检查MCP适配器目录结构"""
         issues = []
         
-        for item in os.listdir(adapters_path):
-            item_path = os.path.join(adapters_path, item)
-            if os.path.isdir(item_path):
-                # 检查每个MCP是否有必需文件
-                required_files = ["__init__.py", "README.md"]
-                for req_file in required_files:
-                    file_path = os.path.join(item_path, req_file)
-                    if not os.path.exists(file_path):
-                        issues.append({
-                            "type": "missing_file",
-                            "mcp": item,
-                            "missing_file": req_file,
-                            "severity": "low"
-                        })
+        for item in tree.subdirs(adapters_path):
+            # 检查每个MCP是否有必需文件
+            required_files = ["__init__.py", "README.md"]
+            for req_file in required_files:
+                if not tree.has_file(os.path.join(adapters_path, item, req_file)):
+                    issues.append({
+                        "type": "missing_file",
+                        "mcp": item,
+                        "missing_file": req_file,
+                        "severity": "low"
+                    })
         
         return issues
     
@@ -7,7 +7,10 @@ GitHub MCP - Git仓库信息服务
 import os
 import sys
 import json
+import time
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from flask import Flask, request, jsonify
@@ -17,65 +20,209 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class GitMetadataCache:
+    """Git元数据缓存 - 以 HEAD/refs/packed-refs/config 的mtime快照为失效依据
+
+    快照不变时直接返回缓存值；同一个键同时只有一个线程在计算，其余线程等待结果。
+    """
+    
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key, signature, compute):
+        if not self.enabled:
+            return compute()
+        
+        entry = self._entries.get(key)
+        if entry and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+        
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            value = compute()
+            self._entries[key] = (signature, value)
+            return value
+    
+    def get_stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+def format_relative_date(timestamp: int, now: float = None) -> str:
+    """按git --date=relative 的规则格式化相对时间（在响应时计算，缓存的提交数据不会过期）"""
+    diff = int((now if now is not None else time.time()) - timestamp)
+    
+    def unit(count, name):
+        return f"{count} {name}{'' if count == 1 else 's'} ago"
+    
+    if diff < 0:
+        return "in the future"
+    if diff < 90:
+        return unit(diff, "second")
+    diff = (diff + 30) // 60
+    if diff < 90:
+        return unit(diff, "minute")
+    diff = (diff + 30) // 60
+    if diff < 36:
+        return unit(diff, "hour")
+    diff = (diff + 12) // 24
+    if diff < 14:
+        return unit(diff, "day")
+    if diff < 70:
+        return unit((diff + 3) // 7, "week")
+    if diff < 365:
+        return unit((diff + 15) // 30, "month")
+    if diff < 1825:
+        total_months = (diff * 12 * 2 + 365) // (365 * 2)
+        years, months = divmod(total_months, 12)
+        if months:
+            return f"{years} year{'' if years == 1 else 's'}, {months} month{'' if months == 1 else 's'} ago"
+        return unit(years, "year")
+    return unit((diff + 183) // 365, "year")
+
 class GitHubMCP:
-    """GitHub MCP - Git仓库信息管理器"""
+    """GitHub MCP - Git仓库信息管理器
     
-    def __init__(self, repo_root: str = "/home/ubuntu/kilocode_integrated_repo"):
+    Git命令通过 `git -C` 在有界线程池中执行，不修改进程工作目录；
+    分支与HEAD直接读取 .git 下的松散引用和 packed-refs；
+    仓库信息、分支和提交历史按引用快照缓存，未提交更改状态按index快照和短TTL缓存。
+    """
+    
+    def __init__(self, repo_root: str = "/home/ubuntu/kilocode_integrated_repo",
+                 max_git_workers: int = 4, cache_enabled: bool = True, status_ttl: float = 2.0):
         self.repo_root = Path(repo_root)
         self.mcp_id = "github_mcp"
         self.version = "1.0.0"
+        self.git_pool = ThreadPoolExecutor(max_workers=max_git_workers, thread_name_prefix="github_mcp_git")
+        self.cache = GitMetadataCache(enabled=cache_enabled)
+        self.status_ttl = status_ttl
+        self.git_spawns = 0
+    
+    # ------------------------------------------------------------------
+    # Git访问
+    # ------------------------------------------------------------------
+    
+    @property
+    def git_dir(self) -> Path:
+        """仓库的.git目录（支持 .git 为 gitdir 指针文件的情况）"""
+        git_path = self.repo_root / ".git"
+        if git_path.is_file():
+            content = git_path.read_text(encoding="utf-8").strip()
+            if content.startswith("gitdir:"):
+                return (self.repo_root / content[len("gitdir:"):].strip()).resolve()
+        return git_path
+    
+    def _run_git(self, args: list) -> str:
+        """在有界线程池中执行git命令，失败时抛出 subprocess.CalledProcessError"""
+        return self._submit_git(args).result()
+    
+    def _submit_git(self, args: list):
+        command = ["git", "-C", str(self.repo_root)] + args
+        self.git_spawns += 1
+        return self.git_pool.submit(subprocess.check_output, command, text=True, stderr=subprocess.PIPE)
+    
+    def _refs_signature(self) -> tuple:
+        """HEAD、packed-refs、config 与 refs 目录树的mtime快照，引用任何变化都会改变快照"""
+        git_dir = self.git_dir
+        paths = [git_dir / "HEAD", git_dir / "packed-refs", git_dir / "config"]
+        signature = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        for dirpath, _, filenames in os.walk(git_dir / "refs"):
+            signature.append((dirpath, os.stat(dirpath).st_mtime_ns))
+            for name in filenames:
+                try:
+                    signature.append((name, os.stat(os.path.join(dirpath, name)).st_mtime_ns))
+                except OSError:
+                    continue
+        return tuple(signature)
+    
+    def _status_signature(self) -> tuple:
+        """未提交更改的缓存快照：引用快照 + index mtime + TTL时间片（工作区修改不会更新index）"""
+        try:
+            index_mtime = (self.git_dir / "index").stat().st_mtime_ns
+        except OSError:
+            index_mtime = None
+        time_slot = int(time.monotonic() / self.status_ttl) if self.status_ttl > 0 else time.monotonic()
+        return (self._refs_signature(), index_mtime, time_slot)
+    
+    def _read_head(self) -> str:
+        """读取HEAD，返回当前分支名；分离HEAD时返回空字符串（与 git branch --show-current 一致）"""
+        head = (self.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if head.startswith("ref: refs/heads/"):
+            return head[len("ref: refs/heads/"):]
+        return ""
+    
+    def _read_refs(self, prefix: str) -> dict:
+        """读取某前缀下的全部引用：packed-refs 与松散引用合并，松散引用优先"""
+        git_dir = self.git_dir
+        refs = {}
+        packed = git_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                if not line or line[0] in "#^":
+                    continue
+                sha, _, name = line.partition(" ")
+                if name.startswith(prefix):
+                    refs[name[len(prefix):]] = sha
         
+        loose_root = git_dir / prefix.rstrip("/")
+        if loose_root.is_dir():
+            for dirpath, _, filenames in os.walk(loose_root):
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    name = path.relative_to(loose_root).as_posix()
+                    try:
+                        refs[name] = path.read_text(encoding="utf-8").strip()
+                    except OSError:
+                        continue
+        return refs
+    
+    # ------------------------------------------------------------------
+    # 查询接口
+    # ------------------------------------------------------------------
+    
     def get_repo_info(self) -> dict:
         """获取Git仓库基本信息"""
         try:
-            os.chdir(self.repo_root)
-            
-            # 获取远程仓库URL
-            remote_url = subprocess.check_output(
-                ["git", "remote", "get-url", "origin"], 
-                text=True
-            ).strip()
-            
-            # 提取仓库名
-            repo_name = remote_url.split('/')[-1].replace('.git', '')
-            
-            # 获取当前分支
-            current_branch = subprocess.check_output(
-                ["git", "branch", "--show-current"], 
-                text=True
-            ).strip()
+            info = self.cache.get("repo_info", self._refs_signature(), self._load_repo_info)
+            has_changes = self.cache.get("has_changes", self._status_signature(), self._load_has_changes)
             
-            # 获取最后提交信息
-            last_commit = subprocess.check_output(
-                ["git", "log", "-1", "--pretty=format:%h|%s|%an|%ad", "--date=relative"], 
-                text=True
-            ).strip()
-            
-            commit_parts = last_commit.split('|')
-            
-            # 检查是否有未提交的更改
-            status_output = subprocess.check_output(
-                ["git", "status", "--porcelain"], 
-                text=True
-            ).strip()
-            
-            has_changes = len(status_output) > 0
+            last_commit = dict(info["last_commit"])
+            last_commit["date"] = format_relative_date(last_commit.pop("timestamp")) \
+                if last_commit.get("timestamp") is not None else ""
             
             return {
                 "success": True,
                 "data": {
-                    "repo_name": repo_name,
-                    "repo_url": remote_url,
-                    "current_branch": current_branch,
-                    "last_commit": {
-                        "hash": commit_parts[0] if len(commit_parts) > 0 else "",
-                        "message": commit_parts[1] if len(commit_parts) > 1 else "",
-                        "author": commit_parts[2] if len(commit_parts) > 2 else "",
-                        "date": commit_parts[3] if len(commit_parts) > 3 else ""
-                    },
+                    "repo_name": info["repo_name"],
+                    "repo_url": info["repo_url"],
+                    "current_branch": info["current_branch"],
+                    "last_commit": last_commit,
                     "has_uncommitted_changes": has_changes,
                     "sync_status": "有未提交更改" if has_changes else "已同步",
-                    "last_sync": commit_parts[3] if len(commit_parts) > 3 else "未知",
+                    "last_sync": last_commit["date"] or "未知",
                     "webhook_status": "正常监听",
                     "auto_deploy": "启用",
                     "code_quality": "通过"
@@ -95,39 +242,38 @@ class GitHubMCP:
                 "error": f"获取仓库信息失败: {e}"
             }
     
+    def _load_repo_info(self) -> dict:
+        """读取仓库信息：远程地址与最后提交并发查询，分支直接读取HEAD"""
+        remote_future = self._submit_git(["remote", "get-url", "origin"])
+        commit_future = self._submit_git(["log", "-1", "--pretty=format:%h|%s|%an|%ct"])
+        
+        remote_url = remote_future.result().strip()
+        # 提交说明中可能含有 "|"，从右侧切分作者和时间
+        commit_parts = commit_future.result().strip().rsplit('|', 2)
+        commit_hash, _, message = commit_parts[0].partition('|')
+        
+        return {
+            "repo_name": remote_url.split('/')[-1].replace('.git', ''),
+            "repo_url": remote_url,
+            "current_branch": self._read_head(),
+            "last_commit": {
+                "hash": commit_hash,
+                "message": message,
+                "author": commit_parts[1] if len(commit_parts) > 1 else "",
+                "timestamp": int(commit_parts[2]) if len(commit_parts) > 2 else None
+            }
+        }
+    
+    def _load_has_changes(self) -> bool:
+        return len(self._run_git(["--no-optional-locks", "status", "--porcelain"]).strip()) > 0
+    
     def get_branch_info(self) -> dict:
         """获取分支信息"""
         try:
-            os.chdir(self.repo_root)
-            
-            # 获取所有分支
-            branches = subprocess.check_output(
-                ["git", "branch", "-a"], 
-                text=True
-            ).strip().split('\n')
-            
-            # 处理分支列表
-            local_branches = []
-            remote_branches = []
-            current_branch = ""
-            
-            for branch in branches:
-                branch = branch.strip()
-                if branch.startswith('*'):
-                    current_branch = branch[2:]
-                    local_branches.append(current_branch)
-                elif branch.startswith('remotes/'):
-                    remote_branches.append(branch[8:])  # 移除 'remotes/' 前缀
-                else:
-                    local_branches.append(branch)
-            
+            data = self.cache.get("branch_info", self._refs_signature(), self._load_branch_info)
             return {
                 "success": True,
-                "data": {
-                    "current_branch": current_branch,
-                    "local_branches": local_branches,
-                    "remote_branches": remote_branches
-                }
+                "data": data
             }
             
         except Exception as e:
@@ -137,29 +283,46 @@ class GitHubMCP:
                 "error": f"获取分支信息失败: {e}"
             }
     
+    def _load_branch_info(self) -> dict:
+        """直接读取 refs/heads 与 refs/remotes，输出与 git branch -a 相同的分支列表"""
+        current_branch = self._read_head()
+        local_branches = sorted(self._read_refs("refs/heads/"))
+        
+        remote_branches = []
+        for name, value in sorted(self._read_refs("refs/remotes/").items()):
+            if value.startswith("ref: refs/remotes/"):
+                remote_branches.append(f"{name} -> {value[len('ref: refs/remotes/'):]}")
+            else:
+                remote_branches.append(name)
+        
+        if not current_branch:
+            # 分离HEAD时与 git branch -a 一致，列出 "(HEAD detached at <sha>)"
+            head = (self.git_dir / "HEAD").read_text(encoding="utf-8").strip()
+            current_branch = f"(HEAD detached at {head[:7]})"
+            local_branches.insert(0, current_branch)
+        
+        return {
+            "current_branch": current_branch,
+            "local_branches": local_branches,
+            "remote_branches": remote_branches
+        }
+    
     def get_commit_history(self, limit: int = 10) -> dict:
         """获取提交历史"""
         try:
-            os.chdir(self.repo_root)
-            
-            # 获取提交历史
-            commits = subprocess.check_output(
-                ["git", "log", f"-{limit}", "--pretty=format:%h|%s|%an|%ad|%ar", "--date=iso"], 
-                text=True
-            ).strip().split('\n')
+            commits = self.cache.get(("commit_history", limit), self._refs_signature(),
+                                     lambda: self._load_commit_history(limit))
             
-            commit_list = []
-            for commit in commits:
-                if commit:
-                    parts = commit.split('|')
-                    if len(parts) >= 5:
-                        commit_list.append({
-                            "hash": parts[0],
-                            "message": parts[1],
-                            "author": parts[2],
-                            "date": parts[3],
-                            "relative_date": parts[4]
-                        })
+            commit_list = [
+                {
+                    "hash": commit["hash"],
+                    "message": commit["message"],
+                    "author": commit["author"],
+                    "date": commit["date"],
+                    "relative_date": format_relative_date(commit["timestamp"])
+                }
+                for commit in commits
+            ]
             
             return {
                 "success": True,
@@ -175,6 +338,27 @@ class GitHubMCP:
                 "success": False,
                 "error": f"获取提交历史失败: {e}"
             }
+    
+    def _load_commit_history(self, limit: int) -> list:
+        commits = self._run_git(
+            ["log", f"-{limit}", "--pretty=format:%h|%s|%an|%ad|%ct", "--date=iso"]
+        ).strip().split('\n')
+        
+        commit_list = []
+        for commit in commits:
+            if commit:
+                # 提交说明中可能含有 "|"，从右侧切分作者、日期和时间戳
+                parts = commit.rsplit('|', 3)
+                if len(parts) == 4:
+                    commit_hash, _, message = parts[0].partition('|')
+                    commit_list.append({
+                        "hash": commit_hash,
+                        "message": message,
+                        "author": parts[1],
+                        "date": parts[2],
+                        "timestamp": int(parts[3])
+                    })
+        return commit_list
 
 # 创建Flask应用
 app = Flask(__name__)
@@ -235,6 +419,14 @@ def mcp_request():
             "error": f"MCP请求处理失败: {e}"
         }), 500
 
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """元数据缓存统计API"""
+    return jsonify({
+        "success": True,
+        "data": dict(github_mcp.cache.get_stats(), git_spawns=github_mcp.git_spawns)
+    })
+
 @app.route('/api/repo-info', methods=['GET'])
 def get_repo_info():
     """获取仓库信息API"""
@@ -265,5 +457,5 @@ if __name__ == '__main__':
     else:
         print(f"❌ Git仓库连接失败: {repo_info['error']}")
     
-    app.run(host='0.0.0.0', port=8091, debug=False)
+    app.run(host='0.0.0.0', port=8091, debug=False, threaded=True)
 
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+GitHub MCP 并发负载测试
+
+在本地夹具仓库上启动多线程Flask服务，用并发客户端轮流请求
+/api/repo-info、/api/branch-info、/api/commit-history，
+分别在关闭和开启元数据缓存时测量吞吐量与 p50/p99 延迟。
+
+用法:
+    python github_mcp_load_test.py --requests 600 --concurrency 16
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from werkzeug.serving import make_server
+import github_mcp as github_mcp_module
+from github_mcp import GitHubMCP
+
+ENDPOINTS = ["/api/repo-info", "/api/branch-info", "/api/commit-history?limit=20"]
+
+
+def git(repo: str, *args: str):
+    subprocess.run(["git", "-C", repo] + list(args), check=True, capture_output=True)
+
+
+def create_fixture_repo(root: str, commit_count: int = 50, branch_count: int = 20) -> str:
+    """创建带远程跟踪分支、packed-refs 与松散引用的夹具仓库"""
+    repo = os.path.join(root, "fixture_repo")
+    os.makedirs(repo)
+    git(repo, "init", "-q", "-b", "main")
+    git(repo, "config", "user.email", "load@example.com")
+    git(repo, "config", "user.name", "load test")
+    git(repo, "remote", "add", "origin", "https://github.com/example/fixture_repo.git")
+    for i in range(commit_count):
+        Path(repo, "file.txt").write_text(f"revision {i}\n", encoding="utf-8")
+        git(repo, "add", "file.txt")
+        git(repo, "commit", "-q", "-m", f"commit {i} | load fixture")
+    for i in range(branch_count):
+        git(repo, "branch", f"feature/{i}")
+    git(repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+    git(repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+    git(repo, "pack-refs", "--all")
+    git(repo, "branch", "loose-branch")
+    return repo
+
+
+def run_load(repo: str, cache_enabled: bool, total_requests: int, concurrency: int) -> Dict[str, Any]:
+    """启动服务并发压测，返回吞吐量与延迟分位数"""
+    github_mcp_module.github_mcp = GitHubMCP(repo, cache_enabled=cache_enabled)
+    server = make_server("127.0.0.1", 0, github_mcp_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def request(i: int) -> float:
+        start = time.perf_counter()
+        with urllib.request.urlopen(base_url + ENDPOINTS[i % len(ENDPOINTS)], timeout=30) as response:
+            payload = json.loads(response.read())
+        if not payload.get("success"):
+            raise RuntimeError(payload.get("error"))
+        return time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = sorted(pool.map(request, range(total_requests)))
+        elapsed = time.perf_counter() - start
+        stats = github_mcp_module.github_mcp.cache.get_stats()
+        spawns = github_mcp_module.github_mcp.git_spawns
+    finally:
+        server.shutdown()
+        github_mcp_module.github_mcp.git_pool.shutdown()
+
+    return {
+        "cache": "on" if cache_enabled else "off",
+        "requests": total_requests,
+        "throughput": total_requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        "git_spawns": spawns,
+        "hit_rate": stats["hit_rate"]
+    }
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化负载测试结果"""
+    lines = [f"{'cache':>6} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'git':>6} {'hit':>6}"]
+    for row in rows:
+        lines.append(f"{row['cache']:>6} {row['requests']:>9} {row['throughput']:>9.1f} "
+                     f"{row['p50_ms']:>9.2f} {row['p99_ms']:>9.2f} {row['git_spawns']:>6} {row['hit_rate']:>6.2f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GitHub MCP 并发负载测试")
+    parser.add_argument("--requests", type=int, default=600, help="请求总数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发客户端数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        repo = create_fixture_repo(root)
+        rows = [run_load(repo, cache_enabled, args.requests, args.concurrency)
+                for cache_enabled in (False, True)]
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+github_mcp 元数据缓存单元测试
+覆盖直接读取引用、按引用快照缓存与失效、不修改进程工作目录
+"""
+
+import unittest
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+import sys
+
+# 添加模块路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from github_mcp import GitHubMCP, format_relative_date
+
+
+def git(repo, *args):
+    return subprocess.check_output(["git", "-C", repo] + list(args), text=True)
+
+
+class TestGitHubMCPCache(unittest.TestCase):
+    """GitHubMCP 缓存测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = self.tmp.name
+        git(self.repo, "init", "-q", "-b", "main")
+        git(self.repo, "config", "user.email", "test@example.com")
+        git(self.repo, "config", "user.name", "tester")
+        git(self.repo, "remote", "add", "origin", "https://github.com/example/demo_repo.git")
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "first | commit")
+        git(self.repo, "branch", "feature/a")
+        git(self.repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+        git(self.repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+        git(self.repo, "pack-refs", "--all")
+        git(self.repo, "branch", "loose")
+        self.mcp = GitHubMCP(self.repo)
+
+    def tearDown(self):
+        self.mcp.git_pool.shutdown()
+        self.tmp.cleanup()
+
+    def test_branch_info_matches_git_branch(self):
+        """TC001: 直接读取 packed-refs 与松散引用，结果与 git branch -a 一致"""
+        result = self.mcp.get_branch_info()
+        self.assertTrue(result["success"])
+        self.assertEqual(result["data"], {
+            "current_branch": "main",
+            "local_branches": ["feature/a", "loose", "main"],
+            "remote_branches": ["origin/HEAD -> origin/main", "origin/main"]
+        })
+        self.assertEqual(self.mcp.git_spawns, 0)
+
+    def test_cached_until_refs_change(self):
+        """TC002: 引用不变时从缓存返回，新提交后缓存失效"""
+        cwd = os.getcwd()
+        info = self.mcp.get_repo_info()["data"]
+        self.assertEqual(info["repo_name"], "demo_repo")
+        self.assertEqual(info["last_commit"]["message"], "first | commit")
+        self.assertEqual(os.getcwd(), cwd)
+
+        spawns = self.mcp.git_spawns
+        for _ in range(10):
+            self.mcp.get_repo_info()
+            self.mcp.get_commit_history(5)
+        self.assertLessEqual(self.mcp.git_spawns - spawns, 2)
+
+        git(self.repo, "commit", "-q", "--allow-empty", "-m", "second")
+        history = self.mcp.get_commit_history(5)["data"]
+        self.assertEqual(history["total"], 2)
+        self.assertEqual(history["commits"][0]["message"], "second")
+        self.assertEqual(self.mcp.get_repo_info()["data"]["last_commit"]["message"], "second")
+
+    def test_relative_date_format(self):
+        """TC003: 相对时间与 git --date=relative 规则一致"""
+        now = 1_000_000_000
+        self.assertEqual(format_relative_date(now - 1, now), "1 second ago")
+        self.assertEqual(format_relative_date(now - 600, now), "10 minutes ago")
+        self.assertEqual(format_relative_date(now - 3 * 86400, now), "3 days ago")
+        self.assertEqual(format_relative_date(now - 21 * 86400, now), "3 weeks ago")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,8 +14,16 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
+try:
+    from .interaction_log_store import SegmentedLogStore
+    from .rag_index import BM25Index, interaction_text, interaction_meta
+except ImportError:
+    from interaction_log_store import SegmentedLogStore
+    from rag_index import BM25Index, interaction_text, interaction_meta
+
 class InteractionType(Enum):
     """交互類型枚舉"""
     TECHNICAL_ANALYSIS = "technical_analysis"
@@ -67,13 +75,31 @@ class Deliverable:
     template_potential: float  # 模板化潛力評分
 
 class InteractionLogManager:
-    """交互日誌管理器"""
+    """交互日誌管理器
+    
+    storage_backend="segmented"（默認）時日誌、交付件和模板追加寫入 store/ 下的分段存儲；
+    storage_backend="files" 時保留每條記錄一個文件的舊佈局。
+    
+    注意：默認值改為 "segmented" 後，新寫入的記錄不再出現在 logs/、deliverables/、
+    templates/kilocode/ 下的單獨文件中，已有的文件也不會被分段存儲讀取。
+    依賴舊目錄佈局的調用方需顯式傳入 storage_backend="files"。
+    """
+    
+    STORAGE_BACKENDS = ("segmented", "files")
     
-    def __init__(self, base_dir: str = "/home/ubuntu/Powerauto.ai/interaction_logs"):
+    def __init__(self, base_dir: str = "/home/ubuntu/Powerauto.ai/interaction_logs",
+                 storage_backend: str = "segmented", store_options: Dict[str, Any] = None):
+        if storage_backend not in self.STORAGE_BACKENDS:
+            raise ValueError(f"不支持的存儲後端: {storage_backend}，可選 {self.STORAGE_BACKENDS}")
         self.base_dir = Path(base_dir)
         self.setup_logging()
         self.setup_directory_structure()
         self.current_session_id = self.generate_session_id()
+        self.storage_backend = storage_backend
+        self.log_store = None
+        self.log_listeners = []  # 每條日誌保存後回調 listener(log_id, log_dict)
+        if storage_backend == "segmented":
+            self.log_store = SegmentedLogStore(self.base_dir / "store", **(store_options or {}))
         
     def setup_directory_structure(self):
         """設置目錄結構"""
@@ -102,7 +128,8 @@ class InteractionLogManager:
             "rag/embeddings",
             "rag/index",
             "readiness/checks",
-            "readiness/reports"
+            "readiness/reports",
+            "store"
         ]
         
         for directory in directories:
@@ -233,11 +260,8 @@ class InteractionLogManager:
         # 處理交付件
         processed_deliverables = []
         if deliverables:
-            for file_path in deliverables:
-                if os.path.exists(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
+            for file_path, content in self.read_deliverable_files(deliverables):
+                if content is not None:
                     deliverable_type = self.classify_deliverable(file_path, content)
                     template_potential = self.calculate_template_potential({
                         'type': deliverable_type,
@@ -289,6 +313,19 @@ class InteractionLogManager:
         self.logger.info(f"✅ 交互日誌已記錄: {log_id}")
         return log_id
     
+    def read_deliverable_files(self, file_paths: List[str]) -> List[tuple]:
+        """讀取交付件內容，多個文件時並發讀取；不存在的文件內容為None"""
+        def read(file_path):
+            if not os.path.exists(file_path):
+                return file_path, None
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return file_path, f.read()
+        
+        if len(file_paths) <= 1:
+            return [read(file_path) for file_path in file_paths]
+        with ThreadPoolExecutor(max_workers=min(8, len(file_paths))) as executor:
+            return list(executor.map(read, file_paths))
+    
     def generate_tags(self, user_request: str, agent_response: str, 
                      deliverables: List[Dict]) -> List[str]:
         """生成標籤"""
@@ -319,13 +356,38 @@ class InteractionLogManager:
         log_dict = asdict(log_entry)
         log_dict['interaction_type'] = log_entry.interaction_type.value
         
-        with open(log_file, 'w', encoding='utf-8') as f:
-            json.dump(log_dict, f, indent=2, ensure_ascii=False)
+        if self.log_store:
+            self.log_store.append(
+                "log", log_dict, record_id=log_id,
+                category=log_dict['interaction_type'],
+                session_id=log_entry.session_id,
+                tags=log_entry.tags,
+                timestamp=log_entry.timestamp
+            )
+        else:
+            with open(log_file, 'w', encoding='utf-8') as f:
+                json.dump(log_dict, f, indent=2, ensure_ascii=False)
+        
+        for listener in self.log_listeners:
+            try:
+                listener(log_id, log_dict)
+            except Exception as e:
+                self.logger.error(f"日誌回調失敗: {e}")
         
         return log_id
     
     def save_deliverables(self, deliverables: List[Dict]):
         """保存交付件"""
+        if self.log_store:
+            for deliverable in deliverables:
+                self.log_store.append(
+                    "deliverable", deliverable, record_id=deliverable['id'],
+                    category=deliverable['type'],
+                    session_id=self.current_session_id,
+                    tags=['high_template_potential'] if deliverable['template_potential'] > 0.7 else []
+                )
+            return
+        
         for deliverable in deliverables:
             # 按類型分類保存
             deliverable_dir = self.base_dir / "deliverables" / deliverable['type']
@@ -351,6 +413,15 @@ class InteractionLogManager:
             if deliverable['template_potential'] > 0.6:  # 高潛力交付件
                 template = self.create_kilocode_template(deliverable)
                 
+                if self.log_store:
+                    self.log_store.append(
+                        "template", template, record_id=template['template_id'],
+                        category=deliverable['type'],
+                        session_id=self.current_session_id,
+                        tags=['high_template_potential'] if template['template_potential'] > 0.7 else []
+                    )
+                    continue
+                
                 template_dir = self.base_dir / "templates" / "kilocode"
                 template_file = template_dir / f"{deliverable['type']}_{deliverable['id']}.json"
                 
@@ -359,6 +430,60 @@ class InteractionLogManager:
                 
                 self.logger.info(f"✅ KiloCode模板已生成: {template_file}")
     
+    def get_interaction_log(self, log_id: str) -> Optional[Dict[str, Any]]:
+        """按ID讀取交互日誌"""
+        if self.log_store:
+            record = self.log_store.get(log_id)
+            return record['data'] if record and record['kind'] == 'log' else None
+        
+        for log_file in (self.base_dir / "logs").glob(f"*/{log_id}.json"):
+            with open(log_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+    
+    def query_interactions(self, interaction_type: str = None, session_id: str = None,
+                           tag: str = None, since: str = None, until: str = None,
+                           limit: int = None) -> List[Dict[str, Any]]:
+        """按類型/會話/標籤和時間範圍 [since, until) 查詢交互日誌，結果按時間排序"""
+        if self.log_store:
+            records = self.log_store.query(
+                kind="log", category=interaction_type, session_id=session_id,
+                tag=tag, since=since, until=until, limit=limit
+            )
+            return [record['data'] for record in records]
+        
+        # 文件佈局：掃描 logs/<類型>/*.json 後過濾
+        pattern = f"{interaction_type}/*.json" if interaction_type else "*/*.json"
+        results = []
+        for log_file in (self.base_dir / "logs").glob(pattern):
+            try:
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    log_dict = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.warning(f"跳過無法讀取的日誌文件 {log_file}: {e}")
+                continue
+            timestamp = log_dict.get('timestamp', '')
+            if session_id is not None and log_dict.get('session_id') != session_id:
+                continue
+            if tag is not None and tag not in log_dict.get('tags', []):
+                continue
+            if (since is not None and timestamp < since) or (until is not None and timestamp >= until):
+                continue
+            results.append(log_dict)
+        
+        results.sort(key=lambda log_dict: log_dict.get('timestamp', ''))
+        return results[:limit] if limit is not None else results
+    
+    def flush(self):
+        """落盤未同步的日誌"""
+        if self.log_store:
+            self.log_store.flush()
+    
+    def close(self):
+        """關閉日誌存儲"""
+        if self.log_store:
+            self.log_store.close()
+    
     def create_kilocode_template(self, deliverable: Dict) -> Dict:
         """創建KiloCode模板"""
         template = {
@@ -483,7 +608,10 @@ class InteractionLogManager:
         return examples
 
 class KiloCodeRAGIntegration:
-    """KiloCode RAG整合系統"""
+    """KiloCode RAG整合系統
+    
+    在 rag/index 下維護BM25倒排索引；註冊到日誌管理器後，每條新日誌保存時即增量索引。
+    """
     
     def __init__(self, log_manager: InteractionLogManager):
         self.log_manager = log_manager
@@ -494,16 +622,44 @@ class KiloCodeRAGIntegration:
         """設置RAG系統"""
         self.logger = logging.getLogger(__name__)
         self.logger.info("🔍 設置KiloCode RAG系統...")
-    
-    def index_interactions(self):
-        """索引所有交互日誌"""
-        # 實現RAG索引邏輯
-        pass
-    
-    def search_similar_interactions(self, query: str) -> List[Dict]:
+        self.index = BM25Index(self.rag_dir / "index")
+        self.log_manager.log_listeners.append(self.index_interaction)
+    
+    def index_interaction(self, log_id: str, log_dict: Dict[str, Any]) -> bool:
+        """增量索引單條交互日誌"""
+        return self.index.add_document(log_id, interaction_text(log_dict), interaction_meta(log_dict))
+    
+    def index_interactions(self) -> int:
+        """補齊索引：掃描已存儲的交互日誌，只索引尚未收錄的日誌，返回新增數量"""
+        indexed = 0
+        store = self.log_manager.log_store
+        if store:
+            for record in store.iter_all(kind="log"):
+                if record['id'] not in self.index and self.index_interaction(record['id'], record['data']):
+                    indexed += 1
+        else:
+            for log_file in (self.log_manager.base_dir / "logs").glob("*/*.json"):
+                if log_file.stem in self.index:
+                    continue
+                try:
+                    with open(log_file, 'r', encoding='utf-8') as f:
+                        log_dict = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if self.index_interaction(log_file.stem, log_dict):
+                    indexed += 1
+        
+        self.index.flush()
+        self.logger.info(f"✅ RAG索引完成: 新增 {indexed} 條，共 {len(self.index)} 條")
+        return indexed
+    
+    def search_similar_interactions(self, query: str, top_k: int = 5) -> List[Dict]:
         """搜索相似交互"""
-        # 實現相似性搜索
-        pass
+        return self.index.search(query, top_k)
+    
+    def close(self):
+        """關閉RAG索引"""
+        self.index.close()
 
 class ReadinessChecker:
     """系統準備狀態檢查器"""
@@ -569,8 +725,13 @@ class ReadinessChecker:
         """檢查日誌覆蓋度"""
         log_types = [t.value for t in InteractionType]
         coverage = {}
+        store = self.log_manager.log_store
         
         for log_type in log_types:
+            if store:
+                coverage[log_type] = store.count("log", category=log_type)
+                continue
+
             log_dir = self.log_manager.base_dir / "logs" / log_type
             if log_dir.exists():
                 log_count = len(list(log_dir.glob("*.json")))
@@ -593,6 +754,18 @@ class ReadinessChecker:
     def check_template_quality(self) -> Dict[str, Any]:
         """檢查模板質量"""
         template_dir = self.log_manager.base_dir / "templates" / "kilocode"
+        store = self.log_manager.log_store
+        
+        if store:
+            total_templates = store.count("template")
+            high_quality_templates = store.count("template", tag="high_template_potential")
+            quality_ratio = high_quality_templates / total_templates if total_templates else 0
+            return {
+                'status': 'pass' if quality_ratio > 0.5 else 'warning',
+                'total_templates': total_templates,
+                'high_quality_templates': high_quality_templates,
+                'quality_ratio': quality_ratio
+            }
         
         if not template_dir.exists():
             return {'status': 'fail', 'reason': 'Template directory not found'}
@@ -626,7 +799,8 @@ class ReadinessChecker:
         return {
             'status': 'pass' if rag_dir.exists() else 'warning',
             'embeddings_ready': (rag_dir / "embeddings").exists(),
-            'index_ready': (rag_dir / "index").exists()
+            'index_ready': (rag_dir / "index").exists(),
+            'index_built': (rag_dir / "index" / "bm25_postings.jsonl").exists()
         }
     
     def calculate_overall_status(self, components: Dict[str, Any]) -> str:
@@ -689,6 +863,8 @@ def main():
     with open(report_file, 'w', encoding='utf-8') as f:
         json.dump(readiness_report, f, indent=2, ensure_ascii=False)
     
+    log_manager.close()
+    
     print("🎯 交互日誌管理系統演示完成")
     print(f"📝 交互日誌ID: {log_id}")
     print(f"📊 系統狀態: {readiness_report['overall_status']}")
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+PowerAutomation 交互日誌分段存儲
+
+以追加寫入的JSONL分段文件保存交互日誌、交付件和模板，取代每條記錄一個JSON文件的佈局：
+- 分段文件達到大小上限後輪轉，記錄只追加不修改
+- SQLite索引記錄每條數據所在的分段與偏移，並按類型/會話/標籤/時間建立索引
+- 按類型與標籤維護計數器，覆蓋度統計為O(1)，無需遍歷目錄
+- 累積一批寫入或超過時間間隔後才fsync並提交索引
+- 重新打開時，分段中已寫入但索引未提交的尾部記錄會被重新索引
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator, Tuple
+import logging
+
+SEGMENT_PREFIX = "segment_"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_FILE = "index.db"
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    record_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    category TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_kind_time ON records(kind, timestamp);
+CREATE INDEX IF NOT EXISTS idx_records_category_time ON records(kind, category, timestamp);
+CREATE INDEX IF NOT EXISTS idx_records_session ON records(session_id, timestamp);
+CREATE TABLE IF NOT EXISTS record_tags (
+    tag TEXT NOT NULL,
+    record_id TEXT NOT NULL,
+    PRIMARY KEY (tag, record_id)
+);
+CREATE TABLE IF NOT EXISTS counters (
+    kind TEXT NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, field, value)
+);
+"""
+
+
+class SegmentedLogStore:
+    """追加寫入的分段日誌存儲"""
+
+    def __init__(self, store_dir: str, segment_max_bytes: int = 64 * 1024 * 1024,
+                 sync_every: int = 64, sync_interval: float = 1.0):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.store_dir / INDEX_FILE), check_same_thread=False)
+        self._conn.executescript(INDEX_SCHEMA)
+        self._conn.commit()
+
+        self._counters: Dict[Tuple[str, str, str], int] = {
+            (kind, field, value): count
+            for kind, field, value, count in self._conn.execute(
+                "SELECT kind, field, value, count FROM counters")
+        }
+        self._dirty_counters = set()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._segment_id = max(self._segment_ids(), default=1)
+        self._file = None
+        self._open_segment(self._segment_id)
+        self._recover_tail()
+
+    # ------------------------------------------------------------------
+    # 分段文件
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.store_dir / f"{SEGMENT_PREFIX}{segment_id:06d}{SEGMENT_SUFFIX}"
+
+    def _segment_ids(self) -> List[int]:
+        ids = []
+        for path in self.store_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"):
+            try:
+                ids.append(int(path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+            except ValueError:
+                continue
+        return sorted(ids)
+
+    def _open_segment(self, segment_id: int):
+        if self._file is not None:
+            self._file.close()
+        self._segment_id = segment_id
+        self._file = open(self._segment_path(segment_id), "ab")
+        self._offset = self._file.tell()
+
+    def _rotate_if_needed(self, incoming: int):
+        if self._offset > 0 and self._offset + incoming > self.segment_max_bytes:
+            self._sync()
+            self._open_segment(self._segment_id + 1)
+
+    def _recover_tail(self):
+        """重新索引活動分段中索引尚未提交的尾部記錄，截斷寫了一半的最後一行"""
+        row = self._conn.execute(
+            "SELECT MAX(offset + length) FROM records WHERE segment = ?", (self._segment_id,)
+        ).fetchone()
+        indexed_end = row[0] or 0
+        if indexed_end >= self._offset:
+            return
+
+        recovered = 0
+        valid_end = indexed_end
+        with open(self._segment_path(self._segment_id), "rb") as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    envelope = json.loads(line)
+                except ValueError:
+                    break
+                self._index(envelope, self._segment_id, offset, len(line))
+                offset += len(line)
+                valid_end = offset
+                recovered += 1
+
+        if valid_end < self._offset:
+            self._file.truncate(valid_end)
+            self._offset = valid_end
+        self._sync()
+        self.logger.info(f"🔧 已恢復 {recovered} 條未索引記錄: {self._segment_path(self._segment_id)}")
+
+    # ------------------------------------------------------------------
+    # 寫入
+    # ------------------------------------------------------------------
+
+    def append(self, kind: str, data: Dict[str, Any], record_id: Optional[str] = None,
+               category: str = "", session_id: str = "", tags: Iterable[str] = (),
+               timestamp: Optional[str] = None) -> str:
+        """追加一條記錄，返回記錄ID"""
+        timestamp = timestamp or datetime.now().isoformat()
+        record_id = record_id or hashlib.md5(
+            f"{kind}{session_id}{timestamp}{time.time()}".encode()).hexdigest()[:12]
+        envelope = {
+            "id": record_id,
+            "kind": kind,
+            "category": category,
+            "session_id": session_id,
+            "timestamp": timestamp,
+            "tags": sorted(set(tags)),
+            "data": data
+        }
+        line = (json.dumps(envelope, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+        with self._lock:
+            self._rotate_if_needed(len(line))
+            offset = self._offset
+            self._file.write(line)
+            self._offset += len(line)
+            self._index(envelope, self._segment_id, offset, len(line))
+
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+
+        return record_id
+
+    def _index(self, envelope: Dict[str, Any], segment_id: int, offset: int, length: int):
+        record_id = envelope["id"]
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (record_id, envelope["kind"], envelope["category"], envelope["session_id"],
+             envelope["timestamp"], segment_id, offset, length)
+        )
+        if cursor.rowcount == 0:
+            # 重複ID：保留先寫入的記錄，不重複計數
+            return
+
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO record_tags VALUES (?, ?)",
+            [(tag, record_id) for tag in envelope["tags"]]
+        )
+        kind = envelope["kind"]
+        self._bump((kind, "", ""))
+        self._bump((kind, "category", envelope["category"]))
+        for tag in envelope["tags"]:
+            self._bump((kind, "tag", tag))
+
+    def _bump(self, key: Tuple[str, str, str]):
+        self._counters[key] = self._counters.get(key, 0) + 1
+        self._dirty_counters.add(key)
+
+    def _sync(self):
+        """fsync分段文件後提交索引與計數器，保證索引不會指向未落盤的數據"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self._dirty_counters:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?)",
+                [key + (self._counters[key],) for key in self._dirty_counters]
+            )
+            self._dirty_counters.clear()
+        self._conn.commit()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        """立即落盤所有未同步的寫入"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """落盤並關閉存儲"""
+        with self._lock:
+            if self._file is None:
+                return
+            self._sync()
+            self._file.close()
+            self._file = None
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 讀取
+    # ------------------------------------------------------------------
+
+    def count(self, kind: str, category: Optional[str] = None, tag: Optional[str] = None) -> int:
+        """O(1)計數：按類型、分類或標籤"""
+        if category is not None:
+            key = (kind, "category", category)
+        elif tag is not None:
+            key = (kind, "tag", tag)
+        else:
+            key = (kind, "", "")
+        return self._counters.get(key, 0)
+
+    def counts_by_category(self, kind: str) -> Dict[str, int]:
+        """按分類返回計數"""
+        return {
+            value: count for (k, field, value), count in self._counters.items()
+            if k == kind and field == "category"
+        }
+
+    def get(self, record_id: str) -> Optional[Dict[str, Any]]:
+        """按ID讀取一條記錄"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT segment, offset, length FROM records WHERE record_id = ?", (record_id,)
+            ).fetchone()
+            if not row:
+                return None
+            self._file.flush()
+            return self._read_envelopes([row])[0]
+
+    def query(self, kind: Optional[str] = None, category: Optional[str] = None,
+              session_id: Optional[str] = None, tag: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """按條件查詢記錄，since/until 為ISO時間範圍 [since, until)，結果按時間排序"""
+        clauses, params = [], []
+        table = "records r"
+        if tag is not None:
+            table += " JOIN record_tags t ON t.record_id = r.record_id"
+            clauses.append("t.tag = ?")
+            params.append(tag)
+        for column, value in (("r.kind", kind), ("r.category", category), ("r.session_id", session_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("r.timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("r.timestamp < ?")
+            params.append(until)
+
+        sql = f"SELECT r.segment, r.offset, r.length FROM {table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY r.timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._file.flush()
+            return self._read_envelopes(rows)
+
+    def iter_all(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """按寫入順序順序掃描全部分段"""
+        with self._lock:
+            self._file.flush()
+        for segment_id in self._segment_ids():
+            with open(self._segment_path(segment_id), "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    envelope = json.loads(line)
+                    if kind is None or envelope["kind"] == kind:
+                        yield envelope
+
+    def _read_envelopes(self, rows: List[Tuple[int, int, int]]) -> List[Dict[str, Any]]:
+        """按 (segment, offset, length) 讀取記錄，同一分段只打開一次"""
+        envelopes = []
+        handles = {}
+        try:
+            for segment_id, offset, length in rows:
+                handle = handles.get(segment_id)
+                if handle is None:
+                    handle = handles[segment_id] = open(self._segment_path(segment_id), "rb")
+                handle.seek(offset)
+                envelopes.append(json.loads(handle.read(length)))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        return envelopes
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取存儲統計"""
+        segments = self._segment_ids()
+        return {
+            "segments": len(segments),
+            "active_segment": self._segment_id,
+            "bytes": sum(self._segment_path(s).stat().st_size for s in segments),
+            "records": sum(count for (k, field, value), count in self._counters.items() if not field),
+            "unsynced": self._unsynced
+        }
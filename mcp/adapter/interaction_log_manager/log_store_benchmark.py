@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+交互日誌存儲基準
+
+比較兩種存儲佈局：
+1. files：每條日誌/交付件/模板一個JSON文件（舊佈局）
+2. segmented：追加寫入的分段存儲 + SQLite索引
+
+測量寫入速率（條/秒）和 ReadinessChecker.check_log_coverage 的統計延遲。
+
+用法:
+    python log_store_benchmark.py --logs 2000
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from interaction_log_manager import InteractionLogManager, ReadinessChecker
+
+SAMPLE_REQUESTS = [
+    "請做技術分析", "生成代碼", "運行測試驗證", "撰寫文檔報告", "製作演示幻燈片",
+    "統計數據", "系統架構設計", "研究調查", "調試修復問題", "性能優化改進"
+]
+
+
+def run_backend(backend: str, log_count: int, deliverable_path: str,
+                coverage_rounds: int = 20) -> Dict[str, Any]:
+    """用指定存儲佈局寫入 log_count 條交互並測量覆蓋度統計延遲"""
+    with tempfile.TemporaryDirectory() as base_dir:
+        manager = InteractionLogManager(base_dir=base_dir, storage_backend=backend)
+        manager.logger.setLevel(logging.WARNING)
+
+        start = time.perf_counter()
+        for i in range(log_count):
+            manager.log_interaction(
+                user_request=SAMPLE_REQUESTS[i % len(SAMPLE_REQUESTS)],
+                agent_response=f"response {i}",
+                deliverables=[deliverable_path] if i % 10 == 0 else None,
+                context={'index': i}
+            )
+        manager.flush()
+        ingest_time = time.perf_counter() - start
+
+        checker = ReadinessChecker(manager)
+        start = time.perf_counter()
+        for _ in range(coverage_rounds):
+            coverage = checker.check_log_coverage()
+        coverage_latency = (time.perf_counter() - start) / coverage_rounds
+
+        file_count = sum(1 for path in Path(base_dir).rglob("*") if path.is_file())
+        manager.close()
+
+    return {
+        "backend": backend,
+        "logs": log_count,
+        "ingest_per_second": log_count / ingest_time if ingest_time else 0.0,
+        "coverage_latency_ms": coverage_latency * 1000,
+        "total_logs_counted": coverage["total_logs"],
+        "files_on_disk": file_count
+    }
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化基準結果表"""
+    lines = [f"{'backend':>10} {'logs':>8} {'ingest/s':>10} {'coverage ms':>12} {'files':>8}"]
+    for row in rows:
+        lines.append(f"{row['backend']:>10} {row['logs']:>8} {row['ingest_per_second']:>10.0f} "
+                     f"{row['coverage_latency_ms']:>12.3f} {row['files_on_disk']:>8}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="交互日誌存儲基準")
+    parser.add_argument("--logs", type=int, default=2000, help="寫入的交互數量")
+    parser.add_argument("--rounds", type=int, default=20, help="覆蓋度統計重複次數")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    rows = [
+        run_backend(backend, args.logs, __file__, args.rounds)
+        for backend in ("files", "segmented")
+    ]
+    print(format_report(rows))
+
+
+if __name__ == "__main__":
+    main()
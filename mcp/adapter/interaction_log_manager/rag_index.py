@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+PowerAutomation 交互日誌本地檢索索引
+
+增量維護的BM25倒排索引，完全離線運行：
+- 每條交互日誌作為一個文檔，索引 user_request、agent_response 和交付件內容
+- 新文檔追加到 rag/index 下的 JSONL 增量文件，無需全量重建
+- 啟動時從增量文件重建內存倒排表，查詢只遍歷查詢詞的倒排列表並取 top-k
+- 英文/數字按單詞切分，中文按字二元組(bigram)切分
+"""
+
+import os
+import re
+import json
+import math
+import heapq
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Any
+import logging
+
+POSTINGS_FILE = "bm25_postings.jsonl"
+
+_WORD_PATTERN = re.compile(r"[a-z0-9_]+|[一-鿿]+")
+_CJK_PATTERN = re.compile(r"[一-鿿]")
+
+
+def tokenize(text: str) -> List[str]:
+    """切分文本：英文單詞小寫化，中文連續片段切為字二元組（單字片段保留單字）"""
+    tokens = []
+    for match in _WORD_PATTERN.findall((text or "").lower()):
+        if _CJK_PATTERN.match(match):
+            if len(match) == 1:
+                tokens.append(match)
+            else:
+                tokens.extend(match[i:i + 2] for i in range(len(match) - 1))
+        elif len(match) > 1:
+            tokens.append(match)
+    return tokens
+
+
+class BM25Index:
+    """增量BM25倒排索引"""
+
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75, sync_every: int = 256):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.sync_every = sync_every
+        self.logger = logging.getLogger(__name__)
+
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_ids: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.doc_meta: List[Dict[str, Any]] = []
+        self.doc_index: Dict[str, int] = {}
+        self.total_length = 0
+        self._norms: List[float] = []
+        self._norms_size = -1
+
+        self._lock = threading.Lock()
+        self._path = self.index_dir / POSTINGS_FILE
+        self._load()
+        self._file = open(self._path, "a", encoding="utf-8")
+        self._unsynced = 0
+
+    def _load(self):
+        """從增量文件重建內存倒排表，忽略寫了一半的最後一行"""
+        if not self._path.exists():
+            return
+        valid_end = 0
+        with open(self._path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._add_to_memory(entry["id"], entry["terms"], entry.get("meta", {}))
+                valid_end += len(line)
+        if valid_end < self._path.stat().st_size:
+            with open(self._path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def _add_to_memory(self, doc_id: str, term_counts: Dict[str, int], meta: Dict[str, Any]):
+        doc = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_meta.append(meta)
+        self.doc_index[doc_id] = doc
+        length = sum(term_counts.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        for term, tf in term_counts.items():
+            self.postings.setdefault(term, {})[doc] = tf
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_index
+
+    def add_document(self, doc_id: str, text: str, meta: Dict[str, Any] = None) -> bool:
+        """增量添加文檔；已索引的ID直接跳過，返回是否新增"""
+        term_counts = dict(Counter(tokenize(text)))
+        meta = meta or {}
+        with self._lock:
+            if doc_id in self.doc_index:
+                return False
+            self._file.write(json.dumps({"id": doc_id, "terms": term_counts, "meta": meta},
+                                        ensure_ascii=False, default=str) + "\n")
+            self._add_to_memory(doc_id, term_counts, meta)
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every:
+                self._sync()
+        return True
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def flush(self):
+        """落盤未同步的增量"""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """落盤並關閉索引文件"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._sync()
+            self._file.close()
+
+    def search(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """BM25檢索，返回得分最高的 top_k 個文檔"""
+        # 與 add_document 互斥：倒排列表和歸一化因子在檢索過程中不能被增量修改
+        with self._lock:
+            return self._search(query, top_k)
+
+    def _search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        doc_count = len(self.doc_ids)
+        if not doc_count:
+            return []
+        k1 = self.k1
+        norms = self._document_norms()
+
+        # 按idf從高到低處理查詢詞（MaxScore剪枝）：
+        # 剩餘詞的得分上界之和低於當前第k名時，未入選的文檔不可能進入top-k，
+        # 之後的高頻詞只需更新已有候選，不必遍歷整條倒排列表
+        terms = []
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings:
+                df = len(postings)
+                terms.append((math.log(1 + (doc_count - df + 0.5) / (df + 0.5)), postings))
+        terms.sort(key=lambda item: item[0], reverse=True)
+        remaining_bound = sum(idf * (k1 + 1) for idf, _ in terms)
+
+        scores: Dict[int, float] = {}
+        for idf, postings in terms:
+            weight = idf * (k1 + 1)
+            if len(scores) >= top_k and remaining_bound < heapq.nlargest(top_k, scores.values())[-1]:
+                if len(postings) < len(scores):
+                    matched = ((doc, tf) for doc, tf in postings.items() if doc in scores)
+                else:
+                    matched = ((doc, postings[doc]) for doc in scores if doc in postings)
+                for doc, tf in list(matched):
+                    scores[doc] += weight * tf / (tf + norms[doc])
+            else:
+                get = scores.get
+                for doc, tf in postings.items():
+                    scores[doc] = get(doc, 0.0) + weight * tf / (tf + norms[doc])
+            remaining_bound -= weight
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [
+            {"id": self.doc_ids[doc], "score": round(score, 6), **self.doc_meta[doc]}
+            for doc, score in best
+        ]
+
+    def _document_norms(self) -> List[float]:
+        """每個文檔的長度歸一化因子 k1*(1-b+b*len/avg)，文檔數變化後才重新計算"""
+        if self._norms_size != len(self.doc_lengths):
+            avg_length = self.total_length / len(self.doc_lengths) or 1.0
+            k1, b = self.k1, self.b
+            self._norms = [k1 * (1 - b + b * length / avg_length) for length in self.doc_lengths]
+            self._norms_size = len(self.doc_lengths)
+        return self._norms
+
+    def get_stats(self) -> Dict[str, Any]:
+        """獲取索引統計"""
+        return {
+            "documents": len(self.doc_ids),
+            "terms": len(self.postings),
+            "average_length": self.total_length / len(self.doc_ids) if self.doc_ids else 0.0,
+            "index_bytes": self._path.stat().st_size if self._path.exists() else 0
+        }
+
+
+def interaction_text(log_dict: Dict[str, Any]) -> str:
+    """拼接交互日誌中參與檢索的文本"""
+    parts = [str(log_dict.get("user_request", "")), str(log_dict.get("agent_response", ""))]
+    for deliverable in log_dict.get("deliverables") or []:
+        parts.append(str(deliverable.get("name", "")))
+        parts.append(str(deliverable.get("content", "")))
+    return "\n".join(parts)
+
+
+def interaction_meta(log_dict: Dict[str, Any], snippet_length: int = 200) -> Dict[str, Any]:
+    """檢索結果中隨文檔返回的摘要信息"""
+    return {
+        "interaction_type": log_dict.get("interaction_type"),
+        "session_id": log_dict.get("session_id"),
+        "timestamp": log_dict.get("timestamp"),
+        "user_request": str(log_dict.get("user_request", ""))[:snippet_length]
+    }
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+interaction_log_store 单元测试
+覆盖分段追加、索引查询、O(1)计数、分段轮转与崩溃后尾部恢复
+"""
+
+import unittest
+import tempfile
+from pathlib import Path
+import sys
+
+# 添加模块路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from interaction_log_store import SegmentedLogStore
+from interaction_log_manager import InteractionLogManager, ReadinessChecker
+
+
+class TestSegmentedLogStore(unittest.TestCase):
+    """分段日誌存储测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store_dir = Path(self.tmp.name) / "store"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_query_and_counts(self):
+        """TC001: 按类型/会话/标签/时间范围查询，计数不读取分段"""
+        store = SegmentedLogStore(self.store_dir, sync_every=100)
+        try:
+            for i in range(6):
+                store.append("log", {"i": i}, record_id=f"log_{i}",
+                             category="testing" if i % 2 else "debugging",
+                             session_id=f"session_{i % 3}",
+                             tags=["mcp"] if i < 2 else [],
+                             timestamp=f"2025-06-17T00:00:0{i}")
+
+            self.assertEqual(store.count("log"), 6)
+            self.assertEqual(store.counts_by_category("log"), {"testing": 3, "debugging": 3})
+            self.assertEqual(store.count("log", tag="mcp"), 2)
+            self.assertEqual(store.get("log_4")["data"], {"i": 4})
+            self.assertEqual([r["id"] for r in store.query(session_id="session_1")], ["log_1", "log_4"])
+            self.assertEqual([r["id"] for r in store.query(tag="mcp", category="testing")], ["log_1"])
+            self.assertEqual(
+                [r["id"] for r in store.query(since="2025-06-17T00:00:02", until="2025-06-17T00:00:04")],
+                ["log_2", "log_3"])
+        finally:
+            store.close()
+
+    def test_rotation_and_reopen(self):
+        """TC002: 超过大小上限时轮转分段，重新打开后计数与记录保持"""
+        store = SegmentedLogStore(self.store_dir, segment_max_bytes=200)
+        for i in range(10):
+            store.append("log", {"payload": "x" * 50}, record_id=f"log_{i}", category="testing")
+        store.close()
+
+        reopened = SegmentedLogStore(self.store_dir, segment_max_bytes=200)
+        try:
+            self.assertGreater(reopened.get_stats()["segments"], 1)
+            self.assertEqual(reopened.count("log", category="testing"), 10)
+            self.assertEqual(len(reopened.query(kind="log")), 10)
+            self.assertEqual(reopened.get("log_0")["data"]["payload"], "x" * 50)
+        finally:
+            reopened.close()
+
+    def test_recovers_unindexed_tail(self):
+        """TC003: 已写入分段但索引未提交的记录在重新打开时恢复，半行被截断"""
+        store = SegmentedLogStore(self.store_dir, sync_every=1000, sync_interval=3600)
+        store.append("log", {"i": 0}, record_id="log_0", category="testing")
+        store.flush()
+        store.append("log", {"i": 1}, record_id="log_1", category="testing")
+        # 模拟崩溃：分段已写入，索引事务未提交，并留下半行
+        store._file.write(b'{"id": "log_2", "kind"')
+        store._file.flush()
+        store._conn.rollback()
+        store._conn.close()
+        store._file.close()
+
+        recovered = SegmentedLogStore(self.store_dir)
+        try:
+            self.assertEqual(recovered.count("log"), 2)
+            self.assertEqual(recovered.get("log_1")["data"], {"i": 1})
+            self.assertIsNone(recovered.get("log_2"))
+        finally:
+            recovered.close()
+
+    def test_manager_uses_store_for_coverage(self):
+        """TC004: 交互日誌写入分段存储，覆盖度统计来自计数器"""
+        manager = InteractionLogManager(base_dir=self.tmp.name)
+        try:
+            log_id = manager.log_interaction("運行測試驗證", "done")
+            manager.log_interaction("調試修復問題", "done")
+
+            coverage = ReadinessChecker(manager).check_log_coverage()
+            self.assertEqual(coverage["total_logs"], 2)
+            self.assertEqual(coverage["details"]["testing"], 1)
+            self.assertEqual(coverage["details"]["debugging"], 1)
+            self.assertEqual(manager.get_interaction_log(log_id)["interaction_type"], "testing")
+            self.assertEqual(len(manager.query_interactions(interaction_type="debugging")), 1)
+            self.assertEqual(list((Path(self.tmp.name) / "logs" / "testing").iterdir()), [])
+        finally:
+            manager.close()
+
+
+    def test_files_backend_query_matches_segmented(self):
+        """TC005: 文件佈局的查詢结果与分段存储一致"""
+        results = {}
+        for backend in InteractionLogManager.STORAGE_BACKENDS:
+            manager = InteractionLogManager(base_dir=str(Path(self.tmp.name) / backend), storage_backend=backend)
+            try:
+                manager.log_interaction("運行測試驗證", "done")
+                manager.log_interaction("調試修復問題", "done")
+                manager.current_session_id = "session_other"
+                manager.log_interaction("再次運行測試", "done")
+                results[backend] = (
+                    [log["user_request"] for log in manager.query_interactions()],
+                    [log["user_request"] for log in manager.query_interactions(interaction_type="testing")],
+                    [log["user_request"] for log in manager.query_interactions(session_id="session_other")],
+                    len(manager.query_interactions(limit=1)),
+                    manager.query_interactions(since="2999-01-01"),
+                )
+            finally:
+                manager.close()
+
+        self.assertEqual(results["files"], results["segmented"])
+        self.assertEqual(results["files"][1], ["運行測試驗證", "再次運行測試"])
+        self.assertEqual(results["files"][2], ["再次運行測試"])
+        self.assertEqual(results["files"][3], 1)
+
+    def test_unknown_backend_rejected(self):
+        """TC006: 不支持的存储后端在构造时报错"""
+        with self.assertRaises(ValueError):
+            InteractionLogManager(base_dir=self.tmp.name, storage_backend="sqlite")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+rag_index 单元测试
+覆盖中英文切分、增量索引持久化、剪枝检索与全量BM25一致、日志写入即索引
+"""
+
+import unittest
+import tempfile
+import random
+import math
+import threading
+from pathlib import Path
+import sys
+
+# 添加模块路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from rag_index import BM25Index, tokenize
+from interaction_log_manager import InteractionLogManager, KiloCodeRAGIntegration
+
+
+def brute_force_scores(index, query):
+    """不剪枝的BM25全量打分"""
+    doc_count = len(index.doc_ids)
+    avg_length = index.total_length / doc_count
+    scores = {}
+    for term in set(tokenize(query)):
+        postings = index.postings.get(term, {})
+        df = len(postings)
+        if not df:
+            continue
+        idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+        for doc, tf in postings.items():
+            norm = index.k1 * (1 - index.b + index.b * index.doc_lengths[doc] / avg_length)
+            scores[index.doc_ids[doc]] = scores.get(index.doc_ids[doc], 0.0) + \
+                idf * tf * (index.k1 + 1) / (tf + norm)
+    return scores
+
+
+class TestBM25Index(unittest.TestCase):
+    """BM25索引测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.tmp.name) / "rag" / "index"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_tokenize_mixed_text(self):
+        """TC001: 英文按词小写切分，中文按字二元组切分"""
+        self.assertEqual(tokenize("Run MCP 測試驗證 a"), ["run", "mcp", "測試", "試驗", "驗證"])
+
+    def test_incremental_add_and_reopen(self):
+        """TC002: 增量添加后重新打开，文档与检索结果保持，重复ID不重复索引"""
+        index = BM25Index(self.index_dir)
+        self.assertTrue(index.add_document("log_1", "deploy the smartui adapter", {"type": "deployment"}))
+        self.assertTrue(index.add_document("log_2", "regression testing for kilocode"))
+        self.assertFalse(index.add_document("log_1", "duplicate"))
+        index.close()
+
+        reopened = BM25Index(self.index_dir)
+        try:
+            self.assertEqual(len(reopened), 2)
+            results = reopened.search("smartui deploy", top_k=1)
+            self.assertEqual(results[0]["id"], "log_1")
+            self.assertEqual(results[0]["type"], "deployment")
+        finally:
+            reopened.close()
+
+    def test_pruned_search_matches_brute_force(self):
+        """TC003: MaxScore剪枝后的top-k与全量BM25打分一致"""
+        rng = random.Random(7)
+        vocabulary = [f"w{i}" for i in range(40)] + ["mcp"] * 20
+        index = BM25Index(self.index_dir)
+        try:
+            for i in range(500):
+                index.add_document(f"log_{i}", " ".join(rng.choices(vocabulary, k=rng.randint(3, 30))))
+
+            for _ in range(30):
+                query = " ".join(rng.sample(vocabulary, 4))
+                expected = sorted(brute_force_scores(index, query).items(), key=lambda x: -x[1])[:5]
+                results = index.search(query, top_k=5)
+                self.assertEqual(len(results), len(expected))
+                for result, (_, score) in zip(results, expected):
+                    self.assertAlmostEqual(result["score"], score, places=5)
+        finally:
+            index.close()
+
+    def test_search_during_concurrent_adds(self):
+        """TC005: 检索与增量添加并发执行时不报错，结束后结果与全量打分一致"""
+        rng = random.Random(11)
+        vocabulary = [f"w{i}" for i in range(30)] + ["mcp"] * 10
+        texts = [" ".join(rng.choices(vocabulary, k=rng.randint(3, 20))) for _ in range(3000)]
+        index = BM25Index(self.index_dir, sync_every=100000)
+        errors = []
+        done = threading.Event()
+
+        def writer():
+            try:
+                for i, text in enumerate(texts):
+                    index.add_document(f"log_{i}", text)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        def reader():
+            try:
+                while not done.is_set():
+                    index.search("mcp w1 w2 w3", top_k=5)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(3)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(len(index), len(texts))
+            expected = sorted(brute_force_scores(index, "mcp w1 w2 w3").values(), reverse=True)[:5]
+            results = index.search("mcp w1 w2 w3", top_k=5)
+            for result, score in zip(results, expected):
+                self.assertAlmostEqual(result["score"], score, places=5)
+        finally:
+            index.close()
+
+    def test_new_logs_indexed_on_write(self):
+        """TC004: 注册RAG后新日志写入即被索引，补齐索引不重复收录"""
+        manager = InteractionLogManager(base_dir=self.tmp.name)
+        manager.log_interaction("分析 gaia benchmark 結果", "analysis done")
+        rag = KiloCodeRAGIntegration(manager)
+        try:
+            self.assertEqual(rag.index_interactions(), 1)
+            log_id = manager.log_interaction("修復 smartui 路由問題", "fixed routing")
+            self.assertEqual(rag.index_interactions(), 0)
+
+            results = rag.search_similar_interactions("smartui 路由", top_k=1)
+            self.assertEqual(results[0]["id"], log_id)
+            self.assertEqual(results[0]["interaction_type"], "debugging")
+        finally:
+            rag.close()
+            manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
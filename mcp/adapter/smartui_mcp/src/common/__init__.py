@@ -46,7 +46,7 @@ from .interfaces import (
 
 # 事件总线
 from .event_bus import (
-    SmartUIEventBus, EventSubscription, EventBusMetrics,
+    SmartUIEventBus, EventSubscription, EventBusMetrics, BackpressurePolicy,
     EventBusFactory, publish_event, subscribe_to_event,
     event_handler, EventHandlerRegistry
 )
@@ -69,7 +69,7 @@ from .communication import (
     PerformanceMetricPayload,
     
     # 消息总线和工厂
-    MessageBus, MessageFactory, MessageHandlerRegistry,
+    MessageBus, MessageCodec, MessageFactory, MessageHandlerRegistry,
     
     # 中间件
     LoggingMiddleware, MetricsMiddleware, ValidationMiddleware,
@@ -123,7 +123,7 @@ __all__ = [
     "SmartUIConstants",
     
     # 事件总线
-    "SmartUIEventBus", "EventSubscription", "EventBusMetrics",
+    "SmartUIEventBus", "EventSubscription", "EventBusMetrics", "BackpressurePolicy",
     "EventBusFactory", "publish_event", "subscribe_to_event",
     "event_handler", "EventHandlerRegistry",
     
@@ -137,7 +137,7 @@ __all__ = [
     "DecisionResponsePayload", "StateRequestPayload", "StateResponsePayload",
     "StateChangeNotificationPayload", "MCPMessageForwardPayload",
     "PerformanceMetricPayload",
-    "MessageBus", "MessageFactory", "MessageHandlerRegistry",
+    "MessageBus", "MessageCodec", "MessageFactory", "MessageHandlerRegistry",
     "LoggingMiddleware", "MetricsMiddleware", "ValidationMiddleware",
     "message_handler",
     
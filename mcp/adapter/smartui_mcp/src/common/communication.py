@@ -5,10 +5,11 @@ SmartUI MCP 组件通信协议
 确保组件间的标准化通信和数据交换。
 """
 
-from typing import Dict, List, Optional, Any, Union, Literal, Callable
-from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Any, Union, Literal, Callable, Tuple
+from pydantic import BaseModel, Field, PrivateAttr, create_model
 from datetime import datetime
 from enum import Enum
+import asyncio
 import uuid
 
 from .ui_models import UIConfiguration, UIComponent
@@ -238,30 +239,40 @@ class ComponentMessage(BaseModel):
     header: MessageHeader
     payload: MessagePayload
     
+    # 已通过 ValidationMiddleware 校验，进程内后续转发不再重复校验
+    _validated: bool = PrivateAttr(default=False)
+    
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
         return {
-            "header": self.header.dict(),
-            "payload": self.payload.dict()
+            "header": self.header.model_dump(),
+            "payload": self.payload.model_dump()
         }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ComponentMessage":
         """从字典创建消息"""
-        header = MessageHeader(**data["header"])
+        header = MessageHeader.model_validate(data["header"])
         
         # 根据消息类型创建相应的载荷
         payload_class = _get_payload_class(header.component_message_type)
-        payload = payload_class(**data["payload"])
+        payload = payload_class.model_validate(data["payload"])
         
-        return cls(header=header, payload=payload)
+        # header/payload 已各自校验，组装时无需再校验一遍
+        return cls.model_construct(header=header, payload=payload)
 
 
 class MessageBus:
-    """消息总线"""
+    """
+    消息总线
+    
+    进程内传递的 ComponentMessage 已在构造时校验，总线直接传递对象本身（不做字典往返）；
+    标记为 trusted_skip 的中间件（如 ValidationMiddleware）对已校验过的消息不再重复执行。
+    字典形式的消息视为外部输入，先经 from_dict 校验。
+    """
     
     def __init__(self):
-        self._handlers: Dict[str, List[Callable]] = {}
+        self._handlers: Dict[Tuple[str, ComponentMessageType], List[Tuple[Callable, bool]]] = {}
         self._middleware: List[Callable] = []
     
     def register_handler(
@@ -271,34 +282,36 @@ class MessageBus:
         handler: Callable[[ComponentMessage], Any]
     ) -> None:
         """注册消息处理器"""
-        key = f"{component_name}:{message_type.value}"
+        key = (component_name, message_type)
         if key not in self._handlers:
             self._handlers[key] = []
-        self._handlers[key].append(handler)
+        self._handlers[key].append((handler, asyncio.iscoroutinefunction(handler)))
     
     def add_middleware(self, middleware: Callable[[ComponentMessage], ComponentMessage]) -> None:
         """添加中间件"""
         self._middleware.append(middleware)
     
-    async def send_message(self, message: ComponentMessage) -> Optional[Any]:
+    async def send_message(self, message: Union[ComponentMessage, Dict[str, Any]]) -> Optional[Any]:
         """发送消息"""
-        # 应用中间件
+        if isinstance(message, dict):
+            message = ComponentMessage.from_dict(message)
+        
+        # 应用中间件，已校验的消息跳过可信中间件
         for middleware in self._middleware:
+            if message._validated and getattr(middleware, "trusted_skip", False):
+                continue
             message = middleware(message)
         
         # 查找处理器
-        target = message.header.target_component
-        message_type = message.header.component_message_type
-        key = f"{target}:{message_type.value}"
-        
-        handlers = self._handlers.get(key, [])
+        header = message.header
+        handlers = self._handlers.get((header.target_component, header.component_message_type))
         if not handlers:
             return None
         
         # 执行处理器
         results = []
-        for handler in handlers:
-            if asyncio.iscoroutinefunction(handler):
+        for handler, is_async in handlers:
+            if is_async:
                 result = await handler(message)
             else:
                 result = handler(message)
@@ -307,6 +320,52 @@ class MessageBus:
         return results[0] if len(results) == 1 else results
 
 
+class MessageCodec:
+    """
+    跨进程消息编解码器
+    
+    编码格式为 ``<component_message_type>|<紧凑JSON>``，JSON 省略等于默认值的字段。
+    每种载荷类型缓存一个以具体载荷类为字段类型的信封模型，
+    编码直接使用其序列化器，解码用 model_validate_json 一次完成解析与校验。
+    """
+    
+    SEPARATOR = b"|"
+    
+    def __init__(self, exclude_defaults: bool = True):
+        self.exclude_defaults = exclude_defaults
+        self._envelopes: Dict[type, type] = {}
+        self._validator = ValidationMiddleware()
+    
+    def _envelope_for(self, payload_class: type) -> type:
+        envelope = self._envelopes.get(payload_class)
+        if envelope is None:
+            envelope = create_model(
+                f"{payload_class.__name__}Envelope",
+                header=(MessageHeader, ...),
+                payload=(payload_class, ...)
+            )
+            self._envelopes[payload_class] = envelope
+        return envelope
+    
+    def encode(self, message: ComponentMessage) -> bytes:
+        """编码消息"""
+        envelope = self._envelope_for(type(message.payload))
+        body = envelope.__pydantic_serializer__.to_json(
+            envelope.model_construct(header=message.header, payload=message.payload),
+            exclude_defaults=self.exclude_defaults
+        )
+        return message.header.component_message_type.value.encode() + self.SEPARATOR + body
+    
+    def decode(self, data: bytes) -> ComponentMessage:
+        """解码并校验消息，返回的消息在本进程内视为已校验"""
+        type_name, _, body = data.partition(self.SEPARATOR)
+        payload_class = _get_payload_class(ComponentMessageType(type_name.decode()))
+        envelope = self._envelope_for(payload_class).model_validate_json(body)
+        
+        message = ComponentMessage.model_construct(header=envelope.header, payload=envelope.payload)
+        return self._validator(message)
+
+
 class MessageFactory:
     """消息工厂"""
     
@@ -429,27 +488,28 @@ class MessageFactory:
         return ComponentMessage(header=header, payload=payload)
 
 
+_PAYLOAD_CLASSES: Dict[ComponentMessageType, type] = {
+    ComponentMessageType.UI_RENDER_REQUEST: UIRenderRequestPayload,
+    ComponentMessageType.UI_RENDER_RESPONSE: UIRenderResponsePayload,
+    ComponentMessageType.UI_UPDATE_REQUEST: UIUpdateRequestPayload,
+    ComponentMessageType.UI_UPDATE_RESPONSE: UIUpdateResponsePayload,
+    ComponentMessageType.UI_COMPONENT_EVENT: UIComponentEventPayload,
+    ComponentMessageType.USER_INTERACTION_DATA: UserInteractionDataPayload,
+    ComponentMessageType.USER_BEHAVIOR_ANALYSIS: UserBehaviorAnalysisPayload,
+    ComponentMessageType.DECISION_REQUEST: DecisionRequestPayload,
+    ComponentMessageType.DECISION_RESPONSE: DecisionResponsePayload,
+    ComponentMessageType.STATE_GET_REQUEST: StateRequestPayload,
+    ComponentMessageType.STATE_SET_REQUEST: StateRequestPayload,
+    ComponentMessageType.STATE_UPDATE_REQUEST: StateRequestPayload,
+    ComponentMessageType.STATE_CHANGE_NOTIFICATION: StateChangeNotificationPayload,
+    ComponentMessageType.MCP_MESSAGE_FORWARD: MCPMessageForwardPayload,
+    ComponentMessageType.PERFORMANCE_METRIC: PerformanceMetricPayload,
+}
+
+
 def _get_payload_class(message_type: ComponentMessageType) -> type:
     """根据消息类型获取载荷类"""
-    payload_mapping = {
-        ComponentMessageType.UI_RENDER_REQUEST: UIRenderRequestPayload,
-        ComponentMessageType.UI_RENDER_RESPONSE: UIRenderResponsePayload,
-        ComponentMessageType.UI_UPDATE_REQUEST: UIUpdateRequestPayload,
-        ComponentMessageType.UI_UPDATE_RESPONSE: UIUpdateResponsePayload,
-        ComponentMessageType.UI_COMPONENT_EVENT: UIComponentEventPayload,
-        ComponentMessageType.USER_INTERACTION_DATA: UserInteractionDataPayload,
-        ComponentMessageType.USER_BEHAVIOR_ANALYSIS: UserBehaviorAnalysisPayload,
-        ComponentMessageType.DECISION_REQUEST: DecisionRequestPayload,
-        ComponentMessageType.DECISION_RESPONSE: DecisionResponsePayload,
-        ComponentMessageType.STATE_GET_REQUEST: StateRequestPayload,
-        ComponentMessageType.STATE_SET_REQUEST: StateRequestPayload,
-        ComponentMessageType.STATE_UPDATE_REQUEST: StateRequestPayload,
-        ComponentMessageType.STATE_CHANGE_NOTIFICATION: StateChangeNotificationPayload,
-        ComponentMessageType.MCP_MESSAGE_FORWARD: MCPMessageForwardPayload,
-        ComponentMessageType.PERFORMANCE_METRIC: PerformanceMetricPayload,
-    }
-    
-    return payload_mapping.get(message_type, MessagePayload)
+    return _PAYLOAD_CLASSES.get(message_type, MessagePayload)
 
 
 # 装饰器
@@ -518,6 +578,9 @@ class MetricsMiddleware:
 class ValidationMiddleware:
     """验证中间件"""
     
+    # 已校验过的消息在进程内转发时由 MessageBus 跳过
+    trusted_skip = True
+    
     def __call__(self, message: ComponentMessage) -> ComponentMessage:
         # 验证消息格式
         if not message.header.source_component:
@@ -526,5 +589,6 @@ class ValidationMiddleware:
         if message.header.message_type == MessageType.REQUEST and not message.header.target_component:
             raise ValueError("Target component is required for request messages")
         
+        message._validated = True
         return message
 
@@ -6,7 +6,10 @@ SmartUI MCP 事件总线系统
 """
 
 import asyncio
+import itertools
 import logging
+import time
+from enum import Enum
 from typing import Dict, List, Optional, Callable, Any
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
@@ -19,6 +22,13 @@ from .interfaces import (
 )
 
 
+class BackpressurePolicy(str, Enum):
+    """订阅者处理积压时的策略"""
+    BLOCK = "block"    # 发布方等待订阅者处理中的事件数降到上限以下
+    DROP = "drop"      # 直接丢弃给该订阅者的事件
+    SAMPLE = "sample"  # 积压期间每 sample_rate 个事件投递一个，其余丢弃
+
+
 class EventSubscription:
     """事件订阅对象"""
     
@@ -28,7 +38,11 @@ class EventSubscription:
         event_type: EventBusEventType,
         handler: EventHandler,
         filter_func: Optional[Callable[[EventBusEvent], bool]] = None,
-        subscriber_name: Optional[str] = None
+        subscriber_name: Optional[str] = None,
+        inline: bool = False,
+        max_pending: int = 1000,
+        backpressure: BackpressurePolicy = BackpressurePolicy.BLOCK,
+        sample_rate: int = 10
     ):
         self.subscription_id = subscription_id
         self.event_type = event_type
@@ -38,6 +52,56 @@ class EventSubscription:
         self.created_at = datetime.now()
         self.last_triggered = None
         self.trigger_count = 0
+        
+        # 廉价处理器在发布方内联执行，不创建任务
+        self.inline = inline
+        self.is_coroutine = asyncio.iscoroutinefunction(handler)
+        
+        # 背压控制
+        self.max_pending = max_pending
+        self.backpressure = BackpressurePolicy(backpressure)
+        self.sample_rate = max(1, sample_rate)
+        self.pending = 0
+        self.dropped_count = 0
+        self._backlogged_events = 0
+        self._slot_released: Optional[asyncio.Event] = None
+    
+    def try_acquire_slot(self) -> bool:
+        """未积压时直接占用名额（无需等待的快路径）"""
+        if self.pending < self.max_pending:
+            self.pending += 1
+            return True
+        return False
+    
+    async def acquire_slot(self) -> bool:
+        """按背压策略申请一个处理名额，返回 False 表示本事件不投递给该订阅者"""
+        if self.pending >= self.max_pending:
+            if self.backpressure == BackpressurePolicy.DROP:
+                self.dropped_count += 1
+                return False
+            if self.backpressure == BackpressurePolicy.SAMPLE:
+                self._backlogged_events += 1
+                if self._backlogged_events % self.sample_rate:
+                    self.dropped_count += 1
+                    return False
+            
+            # BLOCK，以及 SAMPLE 中被采样到的事件：等待名额释放
+            while self.pending >= self.max_pending:
+                if self._slot_released is None:
+                    self._slot_released = asyncio.Event()
+                self._slot_released.clear()
+                await self._slot_released.wait()
+        
+        self.pending += 1
+        return True
+    
+    def release_slot(self) -> None:
+        """释放处理名额"""
+        self.pending -= 1
+        if self.pending < self.max_pending:
+            self._backlogged_events = 0
+            if self._slot_released is not None:
+                self._slot_released.set()
 
 
 class EventBusMetrics:
@@ -49,6 +113,7 @@ class EventBusMetrics:
         self.events_failed = 0
         self.subscriptions_created = 0
         self.subscriptions_removed = 0
+        self.events_dropped = 0
         self.average_processing_time = 0.0
         self.peak_processing_time = 0.0
         self.last_reset = datetime.now()
@@ -59,24 +124,38 @@ class EventBusMetrics:
 
 
 class SmartUIEventBus(IEventBus):
-    """SmartUI事件总线实现"""
+    """
+    SmartUI事件总线实现
+    
+    - 标记为 inline 的廉价处理器在 publish 中直接调用，不创建任务
+    - 其余处理器按订阅的背压策略（block/drop/sample）限制处理中的事件数
+    - 事件历史除全局环形缓冲外，按事件类型和来源维护二级索引，查询代价为 O(limit)
+    """
     
     def __init__(
         self,
         max_history_size: int = 1000,
         cleanup_interval: int = 3600,
-        enable_metrics: bool = True
+        enable_metrics: bool = True,
+        max_pending_per_subscriber: int = 1000,
+        backpressure_policy: BackpressurePolicy = BackpressurePolicy.BLOCK
     ):
         self.max_history_size = max_history_size
         self.cleanup_interval = cleanup_interval
         self.enable_metrics = enable_metrics
+        self.max_pending_per_subscriber = max_pending_per_subscriber
+        self.backpressure_policy = BackpressurePolicy(backpressure_policy)
         
         # 订阅管理
         self._subscriptions: Dict[EventBusEventType, List[EventSubscription]] = defaultdict(list)
         self._subscription_by_id: Dict[str, EventSubscription] = {}
         
-        # 事件历史
+        # 事件历史：全局环形缓冲 + 按类型/来源的二级索引，索引中保存 (序号, 事件)
         self._event_history: deque = deque(maxlen=max_history_size)
+        self._history_seq = itertools.count(1)
+        self._last_seq = 0
+        self._history_by_type: Dict[EventBusEventType, deque] = {}
+        self._history_by_source: Dict[str, deque] = {}
         
         # 性能指标
         self._metrics = EventBusMetrics() if enable_metrics else None
@@ -92,34 +171,57 @@ class SmartUIEventBus(IEventBus):
         if cleanup_interval > 0:
             self._start_cleanup_task()
     
-    async def publish(self, event: EventBusEvent) -> None:
-        """发布事件"""
+    async def publish(self, event: EventBusEvent, wait: bool = True) -> None:
+        """
+        发布事件
+        
+        inline 订阅在此直接执行；其余订阅创建任务处理，wait 为 False 时不等待其完成。
+        """
         try:
             # 记录事件到历史
-            self._event_history.append(event)
+            self._record_history(event)
             
             # 更新指标
             if self._metrics:
                 self._metrics.events_published += 1
             
             # 获取订阅者
-            subscriptions = self._subscriptions.get(event.event_type, [])
+            subscriptions = self._subscriptions.get(event.event_type)
             
             if not subscriptions:
                 self.logger.debug(f"No subscribers for event type: {event.event_type}")
                 return
             
-            # 异步处理所有订阅者
+            # 廉价处理器内联执行，其余处理器按背压策略申请名额后异步处理
             tasks = []
             for subscription in subscriptions:
-                task = asyncio.create_task(
-                    self._process_subscription(event, subscription)
-                )
-                tasks.append(task)
+                if subscription.inline:
+                    await self._process_subscription(event, subscription)
+                    continue
+                
+                if not subscription.try_acquire_slot() and not await subscription.acquire_slot():
+                    if self._metrics:
+                        self._metrics.events_dropped += 1
+                    continue
+                
+                if wait and len(subscriptions) == 1:
+                    # 唯一的订阅者无需单独建任务
+                    await self._process_subscription(event, subscription, release_slot=True)
+                    continue
+                
+                tasks.append(asyncio.create_task(
+                    self._process_subscription(event, subscription, release_slot=True)
+                ))
             
-            # 等待所有任务完成
             if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+                if wait:
+                    # 等待所有任务完成
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                else:
+                    for task in tasks:
+                        task_id = str(id(task))
+                        self._processing_tasks[task_id] = task
+                        task.add_done_callback(lambda _, tid=task_id: self._processing_tasks.pop(tid, None))
             
             self.logger.debug(
                 f"Published event {event.event_type} from {event.source} "
@@ -132,13 +234,43 @@ class SmartUIEventBus(IEventBus):
                 self._metrics.events_failed += 1
             raise
     
+    def _record_history(self, event: EventBusEvent) -> None:
+        """写入全局历史与二级索引，索引中已被全局缓冲淘汰的条目顺带清理"""
+        if self.max_history_size <= 0:
+            return
+        
+        seq = next(self._history_seq)
+        self._last_seq = seq
+        self._event_history.append(event)
+        oldest_seq = seq - len(self._event_history)
+        
+        for index, key in ((self._history_by_type, event.event_type), (self._history_by_source, event.source)):
+            entries = index.get(key)
+            if entries is None:
+                entries = index[key] = deque(maxlen=self.max_history_size)
+            while entries and entries[0][0] <= oldest_seq:
+                entries.popleft()
+            entries.append((seq, event))
+    
+    def _prune_history_indexes(self) -> None:
+        """清理二级索引中已被全局缓冲淘汰的条目和空索引"""
+        oldest_seq = self._last_seq - len(self._event_history)
+        for index in (self._history_by_type, self._history_by_source):
+            for key in list(index):
+                entries = index[key]
+                while entries and entries[0][0] <= oldest_seq:
+                    entries.popleft()
+                if not entries:
+                    del index[key]
+    
     async def _process_subscription(
         self,
         event: EventBusEvent,
-        subscription: EventSubscription
+        subscription: EventSubscription,
+        release_slot: bool = False
     ) -> None:
-        """处理单个订阅"""
-        start_time = datetime.now()
+        """处理单个订阅，release_slot 为 True 时结束后释放背压名额"""
+        start_time = time.perf_counter()
         
         try:
             # 应用过滤器
@@ -146,10 +278,12 @@ class SmartUIEventBus(IEventBus):
                 return
             
             # 调用处理函数
-            if asyncio.iscoroutinefunction(subscription.handler):
+            if subscription.is_coroutine:
                 await subscription.handler(event)
             else:
-                subscription.handler(event)
+                result = subscription.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
             
             # 更新订阅统计
             subscription.last_triggered = datetime.now()
@@ -157,7 +291,7 @@ class SmartUIEventBus(IEventBus):
             
             # 更新指标
             if self._metrics:
-                processing_time = (datetime.now() - start_time).total_seconds()
+                processing_time = time.perf_counter() - start_time
                 self._metrics.events_processed += 1
                 
                 # 更新平均处理时间
@@ -176,15 +310,27 @@ class SmartUIEventBus(IEventBus):
             )
             if self._metrics:
                 self._metrics.events_failed += 1
+        finally:
+            if release_slot:
+                subscription.release_slot()
     
     async def subscribe(
         self,
         event_type: EventBusEventType,
         handler: EventHandler,
         filter_func: Optional[Callable[[EventBusEvent], bool]] = None,
-        subscriber_name: Optional[str] = None
+        subscriber_name: Optional[str] = None,
+        inline: bool = False,
+        max_pending: Optional[int] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
+        sample_rate: int = 10
     ) -> str:
-        """订阅事件"""
+        """
+        订阅事件
+        
+        inline=True 表示处理器足够廉价，可在发布方直接执行；
+        max_pending/backpressure 未指定时使用总线的默认背压设置。
+        """
         subscription_id = str(uuid.uuid4())
         
         subscription = EventSubscription(
@@ -192,11 +338,15 @@ class SmartUIEventBus(IEventBus):
             event_type=event_type,
             handler=handler,
             filter_func=filter_func,
-            subscriber_name=subscriber_name
+            subscriber_name=subscriber_name,
+            inline=inline,
+            max_pending=max_pending if max_pending is not None else self.max_pending_per_subscriber,
+            backpressure=backpressure or self.backpressure_policy,
+            sample_rate=sample_rate
         )
         
-        # 添加到订阅列表
-        self._subscriptions[event_type].append(subscription)
+        # 添加到订阅列表（替换为新列表，正在发布中的遍历不受影响）
+        self._subscriptions[event_type] = self._subscriptions[event_type] + [subscription]
         self._subscription_by_id[subscription_id] = subscription
         
         # 更新指标
@@ -216,10 +366,9 @@ class SmartUIEventBus(IEventBus):
         if not subscription:
             return False
         
-        # 从订阅列表中移除
-        event_subscriptions = self._subscriptions[subscription.event_type]
-        event_subscriptions[:] = [
-            sub for sub in event_subscriptions 
+        # 从订阅列表中移除（替换为新列表，正在发布中的遍历不受影响）
+        self._subscriptions[subscription.event_type] = [
+            sub for sub in self._subscriptions[subscription.event_type]
             if sub.subscription_id != subscription_id
         ]
         
@@ -240,19 +389,34 @@ class SmartUIEventBus(IEventBus):
         source: Optional[str] = None,
         limit: int = 100
     ) -> List[EventBusEvent]:
-        """获取事件历史"""
-        events = list(self._event_history)
+        """获取事件历史（按发布顺序倒序），通过类型/来源索引只读取需要的条目"""
+        if limit <= 0:
+            return []
         
-        # 应用过滤器
-        if event_type:
-            events = [e for e in events if e.event_type == event_type]
+        if not event_type and not source:
+            return list(itertools.islice(reversed(self._event_history), limit))
         
+        # 选择较小的索引遍历，另一个条件在遍历中过滤
+        candidates = []
+        if event_type:
+            candidates.append(self._history_by_type.get(event_type, ()))
         if source:
-            events = [e for e in events if e.source == source]
+            candidates.append(self._history_by_source.get(source, ()))
+        entries = min(candidates, key=len)
         
-        # 按时间倒序排列并限制数量
-        events.sort(key=lambda e: e.timestamp, reverse=True)
-        return events[:limit]
+        oldest_seq = self._last_seq - len(self._event_history)
+        events = []
+        for seq, event in reversed(entries):
+            if seq <= oldest_seq:
+                break
+            if event_type and event.event_type != event_type:
+                continue
+            if source and event.source != source:
+                continue
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events
     
     async def get_subscription_info(self) -> Dict[str, Any]:
         """获取订阅信息"""
@@ -266,7 +430,11 @@ class SmartUIEventBus(IEventBus):
                     "created_at": sub.created_at.isoformat(),
                     "last_triggered": sub.last_triggered.isoformat() if sub.last_triggered else None,
                     "trigger_count": sub.trigger_count,
-                    "has_filter": sub.filter_func is not None
+                    "has_filter": sub.filter_func is not None,
+                    "inline": sub.inline,
+                    "pending": sub.pending,
+                    "backpressure": sub.backpressure.value,
+                    "dropped_count": sub.dropped_count
                 }
                 for sub in subscriptions
             ]
@@ -282,13 +450,16 @@ class SmartUIEventBus(IEventBus):
             "events_published": self._metrics.events_published,
             "events_processed": self._metrics.events_processed,
             "events_failed": self._metrics.events_failed,
+            "events_dropped": self._metrics.events_dropped,
             "subscriptions_created": self._metrics.subscriptions_created,
             "subscriptions_removed": self._metrics.subscriptions_removed,
             "average_processing_time": self._metrics.average_processing_time,
             "peak_processing_time": self._metrics.peak_processing_time,
             "last_reset": self._metrics.last_reset.isoformat(),
             "active_subscriptions": len(self._subscription_by_id),
-            "event_history_size": len(self._event_history)
+            "event_history_size": len(self._event_history),
+            "history_index_keys": len(self._history_by_type) + len(self._history_by_source),
+            "pending_tasks": len(self._processing_tasks)
         }
     
     async def reset_metrics(self) -> None:
@@ -312,8 +483,8 @@ class SmartUIEventBus(IEventBus):
     
     async def _cleanup_old_events(self) -> None:
         """清理旧事件"""
-        # 事件历史已经通过deque的maxlen自动限制
-        # 这里可以添加其他清理逻辑，比如清理失效的订阅等
+        # 事件历史已经通过deque的maxlen自动限制，这里清理二级索引中的过期条目
+        self._prune_history_indexes()
         
         # 清理已完成的处理任务
         completed_tasks = [
@@ -350,6 +521,8 @@ class SmartUIEventBus(IEventBus):
         self._subscriptions.clear()
         self._subscription_by_id.clear()
         self._event_history.clear()
+        self._history_by_type.clear()
+        self._history_by_source.clear()
         self._processing_tasks.clear()
         
         self.logger.info("Event bus shutdown complete")
@@ -429,13 +602,15 @@ async def subscribe_to_event(
 def event_handler(
     event_type: EventBusEventType,
     filter_func: Optional[Callable[[EventBusEvent], bool]] = None,
-    subscriber_name: Optional[str] = None
+    subscriber_name: Optional[str] = None,
+    inline: bool = False
 ):
-    """事件处理器装饰器"""
+    """事件处理器装饰器，inline=True 标记廉价处理器在发布方内联执行"""
     def decorator(func: EventHandler):
         func._event_type = event_type
         func._filter_func = filter_func
         func._subscriber_name = subscriber_name
+        func._inline = inline
         return func
     return decorator
 
@@ -457,7 +632,8 @@ class EventHandlerRegistry:
                     event_type=attr._event_type,
                     handler=attr,
                     filter_func=getattr(attr, '_filter_func', None),
-                    subscriber_name=getattr(attr, '_subscriber_name', None) or f"{handler_object.__class__.__name__}.{attr_name}"
+                    subscriber_name=getattr(attr, '_subscriber_name', None) or f"{handler_object.__class__.__name__}.{attr_name}",
+                    inline=getattr(attr, '_inline', False)
                 )
                 self.registered_handlers.append(subscription_id)
     
@@ -477,6 +653,7 @@ __all__ = [
     'EventBusFactory',
     'EventSubscription',
     'EventBusMetrics',
+    'BackpressurePolicy',
     'publish_event',
     'subscribe_to_event',
     'event_handler',
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+事件总线发布吞吐量与历史查询基准
+
+- 发布吞吐：1/10/100 个订阅者，对比旧实现（每个订阅建任务再 gather）、
+  当前实现的任务路径与 inline 廉价处理器快路径的 events/sec
+- 历史查询：填满历史后按类型/来源取最近 limit 条，对比全量复制过滤排序与二级索引
+- 背压：慢速订阅者在 wait=False 发布下，分别采用 block/drop/sample 策略时的投递与丢弃数
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.common.event_bus_benchmark --events 20000 --history 100000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.common.interfaces import EventBusEvent, EventBusEventType
+from src.common.event_bus import SmartUIEventBus, BackpressurePolicy
+
+EVENT_TYPES = list(EventBusEventType)
+
+
+async def legacy_publish(bus: SmartUIEventBus, event: EventBusEvent) -> None:
+    """旧实现：记录历史后为每个订阅创建任务并 gather"""
+    bus._event_history.append(event)
+    tasks = [asyncio.create_task(bus._process_subscription(event, subscription))
+             for subscription in bus._subscriptions.get(event.event_type, [])]
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def legacy_history(bus: SmartUIEventBus, event_type=None, source=None, limit: int = 100) -> List[EventBusEvent]:
+    """旧实现：复制全部历史后线性过滤并排序"""
+    events = list(bus._event_history)
+    if event_type:
+        events = [e for e in events if e.event_type == event_type]
+    if source:
+        events = [e for e in events if e.source == source]
+    events.sort(key=lambda e: e.timestamp, reverse=True)
+    return events[:limit]
+
+
+async def publish_throughput(subscribers: int, event_count: int) -> Dict[str, Any]:
+    """同一批事件分别走三种发布路径"""
+    event_type = EventBusEventType.USER_INTERACTION
+    events = [EventBusEvent(event_type, {"index": i}, "bench") for i in range(event_count)]
+    counter = {"calls": 0}
+
+    def cheap_handler(event):
+        counter["calls"] += 1
+
+    row = {"subscribers": subscribers}
+    for mode in ("legacy", "tasks", "inline"):
+        bus = SmartUIEventBus(cleanup_interval=0, enable_metrics=False)
+        for _ in range(subscribers):
+            await bus.subscribe(event_type, cheap_handler, inline=(mode == "inline"))
+        counter["calls"] = 0
+        publish = (lambda e: legacy_publish(bus, e)) if mode == "legacy" else bus.publish
+        start = time.perf_counter()
+        for event in events:
+            await publish(event)
+        row[mode] = event_count / (time.perf_counter() - start)
+        if counter["calls"] != subscribers * event_count:
+            raise AssertionError(f"{mode} 投递次数不符")
+        await bus.shutdown()
+    return row
+
+
+async def history_queries(history_size: int, queries: int) -> List[Dict[str, Any]]:
+    rng = random.Random(7)
+    bus = SmartUIEventBus(max_history_size=history_size, cleanup_interval=0, enable_metrics=False)
+    sources = [f"component_{i}" for i in range(500)]
+    for i in range(history_size + history_size // 2):
+        await bus.publish(EventBusEvent(rng.choice(EVENT_TYPES), {"i": i}, rng.choice(sources)))
+
+    rows = []
+    cases = [
+        ("latest", lambda: {}),
+        ("by_type", lambda: {"event_type": rng.choice(EVENT_TYPES)}),
+        ("by_source", lambda: {"source": rng.choice(sources)}),
+        ("type+source", lambda: {"event_type": rng.choice(EVENT_TYPES), "source": rng.choice(sources)}),
+    ]
+    for name, make_args in cases:
+        arg_list = [make_args() for _ in range(queries)]
+        for args in arg_list[:20]:
+            expected = [e.data["i"] for e in legacy_history(bus, **args)]
+            actual = [e.data["i"] for e in await bus.get_event_history(**args)]
+            if expected != actual:
+                raise AssertionError(f"{name} 查询结果不一致")
+
+        legacy_runs = max(1, queries // 20)
+        start = time.perf_counter()
+        for args in arg_list[:legacy_runs]:
+            legacy_history(bus, **args)
+        legacy_ms = (time.perf_counter() - start) * 1000 / legacy_runs
+        start = time.perf_counter()
+        for args in arg_list:
+            await bus.get_event_history(**args)
+        indexed_ms = (time.perf_counter() - start) * 1000 / queries
+        rows.append({"query": name, "legacy_ms": legacy_ms, "indexed_ms": indexed_ms})
+    await bus.shutdown()
+    return rows
+
+
+async def backpressure(event_count: int) -> List[Dict[str, Any]]:
+    """慢速订阅者（每个事件 sleep 1ms），发布方不等待处理完成"""
+    rows = []
+    for policy in BackpressurePolicy:
+        bus = SmartUIEventBus(cleanup_interval=0, max_pending_per_subscriber=100, backpressure_policy=policy)
+        peak = {"pending": 0}
+        delivered = {"count": 0}
+
+        async def slow_handler(event):
+            delivered["count"] += 1
+            await asyncio.sleep(0.001)
+
+        subscription_id = await bus.subscribe(EventBusEventType.PERFORMANCE_METRIC, slow_handler)
+        subscription = bus._subscription_by_id[subscription_id]
+        start = time.perf_counter()
+        for i in range(event_count):
+            await bus.publish(EventBusEvent(EventBusEventType.PERFORMANCE_METRIC, {"i": i}, "bench"), wait=False)
+            peak["pending"] = max(peak["pending"], subscription.pending)
+        publish_seconds = time.perf_counter() - start
+        while bus._processing_tasks:
+            await asyncio.sleep(0.01)
+        rows.append({"policy": policy.value, "publish_ms": publish_seconds * 1000,
+                     "delivered": delivered["count"], "dropped": subscription.dropped_count,
+                     "peak_pending": peak["pending"]})
+        await bus.shutdown()
+    return rows
+
+
+def format_report(throughput_rows, history_rows, backpressure_rows) -> str:
+    lines = ["[发布吞吐 events/sec]",
+             f"{'subscribers':>11} {'legacy':>12} {'tasks':>12} {'inline':>12}"]
+    for row in throughput_rows:
+        lines.append(f"{row['subscribers']:>11} {row['legacy']:>12,.0f} {row['tasks']:>12,.0f} {row['inline']:>12,.0f}")
+    lines += ["", "[历史查询 limit=100]", f"{'query':<12} {'legacy ms':>10} {'indexed ms':>11} {'speedup':>9}"]
+    for row in history_rows:
+        lines.append(f"{row['query']:<12} {row['legacy_ms']:>10.3f} {row['indexed_ms']:>11.4f} "
+                     f"{row['legacy_ms'] / row['indexed_ms']:>8.0f}x")
+    lines += ["", "[背压 max_pending=100]", f"{'policy':<8} {'publish ms':>11} {'delivered':>10} {'dropped':>8} {'peak':>6}"]
+    for row in backpressure_rows:
+        lines.append(f"{row['policy']:<8} {row['publish_ms']:>11.1f} {row['delivered']:>10} "
+                     f"{row['dropped']:>8} {row['peak_pending']:>6}")
+    return "\n".join(lines)
+
+
+async def run_benchmark(event_count: int, history_size: int, queries: int):
+    throughput_rows = [await publish_throughput(n, max(1000, event_count // max(1, n // 10)))
+                       for n in (1, 10, 100)]
+    history_rows = await history_queries(history_size, queries)
+    backpressure_rows = await backpressure(min(event_count, 5000))
+    return throughput_rows, history_rows, backpressure_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="事件总线发布吞吐量与历史查询基准")
+    parser.add_argument("--events", type=int, default=20000, help="每种订阅者规模发布的事件数")
+    parser.add_argument("--history", type=int, default=100000, help="历史容量")
+    parser.add_argument("--queries", type=int, default=1000, help="历史查询次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(*asyncio.run(run_benchmark(args.events, args.history, args.queries))))
+
+
+if __name__ == "__main__":
+    main()
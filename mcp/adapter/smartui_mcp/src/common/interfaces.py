@@ -54,6 +54,7 @@ class EventBusEventType(str, Enum):
     SYSTEM_WARNING = "system_warning"
     SYSTEM_INFO = "system_info"
     PERFORMANCE_METRIC = "performance_metric"
+    CONFIG_UPDATED = "config_updated"
 
 
 class EventBusEvent(object):
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+组件消息传递与编解码基准
+
+对每种载荷类型构造一条典型消息，分别测量 messages/sec 与每条消息的瞬时分配字节数（tracemalloc 峰值）：
+- legacy_hop：旧实现的进程内转发，to_dict + from_dict 重新校验后经 MessageBus 发送
+- trusted：直接发送已校验的消息对象，ValidationMiddleware 只执行一次
+- legacy_wire：旧的跨进程方式，json.dumps(to_dict) + json.loads + from_dict
+- codec：MessageCodec 紧凑 JSON 编码 + model_validate_json 解码
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.common.message_codec_benchmark --iterations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, Any, List, Callable
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.common.ui_models import create_basic_ui_configuration, create_button_component, create_card_component
+from src.common.communication import (
+    ComponentMessage, ComponentMessageType, MessageBus, MessageCodec, MessageHeader, MessageType,
+    LoggingMiddleware, ValidationMiddleware, _get_payload_class,
+    UIRenderRequestPayload, UIRenderResponsePayload, UIUpdateRequestPayload, UIUpdateResponsePayload,
+    UIComponentEventPayload, UserInteractionDataPayload, UserBehaviorAnalysisPayload,
+    DecisionRequestPayload, DecisionResponsePayload, StateRequestPayload, StateChangeNotificationPayload,
+    MCPMessageForwardPayload, PerformanceMetricPayload
+)
+
+
+def sample_messages() -> Dict[str, ComponentMessage]:
+    """每种载荷类型一条典型消息"""
+    ui_configuration = create_basic_ui_configuration(
+        "dashboard",
+        [create_button_component(f"action {i}") for i in range(5)] + [create_card_component(title="summary")]
+    )
+    payloads = {
+        ComponentMessageType.UI_RENDER_REQUEST: UIRenderRequestPayload(ui_configuration=ui_configuration),
+        ComponentMessageType.UI_RENDER_RESPONSE: UIRenderResponsePayload(
+            success=True, rendered_content="<div>" * 20, render_time=0.02),
+        ComponentMessageType.UI_UPDATE_REQUEST: UIUpdateRequestPayload(
+            component_id="button_1", updates={"text": "Save", "disabled": False}),
+        ComponentMessageType.UI_UPDATE_RESPONSE: UIUpdateResponsePayload(success=True, component_id="button_1"),
+        ComponentMessageType.UI_COMPONENT_EVENT: UIComponentEventPayload(
+            component_id="button_1", event_type="click", event_data={"x": 10, "y": 20}),
+        ComponentMessageType.USER_INTERACTION_DATA: UserInteractionDataPayload(
+            user_id="u1", session_id="s1", interaction_type="click", interaction_data={"target": "button_1"}),
+        ComponentMessageType.USER_BEHAVIOR_ANALYSIS: UserBehaviorAnalysisPayload(
+            user_id="u1", analysis_results={"segment": "power"},
+            behavior_patterns=[{"pattern": "shortcut", "count": i} for i in range(5)],
+            recommendations=[{"action": "compact_layout"}], confidence_score=0.8),
+        ComponentMessageType.DECISION_REQUEST: DecisionRequestPayload(
+            decision_context={"page": "dashboard"}, available_actions=["a", "b", "c"]),
+        ComponentMessageType.DECISION_RESPONSE: DecisionResponsePayload(
+            success=True, selected_action="a", confidence_score=0.9, decision_time=0.01),
+        ComponentMessageType.STATE_GET_REQUEST: StateRequestPayload(operation="get", path="ui.theme"),
+        ComponentMessageType.STATE_CHANGE_NOTIFICATION: StateChangeNotificationPayload(
+            path="ui.theme", new_value="dark", old_value="light", change_type="update", change_source="user"),
+        ComponentMessageType.MCP_MESSAGE_FORWARD: MCPMessageForwardPayload(
+            target_mcp_id="mcp_2", original_message={"type": "ping", "data": list(range(10))}),
+        ComponentMessageType.PERFORMANCE_METRIC: PerformanceMetricPayload(
+            metric_name="render_time", metric_value=12.5, metric_unit="ms", component_source="renderer"),
+    }
+    return {
+        message_type.value: ComponentMessage(
+            header=MessageHeader(message_type=MessageType.REQUEST, component_message_type=message_type,
+                                 source_component="bench", target_component="sink"),
+            payload=payload
+        )
+        for message_type, payload in payloads.items()
+    }
+
+
+def legacy_from_dict(data: Dict[str, Any]) -> ComponentMessage:
+    """旧实现：逐层以关键字参数重新构造并校验"""
+    header = MessageHeader(**data["header"])
+    payload = _get_payload_class(header.component_message_type)(**data["payload"])
+    return ComponentMessage(header=header, payload=payload)
+
+
+def build_bus() -> MessageBus:
+    bus = MessageBus()
+    bus.add_middleware(LoggingMiddleware(logging.getLogger("bench")))
+    bus.add_middleware(ValidationMiddleware())
+    for message_type in ComponentMessageType:
+        bus.register_handler("sink", message_type, lambda message: message.header.message_id)
+    return bus
+
+
+def measure(operation: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """返回 messages/sec 与每条消息的瞬时分配字节数"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    rate = iterations / (time.perf_counter() - start)
+
+    samples = min(iterations, 200)
+    tracemalloc.start()
+    total = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        operation()
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return {"rate": rate, "bytes": total / samples}
+
+
+def run_benchmark(iterations: int) -> List[Dict[str, Any]]:
+    loop = asyncio.new_event_loop()
+    codec = MessageCodec()
+    rows = []
+    try:
+        for name, message in sample_messages().items():
+            bus = build_bus()
+            send = lambda m: loop.run_until_complete(bus.send_message(m))
+
+            encoded = codec.encode(message)
+            decoded = codec.decode(encoded)
+            if decoded.header != message.header or decoded.payload != message.payload:
+                raise AssertionError(f"{name} 编解码结果不一致")
+            wire = json.dumps(message.to_dict(), default=str)
+
+            rows.append({
+                "payload": name,
+                "legacy_hop": measure(lambda: send(legacy_from_dict(message.to_dict())), iterations),
+                "trusted": measure(lambda: send(message), iterations),
+                "legacy_wire": measure(
+                    lambda: legacy_from_dict(json.loads(json.dumps(message.to_dict(), default=str))), iterations),
+                "codec": measure(lambda: codec.decode(codec.encode(message)), iterations),
+                "legacy_size": len(wire.encode()),
+                "codec_size": len(encoded),
+            })
+    finally:
+        loop.close()
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    modes = ("legacy_hop", "trusted", "legacy_wire", "codec")
+    lines = ["messages/sec (每条消息分配字节)",
+             f"{'payload':<26}" + "".join(f"{mode:>22}" for mode in modes) + f"{'wire bytes':>16}"]
+    for row in rows:
+        cells = "".join(f"{row[mode]['rate']:>12,.0f} ({row[mode]['bytes']:>6,.0f}B)" for mode in modes)
+        lines.append(f"{row['payload']:<26}{cells}{row['legacy_size']:>8}->{row['codec_size']:<6}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="组件消息传递与编解码基准")
+    parser.add_argument("--iterations", type=int, default=5000, help="每种载荷每种方式的消息数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(run_benchmark(args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
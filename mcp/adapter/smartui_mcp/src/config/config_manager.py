@@ -6,11 +6,13 @@ SmartUI MCP - 配置管理系统
 """
 
 import os
+import copy
+import hashlib
 import yaml
 import json
 import logging
 from typing import Dict, List, Any, Optional, Union, Type, Callable
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields, is_dataclass, replace
 from datetime import datetime
 from pathlib import Path
 from enum import Enum
@@ -220,33 +222,33 @@ class ConfigValidator:
     def __init__(self):
         self.logger = logging.getLogger(f"{__name__}.ConfigValidator")
     
+    # 配置节 -> 验证方法名
+    SECTION_VALIDATORS = {
+        "server": "_validate_server_config",
+        "database": "_validate_database_config",
+        "coordinator": "_validate_coordinator_config",
+        "intelligence": "_validate_intelligence_config",
+        "ui": "_validate_ui_config",
+        "events": "_validate_event_config",
+        "security": "_validate_security_config",
+    }
+    
     def validate_config(self, config: SmartUIConfig) -> List[str]:
         """验证配置"""
         errors = []
         
-        # 验证服务器配置
-        errors.extend(self._validate_server_config(config.server))
-        
-        # 验证数据库配置
-        errors.extend(self._validate_database_config(config.database))
-        
-        # 验证Coordinator配置
-        errors.extend(self._validate_coordinator_config(config.coordinator))
-        
-        # 验证智能组件配置
-        errors.extend(self._validate_intelligence_config(config.intelligence))
-        
-        # 验证UI配置
-        errors.extend(self._validate_ui_config(config.ui))
-        
-        # 验证事件配置
-        errors.extend(self._validate_event_config(config.events))
-        
-        # 验证安全配置
-        errors.extend(self._validate_security_config(config.security))
+        for section in self.SECTION_VALIDATORS:
+            errors.extend(self.validate_section(section, getattr(config, section)))
         
         return errors
     
+    def validate_section(self, section: str, section_config: Any) -> List[str]:
+        """验证单个配置节，没有验证器的配置节视为有效"""
+        validator_name = self.SECTION_VALIDATORS.get(section)
+        if validator_name is None:
+            return []
+        return getattr(self, validator_name)(section_config)
+    
     def _validate_server_config(self, config: ServerConfig) -> List[str]:
         """验证服务器配置"""
         errors = []
@@ -354,23 +356,44 @@ class ConfigValidator:
 
 
 class ConfigFileWatcher(FileSystemEventHandler):
-    """配置文件监控器"""
+    """
+    配置文件监控器
+    
+    watchdog 在自己的观察线程中回调，这里只把重载请求转交给配置管理器所属的事件循环。
+    """
     
     def __init__(self, config_manager: 'ConfigManager'):
         self.config_manager = config_manager
         self.logger = logging.getLogger(f"{__name__}.ConfigFileWatcher")
+        self.watched_path = os.path.abspath(str(config_manager.config_file))
     
     def on_modified(self, event):
         """文件修改事件"""
-        if not event.is_directory and event.src_path == str(self.config_manager.config_file):
-            self.logger.info(f"Config file modified: {event.src_path}")
-            asyncio.create_task(self.config_manager.reload_config())
+        if not event.is_directory and os.path.abspath(event.src_path) == self.watched_path:
+            self.logger.debug(f"Config file modified: {event.src_path}")
+            self.config_manager.schedule_reload()
+    
+    def on_created(self, event):
+        """文件创建事件（部分编辑器删除后重建文件）"""
+        self.on_modified(event)
+    
+    def on_moved(self, event):
+        """文件移动事件（部分编辑器先写临时文件再重命名）"""
+        if not event.is_directory and os.path.abspath(event.dest_path) == self.watched_path:
+            self.logger.debug(f"Config file replaced: {event.dest_path}")
+            self.config_manager.schedule_reload()
 
 
 class ConfigManager:
-    """配置管理器"""
+    """
+    配置管理器
+    
+    文件变化经防抖后才重载：最后一次写入后 reload_debounce 秒内没有新写入才读取文件，
+    内容哈希与上次相同则跳过；否则只重建和验证发生变化的配置节，
+    并按配置节通知回调。
+    """
     
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, reload_debounce: float = 0.2):
         self.logger = logging.getLogger(f"{__name__}.ConfigManager")
         
         # 配置文件路径
@@ -381,7 +404,11 @@ class ConfigManager:
         
         # 配置对象
         self.config: Optional[SmartUIConfig] = None
-        self.config_cache = AsyncCache(default_ttl=300)
+        self.config_cache = AsyncCache(ttl=300)
+        
+        # 当前配置的字典形式与配置文件内容哈希，用于重载时计算变化的配置节
+        self._config_dict: Dict[str, Any] = {}
+        self._file_hash: Optional[str] = None
         
         # 配置验证器
         self.validator = ConfigValidator()
@@ -390,8 +417,23 @@ class ConfigManager:
         self.observer: Optional[Observer] = None
         self.file_watcher: Optional[ConfigFileWatcher] = None
         
+        # 防抖重载
+        self.reload_debounce = reload_debounce
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reload_handle: Optional[asyncio.TimerHandle] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._reload_lock = asyncio.Lock()
+        self.reload_stats: Dict[str, int] = {
+            "requested": 0,
+            "debounced": 0,
+            "skipped_unchanged": 0,
+            "reloads": 0,
+            "failed": 0
+        }
+        
         # 配置更新回调
         self.update_callbacks: List[Callable[[SmartUIConfig], None]] = []
+        self.section_callbacks: Dict[str, List[Callable[[Any], None]]] = {}
         
         self.logger.info(f"Config Manager initialized with file: {self.config_file}")
     
@@ -431,6 +473,7 @@ class ConfigManager:
             # 缓存配置
             await self.config_cache.set("main_config", config)
             self.config = config
+            self._config_dict = asdict(config)
             
             self.logger.info("Configuration loaded successfully")
             return config
@@ -439,45 +482,138 @@ class ConfigManager:
             self.logger.error(f"Error loading configuration: {e}")
             # 返回默认配置
             self.config = SmartUIConfig()
+            self._config_dict = asdict(self.config)
             return self.config
     
-    async def reload_config(self) -> SmartUIConfig:
-        """重新加载配置"""
-        self.logger.info("Reloading configuration...")
-        
-        # 清除缓存
-        await self.config_cache.clear()
-        
-        # 重新加载
-        old_config = self.config
-        new_config = await self.load_config()
-        
-        # 检查配置是否有变化
-        if old_config and asdict(old_config) != asdict(new_config):
-            self.logger.info("Configuration changed, notifying callbacks")
+    async def reload_config(self, force: bool = True) -> SmartUIConfig:
+        """
+        重新加载配置
+        
+        只重建并验证发生变化的配置节；变化的配置节验证失败时保留当前配置。
+        force=False 时配置文件内容哈希未变化则直接返回当前配置。
+        """
+        async with self._reload_lock:
+            content = self._read_config_bytes()
+            content_hash = hashlib.sha256(content).hexdigest() if content is not None else None
+            if not force and self.config is not None and content_hash == self._file_hash:
+                self.reload_stats["skipped_unchanged"] += 1
+                return self.config
+            
+            self.logger.info("Reloading configuration...")
+            
+            # 清除缓存
+            await self.config_cache.clear()
+            
+            if self.config is None:
+                return await self.load_config()
+            
+            # 默认配置 <- 文件 <- 环境变量
+            merged_dict = asdict(SmartUIConfig())
+            for override in (self._parse_config_content(content) if content is not None else None,
+                             self._load_from_environment()):
+                if override:
+                    merged_dict = self._deep_merge(merged_dict, override)
+            self._file_hash = content_hash
+            
+            section_names = [f.name for f in fields(SmartUIConfig)]
+            changed_sections = [name for name in section_names
+                                if merged_dict.get(name) != self._config_dict.get(name)]
+            if not changed_sections:
+                await self.config_cache.set("main_config", self.config)
+                return self.config
+            
+            # 只重建并验证变化的配置节
+            try:
+                updates = {}
+                for section in changed_sections:
+                    current = getattr(self.config, section)
+                    value = copy.deepcopy(merged_dict.get(section))
+                    updates[section] = type(current)(**value) if is_dataclass(current) else value
+                validation_errors = [error for section, value in updates.items()
+                                     for error in self.validator.validate_section(section, value)]
+            except Exception as e:
+                validation_errors = [str(e)]
+            
+            if validation_errors:
+                self.reload_stats["failed"] += 1
+                self.logger.error(f"Config reload rejected, keeping current configuration: {validation_errors}")
+                await self.config_cache.set("main_config", self.config)
+                return self.config
+            
+            old_config = self.config
+            new_config = replace(old_config, **updates)
+            self.config = new_config
+            self._config_dict = merged_dict
+            await self.config_cache.set("main_config", new_config)
+            self.reload_stats["reloads"] += 1
+            
+            self.logger.info(f"Configuration changed in sections {changed_sections}, notifying callbacks")
             
             # 发布配置更新事件
             await publish_event(
                 event_type=EventBusEventType.CONFIG_UPDATED,
                 data={
-                    "old_config": asdict(old_config) if old_config else None,
+                    "changed_sections": changed_sections,
+                    "old_config": asdict(old_config),
                     "new_config": asdict(new_config),
                     "timestamp": datetime.now().isoformat()
                 },
                 source="config_manager"
             )
             
-            # 调用更新回调
+            # 按配置节通知，再通知整体配置回调
+            for section in changed_sections:
+                for callback in self.section_callbacks.get(section, []):
+                    await self._invoke_callback(callback, getattr(new_config, section))
             for callback in self.update_callbacks:
-                try:
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(new_config)
-                    else:
-                        callback(new_config)
-                except Exception as e:
-                    self.logger.error(f"Error in config update callback: {e}")
+                await self._invoke_callback(callback, new_config)
+            
+            return new_config
+    
+    def schedule_reload(self) -> None:
+        """请求一次防抖重载，可以在任意线程中调用"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.logger.warning("Config reload requested but no event loop is attached")
+            return
         
-        return new_config
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is loop:
+            self._debounce_reload()
+        else:
+            loop.call_soon_threadsafe(self._debounce_reload)
+    
+    def _debounce_reload(self) -> None:
+        """在事件循环中执行：重置防抖计时器"""
+        self.reload_stats["requested"] += 1
+        if self._reload_handle is not None:
+            self._reload_handle.cancel()
+            self.reload_stats["debounced"] += 1
+        self._reload_handle = self._loop.call_later(self.reload_debounce, self._start_debounced_reload)
+    
+    def _start_debounced_reload(self) -> None:
+        self._reload_handle = None
+        self._reload_task = self._loop.create_task(self._debounced_reload())
+    
+    async def _debounced_reload(self) -> None:
+        try:
+            await self.reload_config(force=False)
+        except Exception as e:
+            self.logger.error(f"Error reloading configuration: {e}")
+    
+    async def _invoke_callback(self, callback: Callable, *args: Any) -> None:
+        """调用配置更新回调，单个回调出错不影响其他回调"""
+        try:
+            if asyncio.iscoroutinefunction(callback):
+                await callback(*args)
+            else:
+                callback(*args)
+        except Exception as e:
+            self.logger.error(f"Error in config update callback: {e}")
     
     async def save_config(self, config: Optional[SmartUIConfig] = None) -> bool:
         """保存配置"""
@@ -508,9 +644,12 @@ class ConfigManager:
             else:
                 raise ValueError(f"Unsupported config file format: {self.config_file.suffix}")
             
-            # 更新缓存
+            # 更新缓存；记录写入内容的哈希，自身的保存不会再触发一次重载
             await self.config_cache.set("main_config", config)
             self.config = config
+            self._config_dict = config_dict
+            content = self._read_config_bytes()
+            self._file_hash = hashlib.sha256(content).hexdigest() if content is not None else None
             
             self.logger.info(f"Configuration saved to {self.config_file}")
             return True
@@ -521,16 +660,33 @@ class ConfigManager:
     
     async def _load_from_file(self) -> Optional[Dict[str, Any]]:
         """从文件加载配置"""
+        content = self._read_config_bytes()
+        if content is None:
+            return None
+        self._file_hash = hashlib.sha256(content).hexdigest()
+        return self._parse_config_content(content)
+    
+    def _read_config_bytes(self) -> Optional[bytes]:
+        """读取配置文件原始内容，文件不存在时返回None"""
+        try:
+            return self.config_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.error(f"Error reading config file: {e}")
+            return None
+    
+    def _parse_config_content(self, content: bytes) -> Optional[Dict[str, Any]]:
+        """按文件格式解析配置内容"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                if self.config_file.suffix.lower() in ['.yaml', '.yml']:
-                    return yaml.safe_load(f)
-                elif self.config_file.suffix.lower() == '.json':
-                    return json.load(f)
-                else:
-                    self.logger.error(f"Unsupported config file format: {self.config_file.suffix}")
-                    return None
-                    
+            if self.config_file.suffix.lower() in ['.yaml', '.yml']:
+                return yaml.safe_load(content.decode('utf-8'))
+            elif self.config_file.suffix.lower() == '.json':
+                return json.loads(content.decode('utf-8'))
+            else:
+                self.logger.error(f"Unsupported config file format: {self.config_file.suffix}")
+                return None
+                
         except Exception as e:
             self.logger.error(f"Error loading config from file: {e}")
             return None
@@ -624,12 +780,13 @@ class ConfigManager:
         default_config = SmartUIConfig()
         await self.save_config(default_config)
     
-    def start_file_watching(self) -> None:
-        """启动文件监控"""
+    def start_file_watching(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """启动文件监控，重载在 loop（默认为当前运行的事件循环）中执行"""
         try:
             if self.observer is not None:
                 return
             
+            self._loop = loop or asyncio.get_running_loop()
             self.file_watcher = ConfigFileWatcher(self)
             self.observer = Observer()
             self.observer.schedule(
@@ -647,6 +804,10 @@ class ConfigManager:
     def stop_file_watching(self) -> None:
         """停止文件监控"""
         try:
+            if self._reload_handle is not None:
+                self._reload_handle.cancel()
+                self._reload_handle = None
+            
             if self.observer:
                 self.observer.stop()
                 self.observer.join()
@@ -667,6 +828,15 @@ class ConfigManager:
         if callback in self.update_callbacks:
             self.update_callbacks.remove(callback)
     
+    def add_section_callback(self, section: str, callback: Callable[[Any], None]) -> None:
+        """添加配置节更新回调，只在该配置节变化时以新的配置节对象调用"""
+        self.section_callbacks.setdefault(section, []).append(callback)
+    
+    def remove_section_callback(self, section: str, callback: Callable[[Any], None]) -> None:
+        """移除配置节更新回调"""
+        if callback in self.section_callbacks.get(section, []):
+            self.section_callbacks[section].remove(callback)
+    
     async def get_config_section(self, section: str) -> Optional[Any]:
         """获取配置节"""
         if self.config is None:
@@ -710,6 +880,8 @@ class ConfigManager:
             "config_loaded": self.config is not None,
             "file_watching": self.observer is not None and self.observer.is_alive(),
             "update_callbacks": len(self.update_callbacks),
+            "section_callbacks": sum(len(callbacks) for callbacks in self.section_callbacks.values()),
+            "reload_stats": dict(self.reload_stats),
             "cache_size": await self.config_cache.size(),
             "last_modified": self.config_file.stat().st_mtime if self.config_file.exists() else None
         }
@@ -6,8 +6,10 @@ SmartUI MCP - API状态管理器
 """
 
 import asyncio
+import atexit
 import json
 import logging
+import sqlite3
 import time
 from typing import Dict, List, Any, Optional, Union, Callable, Set, Tuple
 from dataclasses import dataclass, asdict
@@ -169,13 +171,211 @@ class StateValidator:
         return len(errors) == 0, errors
 
 
+# 仍有未提交写入可能的存储实例，进程退出时统一提交（弱引用，不阻止回收）
+_live_stores: "weakref.WeakSet[SQLiteStateStore]" = weakref.WeakSet()
+
+
+def _flush_live_stores() -> None:
+    for store in list(_live_stores):
+        try:
+            store.flush()
+        except Exception as e:
+            logging.error(f"Error flushing state store {store.db_path} at exit: {e}")
+
+
+atexit.register(_flush_live_stores)
+
+
+class SQLiteStateStore:
+    """
+    批量提交的 SQLite(WAL) 状态存储
+    
+    写入先按路径合并到内存缓冲区（同一路径只保留最后一次写入），
+    最迟 flush_interval 秒后或缓冲达到 max_batch_size 时在单个事务内提交，
+    同一批次的多个路径要么全部生效要么全部不生效。
+    读取优先查缓冲区；冷启动时 load_all 一次查询恢复整个命名空间。
+    
+    延迟提交任务被取消（如 asyncio.run 结束时）会立即提交；进程退出时提交所有未关闭存储的缓冲区；
+    打开同一数据库文件的新实例前，先提交已有实例的缓冲区。
+    """
+    
+    _DELETED = object()
+    
+    def __init__(self, db_path: Union[str, Path], flush_interval: float = 0.05, max_batch_size: int = 1000):
+        self.db_path = Path(db_path).resolve()
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        
+        # 同一进程内重新打开时，先让已有实例的缓冲写入落盘
+        for store in list(_live_stores):
+            if store.db_path == self.db_path:
+                store.flush()
+        
+        # 自动提交模式，事务由 flush 显式控制
+        self._connection = sqlite3.connect(str(self.db_path), isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS states ("
+            "namespace TEXT NOT NULL, path TEXT NOT NULL, value TEXT NOT NULL, "
+            "metadata TEXT, updated_at TEXT NOT NULL, PRIMARY KEY (namespace, path))"
+        )
+        
+        # 待提交的写入：(namespace, path) -> (value_json, metadata_json, updated_at) 或 _DELETED
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        self.stats: Dict[str, int] = {
+            "writes": 0,
+            "coalesced_writes": 0,
+            "flushes": 0,
+            "committed_rows": 0
+        }
+        _live_stores.add(self)
+    
+    def put(self, namespace: str, path: str, value: Any, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """写入单个路径"""
+        self._stage(namespace, path, value, metadata)
+        self._schedule_flush()
+    
+    def put_many(self, namespace: str, items: Dict[str, Any], metadata: Optional[Dict[str, Dict[str, Any]]] = None) -> None:
+        """写入多个路径，保证它们在同一个事务中提交"""
+        metadata = metadata or {}
+        for path, value in items.items():
+            self._stage(namespace, path, value, metadata.get(path))
+        self._schedule_flush()
+    
+    def delete(self, namespace: str, path: str) -> None:
+        """删除路径"""
+        key = (namespace, path)
+        if key in self._pending:
+            self.stats["coalesced_writes"] += 1
+        self._pending[key] = self._DELETED
+        self.stats["writes"] += 1
+        self._schedule_flush()
+    
+    def get(self, namespace: str, path: str) -> Tuple[bool, Any]:
+        """读取路径，返回 (是否存在, 值)"""
+        pending = self._pending.get((namespace, path))
+        if pending is self._DELETED:
+            return False, None
+        if pending is not None:
+            return True, json.loads(pending[0])
+        
+        row = self._connection.execute(
+            "SELECT value FROM states WHERE namespace = ? AND path = ?", (namespace, path)
+        ).fetchone()
+        if row is None:
+            return False, None
+        return True, json.loads(row[0])
+    
+    def load_all(self, namespace: str) -> Dict[str, Any]:
+        """一次查询读取命名空间下的全部状态"""
+        self.flush()
+        rows = self._connection.execute("SELECT path, value FROM states WHERE namespace = ?", (namespace,))
+        return {path: json.loads(value) for path, value in rows}
+    
+    def flush(self) -> int:
+        """在单个事务内提交缓冲区，返回提交的路径数"""
+        if not self._pending:
+            return 0
+        
+        batch, self._pending = self._pending, {}
+        upserts = [(namespace, path) + record for (namespace, path), record in batch.items()
+                   if record is not self._DELETED]
+        deletes = [key for key, record in batch.items() if record is self._DELETED]
+        
+        try:
+            self._connection.execute("BEGIN")
+            if upserts:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO states (namespace, path, value, metadata, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)", upserts
+                )
+            if deletes:
+                self._connection.executemany("DELETE FROM states WHERE namespace = ? AND path = ?", deletes)
+            self._connection.execute("COMMIT")
+        except Exception:
+            if self._connection.in_transaction:
+                self._connection.execute("ROLLBACK")
+            # 放回缓冲区，期间的新写入优先
+            batch.update(self._pending)
+            self._pending = batch
+            raise
+        
+        self.stats["flushes"] += 1
+        self.stats["committed_rows"] += len(batch)
+        return len(batch)
+    
+    def close(self) -> None:
+        """提交剩余写入并关闭连接"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self.flush()
+        self._connection.close()
+        _live_stores.discard(self)
+    
+    def _stage(self, namespace: str, path: str, value: Any, metadata: Optional[Dict[str, Any]]) -> None:
+        key = (namespace, path)
+        if key in self._pending:
+            self.stats["coalesced_writes"] += 1
+        self._pending[key] = (
+            json.dumps(value, default=str),
+            json.dumps(metadata, default=str) if metadata is not None else None,
+            datetime.now().isoformat()
+        )
+        self.stats["writes"] += 1
+    
+    def _schedule_flush(self) -> None:
+        """缓冲已满或不允许延迟时立即提交，否则保证 flush_interval 内有一次提交"""
+        if len(self._pending) >= self.max_batch_size or self.flush_interval <= 0:
+            self.flush()
+            return
+        
+        if self._flush_task is None or self._flush_task.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # 没有事件循环时无法延迟提交
+                self.flush()
+                return
+            self._flush_task = loop.create_task(self._delayed_flush())
+    
+    async def _delayed_flush(self) -> None:
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            # 事件循环结束时任务被取消，同样提交缓冲区，避免已确认的写入丢失
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error flushing state store {self.db_path}: {e}")
+
+
 class StatePersistence:
     """状态持久化管理器"""
     
-    def __init__(self, base_path: Optional[str] = None):
+    # 落盘的持久化类型对应的存储命名空间
+    STORE_NAMESPACES = {
+        StatePersistenceType.FILE: StatePersistenceType.FILE.value,
+        StatePersistenceType.LOCAL_STORAGE: StatePersistenceType.LOCAL_STORAGE.value,
+    }
+    
+    def __init__(
+        self,
+        base_path: Optional[str] = None,
+        flush_interval: float = 0.05,
+        max_batch_size: int = 1000
+    ):
         self.base_path = Path(base_path) if base_path else Path.cwd() / "state_data"
         self.base_path.mkdir(exist_ok=True)
         
+        db_path = self.base_path / "state.db"
+        is_new_store = not db_path.exists()
+        self.store = SQLiteStateStore(db_path, flush_interval, max_batch_size)
+        if is_new_store:
+            self._import_legacy_files()
+        
         self.persistence_handlers: Dict[StatePersistenceType, Callable] = {
             StatePersistenceType.MEMORY: self._handle_memory_persistence,
             StatePersistenceType.FILE: self._handle_file_persistence,
@@ -200,6 +400,29 @@ class StatePersistence:
             logging.error(f"Error saving state {path}: {e}")
             return False
     
+    async def save_states(
+        self,
+        states: Dict[str, Any],
+        persistence_type: StatePersistenceType,
+        metadata: Optional[Dict[str, StateMetadata]] = None
+    ) -> bool:
+        """保存多个状态，落盘类型保证在同一个事务中提交"""
+        metadata = metadata or {}
+        namespace = self.STORE_NAMESPACES.get(persistence_type)
+        if namespace is None:
+            results = [await self.save_state(path, value, persistence_type, metadata.get(path))
+                       for path, value in states.items()]
+            return all(results)
+        
+        try:
+            self.store.put_many(namespace, states, {
+                path: vars(meta) for path, meta in metadata.items() if meta is not None
+            })
+            return True
+        except Exception as e:
+            logging.error(f"Error saving states {list(states)[:5]}: {e}")
+            return False
+    
     async def load_state(
         self,
         path: str,
@@ -216,6 +439,17 @@ class StatePersistence:
             logging.error(f"Error loading state {path}: {e}")
             return False, None
     
+    async def load_all_states(self, persistence_type: StatePersistenceType) -> Dict[str, Any]:
+        """冷启动恢复：读取某种持久化类型的全部状态"""
+        namespace = self.STORE_NAMESPACES.get(persistence_type)
+        if namespace is None:
+            return {}
+        try:
+            return self.store.load_all(namespace)
+        except Exception as e:
+            logging.error(f"Error loading {persistence_type.value} states: {e}")
+            return {}
+    
     async def delete_state(
         self,
         path: str,
@@ -232,6 +466,38 @@ class StatePersistence:
             logging.error(f"Error deleting state {path}: {e}")
             return False
     
+    def flush(self) -> int:
+        """立即提交缓冲的写入"""
+        return self.store.flush()
+    
+    def close(self) -> None:
+        """提交剩余写入并关闭存储"""
+        self.store.close()
+    
+    def _import_legacy_files(self) -> None:
+        """导入旧版每个路径一个JSON文件的持久化数据（文件保留不删除）"""
+        legacy_states: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        legacy_metadata: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        for file_path in self.base_path.glob("*.json"):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                name = file_path.stem
+                if name.startswith("localStorage_"):
+                    namespace, path = StatePersistenceType.LOCAL_STORAGE.value, name[len("localStorage_"):]
+                else:
+                    namespace, path = StatePersistenceType.FILE.value, name
+                legacy_states[namespace][path] = data["value"]
+                legacy_metadata[namespace][path] = data.get("metadata")
+            except Exception as e:
+                logging.error(f"Error importing legacy state file {file_path}: {e}")
+        
+        for namespace, states in legacy_states.items():
+            self.store.put_many(namespace, states, legacy_metadata[namespace])
+        if legacy_states:
+            self.store.flush()
+            logging.info(f"Imported {sum(map(len, legacy_states.values()))} legacy state files into {self.store.db_path}")
+    
     async def _handle_memory_persistence(
         self,
         operation: str,
@@ -254,44 +520,32 @@ class StatePersistence:
         operation: str,
         path: str,
         value: Any,
-        metadata: StateMetadata
+        metadata: StateMetadata,
+        namespace: str = StatePersistenceType.FILE.value
     ) -> Union[bool, Tuple[bool, Any]]:
-        """处理文件持久化"""
-        file_path = self.base_path / f"{path.replace('/', '_')}.json"
-        
+        """处理文件持久化：写入合并后批量提交到 SQLite 存储"""
         if operation == "save":
             try:
-                data = {
-                    "value": value,
-                    "metadata": asdict(metadata),
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str)
+                # 元数据字段都是可直接序列化的简单值，入缓冲时即序列化，无需 asdict 深拷贝
+                self.store.put(namespace, path, value, vars(metadata) if metadata is not None else None)
                 return True
             except Exception as e:
-                logging.error(f"Error saving to file {file_path}: {e}")
+                logging.error(f"Error saving state {path} to {self.store.db_path}: {e}")
                 return False
         
         elif operation == "load":
             try:
-                if file_path.exists():
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                    return True, data["value"]
-                return False, None
+                return self.store.get(namespace, path)
             except Exception as e:
-                logging.error(f"Error loading from file {file_path}: {e}")
+                logging.error(f"Error loading state {path} from {self.store.db_path}: {e}")
                 return False, None
         
         elif operation == "delete":
             try:
-                if file_path.exists():
-                    file_path.unlink()
+                self.store.delete(namespace, path)
                 return True
             except Exception as e:
-                logging.error(f"Error deleting file {file_path}: {e}")
+                logging.error(f"Error deleting state {path} from {self.store.db_path}: {e}")
                 return False
         
         return False
@@ -306,7 +560,9 @@ class StatePersistence:
         """处理本地存储持久化"""
         # 这里应该与前端的localStorage交互
         # 在服务器端，我们可以模拟或使用文件系统
-        return await self._handle_file_persistence(operation, f"localStorage_{path}", value, metadata)
+        return await self._handle_file_persistence(
+            operation, path, value, metadata, namespace=StatePersistenceType.LOCAL_STORAGE.value
+        )
     
     async def _handle_session_storage_persistence(
         self,
@@ -322,12 +578,32 @@ class StatePersistence:
 
 
 class StateComputer:
-    """状态计算器"""
+    """
+    状态计算器
+    
+    维护显式的依赖DAG：普通状态每次变化递增其版本号，计算状态记录上次计算时各输入的版本。
+    mark_dirty 沿DAG按拓扑顺序传播脏标记（每个节点只访问一次）；
+    compute_state 先计算依赖再计算自身，输入版本与上次相同时直接复用缓存值，
+    因此一批变化之后每个计算状态最多重新计算一次，且不会读到过期的中间值。
+    计算结果与上次相等时不递增版本，下游节点随之命中缓存。
+    """
     
     def __init__(self):
         self.computed_states: Dict[str, Dict[str, Any]] = {}
         self.dependency_graph: Dict[str, Set[str]] = defaultdict(set)
         self.reverse_dependency_graph: Dict[str, Set[str]] = defaultdict(set)
+        
+        # 被计算状态依赖的普通状态的版本号
+        self.source_versions: Dict[str, int] = defaultdict(int)
+        
+        # 拓扑顺序缓存，注册/注销时失效
+        self._topological_order: Optional[Dict[str, int]] = None
+        
+        self.stats: Dict[str, int] = {
+            "recomputations": 0,
+            "memo_hits": 0,
+            "dirty_marks": 0
+        }
     
     def register_computed_state(
         self,
@@ -337,19 +613,31 @@ class StateComputer:
         cache: bool = True
     ) -> None:
         """注册计算状态"""
+        if path in dependencies or any(self._depends_on(dep, path) for dep in dependencies):
+            raise ValueError(f"Circular dependency for computed state: {path}")
+        
+        if path in self.computed_states:
+            self.unregister_computed_state(path)
+        
         self.computed_states[path] = {
             "dependencies": dependencies,
             "compute_func": compute_func,
+            "is_coroutine": asyncio.iscoroutinefunction(compute_func),
             "cache": cache,
             "cached_value": None,
+            "has_value": False,
             "last_computed": None,
-            "dirty": True
+            "dirty": True,
+            "version": 0,
+            "input_versions": None
         }
         
         # 更新依赖图
         for dep in dependencies:
             self.dependency_graph[dep].add(path)
             self.reverse_dependency_graph[path].add(dep)
+        
+        self._topological_order = None
     
     def unregister_computed_state(self, path: str) -> None:
         """取消注册计算状态"""
@@ -361,48 +649,149 @@ class StateComputer:
                 self.reverse_dependency_graph[path].discard(dep)
             
             del self.computed_states[path]
+            self._topological_order = None
+    
+    def _depends_on(self, path: str, target: str) -> bool:
+        """path 是否（直接或间接）依赖 target"""
+        stack, seen = [path], set()
+        while stack:
+            current = stack.pop()
+            if current == target:
+                return True
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.reverse_dependency_graph.get(current, ()))
+        return False
+    
+    def _get_topological_order(self) -> Dict[str, int]:
+        """计算状态的拓扑序号（依赖在前）"""
+        if self._topological_order is None:
+            order: Dict[str, int] = {}
+            
+            def visit(node: str) -> None:
+                stack = [(node, iter(self.computed_states[node]["dependencies"]))]
+                while stack:
+                    current, deps = stack[-1]
+                    for dep in deps:
+                        if dep in self.computed_states and dep not in order:
+                            stack.append((dep, iter(self.computed_states[dep]["dependencies"])))
+                            break
+                    else:
+                        stack.pop()
+                        order.setdefault(current, len(order))
+            
+            for node in self.computed_states:
+                if node not in order:
+                    visit(node)
+            self._topological_order = order
+        return self._topological_order
     
     def mark_dirty(self, path: str) -> Set[str]:
-        """标记状态为脏数据"""
-        dirty_paths = set()
+        """状态变化：递增版本号，并把所有下游计算状态标记为脏（每个节点只访问一次）"""
+        if path not in self.computed_states and path in self.dependency_graph:
+            self.source_versions[path] += 1
         
-        # 标记所有依赖此状态的计算状态为脏
-        for computed_path in self.dependency_graph[path]:
-            if computed_path in self.computed_states:
-                self.computed_states[computed_path]["dirty"] = True
-                dirty_paths.add(computed_path)
-                
-                # 递归标记
-                dirty_paths.update(self.mark_dirty(computed_path))
+        dirty_paths = set()
+        stack = list(self.dependency_graph.get(path, ()))
+        while stack:
+            computed_path = stack.pop()
+            if computed_path in dirty_paths or computed_path not in self.computed_states:
+                continue
+            self.computed_states[computed_path]["dirty"] = True
+            dirty_paths.add(computed_path)
+            stack.extend(self.dependency_graph.get(computed_path, ()))
         
+        self.stats["dirty_marks"] += len(dirty_paths)
         return dirty_paths
     
+    def get_dirty_paths(self) -> List[str]:
+        """按拓扑顺序返回当前的脏计算状态"""
+        order = self._get_topological_order()
+        return sorted(
+            (path for path, info in self.computed_states.items() if info["dirty"]),
+            key=order.__getitem__
+        )
+    
+    async def recompute_dirty(self, state_manager) -> Dict[str, Any]:
+        """按拓扑顺序一次性重新计算所有脏计算状态，每个节点最多计算一次"""
+        fresh: Dict[str, Any] = {}
+        for path in self.get_dirty_paths():
+            fresh[path] = await self._compute_node(path, state_manager, fresh)
+        return fresh
+    
+    def _stale_upstream(self, path: str) -> List[str]:
+        """path 及其需要重新计算的上游计算状态，按拓扑顺序排列"""
+        stale, stack = set(), [path]
+        while stack:
+            current = stack.pop()
+            if current in stale:
+                continue
+            stale.add(current)
+            for dep in self.computed_states[current]["dependencies"]:
+                info = self.computed_states.get(dep)
+                # 干净的节点其上游必然也是干净的（mark_dirty 会标记全部下游）
+                if info is not None and (info["dirty"] or not info["has_value"] or not info["cache"]):
+                    stack.append(dep)
+        order = self._get_topological_order()
+        return sorted(stale, key=order.__getitem__)
+    
     async def compute_state(self, path: str, state_manager) -> Any:
-        """计算状态值"""
+        """计算状态值：先按拓扑顺序计算过期的上游节点，再计算自身"""
         if path not in self.computed_states:
             raise ValueError(f"Computed state not registered: {path}")
         
         computed_info = self.computed_states[path]
         
         # 检查缓存
-        if computed_info["cache"] and not computed_info["dirty"] and computed_info["cached_value"] is not None:
+        if computed_info["cache"] and not computed_info["dirty"] and computed_info["has_value"]:
             return computed_info["cached_value"]
         
-        # 获取依赖值
+        fresh: Dict[str, Any] = {}
+        for node in self._stale_upstream(path):
+            fresh[node] = await self._compute_node(node, state_manager, fresh)
+        return fresh[path]
+    
+    async def _compute_node(self, path: str, state_manager, fresh: Dict[str, Any]) -> Any:
+        """计算单个节点，其计算状态依赖均已是最新值"""
+        computed_info = self.computed_states[path]
+        
+        # 获取依赖值，同时记录输入版本
         dependency_values = {}
+        input_versions = []
         for dep_path in computed_info["dependencies"]:
-            dependency_values[dep_path] = await state_manager.get_state(dep_path)
+            dep_info = self.computed_states.get(dep_path)
+            if dep_info is not None:
+                dependency_values[dep_path] = fresh[dep_path] if dep_path in fresh else dep_info["cached_value"]
+                input_versions.append(dep_info["version"])
+            else:
+                dependency_values[dep_path] = await state_manager.get_state(dep_path)
+                input_versions.append(self.source_versions.get(dep_path, 0))
+        input_versions = tuple(input_versions)
+        
+        # 输入版本未变化时复用上次结果
+        if computed_info["cache"] and computed_info["has_value"] and computed_info["input_versions"] == input_versions:
+            computed_info["dirty"] = False
+            self.stats["memo_hits"] += 1
+            return computed_info["cached_value"]
         
         # 计算新值
         try:
-            if asyncio.iscoroutinefunction(computed_info["compute_func"]):
+            if computed_info["is_coroutine"]:
                 new_value = await computed_info["compute_func"](dependency_values)
             else:
                 new_value = computed_info["compute_func"](dependency_values)
+            self.stats["recomputations"] += 1
+            
+            # 结果变化时才递增版本，下游据此判断是否需要重新计算
+            if not computed_info["has_value"] or computed_info["cached_value"] != new_value:
+                computed_info["version"] += 1
             
             # 更新缓存
             if computed_info["cache"]:
                 computed_info["cached_value"] = new_value
+                computed_info["has_value"] = True
+                computed_info["input_versions"] = input_versions
                 computed_info["dirty"] = False
             
             computed_info["last_computed"] = datetime.now()
@@ -438,7 +827,11 @@ class SmartUIApiStateManager(IApiStateManager):
         
         # 子组件
         self.validator = StateValidator()
-        self.persistence = StatePersistence(self.config.get("persistence_path"))
+        self.persistence = StatePersistence(
+            self.config.get("persistence_path"),
+            flush_interval=self.config.get("persistence_flush_interval", 0.05),
+            max_batch_size=self.config.get("persistence_max_batch_size", 1000)
+        )
         self.computer = StateComputer()
         
         # 缓存和锁
@@ -1121,6 +1514,20 @@ class SmartUIApiStateManager(IApiStateManager):
         if component_id:
             await self.delete_state(f"ui.components.{component_id}", "system")
     
+    async def restore_persisted_states(self) -> int:
+        """冷启动时从持久化存储恢复落盘的状态，返回恢复的路径数"""
+        restored = 0
+        for persistence_type in StatePersistence.STORE_NAMESPACES:
+            states = await self.persistence.load_all_states(persistence_type)
+            for path, value in states.items():
+                self._set_nested_value(self.state_data, path, value)
+            restored += len(states)
+        
+        if restored:
+            await self.state_cache.clear()
+            self.logger.info(f"Restored {restored} persisted states")
+        return restored
+    
     async def get_performance_metrics(self) -> Dict[str, Any]:
         """获取性能指标"""
         return {
@@ -1128,6 +1535,8 @@ class SmartUIApiStateManager(IApiStateManager):
             "watchers_count": len(self.watchers),
             "bindings_count": len(self.bindings),
             "computed_states_count": len(self.computer.computed_states),
+            "computed_state_stats": dict(self.computer.stats),
+            "persistence_stats": dict(self.persistence.store.stats),
             "change_history_size": len(self.change_history),
             "cache_hit_rate": getattr(self.state_cache, "hit_rate", 0.0),
             "performance_metrics": dict(self.performance_metrics)
@@ -1145,11 +1554,19 @@ class SmartUIApiStateManager(IApiStateManager):
         await self.state_cache.clear()
         cleanup_stats["cleared_cache_entries"] = 1
         
+        # 提交缓冲的持久化写入
+        cleanup_stats["flushed_persisted_states"] = self.persistence.flush()
+        
         # 清理过期的监听器（这里可以添加更复杂的逻辑）
         # 清理过期的绑定
         
         self.logger.info(f"Cleanup completed: {cleanup_stats}")
         return cleanup_stats
+    
+    def close(self) -> None:
+        """提交缓冲的持久化写入并关闭存储"""
+        self.persistence.close()
+        self.logger.info("SmartUI API State Manager closed")
 
 
 # 导出主要类
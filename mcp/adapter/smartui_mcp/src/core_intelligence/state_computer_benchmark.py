@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+计算状态依赖图基准
+
+在深链、宽扇出、菱形格与截断（上游结果不变）四种计算状态图上，
+每轮修改源状态后读取汇点，对比旧 StateComputer 与增量依赖DAG实现的
+单轮耗时、计算函数调用次数和脏标记访问次数，并校验读取结果一致。
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.core_intelligence.state_computer_benchmark --rounds 200
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Tuple
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core_intelligence.api_state_manager import StateComputer
+
+
+class LegacyStateComputer:
+    """旧实现：递归标记脏数据，依赖集合整体重算"""
+
+    def __init__(self):
+        self.computed_states: Dict[str, Dict[str, Any]] = {}
+        self.dependency_graph = defaultdict(set)
+        self.stats = {"dirty_marks": 0}
+
+    def register_computed_state(self, path, dependencies, compute_func, cache=True):
+        self.computed_states[path] = {"dependencies": dependencies, "compute_func": compute_func,
+                                      "cache": cache, "cached_value": None, "last_computed": None, "dirty": True}
+        for dep in dependencies:
+            self.dependency_graph[dep].add(path)
+
+    def mark_dirty(self, path):
+        dirty_paths = set()
+        for computed_path in self.dependency_graph[path]:
+            if computed_path in self.computed_states:
+                self.stats["dirty_marks"] += 1
+                self.computed_states[computed_path]["dirty"] = True
+                dirty_paths.add(computed_path)
+                dirty_paths.update(self.mark_dirty(computed_path))
+        return dirty_paths
+
+    async def compute_state(self, path, state_manager):
+        info = self.computed_states[path]
+        if info["cache"] and not info["dirty"] and info["cached_value"] is not None:
+            return info["cached_value"]
+        values = {dep: await state_manager.get_state(dep) for dep in info["dependencies"]}
+        if asyncio.iscoroutinefunction(info["compute_func"]):
+            new_value = await info["compute_func"](values)
+        else:
+            new_value = info["compute_func"](values)
+        if info["cache"]:
+            info["cached_value"] = new_value
+            info["dirty"] = False
+        info["last_computed"] = datetime.now()
+        return new_value
+
+
+class DictStateManager:
+    """最小状态管理器：普通状态存字典，计算状态委托给计算器（与 SmartUIApiStateManager.get_state 一致）"""
+
+    def __init__(self, computer):
+        self.computer = computer
+        self.data: Dict[str, Any] = {}
+
+    async def get_state(self, path: str) -> Any:
+        if path in self.computer.computed_states:
+            return await self.computer.compute_state(path, self)
+        return self.data.get(path)
+
+    def set_state(self, path: str, value: Any) -> None:
+        self.data[path] = value
+        self.computer.mark_dirty(path)
+
+
+def counted(func: Callable, counter: Dict[str, int]) -> Callable:
+    def wrapper(values):
+        counter["calls"] += 1
+        return func(values)
+    return wrapper
+
+
+def deep_chain(computer, counter, depth: int = 200) -> Tuple[List[str], List[str]]:
+    previous = "src.0"
+    for i in range(depth):
+        path = f"chain.{i}"
+        computer.register_computed_state(path, [previous], counted(lambda v, p=previous: v[p] + 1, counter))
+        previous = path
+    return ["src.0"], [previous]
+
+
+def wide_fanout(computer, counter, width: int = 1000) -> Tuple[List[str], List[str]]:
+    for i in range(width):
+        computer.register_computed_state(f"wide.{i}", ["src.0"], counted(lambda v, i=i: v["src.0"] * i, counter))
+    deps = [f"wide.{i}" for i in range(width)]
+    computer.register_computed_state("wide.sum", deps, counted(lambda v: sum(v.values()), counter))
+    return ["src.0"], ["wide.sum"]
+
+
+def diamond_lattice(computer, counter, layers: int = 14) -> Tuple[List[str], List[str]]:
+    previous = ["src.0", "src.1"]
+    for layer in range(layers):
+        current = [f"diamond.{layer}.{k}" for k in range(2)]
+        for k, path in enumerate(current):
+            computer.register_computed_state(
+                path, list(previous), counted(lambda v, k=k: sum(v.values()) + k, counter))
+        previous = current
+    computer.register_computed_state("diamond.sink", previous, counted(lambda v: sum(v.values()), counter))
+    return ["src.0", "src.1"], ["diamond.sink"]
+
+
+def cutoff_chain(computer, counter, depth: int = 200) -> Tuple[List[str], List[str]]:
+    computer.register_computed_state("clamp", ["src.0"], counted(lambda v: min(v["src.0"], 10), counter))
+    previous = "clamp"
+    for i in range(depth):
+        path = f"after_clamp.{i}"
+        computer.register_computed_state(path, [previous], counted(lambda v, p=previous: v[p] + 1, counter))
+        previous = path
+    return ["src.0"], [previous]
+
+
+GRAPHS = {"deep_chain": deep_chain, "wide_fanout": wide_fanout,
+          "diamond_lattice": diamond_lattice, "cutoff_chain": cutoff_chain}
+
+
+async def run_graph(name: str, computer_class, rounds: int) -> Dict[str, Any]:
+    counter = {"calls": 0}
+    computer = computer_class()
+    sources, sinks = GRAPHS[name](computer, counter)
+    manager = DictStateManager(computer)
+    for source in sources:
+        manager.set_state(source, 1)
+    for sink in sinks:
+        await manager.get_state(sink)
+
+    counter["calls"] = 0
+    dirty_before = computer.stats["dirty_marks"]
+    results = []
+    start = time.perf_counter()
+    for round_index in range(rounds):
+        # 一轮内修改全部源状态后再读取
+        for source in sources:
+            manager.set_state(source, 20 + round_index)
+        results.append([await manager.get_state(sink) for sink in sinks])
+    elapsed = time.perf_counter() - start
+    dirty_after = computer.stats["dirty_marks"]
+    return {"graph": name, "nodes": len(computer.computed_states), "ms_per_round": elapsed * 1000 / rounds,
+            "calls_per_round": counter["calls"] / rounds, "dirty_per_round": (dirty_after - dirty_before) / rounds,
+            "results": results}
+
+
+async def run_benchmark(rounds: int) -> List[Dict[str, Any]]:
+    rows = []
+    for name in GRAPHS:
+        legacy = await run_graph(name, LegacyStateComputer, rounds)
+        incremental = await run_graph(name, StateComputer, rounds)
+        if legacy["results"] != incremental["results"]:
+            raise AssertionError(f"{name} 计算结果不一致")
+        rows.append({"graph": name, "nodes": legacy["nodes"], "legacy": legacy, "incremental": incremental})
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'graph':<16} {'nodes':>6} {'legacy ms':>10} {'dag ms':>9} {'legacy calls':>13} "
+             f"{'dag calls':>10} {'legacy dirty':>13} {'dag dirty':>10}"]
+    for row in rows:
+        legacy, incremental = row["legacy"], row["incremental"]
+        lines.append(f"{row['graph']:<16} {row['nodes']:>6} {legacy['ms_per_round']:>10.3f} "
+                     f"{incremental['ms_per_round']:>9.3f} {legacy['calls_per_round']:>13.1f} "
+                     f"{incremental['calls_per_round']:>10.1f} {legacy['dirty_per_round']:>13.0f} "
+                     f"{incremental['dirty_per_round']:>10.0f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="计算状态依赖图基准")
+    parser.add_argument("--rounds", type=int, default=200, help="每种图的更新轮数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(asyncio.run(run_benchmark(args.rounds))))
+
+
+if __name__ == "__main__":
+    main()
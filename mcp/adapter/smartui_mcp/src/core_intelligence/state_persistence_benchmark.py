@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+状态持久化写入/恢复基准
+
+对比旧实现（每个路径一个 indent=2 JSON 文件，每次变化立即整文件重写）
+与 SQLite(WAL) 批量提交存储：
+- 写入：每个路径写一次（冷写入）与少量热点路径被反复写入（写风暴）的 writes/sec
+- 恢复：重新打开持久化目录并读出全部路径的耗时
+并校验两种方式恢复出的状态完全一致。
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.core_intelligence.state_persistence_benchmark --paths 100000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import tempfile
+import time
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.core_intelligence.api_state_manager import (
+    StatePersistence, StatePersistenceType, StateMetadata, StateAccessLevel
+)
+
+
+class LegacyFilePersistence:
+    """旧实现：每个路径一个JSON文件"""
+
+    def __init__(self, base_path: Path):
+        self.base_path = base_path
+
+    def save(self, path: str, value: Any, metadata: StateMetadata) -> None:
+        data = {"value": value, "metadata": asdict(metadata), "timestamp": datetime.now().isoformat()}
+        with open(self.base_path / f"{path.replace('/', '_')}.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=str)
+
+    def load_all(self) -> Dict[str, Any]:
+        states = {}
+        for file_path in self.base_path.glob("*.json"):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                states[file_path.stem] = json.load(f)["value"]
+        return states
+
+
+def sample_metadata() -> StateMetadata:
+    return StateMetadata(
+        created_at=datetime.now(), updated_at=datetime.now(), version=1,
+        access_level=StateAccessLevel.PUBLIC, persistence_type=StatePersistenceType.FILE,
+        tags=["ui"], description="benchmark state"
+    )
+
+
+def generate_writes(path_count: int, hot_writes: int, seed: int = 7):
+    """冷写入：每个路径一次；热点写入：集中在100个路径上"""
+    rng = random.Random(seed)
+    paths = [f"ui.components.component_{i}.props" for i in range(path_count)]
+    cold = [(path, {"visible": True, "index": i, "label": f"item {i}"}) for i, path in enumerate(paths)]
+    hot_paths = paths[:100]
+    hot = [(rng.choice(hot_paths), {"visible": bool(i % 2), "index": i, "label": f"hot {i}"})
+           for i in range(hot_writes)]
+    return cold, hot
+
+
+async def run_store(base_path: Path, cold, hot, metadata: StateMetadata) -> Dict[str, Any]:
+    persistence = StatePersistence(str(base_path))
+    timings = {}
+    for name, writes in (("cold", cold), ("hot", hot)):
+        start = time.perf_counter()
+        for path, value in writes:
+            await persistence.save_state(path, value, StatePersistenceType.FILE, metadata)
+        persistence.flush()
+        timings[name] = len(writes) / (time.perf_counter() - start)
+    stats = dict(persistence.store.stats)
+    persistence.close()
+
+    start = time.perf_counter()
+    restored_persistence = StatePersistence(str(base_path))
+    states = await restored_persistence.load_all_states(StatePersistenceType.FILE)
+    restore_ms = (time.perf_counter() - start) * 1000
+    restored_persistence.close()
+    return {"mode": "sqlite_wal", "cold": timings["cold"], "hot": timings["hot"], "restore_ms": restore_ms,
+            "commits": stats["flushes"], "states": states}
+
+
+def run_legacy(base_path: Path, cold, hot, metadata: StateMetadata) -> Dict[str, Any]:
+    persistence = LegacyFilePersistence(base_path)
+    timings = {}
+    for name, writes in (("cold", cold), ("hot", hot)):
+        start = time.perf_counter()
+        for path, value in writes:
+            persistence.save(path, value, metadata)
+        timings[name] = len(writes) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    states = LegacyFilePersistence(base_path).load_all()
+    restore_ms = (time.perf_counter() - start) * 1000
+    return {"mode": "legacy_files", "cold": timings["cold"], "hot": timings["hot"], "restore_ms": restore_ms,
+            "commits": len(cold) + len(hot), "states": states}
+
+
+def run_benchmark(path_count: int, hot_writes: int) -> List[Dict[str, Any]]:
+    cold, hot = generate_writes(path_count, hot_writes)
+    metadata = sample_metadata()
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as store_dir:
+        legacy = run_legacy(Path(legacy_dir), cold, hot, metadata)
+        store = asyncio.run(run_store(Path(store_dir), cold, hot, metadata))
+    if legacy["states"] != store["states"]:
+        raise AssertionError("恢复出的状态不一致")
+    return [legacy, store]
+
+
+def format_report(rows: List[Dict[str, Any]], path_count: int, hot_writes: int) -> str:
+    lines = [f"路径数 {path_count:,}，热点写入 {hot_writes:,}",
+             f"{'mode':<14} {'cold writes/s':>14} {'hot writes/s':>13} {'commits':>9} {'restore ms':>11}"]
+    for row in rows:
+        lines.append(f"{row['mode']:<14} {row['cold']:>14,.0f} {row['hot']:>13,.0f} "
+                     f"{row['commits']:>9,} {row['restore_ms']:>11.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="状态持久化写入/恢复基准")
+    parser.add_argument("--paths", type=int, default=100000, help="持久化路径数")
+    parser.add_argument("--hot-writes", type=int, default=50000, help="热点路径写入次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(run_benchmark(args.paths, args.hot_writes), args.paths, args.hot_writes))
+
+
+if __name__ == "__main__":
+    main()
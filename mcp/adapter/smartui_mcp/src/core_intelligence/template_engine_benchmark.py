@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+模板引擎查找/应用基准
+
+注册指定数量的模板（预设1万个），条件覆盖设备类型、页面类型、用户角色，
+并混入一部分无法索引的条件，对比：
+- 模板查找：旧实现逐个 eval 全部模板条件 vs 条件索引 + 预编译条件
+- 变量替换：每次遍历整个配置查找占位符 vs 预计算的替换槽位
+并校验两种查找返回的模板序列完全一致。
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.core_intelligence.template_engine_benchmark --templates 10000
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.common import create_basic_ui_configuration, create_button_component, create_card_component
+from src.core_intelligence.ui_generator import TemplateEngine, UITemplate, GenerationContext
+
+DEVICE_TYPES = ["mobile", "tablet", "desktop", "tv", "watch"]
+PAGE_TYPES = [f"page_{i}" for i in range(200)]
+ROLES = ["admin", "developer", "analyst", "guest"]
+CATEGORIES = ["dashboard", "form", "list", "detail"]
+
+
+def build_templates(count: int, seed: int = 7) -> List[UITemplate]:
+    """生成模板：约95%可索引条件，5%依赖意图数量等无法索引的条件"""
+    rng = random.Random(seed)
+    templates = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            conditions = {"page": f"context.current_ui_state.get('page_type') == '{rng.choice(PAGE_TYPES)}'"}
+        elif kind < 0.7:
+            conditions = {"device": f"context.device_info.get('type') == '{rng.choice(DEVICE_TYPES)}'",
+                          "page": f"context.current_ui_state.get('page_type') == '{rng.choice(PAGE_TYPES)}'"}
+        elif kind < 0.95:
+            conditions = {"role": f"user_profile.get('role') in ('{rng.choice(ROLES)}', 'owner_{i}')",
+                          "page": f"context.current_ui_state.get('page_type') == '{rng.choice(PAGE_TYPES)}'"}
+        else:
+            conditions = {"intents": f"len(intents) > {rng.randrange(3)}"}
+
+        components = [
+            create_button_component(f"${{user_name}} action {j}", on_click=f"click_{j}")
+            for j in range(3)
+        ] + [create_card_component(title="Welcome ${user_name}", content=f"card {i} on ${{device_type}}")]
+        templates.append(UITemplate(
+            template_id=f"template_{i}",
+            name=f"template {i}",
+            description="benchmark template",
+            category=rng.choice(CATEGORIES),
+            base_configuration=create_basic_ui_configuration(f"${{user_role}} view {i}", components),
+            variables={},
+            conditions=conditions,
+            tags=rng.sample(["compact", "rich", "dark", "touch", "a11y"], rng.randrange(4)),
+            created_at=datetime.now()
+        ))
+    return templates
+
+
+def random_context(rng: random.Random, index: int) -> GenerationContext:
+    return GenerationContext(
+        context_id=f"bench_context_{index}",
+        user_profile={"name": "Alice", "role": rng.choice(ROLES)},
+        device_info={"type": rng.choice(DEVICE_TYPES)},
+        current_ui_state={"page_type": rng.choice(PAGE_TYPES)},
+        user_intents=[{"intent_type": "view"}] * rng.randrange(3),
+        performance_constraints={},
+        accessibility_requirements=[],
+        business_goals=[],
+        timestamp=datetime.now()
+    )
+
+
+def legacy_find(engine: TemplateEngine, context: GenerationContext) -> List[UITemplate]:
+    """旧实现：逐个模板 eval 条件字符串"""
+    safe_dict = {
+        "context": context,
+        "user_profile": context.user_profile,
+        "device_info": context.device_info,
+        "intents": context.user_intents,
+        "len": len,
+        "any": any,
+        "all": all,
+    }
+    matching = []
+    for template in engine.templates.values():
+        if all(eval(expr, {"__builtins__": {}}, safe_dict) for expr in template.conditions.values()):
+            matching.append(template)
+    matching.sort(key=lambda t: len(t.tags), reverse=True)
+    return matching
+
+
+def timed(func, repeat: int) -> float:
+    """返回平均每次耗时(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(template_count: int, queries: int) -> List[Dict[str, Any]]:
+    engine = TemplateEngine()
+    templates = build_templates(template_count)
+    start = time.perf_counter()
+    for template in templates:
+        engine.register_template(template)
+    register_us = (time.perf_counter() - start) / template_count * 1e6
+
+    rng = random.Random(11)
+    contexts = [random_context(rng, i) for i in range(queries)]
+
+    async def indexed_find(context):
+        # 每个上下文ID不同，绕过结果缓存，测量的是实际查找
+        return await engine.find_templates(context)
+
+    loop = asyncio.new_event_loop()
+    try:
+        for context in contexts[:max(1, queries // 10)]:
+            expected = [t.template_id for t in legacy_find(engine, context)]
+            actual = [t.template_id for t in loop.run_until_complete(indexed_find(context))]
+            if expected != actual:
+                raise AssertionError(f"查找结果不一致: {context.context_id}")
+
+        legacy_iter = iter(contexts)
+        indexed_iter = iter(contexts)
+        rows = [{
+            "operation": "find_templates",
+            "legacy_ms": timed(lambda: legacy_find(engine, next(legacy_iter)), max(1, queries // 10)),
+            "indexed_ms": timed(lambda: loop.run_until_complete(indexed_find(next(indexed_iter))), queries),
+        }]
+
+        template = templates[0]
+        contexts[0].device_info = {"type": "desktop"}
+        plan = engine.compiled_templates[template.template_id].substitution_plan
+        variables = engine._extract_context_variables(contexts[0])
+        config = template.base_configuration.model_copy(deep=True)
+        rows.append({
+            "operation": "variable_substitution",
+            "legacy_ms": timed(lambda: engine._apply_variable_substitution(
+                config, variables, engine._build_substitution_plan(config)), queries),
+            "indexed_ms": timed(lambda: engine._apply_variable_substitution(config, variables, plan), queries),
+            "note": f"{len(plan)} 个槽位",
+        })
+        rows.append({
+            "operation": "apply_template",
+            "legacy_ms": None,
+            "indexed_ms": timed(lambda: loop.run_until_complete(
+                engine.apply_template(template, contexts[0])), queries),
+            "note": "含配置深拷贝与上下文优化",
+        })
+    finally:
+        loop.close()
+
+    for row in rows:
+        row["templates"] = template_count
+        row["register_us"] = register_us
+        row["indexed_slots"] = len(engine.condition_index)
+        row["unindexed"] = len(engine.unindexed_templates)
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化基准结果"""
+    first = rows[0]
+    lines = [f"模板数 {first['templates']:,}，单个注册 {first['register_us']:.1f}us，"
+             f"索引槽位 {first['indexed_slots']}，未索引模板 {first['unindexed']}",
+             f"{'operation':<24} {'legacy ms':>12} {'indexed ms':>12} {'speedup':>10}"]
+    for row in rows:
+        if row["legacy_ms"] is None:
+            line = f"{row['operation']:<24} {'-':>12} {row['indexed_ms']:>12.4f} {'-':>10}"
+        else:
+            line = (f"{row['operation']:<24} {row['legacy_ms']:>12.3f} {row['indexed_ms']:>12.4f} "
+                    f"{row['legacy_ms'] / row['indexed_ms']:>9.1f}x")
+        if row.get("note"):
+            line += f"  ({row['note']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模板引擎查找/应用基准")
+    parser.add_argument("--templates", type=int, default=10000, help="注册模板数")
+    parser.add_argument("--queries", type=int, default=1000, help="查找次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(run_benchmark(args.templates, args.queries)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,9 +5,12 @@ SmartUI MCP - UI生成器
 动态生成和优化用户界面配置。
 """
 
+import ast
 import asyncio
+import itertools
 import json
 import logging
+import re
 import time
 from typing import Dict, List, Any, Optional, Union, Callable, Tuple
 from dataclasses import dataclass, asdict
@@ -119,16 +122,56 @@ class GenerationResult:
             self.result_id = generate_id("gen_result_")
 
 
+_PLACEHOLDER_PATTERN = re.compile(r"\$\{(\w+)\}")
+
+# 可建立索引的条件来源：条件表达式中的名称 -> GenerationContext 属性
+_INDEXABLE_SOURCES = {
+    ("context", "device_info"): "device_info",
+    ("device_info",): "device_info",
+    ("context", "current_ui_state"): "current_ui_state",
+    ("context", "user_profile"): "user_profile",
+    ("user_profile",): "user_profile",
+}
+
+_MISSING = object()
+
+
+@dataclass
+class CompiledTemplate:
+    """预编译的模板：编译后的条件、索引槽位和变量替换计划"""
+    seq: int
+    conditions: List[Any]
+    index_slot: Optional[Tuple]
+    index_values: Tuple
+    substitution_plan: List[Tuple[Tuple, List[Tuple[str, Optional[str]]]]]
+
+
 class TemplateEngine:
-    """模板引擎"""
+    """
+    模板引擎
+    
+    注册时预编译模板：条件表达式只编译一次，并从形如
+    ``device_info.get('type') == 'mobile'`` 或 ``... in ('a', 'b')`` 的条件中提取索引槽位，
+    查找时只评估索引命中的模板和无法索引的模板；
+    基础配置中含 ``${var}`` 的字符串位置预先记录为替换计划，应用时只处理这些槽位。
+    """
     
     def __init__(self):
         self.templates: Dict[str, UITemplate] = {}
         self.template_categories: Dict[str, List[str]] = {}
         self.template_cache = AsyncCache(max_size=100, ttl=1800)  # 30分钟缓存
+        
+        # 预编译结果与条件索引：slot -> 条件值 -> 模板ID集合
+        self.compiled_templates: Dict[str, CompiledTemplate] = {}
+        self.condition_index: Dict[Tuple, Dict[Any, set]] = {}
+        self.unindexed_templates: set = set()
+        self._template_seq = itertools.count()
     
     def register_template(self, template: UITemplate) -> None:
         """注册模板"""
+        if template.template_id in self.templates:
+            self.unregister_template(template.template_id)
+        
         self.templates[template.template_id] = template
         
         # 更新分类索引
@@ -136,6 +179,147 @@ class TemplateEngine:
         if category not in self.template_categories:
             self.template_categories[category] = []
         self.template_categories[category].append(template.template_id)
+        
+        # 预编译并加入条件索引
+        compiled = self._compile_template(template)
+        self.compiled_templates[template.template_id] = compiled
+        if compiled.index_slot is None:
+            self.unindexed_templates.add(template.template_id)
+        else:
+            buckets = self.condition_index.setdefault(compiled.index_slot, {})
+            for value in compiled.index_values:
+                buckets.setdefault(value, set()).add(template.template_id)
+    
+    def _compile_template(self, template: UITemplate) -> CompiledTemplate:
+        """编译条件、提取索引槽位、生成替换计划"""
+        conditions = []
+        index_slot, index_values = None, ()
+        for condition_name, condition_expr in (template.conditions or {}).items():
+            try:
+                tree = ast.parse(condition_expr, mode="eval")
+                conditions.append(compile(tree, f"<template {template.template_id}:{condition_name}>", "eval"))
+            except SyntaxError as e:
+                logging.error(f"Error compiling template condition {condition_name}: {e}")
+                conditions.append(None)  # 评估时视为不满足
+                continue
+            if index_slot is None:
+                index_slot, index_values = self._extract_index_slot(tree.body)
+        
+        return CompiledTemplate(
+            seq=next(self._template_seq),
+            conditions=conditions,
+            index_slot=index_slot,
+            index_values=index_values,
+            substitution_plan=self._build_substitution_plan(template.base_configuration)
+        )
+    
+    @classmethod
+    def _extract_index_slot(cls, node: ast.AST) -> Tuple[Optional[Tuple], Tuple]:
+        """从条件（或 and 连接的某一项）中识别 来源取值 == 常量 / in 常量集合"""
+        if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+            for value in node.values:
+                slot, values = cls._extract_index_slot(value)
+                if slot is not None:
+                    return slot, values
+            return None, ()
+        
+        if not (isinstance(node, ast.Compare) and len(node.ops) == 1):
+            return None, ()
+        left, op, right = node.left, node.ops[0], node.comparators[0]
+        if isinstance(op, ast.Eq) and isinstance(left, ast.Constant):
+            left, right = right, left
+        
+        slot = cls._slot_of(left)
+        if slot is None:
+            return None, ()
+        
+        if isinstance(op, ast.Eq) and isinstance(right, ast.Constant):
+            values = (right.value,)
+        elif isinstance(op, ast.In) and isinstance(right, (ast.Tuple, ast.List, ast.Set)) \
+                and all(isinstance(e, ast.Constant) for e in right.elts):
+            values = tuple(e.value for e in right.elts)
+        else:
+            return None, ()
+        
+        try:
+            for value in values:
+                hash(value)
+        except TypeError:
+            return None, ()
+        return slot, values
+    
+    @staticmethod
+    def _slot_of(node: ast.AST) -> Optional[Tuple]:
+        """识别 source.get('key'[, 常量默认值]) 或 source['key']，返回 (来源, 键, 方式, 默认值)"""
+        def source_name(expr):
+            parts = []
+            while isinstance(expr, ast.Attribute):
+                parts.append(expr.attr)
+                expr = expr.value
+            if isinstance(expr, ast.Name):
+                parts.append(expr.id)
+                return _INDEXABLE_SOURCES.get(tuple(reversed(parts)))
+            return None
+        
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "get" \
+                and not node.keywords and 1 <= len(node.args) <= 2 \
+                and all(isinstance(arg, ast.Constant) for arg in node.args):
+            source = source_name(node.func.value)
+            if source is None:
+                return None
+            default = node.args[1].value if len(node.args) == 2 else None
+            try:
+                hash(default)
+            except TypeError:
+                return None
+            return (source, node.args[0].value, "get", default)
+        
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+            source = source_name(node.value)
+            if source is None:
+                return None
+            return (source, node.slice.value, "item", None)
+        
+        return None
+    
+    @staticmethod
+    def _slot_value(context: GenerationContext, slot: Tuple) -> Any:
+        source, key, mode, default = slot
+        mapping = getattr(context, source, None)
+        if not isinstance(mapping, dict):
+            return _MISSING
+        if mode == "get":
+            return mapping.get(key, default)
+        return mapping.get(key, _MISSING)
+    
+    @staticmethod
+    def _build_substitution_plan(ui_config: Any) -> List[Tuple[Tuple, List[Tuple[str, Optional[str]]]]]:
+        """记录所有含 ${var} 的字符串位置：(路径, [(字面量, 变量名), ...])"""
+        plan = []
+        
+        def walk(value, path):
+            if isinstance(value, str):
+                if "${" not in value:
+                    return
+                pieces, position = [], 0
+                for match in _PLACEHOLDER_PATTERN.finditer(value):
+                    pieces.append((value[position:match.start()], match.group(1)))
+                    position = match.end()
+                if pieces:
+                    pieces.append((value[position:], None))
+                    plan.append((path, pieces))
+            elif isinstance(value, dict):
+                for key, item in value.items():
+                    walk(item, path + (("key", key),))
+            elif isinstance(value, list):
+                for index, item in enumerate(value):
+                    walk(item, path + (("index", index),))
+            elif hasattr(type(value), "model_fields"):
+                for name in type(value).model_fields:
+                    walk(getattr(value, name, None), path + (("attr", name),))
+        
+        walk(ui_config, ())
+        return plan
     
     def unregister_template(self, template_id: str) -> bool:
         """取消注册模板"""
@@ -151,8 +335,37 @@ class TemplateEngine:
                 del self.template_categories[template.category]
         
         del self.templates[template_id]
+        
+        # 从条件索引中移除
+        compiled = self.compiled_templates.pop(template_id, None)
+        self.unindexed_templates.discard(template_id)
+        if compiled and compiled.index_slot is not None:
+            buckets = self.condition_index.get(compiled.index_slot, {})
+            for value in compiled.index_values:
+                bucket = buckets.get(value)
+                if bucket is not None:
+                    bucket.discard(template_id)
+                    if not bucket:
+                        del buckets[value]
+            if not buckets:
+                self.condition_index.pop(compiled.index_slot, None)
         return True
     
+    def _candidate_template_ids(self, context: GenerationContext) -> set:
+        """按条件索引取候选模板：每个槽位只查一次上下文取值对应的桶"""
+        candidates = set(self.unindexed_templates)
+        for slot, buckets in self.condition_index.items():
+            value = self._slot_value(context, slot)
+            if value is _MISSING:
+                continue
+            try:
+                bucket = buckets.get(value)
+            except TypeError:
+                continue
+            if bucket:
+                candidates.update(bucket)
+        return candidates
+    
     async def find_templates(
         self,
         context: GenerationContext,
@@ -169,10 +382,12 @@ class TemplateEngine:
         
         matching_templates = []
         
-        for template in self.templates.values():
-            # 分类过滤
-            if category and template.category != category:
-                continue
+        candidate_ids = self._candidate_template_ids(context)
+        if category:
+            candidate_ids.intersection_update(self.template_categories.get(category, ()))
+        
+        for template_id in candidate_ids:
+            template = self.templates[template_id]
             
             # 标签过滤
             if tags and not any(tag in template.tags for tag in tags):
@@ -182,8 +397,10 @@ class TemplateEngine:
             if self._evaluate_template_conditions(template, context):
                 matching_templates.append(template)
         
-        # 按优先级排序（这里可以添加更复杂的排序逻辑）
-        matching_templates.sort(key=lambda t: len(t.tags), reverse=True)
+        # 按优先级排序（这里可以添加更复杂的排序逻辑），同优先级保持注册顺序
+        matching_templates.sort(
+            key=lambda t: (-len(t.tags), self.compiled_templates[t.template_id].seq)
+        )
         
         # 缓存结果
         await self.template_cache.set(cache_key, matching_templates)
@@ -197,8 +414,8 @@ class TemplateEngine:
         variables: Optional[Dict[str, Any]] = None
     ) -> UIConfiguration:
         """应用模板"""
-        # 合并变量
-        template_variables = copy.deepcopy(template.variables)
+        # 合并变量（替换时只读取取值的字符串形式，无需深拷贝）
+        template_variables = dict(template.variables)
         if variables:
             template_variables.update(variables)
         
@@ -210,7 +427,10 @@ class TemplateEngine:
         ui_config = copy.deepcopy(template.base_configuration)
         
         # 应用变量替换
-        ui_config = self._apply_variable_substitution(ui_config, template_variables)
+        compiled = self.compiled_templates.get(template.template_id)
+        if compiled is None:
+            compiled = self._compile_template(template)
+        ui_config = self._apply_variable_substitution(ui_config, template_variables, compiled.substitution_plan)
         
         # 应用上下文优化
         ui_config = await self._apply_context_optimizations(ui_config, context)
@@ -226,6 +446,9 @@ class TemplateEngine:
         if not template.conditions:
             return True
         
+        compiled = self.compiled_templates.get(template.template_id)
+        conditions = compiled.conditions if compiled else list(template.conditions.values())
+        
         try:
             # 构建安全的评估环境
             safe_dict = {
@@ -239,8 +462,10 @@ class TemplateEngine:
             }
             
             # 评估所有条件
-            for condition_name, condition_expr in template.conditions.items():
-                result = eval(condition_expr, {"__builtins__": {}}, safe_dict)
+            for condition in conditions:
+                if condition is None:
+                    return False
+                result = eval(condition, {"__builtins__": {}}, safe_dict)
                 if not result:
                     return False
             
@@ -297,34 +522,29 @@ class TemplateEngine:
     def _apply_variable_substitution(
         self,
         ui_config: UIConfiguration,
-        variables: Dict[str, Any]
+        variables: Dict[str, Any],
+        plan: Optional[List[Tuple[Tuple, List[Tuple[str, Optional[str]]]]]] = None
     ) -> UIConfiguration:
-        """应用变量替换"""
-        # 这里应该实现递归的变量替换逻辑
-        # 简化实现，只处理字符串类型的替换
-        
-        def substitute_value(value):
-            if isinstance(value, str):
-                # 简单的变量替换 ${variable_name}
-                for var_name, var_value in variables.items():
-                    placeholder = f"${{{var_name}}}"
-                    if placeholder in value:
-                        value = value.replace(placeholder, str(var_value))
-                return value
-            elif isinstance(value, dict):
-                return {k: substitute_value(v) for k, v in value.items()}
-            elif isinstance(value, list):
-                return [substitute_value(item) for item in value]
+        """按替换计划只改写含 ${variable_name} 的槽位，未知变量保留原占位符"""
+        if plan is None:
+            plan = self._build_substitution_plan(ui_config)
+        
+        for path, pieces in plan:
+            parts = []
+            for literal, var_name in pieces:
+                parts.append(literal)
+                if var_name is not None:
+                    parts.append(str(variables[var_name]) if var_name in variables else f"${{{var_name}}}")
+            
+            target = ui_config
+            for kind, step in path[:-1]:
+                target = getattr(target, step) if kind == "attr" else target[step]
+            kind, step = path[-1]
+            if kind == "attr":
+                setattr(target, step, "".join(parts))
             else:
-                return value
-        
-        # 应用替换
-        config_dict = asdict(ui_config)
-        substituted_dict = substitute_value(config_dict)
+                target[step] = "".join(parts)
         
-        # 重新构建UIConfiguration对象
-        # 这里需要更复杂的逻辑来正确重建对象
-        # 简化实现，直接返回原配置
         return ui_config
     
     async def _apply_context_optimizations(
@@ -6,6 +6,8 @@ SmartUI MCP - 响应式组件系统
 """
 
 import asyncio
+import heapq
+import itertools
 import logging
 import time
 import weakref
@@ -177,8 +179,8 @@ class ReactiveComponent(IReactiveComponent):
             self.lifecycle_state = ComponentState.ERROR
             return False
     
-    async def update(self, changes: Dict[str, Any]) -> bool:
-        """更新组件"""
+    async def update(self, changes: Dict[str, Any], propagate_to_children: bool = True) -> bool:
+        """更新组件，propagate_to_children 为 False 时由调用方负责调度子组件更新"""
         try:
             async with self.update_lock:
                 if not self.is_mounted:
@@ -217,7 +219,8 @@ class ReactiveComponent(IReactiveComponent):
                 await self._render()
                 
                 # 更新子组件
-                await self._update_children(changes)
+                if propagate_to_children:
+                    await self._update_children(changes)
                 
                 # 执行更新后钩子
                 await self._after_update(changes)
@@ -412,6 +415,15 @@ class ReactiveComponent(IReactiveComponent):
             if child_changes:
                 await child.update(child_changes)
     
+    def get_depth(self) -> int:
+        """组件在树中的深度，根组件为0"""
+        depth = 0
+        node = self.parent
+        while node is not None:
+            depth += 1
+            node = node.parent
+        return depth
+    
     def _filter_changes_for_child(
         self,
         child: 'ReactiveComponent',
@@ -589,7 +601,14 @@ class ComponentRegistry:
 
 
 class ReactiveComponentSystem:
-    """响应式组件系统"""
+    """
+    响应式组件系统
+    
+    update_component 不直接排队渲染协程，而是把变更按组件合并到待刷新表中；
+    更新处理器在一个刷新窗口（update_flush_window，默认一帧）内收集变更，
+    再按树深度从父到子批量渲染，父组件传递给子组件的变更也并入同一批次，
+    因此每次刷新中每个脏组件最多渲染一次。
+    """
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
@@ -598,16 +617,26 @@ class ReactiveComponentSystem:
         # 组件注册表
         self.registry = ComponentRegistry()
         
-        # 更新队列
+        # 更新队列：按组件去重的脏组件ID，合并后的变更保存在 pending_updates 中
         self.update_queue: asyncio.Queue = asyncio.Queue()
         self.update_processor_task: Optional[asyncio.Task] = None
+        self.pending_updates: Dict[str, Dict[str, Any]] = {}
+        self.flush_window = self.config.get("update_flush_window", 0.016)
+        self._pending_since: Optional[float] = None
         
         # 性能监控
         self.performance_metrics: Dict[str, Any] = {
             "total_components": 0,
             "active_components": 0,
             "total_updates": 0,
-            "average_update_time": 0.0
+            "average_update_time": 0.0,
+            "coalesced_updates": 0,
+            "renders": 0,
+            "renders_saved": 0,
+            "flushes": 0,
+            "last_flush_latency": 0.0,
+            "max_flush_latency": 0.0,
+            "total_flush_latency": 0.0
         }
         
         # 事件处理器注册
@@ -624,22 +653,90 @@ class ReactiveComponentSystem:
             self.update_processor_task = asyncio.create_task(self._process_updates())
     
     async def _process_updates(self) -> None:
-        """处理更新队列"""
+        """处理更新队列：等待一个刷新窗口收集变更后批量刷新"""
         while True:
+            batch_size = 0
             try:
-                # 从队列获取更新任务
-                update_task = await self.update_queue.get()
+                # 等待第一个脏组件
+                await self.update_queue.get()
+                batch_size = 1
                 
-                # 执行更新
-                await update_task
+                # 在刷新窗口内继续收集变更
+                if self.flush_window > 0:
+                    await asyncio.sleep(self.flush_window)
+                while not self.update_queue.empty():
+                    self.update_queue.get_nowait()
+                    batch_size += 1
                 
-                # 标记任务完成
-                self.update_queue.task_done()
+                await self._flush_pending_updates()
                 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self.logger.error(f"Error processing update: {e}")
+            finally:
+                # 标记任务完成
+                for _ in range(batch_size):
+                    self.update_queue.task_done()
+    
+    @staticmethod
+    def _merge_changes(target: Dict[str, Any], changes: Dict[str, Any]) -> None:
+        """合并变更：props/state_changes 按键合并，其余字段后写覆盖"""
+        for key, value in changes.items():
+            if key in ("props", "state_changes") and isinstance(value, dict):
+                target[key] = {**target.get(key, {}), **value}
+            else:
+                target[key] = value
+    
+    async def _flush_pending_updates(self) -> None:
+        """按深度从父到子渲染本批次的脏组件，子组件的传递变更并入同一批次"""
+        pending, self.pending_updates = self.pending_updates, {}
+        pending_since, self._pending_since = self._pending_since, None
+        if not pending:
+            return
+        
+        sequence = itertools.count()
+        schedule = []
+        for component_id in pending:
+            component = self.registry.get_component(component_id)
+            if component is not None:
+                heapq.heappush(schedule, (component.get_depth(), next(sequence), component_id, component))
+        
+        renders = 0
+        while schedule:
+            depth, _, component_id, component = heapq.heappop(schedule)
+            changes = pending.pop(component_id)
+            
+            rendered = await component.update(changes, propagate_to_children=False)
+            if not rendered:
+                continue
+            renders += 1
+            
+            # 子组件变更并入批次，已在批次中的子组件只合并不重复渲染
+            for child in component.children:
+                child_changes = component._filter_changes_for_child(child, changes)
+                if not child_changes:
+                    continue
+                if child.component_id in pending:
+                    self._merge_changes(pending[child.component_id], child_changes)
+                    self.performance_metrics["renders_saved"] += 1
+                else:
+                    pending[child.component_id] = {}
+                    self._merge_changes(pending[child.component_id], child_changes)
+                    heapq.heappush(schedule, (depth + 1, next(sequence), child.component_id, child))
+        
+        latency = time.time() - pending_since if pending_since is not None else 0.0
+        metrics = self.performance_metrics
+        metrics["renders"] += renders
+        metrics["flushes"] += 1
+        metrics["last_flush_latency"] = latency
+        metrics["max_flush_latency"] = max(metrics["max_flush_latency"], latency)
+        metrics["total_flush_latency"] += latency
+    
+    async def flush_updates(self) -> None:
+        """等待所有已提交的更新刷新完成"""
+        self._start_update_processor()
+        await self.update_queue.join()
     
     async def create_component(
         self,
@@ -701,9 +798,17 @@ class ReactiveComponentSystem:
                     "timestamp": datetime.now().isoformat()
                 }
             
-            # 将更新任务加入队列
-            update_task = component.update(updates)
-            await self.update_queue.put(update_task)
+            # 合并到待刷新变更，同一组件在刷新前只入队一次
+            pending = self.pending_updates.get(component_id)
+            if pending is None:
+                self.pending_updates[component_id] = pending = {}
+                if self._pending_since is None:
+                    self._pending_since = time.time()
+                await self.update_queue.put(component_id)
+            else:
+                self.performance_metrics["coalesced_updates"] += 1
+                self.performance_metrics["renders_saved"] += 1
+            self._merge_changes(pending, updates)
             
             # 更新性能指标
             self.performance_metrics["total_updates"] += 1
@@ -908,11 +1013,13 @@ class ReactiveComponentSystem:
         total_render_time = sum(comp.total_render_time for comp in all_components.values())
         total_renders = sum(comp.render_count for comp in all_components.values())
         
+        flushes = self.performance_metrics["flushes"]
         self.performance_metrics.update({
             "active_components": len(all_components),
             "average_update_time": total_render_time / total_renders if total_renders > 0 else 0.0,
-            "queue_size": self.update_queue.qsize(),
-            "component_types": len(self.registry.component_types)
+            "queue_size": len(self.pending_updates),
+            "component_types": len(self.registry.component_types),
+            "average_flush_latency": self.performance_metrics["total_flush_latency"] / flushes if flushes else 0.0
         })
         
         return dict(self.performance_metrics)
@@ -937,6 +1044,8 @@ class ReactiveComponentSystem:
                 cleanup_stats["cancelled_tasks"] += 1
             
             # 清空更新队列
+            self.pending_updates.clear()
+            self._pending_since = None
             while not self.update_queue.empty():
                 try:
                     self.update_queue.get_nowait()
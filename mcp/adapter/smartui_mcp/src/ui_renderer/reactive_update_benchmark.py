@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+响应式组件更新压力基准
+
+构造一棵组件树（根 -> 面板 -> 叶子），父组件会把 props 变更传递给子组件，对比：
+- 旧实现：每次更新依次 await component.update，并递归渲染整个子树
+- 合并刷新：update_component 按组件合并变更，刷新窗口内按父先子后批量渲染
+负载包括对同一组件的突发状态变更以及分散在整棵树上的随机更新，
+并校验两种方式最终的组件 props/state 完全一致。
+
+用法（在 smartui_mcp 目录下）:
+    python -m src.ui_renderer.reactive_update_benchmark --updates 1000 --panels 20 --leaves 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.common import ComponentType
+from src.ui_renderer.reactive_components import ReactiveComponent, ReactiveComponentSystem
+
+
+class PropagatingComponent(ReactiveComponent):
+    """把 props 变更传递给子组件、渲染时序列化自身状态的组件"""
+
+    def _filter_changes_for_child(self, child: ReactiveComponent, changes: Dict[str, Any]) -> Dict[str, Any]:
+        return {"props": changes["props"]} if "props" in changes else {}
+
+    async def _render(self) -> None:
+        json.dumps({"props": self.props, "state": self.state}, sort_keys=True, default=str)
+
+
+async def build_tree(system: ReactiveComponentSystem, panels: int, leaves: int) -> List[str]:
+    system.registry.register_component_type(ComponentType.CARD, PropagatingComponent)
+    tree = {
+        "id": "root", "type": "card", "props": {"theme": "light"},
+        "children": [{
+            "id": f"panel_{p}", "type": "card", "props": {"theme": "light"},
+            "children": [{"id": f"leaf_{p}_{l}", "type": "card", "props": {"theme": "light"}}
+                         for l in range(leaves)]
+        } for p in range(panels)]
+    }
+    result = await system.build_component_tree(tree)
+    return result["created_components"]
+
+
+def generate_updates(component_ids: List[str], count: int, seed: int = 7) -> List[Tuple[str, Dict[str, Any]]]:
+    """一半突发更新同一面板的状态，其余随机分布，偶尔修改根组件 props"""
+    rng = random.Random(seed)
+    updates = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            updates.append(("panel_0", {"state_changes": {"counter": i}}))
+        elif kind < 0.55:
+            updates.append(("root", {"props": {"theme": rng.choice(["light", "dark"]), "tick": i}}))
+        else:
+            updates.append((rng.choice(component_ids), {"state_changes": {"value": i}}))
+    return updates
+
+
+def snapshot(system: ReactiveComponentSystem) -> Dict[str, Any]:
+    return {cid: (c.props, c.state) for cid, c in system.registry.get_all_components().items()}
+
+
+def total_renders(system: ReactiveComponentSystem) -> int:
+    return sum(c.render_count for c in system.registry.get_all_components().values())
+
+
+async def run_legacy(updates, panels: int, leaves: int) -> Dict[str, Any]:
+    """旧实现：逐个 await 组件更新，父组件递归更新子树"""
+    system = ReactiveComponentSystem()
+    await build_tree(system, panels, leaves)
+    start = time.perf_counter()
+    for component_id, changes in updates:
+        await system.registry.get_component(component_id).update(changes)
+    elapsed = time.perf_counter() - start
+    result = {"mode": "legacy", "seconds": elapsed, "renders": total_renders(system),
+              "state": snapshot(system), "flush_latency_ms": None}
+    await system.cleanup()
+    return result
+
+
+async def run_coalesced(updates, panels: int, leaves: int, flush_window: float) -> Dict[str, Any]:
+    """合并刷新：通过 update_component 提交，等待刷新完成"""
+    system = ReactiveComponentSystem({"update_flush_window": flush_window})
+    await build_tree(system, panels, leaves)
+    start = time.perf_counter()
+    for component_id, changes in updates:
+        await system.update_component(component_id, changes)
+    await system.flush_updates()
+    elapsed = time.perf_counter() - start
+    stats = await system.get_system_statistics()
+    result = {"mode": f"coalesced({flush_window * 1000:.0f}ms)", "seconds": elapsed,
+              "renders": total_renders(system), "state": snapshot(system),
+              "renders_saved": stats["renders_saved"], "flushes": stats["flushes"],
+              "flush_latency_ms": stats["average_flush_latency"] * 1000}
+    await system.cleanup()
+    return result
+
+
+async def run_benchmark(update_count: int, panels: int, leaves: int, flush_window: float) -> List[Dict[str, Any]]:
+    component_ids = [f"panel_{p}" for p in range(panels)] + \
+                    [f"leaf_{p}_{l}" for p in range(panels) for l in range(leaves)]
+    updates = generate_updates(component_ids, update_count)
+    legacy = await run_legacy(updates, panels, leaves)
+    coalesced = await run_coalesced(updates, panels, leaves, flush_window)
+    if legacy["state"] != coalesced["state"]:
+        raise AssertionError("合并刷新后的组件状态与逐个更新不一致")
+    return [legacy, coalesced]
+
+
+def format_report(rows: List[Dict[str, Any]], update_count: int) -> str:
+    """格式化基准结果"""
+    lines = [f"更新数 {update_count:,}",
+             f"{'mode':<18} {'total ms':>10} {'renders':>9} {'saved':>8} {'flushes':>8} {'flush ms':>9}"]
+    for row in rows:
+        latency = f"{row['flush_latency_ms']:.2f}" if row["flush_latency_ms"] is not None else "-"
+        lines.append(f"{row['mode']:<18} {row['seconds'] * 1000:>10.1f} {row['renders']:>9} "
+                     f"{row.get('renders_saved', '-'):>8} {row.get('flushes', '-'):>8} {latency:>9}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应式组件更新压力基准")
+    parser.add_argument("--updates", type=int, default=1000, help="更新次数")
+    parser.add_argument("--panels", type=int, default=20, help="面板数")
+    parser.add_argument("--leaves", type=int, default=20, help="每个面板的叶子组件数")
+    parser.add_argument("--flush-window", type=float, default=0.016, help="刷新窗口(秒)")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    rows = asyncio.run(run_benchmark(args.updates, args.panels, args.leaves, args.flush_window))
+    print(format_report(rows, args.updates))
+
+
+if __name__ == "__main__":
+    main()
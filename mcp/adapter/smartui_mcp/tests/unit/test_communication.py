@@ -0,0 +1,84 @@
+"""
+SmartUI MCP - 组件通信协议单元测试
+
+测试消息总线的可信进程内路径与跨进程消息编解码。
+"""
+
+import asyncio
+
+import pytest
+
+from src.common import (
+    ComponentMessageType, MessageBus, MessageCodec, MessageFactory,
+    ValidationMiddleware, create_basic_ui_configuration, create_button_component
+)
+
+
+class CountingValidation(ValidationMiddleware):
+    """记录调用次数的验证中间件"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, message):
+        self.calls += 1
+        return super().__call__(message)
+
+
+class TestMessageBus:
+    """消息总线测试类"""
+
+    def test_trusted_message_validated_once(self):
+        """测试已校验消息再次发送时跳过验证中间件，且处理器收到同一对象"""
+        bus = MessageBus()
+        validation = CountingValidation()
+        bus.add_middleware(validation)
+        received = []
+        bus.register_handler("decision_engine", ComponentMessageType.DECISION_REQUEST, received.append)
+
+        message = MessageFactory.create_decision_request("ui", "decision_engine", {"page": "home"}, ["a"])
+        for _ in range(3):
+            asyncio.run(bus.send_message(message))
+
+        assert validation.calls == 1
+        assert all(item is message for item in received) and len(received) == 3
+
+    def test_dict_message_is_validated(self):
+        """测试字典形式的消息经校验后按载荷类型还原"""
+        bus = MessageBus()
+        bus.add_middleware(ValidationMiddleware())
+        bus.register_handler("decision_engine", ComponentMessageType.DECISION_REQUEST,
+                             lambda message: type(message.payload).__name__)
+
+        data = MessageFactory.create_decision_request("ui", "decision_engine", {}, ["a"]).to_dict()
+        assert asyncio.run(bus.send_message(data)) == "DecisionRequestPayload"
+
+        data["payload"]["available_actions"] = "not-a-list"
+        with pytest.raises(ValueError):
+            asyncio.run(bus.send_message(data))
+
+
+class TestMessageCodec:
+    """消息编解码器测试类"""
+
+    def test_round_trip(self):
+        """测试编码后解码还原完整消息，包括嵌套的UI配置"""
+        codec = MessageCodec()
+        ui_configuration = create_basic_ui_configuration("home", [create_button_component("OK")])
+        messages = [
+            MessageFactory.create_ui_render_request("ui", "renderer", ui_configuration, {"minify": True}),
+            MessageFactory.create_user_interaction_data("ui", "u1", "s1", "click", {"target": "ok"}),
+            MessageFactory.create_state_request("ui", "state", "set", "ui.theme", None),
+        ]
+        for message in messages:
+            encoded = codec.encode(message)
+            assert encoded.startswith(message.header.component_message_type.value.encode() + b"|")
+            assert len(encoded) < len(str(message.to_dict()))
+
+            decoded = codec.decode(encoded)
+            assert decoded.header == message.header
+            assert type(decoded.payload) is type(message.payload)
+            assert decoded.payload == message.payload
+            assert decoded._validated
+
+        assert len(codec._envelopes) == 3
@@ -0,0 +1,123 @@
+"""
+SmartUI MCP - 配置热重载单元测试
+
+模拟编辑器分多次写入保存配置文件，统计重载次数与按配置节的回调通知。
+"""
+
+import asyncio
+import threading
+
+import yaml
+from watchdog.events import FileModifiedEvent
+
+from src.config import ConfigManager
+
+BASE_CONFIG = {
+    "server": {"port": 8080},
+    "ui": {"default_theme": "dark"},
+    "security": {"secret_key": "s" * 32},
+}
+
+
+def write_in_chunks(path, data, chunks: int = 4) -> None:
+    """像部分编辑器一样先截断文件，再分几次写入内容"""
+    content = yaml.dump(data).encode("utf-8")
+    size = len(content) // chunks + 1
+    with open(path, "wb") as f:
+        for start in range(0, len(content), size):
+            f.write(content[start:start + size])
+            f.flush()
+
+
+class TestConfigHotReload:
+    """配置热重载测试类"""
+
+    def test_rapid_multi_write_save_reloads_once(self, tmp_path):
+        """测试观察线程中的多次修改事件只触发一次重载，且只通知变化的配置节"""
+        config_file = tmp_path / "smartui_config.yaml"
+        write_in_chunks(config_file, BASE_CONFIG)
+
+        async def scenario():
+            manager = ConfigManager(str(config_file), reload_debounce=0.05)
+            await manager.load_config()
+            manager._loop = asyncio.get_running_loop()
+
+            server_updates, ui_updates, full_updates = [], [], []
+            manager.add_section_callback("server", server_updates.append)
+            manager.add_section_callback("ui", ui_updates.append)
+            manager.add_update_callback(full_updates.append)
+
+            # 模拟 watchdog 观察线程：每次部分写入后都上报一次修改事件
+            def editor_save():
+                updated = dict(BASE_CONFIG, server={"port": 9090})
+                content = yaml.dump(updated).encode("utf-8")
+                with open(config_file, "wb") as f:
+                    for start in range(0, len(content), 16):
+                        f.write(content[start:start + 16])
+                        f.flush()
+                        manager.schedule_reload()
+
+            thread = threading.Thread(target=editor_save)
+            thread.start()
+            await asyncio.to_thread(thread.join)
+            await asyncio.sleep(0.2)
+            return manager, server_updates, ui_updates, full_updates
+
+        manager, server_updates, ui_updates, full_updates = asyncio.run(scenario())
+        assert manager.reload_stats["requested"] > 1
+        assert manager.reload_stats["reloads"] == 1
+        assert manager.config.server.port == 9090
+        assert [server.port for server in server_updates] == [9090]
+        assert ui_updates == []
+        assert len(full_updates) == 1
+
+    def test_unchanged_content_and_invalid_section_skipped(self, tmp_path):
+        """测试内容哈希未变化时跳过重载，变化的配置节验证失败时保留当前配置"""
+        config_file = tmp_path / "smartui_config.yaml"
+        write_in_chunks(config_file, BASE_CONFIG)
+
+        async def scenario():
+            manager = ConfigManager(str(config_file), reload_debounce=0.01)
+            await manager.load_config()
+            manager._loop = asyncio.get_running_loop()
+
+            # 保存相同内容（例如编辑器 touch 文件）
+            write_in_chunks(config_file, BASE_CONFIG)
+            manager.schedule_reload()
+            await asyncio.sleep(0.05)
+
+            write_in_chunks(config_file, dict(BASE_CONFIG, server={"port": 70000}))
+            manager.schedule_reload()
+            await asyncio.sleep(0.05)
+            return manager
+
+        manager = asyncio.run(scenario())
+        assert manager.reload_stats["skipped_unchanged"] == 1
+        assert manager.reload_stats["failed"] == 1
+        assert manager.reload_stats["reloads"] == 0
+        assert manager.config.server.port == 8080
+
+    def test_watcher_hands_off_from_observer_thread(self, tmp_path):
+        """测试文件监控器在非事件循环线程中回调时转交给所属事件循环"""
+        config_file = tmp_path / "smartui_config.yaml"
+        write_in_chunks(config_file, BASE_CONFIG)
+
+        async def scenario():
+            manager = ConfigManager(str(config_file), reload_debounce=0.01)
+            await manager.load_config()
+            manager.start_file_watching()
+            try:
+                write_in_chunks(config_file, dict(BASE_CONFIG, ui={"default_theme": "light"}))
+                event = FileModifiedEvent(str(config_file))
+                await asyncio.to_thread(manager.file_watcher.on_modified, event)
+                for _ in range(50):
+                    if manager.reload_stats["reloads"]:
+                        break
+                    await asyncio.sleep(0.02)
+            finally:
+                manager.stop_file_watching()
+            return manager
+
+        manager = asyncio.run(scenario())
+        assert manager.reload_stats["reloads"] == 1
+        assert manager.config.ui.default_theme == "light"
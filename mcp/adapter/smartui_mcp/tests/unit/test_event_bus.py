@@ -0,0 +1,95 @@
+"""
+SmartUI MCP - 事件总线单元测试
+
+测试内联快路径、历史二级索引与背压策略。
+"""
+
+import asyncio
+
+from src.common import EventBusEvent, EventBusEventType, SmartUIEventBus, BackpressurePolicy
+
+
+class TestSmartUIEventBus:
+    """事件总线测试类"""
+
+    def test_inline_handlers_skip_tasks(self):
+        """测试 inline 处理器在发布方直接执行，不创建任务"""
+        async def scenario():
+            bus = SmartUIEventBus(cleanup_interval=0)
+            received = []
+            for _ in range(3):
+                await bus.subscribe(EventBusEventType.USER_INTERACTION, received.append, inline=True)
+
+            created = []
+            original_create_task = asyncio.create_task
+
+            def tracking_create_task(coro, **kwargs):
+                created.append(coro)
+                return original_create_task(coro, **kwargs)
+
+            asyncio.create_task = tracking_create_task
+            try:
+                await bus.publish(EventBusEvent(EventBusEventType.USER_INTERACTION, {}, "test"))
+            finally:
+                asyncio.create_task = original_create_task
+            metrics = await bus.get_metrics()
+            await bus.shutdown()
+            return received, created, metrics
+
+        received, created, metrics = asyncio.run(scenario())
+        assert len(received) == 3
+        assert created == []
+        assert metrics["events_processed"] == 3
+
+    def test_history_indexes_follow_eviction(self):
+        """测试按类型/来源查询只返回仍在全局历史中的事件，且按发布顺序倒序"""
+        async def scenario():
+            bus = SmartUIEventBus(max_history_size=10, cleanup_interval=0)
+            types = [EventBusEventType.USER_INTERACTION, EventBusEventType.DECISION_MADE]
+            for i in range(25):
+                await bus.publish(EventBusEvent(types[i % 2], {"i": i}, f"source_{i % 3}"))
+            results = {
+                "latest": await bus.get_event_history(limit=3),
+                "by_type": await bus.get_event_history(event_type=types[0]),
+                "by_source": await bus.get_event_history(source="source_0", limit=2),
+                "both": await bus.get_event_history(event_type=types[1], source="source_1"),
+            }
+            await bus.shutdown()
+            return {name: [e.data["i"] for e in events] for name, events in results.items()}
+
+        results = asyncio.run(scenario())
+        assert results["latest"] == [24, 23, 22]
+        assert results["by_type"] == [24, 22, 20, 18, 16]
+        assert results["by_source"] == [24, 21]
+        assert results["both"] == [19]
+
+    def test_backpressure_policies(self):
+        """测试订阅者积压时 drop 丢弃、block 等待、sample 按比例投递"""
+        async def run(policy):
+            bus = SmartUIEventBus(cleanup_interval=0, max_pending_per_subscriber=5, backpressure_policy=policy)
+            release = asyncio.Event()
+            delivered = []
+
+            async def slow_handler(event):
+                delivered.append(event.data["i"])
+                await release.wait()
+
+            await bus.subscribe(EventBusEventType.PERFORMANCE_METRIC, slow_handler, sample_rate=5)
+            publisher = asyncio.ensure_future(asyncio.gather(*[
+                bus.publish(EventBusEvent(EventBusEventType.PERFORMANCE_METRIC, {"i": i}, "test"), wait=False)
+                for i in range(30)
+            ]))
+            await asyncio.sleep(0.05)
+            blocked = not publisher.done()
+            release.set()
+            await publisher
+            while bus._processing_tasks:
+                await asyncio.sleep(0.01)
+            info = await bus.get_subscription_info()
+            await bus.shutdown()
+            return len(delivered), blocked, info[EventBusEventType.PERFORMANCE_METRIC.value][0]["dropped_count"]
+
+        assert asyncio.run(run(BackpressurePolicy.DROP)) == (5, False, 25)
+        assert asyncio.run(run(BackpressurePolicy.BLOCK)) == (30, True, 0)
+        delivered, blocked, dropped = asyncio.run(run(BackpressurePolicy.SAMPLE))
+        assert blocked and delivered + dropped == 30 and dropped == 20
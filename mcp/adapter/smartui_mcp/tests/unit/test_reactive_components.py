@@ -0,0 +1,78 @@
+"""
+SmartUI MCP - 响应式组件系统单元测试
+
+测试组件更新合并、父先子后的批量渲染与刷新指标。
+"""
+
+import asyncio
+
+from src.common import ComponentType
+from src.ui_renderer.reactive_components import ReactiveComponent, ReactiveComponentSystem
+
+
+class PropagatingComponent(ReactiveComponent):
+    """把 props 变更传递给子组件并记录渲染顺序"""
+
+    render_log = []
+
+    def _filter_changes_for_child(self, child, changes):
+        return {"props": changes["props"]} if "props" in changes else {}
+
+    async def _render(self):
+        self.render_log.append(self.component_id)
+
+
+async def build_system():
+    system = ReactiveComponentSystem({"update_flush_window": 0.01})
+    system.registry.register_component_type(ComponentType.CARD, PropagatingComponent)
+    await system.build_component_tree({
+        "id": "root", "type": "card",
+        "children": [
+            {"id": "panel", "type": "card", "children": [{"id": "leaf", "type": "card"}]}
+        ]
+    })
+    PropagatingComponent.render_log = []
+    return system
+
+
+class TestReactiveComponentSystem:
+    """响应式组件系统测试类"""
+
+    def test_burst_updates_render_once(self):
+        """测试同一组件的突发更新在一次刷新中只渲染一次"""
+        async def scenario():
+            system = await build_system()
+            for i in range(100):
+                await system.update_component("panel", {"state_changes": {"counter": i}, "props": {"size": i}})
+            await system.flush_updates()
+            stats = await system.get_system_statistics()
+            panel = system.registry.get_component("panel")
+            await system.cleanup()
+            return panel, stats
+
+        panel, stats = asyncio.run(scenario())
+        assert panel.state["counter"] == 99
+        assert panel.props["size"] == 99
+        assert PropagatingComponent.render_log == ["panel", "leaf"]
+        assert stats["coalesced_updates"] == 99
+        assert stats["renders"] == 2
+        assert stats["flushes"] == 1
+        assert stats["average_flush_latency"] > 0
+
+    def test_parent_before_child(self):
+        """测试子组件先于父组件提交时仍按父先子后渲染，且子组件合并父组件传递的变更"""
+        async def scenario():
+            system = await build_system()
+            await system.update_component("leaf", {"state_changes": {"value": 1}})
+            await system.update_component("root", {"props": {"theme": "dark"}})
+            await system.flush_updates()
+            leaf = system.registry.get_component("leaf")
+            stats = await system.get_system_statistics()
+            await system.cleanup()
+            return leaf, stats
+
+        leaf, stats = asyncio.run(scenario())
+        assert PropagatingComponent.render_log == ["root", "panel", "leaf"]
+        assert leaf.props["theme"] == "dark"
+        assert leaf.state["value"] == 1
+        assert stats["renders_saved"] == 1
@@ -0,0 +1,93 @@
+"""
+SmartUI MCP - 计算状态依赖图单元测试
+
+测试菱形依赖的单次重算、结果不变时的下游截断与循环依赖检测。
+"""
+
+import asyncio
+
+import pytest
+
+from src.core_intelligence.api_state_manager import StateComputer
+
+
+class DictStateSource:
+    """普通状态存字典，计算状态委托给 StateComputer"""
+
+    def __init__(self, computer: StateComputer):
+        self.computer = computer
+        self.data = {}
+
+    async def get_state(self, path):
+        if path in self.computer.computed_states:
+            return await self.computer.compute_state(path, self)
+        return self.data.get(path)
+
+    def set_state(self, path, value):
+        self.data[path] = value
+        return self.computer.mark_dirty(path)
+
+
+def tracked(name, func, calls):
+    def compute(values):
+        calls.append(name)
+        return func(values)
+    return compute
+
+
+class TestStateComputer:
+    """状态计算器测试类"""
+
+    def test_diamond_recomputes_each_node_once(self):
+        """测试菱形依赖在一次变化后每个节点只重算一次且读到最新值"""
+        computer = StateComputer()
+        source = DictStateSource(computer)
+        calls = []
+        computer.register_computed_state("left", ["a"], tracked("left", lambda v: v["a"] + 1, calls))
+        computer.register_computed_state("right", ["a"], tracked("right", lambda v: v["a"] * 2, calls))
+        computer.register_computed_state(
+            "total", ["left", "right"], tracked("total", lambda v: v["left"] + v["right"], calls))
+
+        source.set_state("a", 1)
+        assert asyncio.run(source.get_state("total")) == 4
+
+        calls.clear()
+        dirty = source.set_state("a", 5)
+        assert dirty == {"left", "right", "total"}
+        assert computer.get_dirty_paths()[-1] == "total"
+        assert asyncio.run(source.get_state("total")) == 16
+        assert sorted(calls) == ["left", "right", "total"]
+        assert calls[-1] == "total"
+        assert computer.get_dirty_paths() == []
+
+    def test_unchanged_result_cuts_off_downstream(self):
+        """测试上游结果不变时下游直接复用缓存"""
+        computer = StateComputer()
+        source = DictStateSource(computer)
+        calls = []
+        computer.register_computed_state("clamped", ["a"], tracked("clamped", lambda v: min(v["a"], 10), calls))
+        computer.register_computed_state("label", ["clamped"], tracked("label", lambda v: f"{v['clamped']}%", calls))
+
+        source.set_state("a", 50)
+        assert asyncio.run(source.get_state("label")) == "10%"
+
+        calls.clear()
+        source.set_state("a", 80)
+        assert asyncio.run(source.get_state("label")) == "10%"
+        assert calls == ["clamped"]
+        assert computer.stats["memo_hits"] == 1
+
+        source.set_state("a", 3)
+        assert asyncio.run(computer.recompute_dirty(source)) == {"clamped": 3, "label": "3%"}
+
+    def test_circular_dependency_rejected(self):
+        """测试注册形成环的计算状态时报错"""
+        computer = StateComputer()
+        computer.register_computed_state("b", ["a"], lambda v: v["a"])
+        computer.register_computed_state("c", ["b"], lambda v: v["b"])
+
+        with pytest.raises(ValueError):
+            computer.register_computed_state("a", ["c"], lambda v: v["c"])
+        with pytest.raises(ValueError):
+            computer.register_computed_state("d", ["d"], lambda v: 0)
+        assert "a" not in computer.computed_states
@@ -0,0 +1,133 @@
+"""
+SmartUI MCP - 状态持久化单元测试
+
+测试写入合并、批量原子提交、冷启动恢复与旧版JSON文件导入。
+"""
+
+import asyncio
+import json
+from datetime import datetime
+
+from src.core_intelligence.api_state_manager import (
+    SmartUIApiStateManager, StatePersistence, StatePersistenceType, StateMetadata, StateAccessLevel
+)
+
+
+class ClosableStateManager(SmartUIApiStateManager):
+    """补全快照接口以便实例化，只用于测试 close"""
+
+    async def get_state_snapshot(self):
+        raise NotImplementedError
+
+    async def restore_state_snapshot(self, snapshot):
+        raise NotImplementedError
+
+
+def make_metadata() -> StateMetadata:
+    return StateMetadata(
+        created_at=datetime.now(), updated_at=datetime.now(), version=1,
+        access_level=StateAccessLevel.PUBLIC, persistence_type=StatePersistenceType.FILE,
+        tags=["test"], description="test state"
+    )
+
+
+class TestStatePersistence:
+    """状态持久化测试类"""
+
+    def test_writes_coalesce_within_flush_interval(self, tmp_path):
+        """测试刷新间隔内的写入按路径合并，并在间隔结束后一次提交"""
+        async def scenario():
+            persistence = StatePersistence(str(tmp_path), flush_interval=0.01)
+            metadata = make_metadata()
+            for i in range(50):
+                await persistence.save_state("ui.theme", f"theme_{i}", StatePersistenceType.FILE, metadata)
+            await persistence.save_state("ui.lang", "zh", StatePersistenceType.LOCAL_STORAGE, metadata)
+            pending_loaded = await persistence.load_state("ui.theme", StatePersistenceType.FILE, metadata)
+            await asyncio.sleep(0.05)
+            stats = dict(persistence.store.stats)
+            persistence.close()
+            return pending_loaded, stats
+
+        pending_loaded, stats = asyncio.run(scenario())
+        assert pending_loaded == (True, "theme_49")
+        assert stats["flushes"] == 1
+        assert stats["committed_rows"] == 2
+        assert stats["coalesced_writes"] == 49
+
+    def test_batch_commit_and_restore(self, tmp_path):
+        """测试多路径批量提交、删除与重新打开后的恢复"""
+        async def scenario():
+            persistence = StatePersistence(str(tmp_path))
+            await persistence.save_states(
+                {"user.name": "alice", "user.prefs": {"dense": True}, "ui.sidebar": "open"},
+                StatePersistenceType.FILE
+            )
+            await persistence.save_state("ui.lang", "zh", StatePersistenceType.LOCAL_STORAGE, make_metadata())
+            await persistence.delete_state("ui.sidebar", StatePersistenceType.FILE, make_metadata())
+            persistence.close()
+
+            reopened = StatePersistence(str(tmp_path))
+            restored = (await reopened.load_all_states(StatePersistenceType.FILE),
+                        await reopened.load_all_states(StatePersistenceType.LOCAL_STORAGE))
+            reopened.close()
+            return restored
+
+        file_states, local_states = asyncio.run(scenario())
+        assert file_states == {"user.name": "alice", "user.prefs": {"dense": True}}
+        assert local_states == {"ui.lang": "zh"}
+
+    def test_legacy_files_imported_once(self, tmp_path):
+        """测试首次打开存储时导入旧版每路径一个的JSON文件"""
+        for name, value in (("ui.theme", "dark"), ("localStorage_ui.lang", "en")):
+            with open(tmp_path / f"{name}.json", "w", encoding="utf-8") as f:
+                json.dump({"value": value, "metadata": {}, "timestamp": "2024-01-01T00:00:00"}, f)
+
+        async def scenario():
+            persistence = StatePersistence(str(tmp_path))
+            restored = (await persistence.load_all_states(StatePersistenceType.FILE),
+                        await persistence.load_all_states(StatePersistenceType.LOCAL_STORAGE))
+            persistence.close()
+            return restored
+
+        assert asyncio.run(scenario()) == ({"ui.theme": "dark"}, {"ui.lang": "en"})
+
+    def test_write_survives_loop_end_without_flush(self, tmp_path):
+        """测试未显式提交时，事件循环结束后重新打开存储仍能读到已确认的写入"""
+        async def save():
+            persistence = StatePersistence(str(tmp_path), flush_interval=10)
+            return await persistence.save_state("ui.theme", "dark", StatePersistenceType.FILE, make_metadata())
+
+        async def load():
+            reopened = StatePersistence(str(tmp_path))
+            loaded = await reopened.load_state("ui.theme", StatePersistenceType.FILE, make_metadata())
+            reopened.close()
+            return loaded
+
+        assert asyncio.run(save()) is True
+        assert asyncio.run(load()) == (True, "dark")
+
+    def test_reopen_in_same_loop_sees_pending_writes(self, tmp_path):
+        """测试同一事件循环内重新打开存储时，已有实例的缓冲写入先落盘"""
+        async def scenario():
+            persistence = StatePersistence(str(tmp_path), flush_interval=10)
+            await persistence.save_state("ui.lang", "zh", StatePersistenceType.LOCAL_STORAGE, make_metadata())
+            reopened = StatePersistence(str(tmp_path))
+            loaded = await reopened.load_all_states(StatePersistenceType.LOCAL_STORAGE)
+            reopened.close()
+            persistence.close()
+            return loaded
+
+        assert asyncio.run(scenario()) == {"ui.lang": "zh"}
+
+    def test_manager_close_flushes_store(self, tmp_path):
+        """测试关闭状态管理器时提交缓冲的持久化写入"""
+        async def scenario():
+            manager = ClosableStateManager({"persistence_path": str(tmp_path), "persistence_flush_interval": 10})
+            await manager.persistence.save_state("ui.theme", "light", StatePersistenceType.FILE, make_metadata())
+            manager.close()
+            return manager.persistence.store.stats["committed_rows"]
+
+        assert asyncio.run(scenario()) == 1
+        reopened = StatePersistence(str(tmp_path))
+        assert reopened.store.load_all(StatePersistenceType.FILE.value) == {"ui.theme": "light"}
+        reopened.close()
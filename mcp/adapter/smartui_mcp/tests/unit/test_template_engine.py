@@ -0,0 +1,98 @@
+"""
+SmartUI MCP - 模板引擎单元测试
+
+测试模板条件索引、预编译条件与变量替换计划。
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.common import create_basic_ui_configuration, create_button_component
+from src.core_intelligence.ui_generator import TemplateEngine, UITemplate, GenerationContext
+
+
+def make_template(template_id, conditions, tags=None, category="page", text="${user_name} go"):
+    return UITemplate(
+        template_id=template_id,
+        name=template_id,
+        description="",
+        category=category,
+        base_configuration=create_basic_ui_configuration(
+            "${user_role} view", [create_button_component(text)]
+        ),
+        variables={},
+        conditions=conditions,
+        tags=tags or [],
+        created_at=datetime.now()
+    )
+
+
+def make_context(context_id, device_type="mobile", page_type="dashboard", role="admin", intents=0):
+    return GenerationContext(
+        context_id=context_id,
+        user_profile={"name": "Alice", "role": role},
+        device_info={"type": device_type},
+        current_ui_state={"page_type": page_type},
+        user_intents=[{"intent_type": "view"}] * intents,
+        performance_constraints={},
+        accessibility_requirements=[],
+        business_goals=[],
+        timestamp=datetime.now()
+    )
+
+
+class TestTemplateEngine:
+    """模板引擎测试类"""
+
+    @pytest.fixture
+    def engine(self):
+        engine = TemplateEngine()
+        engine.register_template(make_template(
+            "mobile", {"device": "context.device_info.get('type') == 'mobile'"}))
+        engine.register_template(make_template(
+            "mobile_dashboard", {"device": "device_info['type'] in ('mobile', 'tablet')",
+                                 "page": "context.current_ui_state.get('page_type') == 'dashboard'"},
+            tags=["touch"]))
+        engine.register_template(make_template(
+            "admin", {"role": "'admin' == user_profile.get('role')"}, category="admin"))
+        engine.register_template(make_template(
+            "busy", {"intents": "len(intents) > 1"}))
+        engine.register_template(make_template("always", {}))
+        return engine
+
+    def test_indexed_lookup(self, engine):
+        """测试按条件索引查找，结果与逐个评估一致"""
+        assert len(engine.unindexed_templates) == 2
+        assert len(engine.condition_index) == 3
+
+        found = asyncio.run(engine.find_templates(make_context("c1")))
+        assert [t.template_id for t in found] == ["mobile_dashboard", "mobile", "admin", "always"]
+
+        found = asyncio.run(engine.find_templates(
+            make_context("c2", device_type="tablet", role="guest", intents=2)))
+        assert [t.template_id for t in found] == ["mobile_dashboard", "busy", "always"]
+
+        found = asyncio.run(engine.find_templates(make_context("c3"), category="admin"))
+        assert [t.template_id for t in found] == ["admin"]
+
+    def test_unregister_removes_from_index(self, engine):
+        """测试注销模板后不再出现在索引中"""
+        assert engine.unregister_template("mobile")
+        assert engine.unregister_template("admin")
+        assert ("user_profile", "role", "get", None) not in engine.condition_index
+
+        found = asyncio.run(engine.find_templates(make_context("c4")))
+        assert [t.template_id for t in found] == ["mobile_dashboard", "always"]
+
+    def test_substitution_plan(self, engine):
+        """测试只替换预计算槽位，未知变量保留占位符"""
+        template = make_template("subst", {}, text="Hi ${user_name} on ${device_type} ${unknown}")
+        engine.register_template(template)
+        assert len(engine.compiled_templates["subst"].substitution_plan) == 2
+
+        ui_config = asyncio.run(engine.apply_template(template, make_context("c5", device_type="desktop")))
+        assert ui_config.name == "admin view"
+        assert ui_config.components[0].props.text == "Hi Alice on desktop ${unknown}"
+        assert template.base_configuration.name == "${user_role} view"
@@ -0,0 +1 @@
+"""MCP共享组件"""
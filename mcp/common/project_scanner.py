@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+共享项目扫描引擎
+一次遍历项目目录，将文件分发到进程池中的AST/正则分析器，
+供持续重构、开发介入和目录结构检查等MCP复用
+"""
+
+import os
+import re
+import ast
+import time
+import asyncio
+import bisect
+import logging
+from typing import Dict, List, Any, Optional, Tuple, Iterable, AsyncIterator
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 默认跳过的目录（按目录名子串匹配）
+DEFAULT_SKIP_PATTERNS = (
+    "__pycache__",
+    ".git",
+    "venv",
+    "node_modules",
+    ".pytest_cache",
+)
+
+
+class FileContext:
+    """单个文件的分析上下文，同一文件的所有分析器共享"""
+
+    def __init__(self, path: str, content: str):
+        self.path = path
+        self.content = content
+        self.tree: Optional[ast.AST] = None
+        self.findings: Dict[str, List[Dict[str, Any]]] = {}
+        self._line_offsets: Optional[List[int]] = None
+
+    def add_finding(self, analyzer_name: str, finding: Dict[str, Any]):
+        """记录分析器发现的问题"""
+        self.findings.setdefault(analyzer_name, []).append(finding)
+
+    def line_of(self, offset: int) -> int:
+        """将字符偏移转换为行号（从1开始）"""
+        if self._line_offsets is None:
+            self._line_offsets = [i for i, ch in enumerate(self.content) if ch == "\n"]
+        return bisect.bisect_left(self._line_offsets, offset) + 1
+
+
+class FileAnalyzer:
+    """
+    文件分析器基类
+
+    子类可以实现 analyze_source 做基于文本的检查，
+    也可以在 node_types 中声明关心的AST节点类型并实现 visit_node；
+    同一文件只解析一次，所有分析器共享同一棵语法树。
+    分析器会被传入工作进程，必须可以pickle。
+    """
+
+    name = "base"
+    suffixes: Tuple[str, ...] = (".py",)
+    node_types: Tuple[type, ...] = ()
+
+    def accepts(self, path: str) -> bool:
+        return path.endswith(self.suffixes)
+
+    def analyze_source(self, ctx: FileContext):
+        """基于源码文本的分析"""
+
+    def visit_node(self, node: ast.AST, ctx: FileContext):
+        """基于AST节点的分析"""
+
+
+def calculate_complexity(node: ast.AST) -> int:
+    """计算函数圈复杂度"""
+    complexity = 1  # 基础复杂度
+
+    for child in ast.walk(node):
+        if isinstance(child, (ast.If, ast.While, ast.For, ast.Try)):
+            complexity += 1
+        elif isinstance(child, ast.BoolOp):
+            complexity += len(child.values) - 1
+
+    return complexity
+
+
+class ComplexityAnalyzer(FileAnalyzer):
+    """函数复杂度分析器"""
+
+    name = "complexity"
+    node_types = (ast.FunctionDef,)
+
+    def __init__(self, threshold: int = 10, severity: str = "medium"):
+        self.threshold = threshold
+        self.severity = severity
+
+    def visit_node(self, node: ast.AST, ctx: FileContext):
+        complexity = calculate_complexity(node)
+        if complexity > self.threshold:
+            ctx.add_finding(self.name, {
+                "type": "high_complexity",
+                "file": ctx.path,
+                "function": node.name,
+                "line": node.lineno,
+                "complexity": complexity,
+                "severity": self.severity
+            })
+
+
+class RegexRuleAnalyzer(FileAnalyzer):
+    """
+    正则规则分析器
+
+    rules 格式: {rule_name: {"patterns": [...], ...}}，
+    规则中除 patterns 外的字段不会被读取，由调用方自行解释。
+    """
+
+    name = "regex_rules"
+
+    def __init__(self, rules: Dict[str, Dict[str, Any]], flags: int = re.MULTILINE | re.IGNORECASE):
+        self.rule_patterns = {
+            rule_name: list(rule_config.get("patterns", []))
+            for rule_name, rule_config in rules.items()
+        }
+        self.flags = flags
+        self._compiled: Optional[List[Tuple[str, str, "re.Pattern"]]] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_compiled"] = None
+        return state
+
+    def _compile(self) -> List[Tuple[str, str, "re.Pattern"]]:
+        if self._compiled is None:
+            self._compiled = [
+                (rule_name, pattern, re.compile(pattern, self.flags))
+                for rule_name, patterns in self.rule_patterns.items()
+                for pattern in patterns
+            ]
+        return self._compiled
+
+    def analyze_source(self, ctx: FileContext):
+        for rule_name, pattern, regex in self._compile():
+            for match in regex.finditer(ctx.content):
+                ctx.add_finding(self.name, {
+                    "rule": rule_name,
+                    "pattern": pattern,
+                    "file": ctx.path,
+                    "line": ctx.line_of(match.start())
+                })
+
+
+@dataclass
+class FileScanResult:
+    """单个文件的扫描结果"""
+    path: str
+    findings: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def total_time(self) -> float:
+        return self.timings.get("total", 0.0)
+
+
+def analyze_file(path: str, analyzers: List[FileAnalyzer], profile: bool = False) -> FileScanResult:
+    """在当前进程中用给定分析器分析单个文件"""
+    start = time.perf_counter()
+    result = FileScanResult(path=path)
+    applicable = [a for a in analyzers if a.accepts(path)]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+    except Exception as e:
+        result.error = f"read: {e}"
+        result.timings["total"] = time.perf_counter() - start
+        return result
+
+    ctx = FileContext(path, content)
+    if profile:
+        result.timings["read"] = time.perf_counter() - start
+
+    # 文本分析
+    for analyzer in applicable:
+        t0 = time.perf_counter()
+        try:
+            analyzer.analyze_source(ctx)
+        except Exception as e:
+            result.error = f"{analyzer.name}: {e}"
+        if profile:
+            result.timings[analyzer.name] = result.timings.get(analyzer.name, 0.0) + time.perf_counter() - t0
+
+    # AST分析：只解析一次，按节点类型分发给各分析器
+    dispatch: Dict[type, List[FileAnalyzer]] = {}
+    for analyzer in applicable:
+        for node_type in analyzer.node_types:
+            dispatch.setdefault(node_type, []).append(analyzer)
+
+    if dispatch:
+        t0 = time.perf_counter()
+        try:
+            ctx.tree = ast.parse(content, filename=path)
+        except Exception as e:
+            result.error = f"parse: {e}"
+        if profile:
+            result.timings["parse"] = time.perf_counter() - t0
+
+        if ctx.tree is not None:
+            for node in ast.walk(ctx.tree):
+                handlers = dispatch.get(type(node))
+                if not handlers:
+                    continue
+                for analyzer in handlers:
+                    t1 = time.perf_counter() if profile else 0.0
+                    try:
+                        analyzer.visit_node(node, ctx)
+                    except Exception as e:
+                        result.error = f"{analyzer.name}: {e}"
+                    if profile:
+                        result.timings[analyzer.name] = result.timings.get(analyzer.name, 0.0) + time.perf_counter() - t1
+
+    result.findings = ctx.findings
+    result.timings["total"] = time.perf_counter() - start
+    return result
+
+
+def _analyze_chunk(paths: List[str], analyzers: List[FileAnalyzer], profile: bool) -> List[FileScanResult]:
+    """工作进程入口：分析一批文件"""
+    return [analyze_file(path, analyzers, profile) for path in paths]
+
+
+@dataclass
+class ProjectTree:
+    """项目目录快照：相对目录路径 -> 文件名列表"""
+    root: str
+    directories: Dict[str, List[str]] = field(default_factory=dict)
+
+    def has_dir(self, rel_path: str) -> bool:
+        return os.path.normpath(rel_path) in self.directories
+
+    def has_file(self, rel_path: str) -> bool:
+        dir_name, file_name = os.path.split(os.path.normpath(rel_path))
+        return file_name in self.directories.get(dir_name or ".", ())
+
+    def subdirs(self, rel_path: str) -> List[str]:
+        """列出直接子目录名"""
+        base = os.path.normpath(rel_path)
+        prefix = "" if base == "." else base + os.sep
+        return sorted(
+            d[len(prefix):] for d in self.directories
+            if d.startswith(prefix) and d != base and os.sep not in d[len(prefix):]
+        )
+
+
+@dataclass
+class ScanReport:
+    """完整扫描报告"""
+    root: str
+    results: List[FileScanResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def files_scanned(self) -> int:
+        return len(self.results)
+
+    @property
+    def errors(self) -> List[FileScanResult]:
+        return [r for r in self.results if r.error]
+
+    def findings(self, analyzer_name: str) -> List[Dict[str, Any]]:
+        """汇总某个分析器在所有文件上的发现"""
+        return [f for r in self.results for f in r.findings.get(analyzer_name, ())]
+
+    def slowest(self, limit: int = 10) -> List[FileScanResult]:
+        return sorted(self.results, key=lambda r: r.total_time, reverse=True)[:limit]
+
+    def format_profile(self, limit: int = 20) -> str:
+        """生成最慢文件的耗时报表"""
+        lines = [f"扫描 {self.files_scanned} 个文件，耗时 {self.elapsed:.3f}s"]
+        for r in self.slowest(limit):
+            detail = ", ".join(
+                f"{k}={v * 1000:.1f}ms" for k, v in sorted(r.timings.items()) if k != "total"
+            )
+            lines.append(f"{r.total_time * 1000:8.1f}ms  {r.path}" + (f"  ({detail})" if detail else ""))
+        return "\n".join(lines)
+
+
+class ProjectScanner:
+    """
+    项目扫描引擎
+
+    单次 os.walk 收集文件，按批次提交到进程池，结果在完成时流式返回。
+    文件数较少时在线程中直接分析，避免进程启动开销。
+    """
+
+    def __init__(self,
+                 analyzers: Iterable[FileAnalyzer],
+                 max_workers: Optional[int] = None,
+                 chunk_size: int = 16,
+                 skip_patterns: Iterable[str] = DEFAULT_SKIP_PATTERNS,
+                 min_parallel_files: int = 32,
+                 use_processes: bool = True,
+                 profile: bool = False):
+        self.analyzers = list(analyzers)
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.skip_patterns = tuple(skip_patterns)
+        self.min_parallel_files = min_parallel_files
+        self.use_processes = use_processes
+        self.profile = profile
+        self._executor: Optional[Executor] = None
+
+    def _should_skip_dir(self, name: str) -> bool:
+        return any(pattern in name for pattern in self.skip_patterns)
+
+    def _accepts(self, path: str) -> bool:
+        return any(a.accepts(path) for a in self.analyzers)
+
+    def collect_files(self, root: str) -> List[str]:
+        """遍历目录，返回分析器关心的文件路径"""
+        paths = []
+        for dir_path, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if not self._should_skip_dir(d))
+            for file_name in sorted(files):
+                path = os.path.join(dir_path, file_name)
+                if self._accepts(path):
+                    paths.append(path)
+        return paths
+
+    def snapshot(self, root: str, max_depth: Optional[int] = None) -> ProjectTree:
+        """遍历目录生成快照，max_depth 限制相对 root 的深度"""
+        tree = ProjectTree(root=root)
+        root = os.path.normpath(root)
+        for dir_path, dirs, files in os.walk(root):
+            rel = os.path.relpath(dir_path, root)
+            depth = 0 if rel == "." else rel.count(os.sep) + 1
+            dirs[:] = sorted(d for d in dirs if not self._should_skip_dir(d))
+            if max_depth is not None and depth >= max_depth:
+                dirs[:] = []
+            tree.directories[rel] = sorted(files)
+        return tree
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                except (OSError, NotImplementedError) as e:
+                    logger.warning(f"进程池不可用，改用线程池: {e}")
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def shutdown(self):
+        """关闭工作池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def iter_scan(self, root: str) -> AsyncIterator[FileScanResult]:
+        """流式扫描：每个文件分析完成后立即产出结果"""
+        paths = await asyncio.to_thread(self.collect_files, root)
+        async for result in self.iter_scan_files(paths):
+            yield result
+
+    async def iter_scan_files(self, paths: List[str]) -> AsyncIterator[FileScanResult]:
+        """流式分析给定的文件列表"""
+        if not paths:
+            return
+
+        if len(paths) < self.min_parallel_files:
+            results = await asyncio.to_thread(_analyze_chunk, paths, self.analyzers, self.profile)
+            for result in results:
+                yield result
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        futures = [
+            loop.run_in_executor(executor, _analyze_chunk,
+                                 paths[i:i + self.chunk_size], self.analyzers, self.profile)
+            for i in range(0, len(paths), self.chunk_size)
+        ]
+        try:
+            for future in asyncio.as_completed(futures):
+                for result in await future:
+                    yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def scan(self, root: str) -> ScanReport:
+        """扫描整个目录并汇总结果（按路径排序）"""
+        start = time.perf_counter()
+        report = ScanReport(root=root)
+        async for result in self.iter_scan(root):
+            if result.error:
+                logger.warning(f"分析文件失败 {result.path}: {result.error}")
+            report.results.append(result)
+        report.results.sort(key=lambda r: r.path)
+        report.elapsed = time.perf_counter() - start
+        if self.profile:
+            logger.info(report.format_profile())
+        return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="项目扫描引擎 - 输出最慢文件的分析耗时")
+    parser.add_argument("path", nargs="?", default=".", help="扫描目录")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数")
+    parser.add_argument("--top", type=int, default=20, help="显示最慢的文件数")
+    args = parser.parse_args()
+
+    scanner = ProjectScanner([ComplexityAnalyzer()], max_workers=args.workers, profile=True)
+    try:
+        scan_report = asyncio.run(scanner.scan(args.path))
+    finally:
+        scanner.shutdown()
+    print(scan_report.format_profile(args.top))
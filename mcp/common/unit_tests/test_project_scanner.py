@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+project_scanner 单元测试
+覆盖单次遍历、共享语法树分发、流式结果与目录快照
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+from pathlib import Path
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.common.project_scanner import (
+    ProjectScanner, FileAnalyzer, ComplexityAnalyzer, RegexRuleAnalyzer, analyze_file
+)
+import ast
+
+
+COMPLEX_SOURCE = '''
+def complex_func(a, b):
+    if a:
+        pass
+    if b:
+        pass
+    for i in range(3):
+        while i:
+            if a and b and i:
+                pass
+    return a
+'''
+
+IMPORT_SOURCE = "import os\nfrom kilocode_mcp import KiloCode\n"
+
+
+class FunctionCounter(FileAnalyzer):
+    """测试用：与复杂度分析器共享同一棵语法树"""
+    name = "function_counter"
+    node_types = (ast.FunctionDef,)
+
+    def visit_node(self, node, ctx):
+        ctx.add_finding(self.name, {"function": node.name})
+
+
+class TestProjectScanner(unittest.IsolatedAsyncioTestCase):
+    """ProjectScanner 单元测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self._write("pkg/complex.py", COMPLEX_SOURCE)
+        self._write("pkg/imports.py", IMPORT_SOURCE)
+        self._write("pkg/broken.py", "def broken(:\n")
+        self._write("venv/lib/skipped.py", COMPLEX_SOURCE)
+        self._write("README.md", "# readme\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, rel_path, content):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def test_collect_files_skips_patterns(self):
+        """TC001: 单次遍历只收集分析器关心且未被跳过的文件"""
+        scanner = ProjectScanner([ComplexityAnalyzer()])
+        files = [os.path.relpath(p, self.root) for p in scanner.collect_files(self.root)]
+        self.assertEqual(files, [
+            os.path.join("pkg", "broken.py"),
+            os.path.join("pkg", "complex.py"),
+            os.path.join("pkg", "imports.py"),
+        ])
+
+    def test_analyzers_share_parsed_tree(self):
+        """TC002: 多个分析器在同一次解析上注册访问器"""
+        path = os.path.join(self.root, "pkg", "complex.py")
+        result = analyze_file(path, [ComplexityAnalyzer(threshold=5), FunctionCounter()], profile=True)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.findings["function_counter"], [{"function": "complex_func"}])
+        issue = result.findings["complexity"][0]
+        self.assertEqual(issue["function"], "complex_func")
+        self.assertEqual(issue["complexity"], 8)
+        self.assertIn("parse", result.timings)
+        self.assertIn("complexity", result.timings)
+
+    def test_regex_rules_report_line_numbers(self):
+        """TC003: 正则规则按行号报告命中"""
+        rules = {"direct_mcp_import": {"patterns": [r"from\s+\w*mcp\w*\s+import"]}}
+        path = os.path.join(self.root, "pkg", "imports.py")
+        result = analyze_file(path, [RegexRuleAnalyzer(rules)])
+        findings = result.findings["regex_rules"]
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(findings[0]["rule"], "direct_mcp_import")
+        self.assertEqual(findings[0]["line"], 2)
+
+    async def test_process_pool_scan_matches_inline(self):
+        """TC004: 进程池扫描与线程内扫描结果一致，解析失败不影响其它文件"""
+        analyzers = [ComplexityAnalyzer(threshold=5)]
+        inline = ProjectScanner(analyzers)
+        pooled = ProjectScanner(analyzers, max_workers=2, chunk_size=1, min_parallel_files=0)
+        try:
+            inline_report = await inline.scan(self.root)
+            pooled_report = await pooled.scan(self.root)
+        finally:
+            pooled.shutdown()
+
+        self.assertEqual(inline_report.files_scanned, 3)
+        self.assertEqual(pooled_report.findings("complexity"), inline_report.findings("complexity"))
+        self.assertEqual([r.path for r in pooled_report.errors],
+                         [os.path.join(self.root, "pkg", "broken.py")])
+
+    async def test_iter_scan_streams_results(self):
+        """TC005: 流式返回每个文件的结果"""
+        scanner = ProjectScanner([ComplexityAnalyzer()], use_processes=False,
+                                 chunk_size=1, min_parallel_files=0)
+        try:
+            paths = [r.path async for r in scanner.iter_scan(self.root)]
+        finally:
+            scanner.shutdown()
+        self.assertEqual(len(paths), 3)
+
+    def test_snapshot_depth_limit(self):
+        """TC006: 目录快照遵守深度限制"""
+        self._write("mcp/adapters/demo_mcp/__init__.py", "")
+        self._write("mcp/adapters/demo_mcp/deep/nested/x.py", "")
+        tree = ProjectScanner([]).snapshot(self.root, max_depth=3)
+        self.assertTrue(tree.has_dir("mcp/adapters/"))
+        self.assertEqual(tree.subdirs("mcp/adapters"), ["demo_mcp"])
+        self.assertTrue(tree.has_file("mcp/adapters/demo_mcp/__init__.py"))
+        self.assertFalse(tree.has_file("mcp/adapters/demo_mcp/README.md"))
+        self.assertFalse(tree.has_dir("mcp/adapters/demo_mcp/deep/nested"))
+        self.assertFalse(tree.has_dir("venv"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,8 @@ import time
 import uuid
 from datetime import datetime
 from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
 from typing import Dict, List, Any, Optional, Union, Set
 from dataclasses import dataclass, asdict
 from enum import Enum
@@ -350,11 +352,8 @@ class ParallelExecutionScheduler:
             self.logger.info(f"Starting workflow execution: {workflow.workflow_id}")
             workflow.status = WorkflowStatus.RUNNING
             
-            # 创建执行计划
-            execution_plan = self._create_execution_plan(workflow)
-            
-            # 并行执行节点
-            results = await self._execute_parallel_nodes(workflow, execution_plan, mcp_coordinator)
+            # 即时调度执行节点
+            results = await self._execute_parallel_nodes(workflow, mcp_coordinator)
             
             # 更新工作流状态
             if all(result.get('status') == 'success' for result in results.values()):
@@ -402,43 +401,89 @@ class ParallelExecutionScheduler:
         
         return execution_plan
     
-    async def _execute_parallel_nodes(self, workflow: DynamicWorkflow, 
-                                    execution_plan: Dict[str, List[str]],
+    async def _execute_parallel_nodes(self, workflow: DynamicWorkflow,
                                     mcp_coordinator: EnhancedMCPCoordinator) -> Dict[str, Any]:
-        """并行执行节点"""
+        """即时调度执行节点 - 节点的依赖全部结束后立即启动，不再等待整个层级
+
+        并发数由 max_parallel_tasks 信号量限制；同时就绪的节点按优先级从高到低派发。
+        依赖不存在或处于循环中的节点不会执行，结果标记为 skipped。
+        """
+        node_map = {node.node_id: node for node in workflow.nodes}
         results = {}
+        remaining = {}
+        dependents = {node_id: [] for node_id in node_map}
+        
+        # 建立剩余依赖计数与反向依赖索引
+        for node in workflow.nodes:
+            deps = set(node.dependencies)
+            missing = [dep for dep in deps if dep not in node_map]
+            if missing:
+                results[node.node_id] = {
+                    "status": "skipped",
+                    "message": f"Missing dependencies: {', '.join(sorted(missing))}"
+                }
+                continue
+            remaining[node.node_id] = len(deps)
+            for dep in deps:
+                dependents[dep].append(node.node_id)
+        
+        ready = [node_id for node_id, count in remaining.items() if count == 0]
+        semaphore = asyncio.Semaphore(self.max_parallel_tasks)
+        running = {}
         
-        for level, node_ids in execution_plan.items():
-            self.logger.info(f"Executing level {level} with nodes: {node_ids}")
+        async def run_node(node: WorkflowNode) -> Dict[str, Any]:
+            try:
+                return await self._execute_single_node(node, mcp_coordinator)
+            finally:
+                semaphore.release()
+        
+        while ready or running:
+            # 在并发上限内派发就绪节点
+            ready.sort(key=lambda node_id: node_map[node_id].priority)
+            while ready and not semaphore.locked():
+                await semaphore.acquire()
+                node_id = ready.pop()
+                self.logger.info(f"Dispatching node {node_id}")
+                workflow.current_executing_nodes.add(node_id)
+                task = asyncio.create_task(run_node(node_map[node_id]))
+                running[task] = node_id
+                self.running_tasks[node_id] = task
             
-            # 并行执行当前层级的所有节点
-            level_tasks = []
-            for node_id in node_ids:
-                node = next(n for n in workflow.nodes if n.node_id == node_id)
-                task = asyncio.create_task(
-                    self._execute_single_node(node, mcp_coordinator)
-                )
-                level_tasks.append((node_id, task))
+            if not running:
+                break
             
-            # 等待当前层级所有任务完成
-            for node_id, task in level_tasks:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                node_id = running.pop(task)
+                self.running_tasks.pop(node_id, None)
+                workflow.current_executing_nodes.discard(node_id)
+                node = node_map[node_id]
+                
                 try:
-                    result = await task
-                    results[node_id] = result
-                    
-                    # 更新节点状态
-                    node = next(n for n in workflow.nodes if n.node_id == node_id)
-                    if result.get('status') == 'success':
-                        node.status = WorkflowStatus.COMPLETED
-                        workflow.completed_nodes.add(node_id)
-                    else:
-                        node.status = WorkflowStatus.FAILED
-                        workflow.failed_nodes.add(node_id)
-                    
+                    result = task.result()
                 except Exception as e:
                     self.logger.error(f"Node {node_id} execution failed: {str(e)}")
-                    results[node_id] = {"status": "error", "message": str(e)}
+                    result = {"status": "error", "message": str(e)}
+                results[node_id] = result
+                
+                # 更新节点状态
+                if result.get('status') == 'success':
+                    node.status = WorkflowStatus.COMPLETED
+                    workflow.completed_nodes.add(node_id)
+                else:
+                    node.status = WorkflowStatus.FAILED
                     workflow.failed_nodes.add(node_id)
+                
+                # 依赖全部结束的下游节点立即进入就绪队列
+                for dependent_id in dependents[node_id]:
+                    remaining[dependent_id] -= 1
+                    if remaining[dependent_id] == 0:
+                        ready.append(dependent_id)
+        
+        # 剩余未执行的节点处于循环依赖或依赖了被跳过的节点
+        for node_id in node_map:
+            if node_id not in results:
+                results[node_id] = {"status": "skipped", "message": "Unresolvable dependencies"}
         
         return results
     
@@ -591,8 +636,9 @@ class IntelligentDependencyManager:
         """过滤并行依赖 - 只保留真正必要的依赖"""
         filtered = []
         
+        node_map = {node.node_id: node for node in workflow.nodes}
         for dep in dependencies:
-            dep_node = next((n for n in workflow.nodes if n.node_id == dep), None)
+            dep_node = node_map.get(dep)
             if dep_node and self._is_critical_dependency(dep_node):
                 filtered.append(dep)
         
@@ -636,9 +682,10 @@ class IntelligentDependencyManager:
         
         # 计算最长路径（关键路径）
         distances = {node.node_id: 0 for node in workflow.nodes}
+        node_map = {node.node_id: node for node in workflow.nodes}
         
         for node_id in topo_order:
-            node = next(n for n in workflow.nodes if n.node_id == node_id)
+            node = node_map[node_id]
             for dep in graph.get(node_id, []):
                 distances[node_id] = max(
                     distances[node_id], 
@@ -654,7 +701,7 @@ class IntelligentDependencyManager:
         for node_id in reversed(topo_order):
             if distances[node_id] == current_distance:
                 critical_path.insert(0, node_id)
-                node = next(n for n in workflow.nodes if n.node_id == node_id)
+                node = node_map[node_id]
                 current_distance -= node.estimated_duration
         
         return critical_path
@@ -663,13 +710,102 @@ class IntelligentDependencyManager:
 # 5. 主动状态推送器
 # ============================================================================
 
+class _StatusClientChannel:
+    """单个WebSocket客户端的发送通道 - 有界待发队列，独立发送任务
+
+    policy 为 "coalesce" 时同一 (workflow_id, node_id) 只保留最新一条；
+    为 "drop" 时保留全部更新。两种策略在队列满时都丢弃最旧的更新。
+    """
+    
+    def __init__(self, websocket, max_queue_size: int, policy: str, send_timeout: float):
+        self.websocket = websocket
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.subscribe_all = True              # 未订阅任何工作流前接收所有工作流
+        self.subscriptions: Set[str] = set()
+        self.pending: "OrderedDict[Any, str]" = OrderedDict()
+        self.dropped = 0
+        self.frames_sent = 0
+        self.closed = False
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+    
+    def wants(self, workflow_id: str) -> bool:
+        return self.subscribe_all or workflow_id in self.subscriptions
+    
+    def subscribe(self, workflow_ids):
+        """只接收指定工作流；取消订阅到集合为空时不会恢复为接收全部"""
+        workflow_ids = list(workflow_ids)
+        if workflow_ids:
+            self.subscribe_all = False
+            self.subscriptions.update(workflow_ids)
+    
+    def subscribe_everything(self):
+        self.subscribe_all = True
+        self.subscriptions.clear()
+    
+    def enqueue(self, key: Any, payload: str):
+        """加入待发队列 - coalesce策略下同一节点只保留最新状态，队列满时丢弃最旧的更新"""
+        if self.policy == "coalesce" and key in self.pending:
+            self.pending[key] = payload
+        else:
+            if self.policy != "coalesce":
+                self._sequence += 1
+                key = (key, self._sequence)
+            self.pending[key] = payload
+            while len(self.pending) > self.max_queue_size:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+        self._wakeup.set()
+    
+    async def run(self):
+        """发送循环 - 每次把积压的全部更新合并为一帧发送"""
+        while not self.closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            if not self.pending:
+                continue
+            
+            payloads = list(self.pending.values())
+            self.pending.clear()
+            if len(payloads) == 1:
+                frame = '{"type": "status_update", "data": ' + payloads[0] + '}'
+            else:
+                frame = '{"type": "status_batch", "updates": [' + ", ".join(payloads) + ']}'
+            
+            try:
+                await asyncio.wait_for(self.websocket.send(frame), timeout=self.send_timeout)
+                self.frames_sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 发送失败或超时视为连接失效，关闭后由接收循环清理
+                self.closed = True
+                try:
+                    await self.websocket.close()
+                except Exception:
+                    pass
+
 class ActiveStatusPusher:
-    """主动状态推送器 - 实时推送状态到SmartUI"""
+    """主动状态推送器 - 实时推送状态到SmartUI
+    
+    每条状态更新只序列化一次；每个客户端拥有独立的有界发送队列和发送任务，
+    慢客户端只会在自己的队列中合并(coalesce)或丢弃(drop)更新，不会拖慢其它客户端。
+    客户端可发送 {"action": "subscribe", "workflow_ids": [...]} 只接收指定工作流的更新。
+    """
     
-    def __init__(self, smartui_endpoint: str = "ws://localhost:5001/ws"):
+    def __init__(self, smartui_endpoint: str = "ws://localhost:5001/ws",
+                 batch_interval: float = 0.05, max_client_queue: int = 100,
+                 slow_client_policy: str = "coalesce", send_timeout: float = 10.0):
         self.smartui_endpoint = smartui_endpoint
         self.websocket_connections = set()
+        self.client_channels: Dict[Any, _StatusClientChannel] = {}
         self.status_queue = asyncio.Queue()
+        self.batch_interval = batch_interval
+        self.max_client_queue = max_client_queue
+        self.slow_client_policy = slow_client_policy
+        self.send_timeout = send_timeout
         self.logger = logging.getLogger(__name__)
         self.running = False
     
@@ -692,64 +828,123 @@ class ActiveStatusPusher:
         await self.status_queue.put(update)
     
     async def _status_pusher_worker(self):
-        """状态推送工作线程"""
+        """状态推送工作线程 - 每个周期取出积压的全部更新批量分发"""
         while self.running:
             try:
                 # 等待状态更新
                 update = await asyncio.wait_for(self.status_queue.get(), timeout=1.0)
                 
-                # 推送到所有连接的客户端
-                await self._broadcast_update(update)
+                # 在一个周期内收集更多更新，合并为一帧
+                if self.batch_interval > 0:
+                    await asyncio.sleep(self.batch_interval)
+                updates = [update]
+                while not self.status_queue.empty():
+                    updates.append(self.status_queue.get_nowait())
+                
+                self._broadcast_updates(updates)
                 
             except asyncio.TimeoutError:
                 continue
             except Exception as e:
                 self.logger.error(f"Status pusher error: {str(e)}")
     
+    def _serialize_update(self, update: StatusUpdate) -> str:
+        """序列化单条状态更新（每条更新只序列化一次，所有客户端共享）"""
+        return json.dumps({
+            "update_id": update.update_id,
+            "workflow_id": update.workflow_id,
+            "node_id": update.node_id,
+            "status": update.status.value,
+            "progress": update.progress,
+            "message": update.message,
+            "timestamp": update.timestamp.isoformat(),
+            "data": update.data
+        }, default=str)
+    
     async def _broadcast_update(self, update: StatusUpdate):
         """广播状态更新到所有客户端"""
-        if not self.websocket_connections:
+        self._broadcast_updates([update])
+    
+    def _broadcast_updates(self, updates: List[StatusUpdate]):
+        """把一批更新分发到订阅了对应工作流的客户端队列，由各客户端发送任务并发发送"""
+        if not self.client_channels:
             return
         
-        message = {
-            "type": "status_update",
-            "data": {
-                "update_id": update.update_id,
-                "workflow_id": update.workflow_id,
-                "node_id": update.node_id,
-                "status": update.status.value,
-                "progress": update.progress,
-                "message": update.message,
-                "timestamp": update.timestamp.isoformat(),
-                "data": update.data
+        for update in updates:
+            payload = self._serialize_update(update)
+            key = (update.workflow_id, update.node_id)
+            for channel in self.client_channels.values():
+                if channel.wants(update.workflow_id):
+                    channel.enqueue(key, payload)
+    
+    def _handle_client_message(self, channel: _StatusClientChannel, raw_message: str):
+        """处理客户端订阅消息"""
+        try:
+            message = json.loads(raw_message)
+        except (TypeError, ValueError):
+            return
+        if not isinstance(message, dict):
+            return
+        
+        workflow_ids = message.get("workflow_ids") or []
+        if message.get("workflow_id"):
+            workflow_ids = list(workflow_ids) + [message["workflow_id"]]
+        
+        action = message.get("action")
+        if action == "subscribe":
+            channel.subscribe(workflow_ids)
+        elif action == "unsubscribe":
+            if workflow_ids:
+                channel.subscriptions.difference_update(workflow_ids)
+            else:
+                channel.subscribe_everything()
+    
+    def get_client_stats(self) -> List[Dict[str, Any]]:
+        """获取各客户端的推送统计"""
+        return [
+            {
+                "remote_address": str(getattr(ws, "remote_address", "")),
+                "subscribe_all": channel.subscribe_all,
+                "subscriptions": sorted(channel.subscriptions),
+                "pending": len(channel.pending),
+                "dropped": channel.dropped,
+                "frames_sent": channel.frames_sent
             }
-        }
+            for ws, channel in self.client_channels.items()
+        ]
+    
+    async def _serve_client(self, websocket, path: str = ""):
+        """服务单个客户端：注册发送通道，读取订阅消息，连接关闭时清理"""
+        channel = _StatusClientChannel(
+            websocket, self.max_client_queue, self.slow_client_policy, self.send_timeout
+        )
+        # 新版 websockets 只传入连接对象，请求路径在 websocket.request.path 上
+        request = getattr(websocket, "request", None)
+        path = getattr(request, "path", None) or getattr(websocket, "path", "") or path
+        query = parse_qs(urlparse(path or "").query)
+        channel.subscribe(query.get("workflow_id", []))
         
-        # 发送到所有连接的客户端
-        disconnected = set()
-        for ws in self.websocket_connections:
-            try:
-                await ws.send(json.dumps(message))
-            except websockets.exceptions.ConnectionClosed:
-                disconnected.add(ws)
-            except Exception as e:
-                self.logger.error(f"Failed to send update to client: {str(e)}")
-                disconnected.add(ws)
+        self.websocket_connections.add(websocket)
+        self.client_channels[websocket] = channel
+        sender = asyncio.create_task(channel.run())
+        self.logger.info(f"New WebSocket connection: {getattr(websocket, 'remote_address', None)}")
         
-        # 清理断开的连接
-        self.websocket_connections -= disconnected
+        try:
+            async for raw_message in websocket:
+                self._handle_client_message(channel, raw_message)
+        except Exception as e:
+            self.logger.debug(f"WebSocket receive ended: {str(e)}")
+        finally:
+            channel.closed = True
+            sender.cancel()
+            self.websocket_connections.discard(websocket)
+            self.client_channels.pop(websocket, None)
+            self.logger.info(f"WebSocket connection closed: {getattr(websocket, 'remote_address', None)}")
     
     async def _websocket_server(self):
         """WebSocket服务器"""
-        async def handle_client(websocket, path):
-            self.websocket_connections.add(websocket)
-            self.logger.info(f"New WebSocket connection: {websocket.remote_address}")
-            
-            try:
-                await websocket.wait_closed()
-            finally:
-                self.websocket_connections.discard(websocket)
-                self.logger.info(f"WebSocket connection closed: {websocket.remote_address}")
+        async def handle_client(websocket, path=""):
+            await self._serve_client(websocket, path)
         
         try:
             server = await websockets.serve(handle_client, "localhost", 5002)
@@ -775,7 +970,10 @@ class ProductOrchestratorV3:
         )
         self.dependency_manager = IntelligentDependencyManager()
         self.status_pusher = ActiveStatusPusher(
-            smartui_endpoint=self.config.get('smartui_endpoint', 'ws://localhost:5001/ws')
+            smartui_endpoint=self.config.get('smartui_endpoint', 'ws://localhost:5001/ws'),
+            batch_interval=self.config.get('status_batch_interval', 0.05),
+            max_client_queue=self.config.get('status_client_queue_size', 100),
+            slow_client_policy=self.config.get('status_slow_client_policy', 'coalesce')
         )
         
         # 集成现有组件
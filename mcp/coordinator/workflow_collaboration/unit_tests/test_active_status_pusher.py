@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+ActiveStatusPusher 单元测试
+覆盖按工作流订阅过滤、批量合帧、客户端队列的合并/丢弃上限与发送失败处理
+"""
+
+import unittest
+import asyncio
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import websockets
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.coordinator.workflow_collaboration.product_orchestrator_v3 import (
+    ActiveStatusPusher, StatusUpdate, WorkflowStatus, _StatusClientChannel
+)
+
+
+def make_update(workflow_id: str, node_id: str = "node_1", progress: float = 0.5) -> StatusUpdate:
+    return StatusUpdate(
+        update_id=f"{workflow_id}-{node_id}-{progress}",
+        workflow_id=workflow_id,
+        node_id=node_id,
+        status=WorkflowStatus.RUNNING,
+        progress=progress,
+        message="running",
+        timestamp=datetime.now()
+    )
+
+
+def frame_updates(frame: str):
+    """把 status_update / status_batch 帧展开为更新列表"""
+    message = json.loads(frame)
+    if message["type"] == "status_update":
+        return [message["data"]]
+    return message["updates"]
+
+
+class FakeWebSocket:
+    """记录发送帧的WebSocket替身"""
+
+    def __init__(self, fail_send: bool = False, fail_close: bool = False):
+        self.frames = []
+        self.fail_send = fail_send
+        self.fail_close = fail_close
+        self.close_calls = 0
+
+    async def send(self, frame: str):
+        if self.fail_send:
+            raise ConnectionError("connection lost")
+        self.frames.append(frame)
+
+    async def close(self):
+        self.close_calls += 1
+        if self.fail_close:
+            raise ConnectionError("already closed")
+
+
+class TestStatusClientChannel(unittest.TestCase):
+    """客户端发送通道测试"""
+
+    def test_coalesce_keeps_latest_per_node_and_bounds_queue(self):
+        """测试coalesce策略同一节点只保留最新状态，队列满时丢弃最旧的节点"""
+        channel = _StatusClientChannel(FakeWebSocket(), max_queue_size=3, policy="coalesce", send_timeout=1.0)
+        for progress in range(5):
+            channel.enqueue(("wf1", "node_a"), f"a{progress}")
+        self.assertEqual(list(channel.pending.values()), ["a4"])
+        self.assertEqual(channel.dropped, 0)
+
+        for node in ["node_b", "node_c", "node_d"]:
+            channel.enqueue(("wf1", node), node)
+        self.assertEqual(list(channel.pending.values()), ["node_b", "node_c", "node_d"])
+        self.assertEqual(channel.dropped, 1)
+
+    def test_drop_keeps_every_update_up_to_bound(self):
+        """测试drop策略保留每条更新，超过上限时丢弃最旧的更新"""
+        channel = _StatusClientChannel(FakeWebSocket(), max_queue_size=3, policy="drop", send_timeout=1.0)
+        for progress in range(5):
+            channel.enqueue(("wf1", "node_a"), f"a{progress}")
+        self.assertEqual(list(channel.pending.values()), ["a2", "a3", "a4"])
+        self.assertEqual(channel.dropped, 2)
+
+    def test_send_failure_closes_channel_even_if_close_raises(self):
+        """测试发送失败时关闭通道，关闭连接再次出错也不会让发送任务异常退出"""
+        websocket = FakeWebSocket(fail_send=True, fail_close=True)
+        channel = _StatusClientChannel(websocket, max_queue_size=3, policy="coalesce", send_timeout=1.0)
+
+        async def scenario():
+            channel.enqueue(("wf1", "node_a"), "{}")
+            await asyncio.wait_for(channel.run(), timeout=1.0)
+
+        asyncio.run(scenario())
+        self.assertTrue(channel.closed)
+        self.assertEqual(websocket.close_calls, 1)
+
+
+class TestActiveStatusPusher(unittest.TestCase):
+    """状态推送器测试"""
+
+    def test_updates_within_interval_sent_as_one_batch(self):
+        """测试批量周期内的更新合并为一帧发送"""
+        pusher = ActiveStatusPusher(batch_interval=0.05)
+        websocket = FakeWebSocket()
+
+        async def scenario():
+            channel = _StatusClientChannel(websocket, 100, "drop", 1.0)
+            pusher.client_channels[websocket] = channel
+            sender = asyncio.create_task(channel.run())
+            pusher.running = True
+            worker = asyncio.create_task(pusher._status_pusher_worker())
+            for index in range(5):
+                await pusher.push_status_update(make_update("wf1", f"node_{index}"))
+            await asyncio.sleep(0.2)
+            pusher.running = False
+            channel.closed = True
+            sender.cancel()
+            await asyncio.gather(worker, sender, return_exceptions=True)
+
+        asyncio.run(scenario())
+        self.assertEqual(len(websocket.frames), 1)
+        self.assertEqual(json.loads(websocket.frames[0])["type"], "status_batch")
+        self.assertEqual([u["node_id"] for u in frame_updates(websocket.frames[0])],
+                         [f"node_{index}" for index in range(5)])
+
+    def test_query_subscription_filters_workflows_over_real_connection(self):
+        """测试通过 ?workflow_id= 订阅的真实客户端只收到该工作流的更新"""
+        pusher = ActiveStatusPusher(batch_interval=0)
+
+        async def scenario():
+            async with websockets.serve(pusher._serve_client, "127.0.0.1", 0) as server:
+                port = server.sockets[0].getsockname()[1]
+                async with websockets.connect(f"ws://127.0.0.1:{port}/?workflow_id=wf1") as client:
+                    for _ in range(50):
+                        if pusher.client_channels:
+                            break
+                        await asyncio.sleep(0.01)
+                    stats = pusher.get_client_stats()
+                    pusher._broadcast_updates([make_update("wf2"), make_update("wf1"), make_update("wf2", "node_2")])
+                    frame = await asyncio.wait_for(client.recv(), timeout=1.0)
+                    with self.assertRaises(asyncio.TimeoutError):
+                        await asyncio.wait_for(client.recv(), timeout=0.1)
+            return stats, frame
+
+        stats, frame = asyncio.run(scenario())
+        self.assertEqual(stats[0]["subscriptions"], ["wf1"])
+        self.assertEqual([u["workflow_id"] for u in frame_updates(frame)], ["wf1"])
+
+    def test_subscribe_message_filters_workflows(self):
+        """测试订阅/取消订阅消息控制客户端接收的工作流"""
+        pusher = ActiveStatusPusher()
+        channel = _StatusClientChannel(FakeWebSocket(), 100, "coalesce", 1.0)
+        pusher.client_channels["client"] = channel
+
+        pusher._handle_client_message(channel, json.dumps({"action": "subscribe", "workflow_ids": ["wf1", "wf3"]}))
+        pusher._broadcast_updates([make_update("wf1"), make_update("wf2"), make_update("wf3")])
+        self.assertEqual([key[0] for key in channel.pending], ["wf1", "wf3"])
+
+        channel.pending.clear()
+        pusher._handle_client_message(channel, json.dumps({"action": "unsubscribe"}))
+        pusher._handle_client_message(channel, "not json")
+        pusher._broadcast_updates([make_update("wf2")])
+        self.assertEqual([key[0] for key in channel.pending], ["wf2"])
+
+
+    def test_unsubscribe_last_workflow_does_not_receive_all(self):
+        """测试取消订阅最后一个工作流后不会转为接收所有工作流"""
+        pusher = ActiveStatusPusher()
+        channel = _StatusClientChannel(FakeWebSocket(), 100, "coalesce", 1.0)
+        pusher.client_channels["client"] = channel
+
+        pusher._handle_client_message(channel, json.dumps({"action": "subscribe", "workflow_id": "wf1"}))
+        pusher._handle_client_message(channel, json.dumps({"action": "unsubscribe", "workflow_id": "wf1"}))
+        pusher._broadcast_updates([make_update("wf1"), make_update("wf2")])
+        self.assertEqual(len(channel.pending), 0)
+        self.assertFalse(pusher.get_client_stats()[0]["subscribe_all"])
+
+if __name__ == '__main__':
+    unittest.main()
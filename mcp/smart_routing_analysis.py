@@ -51,9 +51,12 @@
 # 2. 路由决策枚举和数据结构
 # ============================================================================
 
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
 class RoutingDecision(Enum):
     """路由决策结果"""
@@ -108,6 +111,28 @@ class RoutingResult:
     estimated_time: float
     fallback_options: List[RoutingDecision] = None
     metadata: Dict[str, Any] = None
+    
+    def __post_init__(self):
+        # reasoning 可以传入无参函数，首次读取时才生成文本
+        if callable(self.reasoning):
+            self.__dict__['_reasoning_factory'] = self.__dict__.pop('reasoning')
+    
+    def __getattr__(self, name):
+        if name == 'reasoning' and '_reasoning_factory' in self.__dict__:
+            reasoning = self.__dict__.pop('_reasoning_factory')()
+            self.__dict__['reasoning'] = reasoning
+            return reasoning
+        raise AttributeError(name)
+
+class _CachedDecision:
+    """决策缓存条目：只保存由阈值档位决定的部分（决策、处理位置、备选方案）"""
+    
+    __slots__ = ('decision', 'location', 'fallback_options')
+    
+    def __init__(self, decision, location, fallback_options):
+        self.decision = decision
+        self.location = location
+        self.fallback_options = tuple(fallback_options)
 
 # ============================================================================
 # 3. 智慧路由决策算法重构
@@ -118,17 +143,21 @@ class EnhancedSmartRouter:
     增强版智慧路由器
     
     基于PowerAutomation智慧路由系统，针对OCR和MCP场景优化
+    
+    决策和备选方案只取决于各阶段实际比较的阈值档位（见 _decision_cache_key），
+    因此按档位缓存这两部分（有界LRU）；置信度、成本估算依赖连续值，每个请求单独计算，
+    推理文本在首次读取时生成；统计按线程分片累加，无需加锁。修改 config 后需调用 clear_decision_cache()。
     """
     
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or self._get_default_config()
-        self.routing_stats = {
-            "total_requests": 0,
-            "local_decisions": 0,
-            "cloud_decisions": 0,
-            "hybrid_decisions": 0,
-            "average_confidence": 0.0
-        }
+        self.decision_cache_size = self.config.get("decision_cache_size", 8192)
+        self._decision_cache: "OrderedDict[Tuple, _CachedDecision]" = OrderedDict()
+        self._capability_bands = self._get_capability_bands()
+        
+        # 按线程分片的统计：[total, local, cloud, hybrid, confidence_sum, cache_hits, cache_misses]
+        self._stats_local = threading.local()
+        self._stats_shards: List[List[float]] = []
     
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
@@ -141,7 +170,8 @@ class EnhancedSmartRouter:
             "cost_sensitivity": 1.0,
             "privacy_enforcement": True,
             "load_balancing_enabled": True,
-            "fallback_enabled": True
+            "fallback_enabled": True,
+            "decision_cache_size": 8192
         }
     
     def route_request(self, context: RoutingContext) -> RoutingResult:
@@ -155,35 +185,25 @@ class EnhancedSmartRouter:
             路由决策结果
         """
         
-        # 更新统计
-        self.routing_stats["total_requests"] += 1
+        entry = self._lookup_decision(context)
+        decision = entry.decision
         
-        # 执行决策算法
-        decision = self._make_routing_decision(context)
-        
-        # 计算置信度
+        # 置信度、成本和时间依赖连续值，按请求计算
         confidence = self._calculate_confidence(context, decision)
-        
-        # 生成推理说明
-        reasoning = self._generate_reasoning(context, decision)
-        
-        # 估算成本和时间
         estimated_cost, estimated_time = self._estimate_cost_and_time(context, decision)
         
-        # 生成备选方案
-        fallback_options = self._generate_fallback_options(context, decision)
-        
         # 更新统计
         self._update_stats(decision, confidence)
         
         result = RoutingResult(
             decision=decision,
-            processing_location=self._decision_to_location(decision),
+            processing_location=entry.location,
             confidence=confidence,
-            reasoning=reasoning,
+            # 推理说明延迟生成
+            reasoning=lambda: self._generate_reasoning(context, decision),
             estimated_cost=estimated_cost,
             estimated_time=estimated_time,
-            fallback_options=fallback_options,
+            fallback_options=list(entry.fallback_options),
             metadata={
                 "context": context,
                 "config": self.config,
@@ -193,6 +213,62 @@ class EnhancedSmartRouter:
         
         return result
     
+    def _get_capability_bands(self) -> Tuple[float, ...]:
+        """决策和备选方案中与 local_capability 比较的全部阈值（升序）"""
+        return tuple(sorted({0.3, 0.5, 0.6, 0.7, 0.8, self.config["local_capability_threshold"]}))
+    
+    def _decision_cache_key(self, context: RoutingContext) -> Tuple:
+        """规范化上下文：连续值只保留其落在各阈值的哪一侧，缺省负载按0.5处理"""
+        system_load = context.system_load or {}
+        cost_ratio = context.cloud_cost / max(context.local_cost, 0.001)
+        return (
+            context.privacy_level,
+            context.complexity,
+            bisect_right(self._capability_bands, context.local_capability),
+            cost_ratio > 10,
+            context.estimated_tokens > 10000,
+            system_load.get("local", 0.5) < 0.3,
+            system_load.get("cloud", 0.5) < 0.3
+        )
+    
+    def _compute_decision(self, context: RoutingContext) -> _CachedDecision:
+        """执行决策算法并生成备选方案（缓存未命中时）"""
+        
+        decision = self._make_routing_decision(context)
+        fallback_options = self._generate_fallback_options(context, decision)
+        return _CachedDecision(decision, self._decision_to_location(decision), fallback_options)
+    
+    def _lookup_decision(self, context: RoutingContext) -> _CachedDecision:
+        """按规范化上下文查找缓存的决策，未命中时计算并放入有界LRU"""
+        if self.decision_cache_size <= 0:
+            self._stats_shard()[6] += 1
+            return self._compute_decision(context)
+        
+        key = self._decision_cache_key(context)
+        entry = self._decision_cache.get(key)
+        if entry is not None:
+            self._stats_shard()[5] += 1
+            try:
+                self._decision_cache.move_to_end(key)
+            except KeyError:
+                pass  # 并发淘汰，不影响结果
+            return entry
+        
+        self._stats_shard()[6] += 1
+        entry = self._compute_decision(context)
+        self._decision_cache[key] = entry
+        while len(self._decision_cache) > self.decision_cache_size:
+            try:
+                self._decision_cache.popitem(last=False)
+            except KeyError:
+                break
+        return entry
+    
+    def clear_decision_cache(self):
+        """清空决策缓存（修改 config 后调用）"""
+        self._capability_bands = self._get_capability_bands()
+        self._decision_cache.clear()
+    
     def _make_routing_decision(self, context: RoutingContext) -> RoutingDecision:
         """
         核心路由决策算法
@@ -378,29 +454,54 @@ class EnhancedSmartRouter:
         else:
             return ProcessingLocation.HYBRID
     
+    def _stats_shard(self) -> List[float]:
+        """当前线程的统计分片，只由本线程写入"""
+        shard = getattr(self._stats_local, 'shard', None)
+        if shard is None:
+            shard = [0, 0, 0, 0, 0.0, 0, 0]
+            self._stats_local.shard = shard
+            self._stats_shards.append(shard)
+        return shard
+    
     def _update_stats(self, decision: RoutingDecision, confidence: float):
-        """更新统计信息"""
+        """更新统计信息（写入当前线程的分片，无锁）"""
         
+        shard = self._stats_shard()
+        shard[0] += 1
         if decision == RoutingDecision.LOCAL_ONLY:
-            self.routing_stats["local_decisions"] += 1
+            shard[1] += 1
         elif decision == RoutingDecision.CLOUD_ONLY:
-            self.routing_stats["cloud_decisions"] += 1
+            shard[2] += 1
         else:
-            self.routing_stats["hybrid_decisions"] += 1
-        
-        # 更新平均置信度
-        total = self.routing_stats["total_requests"]
-        current_avg = self.routing_stats["average_confidence"]
-        self.routing_stats["average_confidence"] = (current_avg * (total - 1) + confidence) / total
+            shard[3] += 1
+        shard[4] += confidence
+    
+    @property
+    def routing_stats(self) -> Dict[str, Any]:
+        """汇总各线程分片的统计"""
+        totals = [0, 0, 0, 0, 0.0, 0, 0]
+        for shard in list(self._stats_shards):
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return {
+            "total_requests": totals[0],
+            "local_decisions": totals[1],
+            "cloud_decisions": totals[2],
+            "hybrid_decisions": totals[3],
+            "average_confidence": totals[4] / totals[0] if totals[0] else 0.0,
+            "cache_hits": totals[5],
+            "cache_misses": totals[6]
+        }
     
     def get_routing_stats(self) -> Dict[str, Any]:
         """获取路由统计信息"""
         
-        total = self.routing_stats["total_requests"]
+        stats = self.routing_stats
+        stats["decision_cache_size"] = len(self._decision_cache)
+        total = stats["total_requests"]
         if total == 0:
-            return self.routing_stats
+            return stats
         
-        stats = self.routing_stats.copy()
         stats["local_percentage"] = (stats["local_decisions"] / total) * 100
         stats["cloud_percentage"] = (stats["cloud_decisions"] / total) * 100
         stats["hybrid_percentage"] = (stats["hybrid_decisions"] / total) * 100
@@ -418,6 +519,23 @@ class OCRSmartRouter(EnhancedSmartRouter):
     针对OCR任务的特点进行优化
     """
     
+    # 根据任务类型调整复杂度
+    COMPLEXITY_MAPPING = {
+        "document_ocr": TaskComplexity.SIMPLE,
+        "handwriting_ocr": TaskComplexity.COMPLEX,
+        "table_extraction": TaskComplexity.COMPLEX,
+        "form_processing": TaskComplexity.MEDIUM,
+        "multilingual_ocr": TaskComplexity.COMPLEX,
+        "structured_data": TaskComplexity.VERY_COMPLEX
+    }
+    
+    COMPLEXITY_MULTIPLIER = {
+        TaskComplexity.SIMPLE: 1.0,
+        TaskComplexity.MEDIUM: 1.5,
+        TaskComplexity.COMPLEX: 2.0,
+        TaskComplexity.VERY_COMPLEX: 3.0
+    }
+    
     def __init__(self, config: Dict[str, Any] = None):
         super().__init__(config)
         self.ocr_config = self._get_ocr_config()
@@ -470,27 +588,11 @@ class OCRSmartRouter(EnhancedSmartRouter):
                           local_capability: float) -> RoutingContext:
         """构建OCR路由上下文"""
         
-        # 根据任务类型调整复杂度
-        complexity_mapping = {
-            "document_ocr": TaskComplexity.SIMPLE,
-            "handwriting_ocr": TaskComplexity.COMPLEX,
-            "table_extraction": TaskComplexity.COMPLEX,
-            "form_processing": TaskComplexity.MEDIUM,
-            "multilingual_ocr": TaskComplexity.COMPLEX,
-            "structured_data": TaskComplexity.VERY_COMPLEX
-        }
-        
-        complexity = complexity_mapping.get(task_type, TaskComplexity.MEDIUM)
+        complexity = self.COMPLEXITY_MAPPING.get(task_type, TaskComplexity.MEDIUM)
         
         # 估算Token数量（基于图像大小和任务复杂度）
         base_tokens = image_size // 1024  # 每KB约1个token
-        complexity_multiplier = {
-            TaskComplexity.SIMPLE: 1.0,
-            TaskComplexity.MEDIUM: 1.5,
-            TaskComplexity.COMPLEX: 2.0,
-            TaskComplexity.VERY_COMPLEX: 3.0
-        }
-        estimated_tokens = int(base_tokens * complexity_multiplier[complexity])
+        estimated_tokens = int(base_tokens * self.COMPLEXITY_MULTIPLIER[complexity])
         
         # 估算成本
         cloud_cost = estimated_tokens * 0.000001  # 假设每token 0.000001美元
@@ -515,6 +617,15 @@ class OCRSmartRouter(EnhancedSmartRouter):
             }
         )
     
+    def _decision_cache_key(self, context: RoutingContext) -> Tuple:
+        """OCR决策额外读取任务类型，以及质量要求、图像大小相对阈值的档位"""
+        preferences = context.user_preferences or {}
+        return super()._decision_cache_key(context) + (
+            context.task_type,
+            preferences.get("quality_requirement", 0.8) >= self.ocr_config["quality_requirement_threshold"],
+            preferences.get("image_size", 0) > self.ocr_config["image_size_threshold"]
+        )
+    
     def _make_routing_decision(self, context: RoutingContext) -> RoutingDecision:
         """
         OCR特化的路由决策算法
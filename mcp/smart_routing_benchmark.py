@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+智慧路由吞吐量基准
+
+对 EnhancedSmartRouter 与 OCRSmartRouter 生成带重复分布的请求负载：
+- 分阶段测量未缓存时每个阶段（构建上下文、决策、置信度、推理文本、成本估算、备选方案、统计）的单次耗时
+- 对比关闭/开启决策缓存时的 decisions/sec
+- OCR 负载另有连续取值的图像大小、质量要求和本地能力，检验按阈值档位缓存时的命中率
+- 校验缓存结果与重新计算的结果完全一致
+
+用法:
+    python smart_routing_benchmark.py --requests 200000
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Callable
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from smart_routing_analysis import (
+    EnhancedSmartRouter, OCRSmartRouter, RoutingContext, PrivacySensitivity, TaskComplexity
+)
+
+OCR_TASKS = ["document_ocr", "handwriting_ocr", "table_extraction", "form_processing",
+             "multilingual_ocr", "structured_data"]
+
+
+def generate_contexts(count: int, seed: int = 7) -> List[RoutingContext]:
+    """通用路由负载：字段取自有限档位，模拟实际请求的重复分布"""
+    rng = random.Random(seed)
+    contexts = []
+    for i in range(count):
+        tokens = rng.choice([500, 2000, 8000, 12000, 40000])
+        contexts.append(RoutingContext(
+            user_request=f"request {i}",
+            task_type=rng.choice(["chat", "code", "analysis"]),
+            privacy_level=rng.choice(list(PrivacySensitivity)),
+            complexity=rng.choice(list(TaskComplexity)),
+            local_capability=rng.choice([0.2, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]),
+            cloud_cost=tokens * 0.000002,
+            local_cost=rng.choice([0.001, 0.01]),
+            estimated_tokens=tokens,
+            system_load=rng.choice([None, {"local": 0.2, "cloud": 0.6}, {"local": 0.7, "cloud": 0.2}])
+        ))
+    return contexts
+
+
+def generate_ocr_requests(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """OCR路由负载"""
+    rng = random.Random(seed)
+    return [{
+        "task_type": rng.choice(OCR_TASKS),
+        "image_size": rng.choice([256, 512, 1024, 2048, 4096, 8192]) * 1024,
+        "quality_requirement": rng.choice([0.7, 0.8, 0.85, 0.9, 0.95]),
+        "privacy_level": rng.choice(list(PrivacySensitivity)),
+        "local_capability": rng.choice([0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
+    } for _ in range(count)]
+
+
+def generate_continuous_ocr_requests(count: int, seed: int = 13) -> List[Dict[str, Any]]:
+    """OCR路由负载：图像大小(字节)、质量要求和本地能力均为连续取值，几乎不重复"""
+    rng = random.Random(seed)
+    return [{
+        "task_type": rng.choice(OCR_TASKS),
+        "image_size": rng.randint(100 * 1024, 16 * 1024 * 1024),
+        "quality_requirement": rng.uniform(0.6, 1.0),
+        "privacy_level": rng.choice(list(PrivacySensitivity)),
+        "local_capability": rng.uniform(0.0, 1.0)
+    } for _ in range(count)]
+
+
+def per_stage_cost(router: EnhancedSmartRouter, contexts: List[RoutingContext]) -> Dict[str, float]:
+    """每个阶段的平均单次耗时(微秒)"""
+    decisions = [router._make_routing_decision(c) for c in contexts]
+    stages: Dict[str, Callable[[RoutingContext, Any], Any]] = {
+        "decision": lambda c, d: router._make_routing_decision(c),
+        "confidence": router._calculate_confidence,
+        "reasoning": router._generate_reasoning,
+        "cost_time": router._estimate_cost_and_time,
+        "fallbacks": router._generate_fallback_options,
+        "stats": lambda c, d: router._update_stats(d, 0.5),
+        "cache_key": lambda c, d: router._decision_cache_key(c),
+    }
+    costs = {}
+    for name, stage in stages.items():
+        start = time.perf_counter()
+        for context, decision in zip(contexts, decisions):
+            stage(context, decision)
+        costs[name] = (time.perf_counter() - start) / len(contexts) * 1e6
+    return costs
+
+
+def throughput(route: Callable[[Any], Any], workload: List[Any]) -> float:
+    start = time.perf_counter()
+    for item in workload:
+        route(item)
+    return len(workload) / (time.perf_counter() - start)
+
+
+def same_result(a, b) -> bool:
+    return (a.decision, a.processing_location, a.confidence, a.reasoning, a.estimated_cost,
+            a.estimated_time, a.fallback_options) == \
+           (b.decision, b.processing_location, b.confidence, b.reasoning, b.estimated_cost,
+            b.estimated_time, b.fallback_options)
+
+
+def ocr_row(name: str, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+    uncached = OCRSmartRouter({**EnhancedSmartRouter()._get_default_config(), "decision_cache_size": 0})
+    cached = OCRSmartRouter()
+    for request in requests[:2000]:
+        if not same_result(uncached.route_ocr_request(**request), cached.route_ocr_request(**request)):
+            raise AssertionError(f"{name} 缓存结果不一致")
+    ocr_router = OCRSmartRouter()
+    ocr_contexts = [ocr_router._build_ocr_context(**r) for r in requests[:20000]]
+    stages = per_stage_cost(ocr_router, ocr_contexts)
+    start = time.perf_counter()
+    for request in requests[:20000]:
+        ocr_router._build_ocr_context(**request)
+    stages["build_context"] = (time.perf_counter() - start) / min(20000, len(requests)) * 1e6
+    return {
+        "router": name,
+        "stages": stages,
+        "uncached": throughput(lambda r: uncached.route_ocr_request(**r), requests),
+        "cached": throughput(lambda r: cached.route_ocr_request(**r), requests),
+        "stats": cached.get_routing_stats()
+    }
+
+
+def run_benchmark(request_count: int) -> List[Dict[str, Any]]:
+    rows = []
+
+    contexts = generate_contexts(request_count)
+    uncached = EnhancedSmartRouter({**EnhancedSmartRouter()._get_default_config(), "decision_cache_size": 0})
+    cached = EnhancedSmartRouter()
+    for context in contexts[:2000]:
+        if not same_result(uncached.route_request(context), cached.route_request(context)):
+            raise AssertionError("EnhancedSmartRouter 缓存结果不一致")
+    rows.append({
+        "router": "EnhancedSmartRouter",
+        "stages": per_stage_cost(EnhancedSmartRouter(), contexts[:20000]),
+        "uncached": throughput(uncached.route_request, contexts),
+        "cached": throughput(cached.route_request, contexts),
+        "stats": cached.get_routing_stats()
+    })
+
+    rows.append(ocr_row("OCRSmartRouter", generate_ocr_requests(request_count)))
+    rows.append(ocr_row("OCRSmartRouter 连续图像大小", generate_continuous_ocr_requests(request_count)))
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    lines = []
+    for row in rows:
+        stats = row["stats"]
+        lines.append(f"[{row['router']}]")
+        lines.append("  各阶段单次耗时(us): " + ", ".join(
+            f"{name}={cost:.2f}" for name, cost in row["stages"].items()))
+        lines.append(f"  decisions/sec 未缓存 {row['uncached']:>10,.0f}   缓存 {row['cached']:>10,.0f}   "
+                     f"({row['cached'] / row['uncached']:.1f}x, 命中 {stats['cache_hits']}/"
+                     f"{stats['cache_hits'] + stats['cache_misses']}, 条目 {stats['decision_cache_size']})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="智慧路由吞吐量基准")
+    parser.add_argument("--requests", type=int, default=200000, help="每个路由器的请求数")
+    args = parser.parse_args()
+    print(format_report(run_benchmark(args.requests)))
+
+
+if __name__ == "__main__":
+    main()
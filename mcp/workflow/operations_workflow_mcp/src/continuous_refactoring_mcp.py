@@ -4,14 +4,20 @@
 负责代码质量监控和自动重构建议
 """
 
-import os
-import ast
+import sys
 import json
 import logging
+from pathlib import Path
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import asyncio
 
+try:
+    from mcp.common.project_scanner import ProjectScanner, ComplexityAnalyzer, analyze_file
+except ImportError:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[4]))
+    from mcp.common.project_scanner import ProjectScanner, ComplexityAnalyzer, analyze_file
+
 logger = logging.getLogger(__name__)
 
 class ContinuousRefactoringMcp:
@@ -53,62 +59,37 @@ class ContinuousRefactoringMcp:
         else:
             raise ValueError(f"未知操作: {operation}")
     
+    def _build_analyzers(self) -> List[ComplexityAnalyzer]:
+        """根据重构规则构建分析器"""
+        rule = self.refactoring_rules["code_complexity"]
+        return [ComplexityAnalyzer(threshold=rule["threshold"], severity=rule["severity"])]
+    
     async def scan_code_quality(self, path: str) -> Dict[str, Any]:
         """扫描代码质量"""
-        issues = []
-        
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if file.endswith('.py'):
-                    file_path = os.path.join(root, file)
-                    file_issues = await self._analyze_file(file_path)
-                    issues.extend(file_issues)
+        scanner = ProjectScanner(
+            self._build_analyzers(),
+            max_workers=self.config.get("scan_workers"),
+            profile=self.config.get("scan_profile", False)
+        )
+        try:
+            report = await scanner.scan(path)
+        finally:
+            scanner.shutdown()
         
+        issues = report.findings("complexity")
         return {
             "total_issues": len(issues),
             "issues": issues,
+            "scanned_files": report.files_scanned,
             "scan_time": datetime.now().isoformat()
         }
     
     async def _analyze_file(self, file_path: str) -> List[Dict]:
         """分析单个文件"""
-        issues = []
-        
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                tree = ast.parse(content)
-            
-            # 检查函数复杂度
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    complexity = self._calculate_complexity(node)
-                    if complexity > self.refactoring_rules["code_complexity"]["threshold"]:
-                        issues.append({
-                            "type": "high_complexity",
-                            "file": file_path,
-                            "function": node.name,
-                            "line": node.lineno,
-                            "complexity": complexity,
-                            "severity": self.refactoring_rules["code_complexity"]["severity"]
-                        })
-        
-        except Exception as e:
-            logger.warning(f"分析文件失败 {file_path}: {e}")
-        
-        return issues
-    
-    def _calculate_complexity(self, node: ast.FunctionDef) -> int:
-        """计算函数复杂度"""
-        complexity = 1  # 基础复杂度
-        
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.While, ast.For, ast.Try)):
-                complexity += 1
-            elif isinstance(child, ast.BoolOp):
-                complexity += len(child.values) - 1
-        
-        return complexity
+        result = await asyncio.to_thread(analyze_file, file_path, self._build_analyzers())
+        if result.error:
+            logger.warning(f"分析文件失败 {file_path}: {result.error}")
+        return result.findings.get("complexity", [])
     
     async def get_status(self) -> Dict[str, Any]:
         """获取状态"""
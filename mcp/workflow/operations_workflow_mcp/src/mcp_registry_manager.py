@@ -5,9 +5,17 @@ MCP注册管理器 - 负责管理和协调所有小型MCP适配器
 """
 
 import os
+import re
+import ast
 import json
+import atexit
+import hashlib
 import importlib
+import importlib.util
 import sys
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor, Future
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Type
 from datetime import datetime
@@ -50,21 +58,137 @@ class MCPRegistration:
         if self.registered_at is None:
             self.registered_at = datetime.now().isoformat()
 
+class DiscoveryManifest:
+    """
+    MCP发现清单
+    
+    按主文件的 mtime/大小/内容哈希缓存分析结果并持久化，
+    重新发现时只解析发生变化的文件。
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = Path(manifest_file)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self.stats = {"stat_hits": 0, "hash_hits": 0, "parsed": 0}
+        self._load()
+    
+    def _load(self):
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("files", {})
+        except Exception as e:
+            logger.warning(f"⚠️ 发现清单损坏，将重新分析: {e}")
+            self.entries = {}
+    
+    def lookup(self, key: str, py_file: Path, analyzer) -> Dict:
+        """返回文件分析结果；mtime与大小未变直接命中，内容哈希未变只更新元数据"""
+        stat = py_file.stat()
+        entry = self.entries.get(key)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.stats["stat_hits"] += 1
+            return entry["info"]
+        
+        content = py_file.read_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        if entry and entry["sha256"] == digest:
+            self.stats["hash_hits"] += 1
+            info = entry["info"]
+        else:
+            self.stats["parsed"] += 1
+            info = analyzer(content.decode('utf-8', errors='replace'))
+        
+        self.entries[key] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "info": info
+        }
+        self.dirty = True
+        return info
+    
+    def prune(self, live_keys):
+        """移除已不存在的文件条目"""
+        for key in set(self.entries) - set(live_keys):
+            del self.entries[key]
+            self.dirty = True
+    
+    def save(self):
+        if not self.dirty:
+            return
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"version": self.VERSION, "files": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.manifest_file)
+        self.dirty = False
+
+# 仍存活的注册管理器（弱引用，不延长实例生命周期），进程退出时统一落盘
+_live_managers: "weakref.WeakSet[MCPRegistryManager]" = weakref.WeakSet()
+
+
+def _flush_live_managers():
+    for manager in list(_live_managers):
+        manager.flush()
+
+
+atexit.register(_flush_live_managers)
+
+
 class MCPRegistryManager:
-    """MCP注册管理器"""
+    """
+    MCP注册管理器
+    
+    - 自动发现使用持久化的发现清单，只重新解析变化过的主文件（AST提取，语法错误时退回正则）
+    - 注册表写入经过合并与防抖，save_delay 内的多次状态变化只写一次；flush() 立即落盘
+    - warm_up() 可在后台线程池中预先导入指定MCP模块，load_mcp 复用已导入的模块
+    """
     
-    def __init__(self, repo_root: str = "/home/ubuntu/kilocode_integrated_repo"):
+    def __init__(self, repo_root: str = "/home/ubuntu/kilocode_integrated_repo",
+                 registry_file: Optional[str] = None, manifest_file: Optional[str] = None,
+                 save_delay: float = 0.5, warm_up: Optional[List[str]] = None,
+                 warm_up_workers: int = 4):
         self.repo_root = Path(repo_root)
         self.registry: Dict[str, MCPRegistration] = {}
         self.active_instances: Dict[str, Any] = {}
-        self.registry_file = self.repo_root / "mcp" / "workflow" / "operations_workflow_mcp" / "config" / "mcp_registry.json"
+        config_dir = self.repo_root / "mcp" / "workflow" / "operations_workflow_mcp" / "config"
+        self.registry_file = Path(registry_file) if registry_file else config_dir / "mcp_registry.json"
         
         # 确保配置目录存在
         self.registry_file.parent.mkdir(parents=True, exist_ok=True)
         
+        # 发现清单
+        self.manifest = DiscoveryManifest(
+            Path(manifest_file) if manifest_file else self.registry_file.parent / "mcp_discovery_manifest.json"
+        )
+        
+        # 合并防抖的注册表保存
+        self.save_delay = save_delay
+        self.save_count = 0
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        
+        # 模块导入缓存与后台预热
+        self._modules: Dict[str, Any] = {}
+        self._module_locks: Dict[str, threading.Lock] = {}
+        self._modules_lock = threading.Lock()
+        self._warm_up_pool: Optional[ThreadPoolExecutor] = None
+        self.warm_up_workers = warm_up_workers
+        
         # 加载现有注册信息
         self._load_registry()
         
+        _live_managers.add(self)
+        
+        if warm_up:
+            self.warm_up(warm_up)
+        
         logger.info("🗂️ MCP Registry Manager 初始化完成")
     
     def _load_registry(self):
@@ -93,22 +217,66 @@ class MCPRegistryManager:
                 self.registry = {}
     
     def _save_registry(self):
-        """保存注册表"""
+        """保存注册表（先写临时文件再原子替换）"""
         try:
             registry_data = {}
-            for name, registration in self.registry.items():
+            for name, registration in list(self.registry.items()):
                 registry_data[name] = asdict(registration)
                 # 转换Enum为字符串
                 registry_data[name]['type'] = registration.type.value
                 registry_data[name]['status'] = registration.status.value
             
-            with open(self.registry_file, 'w', encoding='utf-8') as f:
+            tmp_file = self.registry_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(registry_data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_file, self.registry_file)
+            self.save_count += 1
             
             logger.info(f"💾 保存了 {len(self.registry)} 个MCP注册信息")
         except Exception as e:
             logger.error(f"❌ 保存注册表失败: {e}")
     
+    def _request_save(self):
+        """请求保存注册表：save_delay 内的多次请求合并为一次写入"""
+        if self.save_delay <= 0:
+            with self._save_lock:
+                self._save_registry()
+            return
+        
+        with self._save_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.save_delay, self._flush_pending)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+    
+    def _flush_pending(self):
+        with self._save_lock:
+            if self._save_timer is None:
+                return
+            self._save_timer = None
+            self._save_registry()
+    
+    def flush(self):
+        """立即写出待保存的注册表和发现清单"""
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+                self._save_registry()
+        try:
+            self.manifest.save()
+        except Exception as e:
+            logger.error(f"❌ 保存发现清单失败: {e}")
+    
+    def close(self):
+        """落盘待保存的数据并停止预热线程池，之后进程退出时不再处理该实例"""
+        self.flush()
+        if self._warm_up_pool is not None:
+            self._warm_up_pool.shutdown(wait=False)
+            self._warm_up_pool = None
+        _live_managers.discard(self)
+    
     def auto_discover_mcps(self) -> Dict[str, Any]:
         """自动发现MCP"""
         discovered = {
@@ -137,6 +305,16 @@ class MCPRegistryManager:
         
         discovered["total"] = len(discovered["adapters"]) + len(discovered["workflows"])
         
+        # 清理已删除文件的清单条目并持久化
+        self.manifest.prune(
+            f"{info['path']}/{info['main_file']}"
+            for info in discovered["adapters"] + discovered["workflows"]
+        )
+        try:
+            self.manifest.save()
+        except Exception as e:
+            logger.error(f"❌ 保存发现清单失败: {e}")
+        
         logger.info(f"🔍 自动发现 {discovered['total']} 个MCP")
         return discovered
     
@@ -158,13 +336,16 @@ class MCPRegistryManager:
                         break
             
             if main_file:
-                # 分析Python文件获取类信息
-                class_info = self._analyze_python_file(main_file)
+                # 分析Python文件获取类信息（经发现清单缓存）
+                relative_dir = mcp_dir.relative_to(self.repo_root).as_posix()
+                class_info = self.manifest.lookup(
+                    f"{relative_dir}/{main_file.name}", main_file, self._analyze_python_source
+                )
                 
                 return {
                     "name": mcp_dir.name,
                     "type": mcp_type,
-                    "path": str(mcp_dir.relative_to(self.repo_root)),
+                    "path": relative_dir,
                     "main_file": main_file.name,
                     "class_name": class_info.get("main_class"),
                     "capabilities": class_info.get("capabilities", []),
@@ -180,9 +361,54 @@ class MCPRegistryManager:
         try:
             with open(py_file, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+            return self._analyze_python_source(content)
+        except Exception as e:
+            logger.error(f"❌ 分析Python文件 {py_file} 失败: {e}")
+            return {}
+    
+    def _analyze_python_source(self, content: str) -> Dict:
+        """基于AST提取主类、描述与能力；无法解析时退回正则提取"""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return self._analyze_python_source_regex(content)
+        
+        nodes = sorted(
+            (node for node in ast.walk(tree)
+             if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))),
+            key=lambda node: (node.lineno, node.col_offset)
+        )
+        
+        main_class = next(
+            (node.name for node in nodes
+             if isinstance(node, ast.ClassDef) and re.fullmatch(r'\w+MCP', node.name)),
+            None
+        )
+        
+        # 模块文档字符串优先，其次是第一个带文档字符串的定义
+        description = ast.get_docstring(tree, clean=False)
+        if description is None:
+            description = next(
+                (ast.get_docstring(node, clean=False) for node in nodes
+                 if ast.get_docstring(node, clean=False) is not None),
+                ""
+            )
+        
+        capabilities = [
+            node.name for node in nodes
+            if not isinstance(node, ast.ClassDef) and not node.name.startswith('_')
+        ]
+        
+        return {
+            "main_class": main_class,
+            "description": description.strip(),
+            "capabilities": capabilities[:10]  # 限制数量
+        }
+    
+    def _analyze_python_source_regex(self, content: str) -> Dict:
+        """正则提取（用于无法通过语法解析的文件）"""
+        try:
             # 简单的类名提取
-            import re
             class_matches = re.findall(r'class\s+(\w+MCP)\s*[:\(]', content)
             main_class = class_matches[0] if class_matches else None
             
@@ -200,7 +426,7 @@ class MCPRegistryManager:
                 "capabilities": capabilities[:10]  # 限制数量
             }
         except Exception as e:
-            logger.error(f"❌ 分析Python文件 {py_file} 失败: {e}")
+            logger.error(f"❌ 分析Python源码失败: {e}")
             return {}
     
     def register_mcp(self, name: str, mcp_type: MCPType, path: str, class_name: str, 
@@ -220,7 +446,7 @@ class MCPRegistryManager:
             )
             
             self.registry[name] = registration
-            self._save_registry()
+            self._request_save()
             
             logger.info(f"✅ 成功注册MCP: {name}")
             return True
@@ -241,22 +467,10 @@ class MCPRegistryManager:
         try:
             registration = self.registry[name]
             
-            # 构建模块路径
-            module_path = registration.path.replace('/', '.').replace('\\', '.')
-            if module_path.startswith('.'):
-                module_path = module_path[1:]
-            
-            # 动态导入模块
-            import importlib.util
-            spec = importlib.util.spec_from_file_location(
-                f"{name}_module",
-                self.repo_root / registration.path / f"{name}.py"
-            )
+            # 动态导入模块（预热过的直接复用）
+            module = self._import_module(name)
             
-            if spec and spec.loader:
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
-                
+            if module is not None:
                 # 获取MCP类
                 mcp_class = getattr(module, registration.class_name)
                 
@@ -267,7 +481,7 @@ class MCPRegistryManager:
                 # 更新状态
                 registration.status = MCPStatus.ACTIVE
                 registration.last_health_check = datetime.now().isoformat()
-                self._save_registry()
+                self._request_save()
                 
                 logger.info(f"✅ 成功加载MCP: {name}")
                 return instance
@@ -276,10 +490,57 @@ class MCPRegistryManager:
             logger.error(f"❌ 加载MCP {name} 失败: {e}")
             if name in self.registry:
                 self.registry[name].status = MCPStatus.ERROR
-                self._save_registry()
+                self._request_save()
         
         return None
     
+    def _import_module(self, name: str) -> Optional[Any]:
+        """导入MCP模块；同一模块只执行一次，并发的预热与加载共享结果"""
+        with self._modules_lock:
+            if name in self._modules:
+                return self._modules[name]
+            module_lock = self._module_locks.setdefault(name, threading.Lock())
+        
+        with module_lock:
+            if name in self._modules:
+                return self._modules[name]
+            
+            registration = self.registry[name]
+            spec = importlib.util.spec_from_file_location(
+                f"{name}_module",
+                self.repo_root / registration.path / f"{name}.py"
+            )
+            if not (spec and spec.loader):
+                return None
+            
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            with self._modules_lock:
+                self._modules[name] = module
+            return module
+    
+    def warm_up(self, names: List[str]) -> Dict[str, Future]:
+        """在后台线程池中并行预导入指定MCP模块（不创建实例）"""
+        if self._warm_up_pool is None:
+            self._warm_up_pool = ThreadPoolExecutor(
+                max_workers=self.warm_up_workers, thread_name_prefix="mcp-warmup"
+            )
+        
+        futures = {}
+        for name in names:
+            if name not in self.registry:
+                logger.warning(f"⚠️ 预热跳过未注册的MCP: {name}")
+                continue
+            futures[name] = self._warm_up_pool.submit(self._warm_up_one, name)
+        return futures
+    
+    def _warm_up_one(self, name: str) -> bool:
+        try:
+            return self._import_module(name) is not None
+        except Exception as e:
+            logger.warning(f"⚠️ 预热MCP {name} 失败: {e}")
+            return False
+    
     def call_mcp_method(self, mcp_name: str, method_name: str, *args, **kwargs) -> Any:
         """调用MCP方法"""
         instance = self.load_mcp(mcp_name)
@@ -307,6 +568,9 @@ class MCPRegistryManager:
             "active_instances": len(self.active_instances),
             "by_type": {"adapter": 0, "workflow": 0},
             "by_status": {"registered": 0, "active": 0, "inactive": 0, "error": 0},
+            "imported_modules": len(self._modules),
+            "discovery_manifest": dict(self.manifest.stats),
+            "registry_saves": self.save_count,
             "mcps": []
         }
         
@@ -375,7 +639,7 @@ class MCPRegistryManager:
                 results["unhealthy"] += 1
                 registration.status = MCPStatus.ERROR
         
-        self._save_registry()
+        self._request_save()
         return results
 
 if __name__ == "__main__":
@@ -395,4 +659,5 @@ if __name__ == "__main__":
     health = manager.health_check_all()
     print(f"检查了 {health['total_checked']} 个MCP")
     print(f"健康: {health['healthy']} 个，不健康: {health['unhealthy']} 个")
+    manager.flush()
 
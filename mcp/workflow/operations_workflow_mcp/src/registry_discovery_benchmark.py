@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+MCP自动发现基准
+
+在仓库上测量 auto_discover_mcps 的耗时：
+- legacy：旧实现，每次读取并正则扫描全部主文件
+- cold：没有发现清单，逐个AST解析并写出清单
+- warm：新建管理器读取已持久化的清单，只做 stat
+
+并校验AST提取与正则提取得到的主类一致。
+
+用法:
+    python registry_discovery_benchmark.py --repo-root /path/to/repo --rounds 5
+"""
+
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mcp_registry_manager import MCPRegistryManager
+
+
+def legacy_discover(manager: MCPRegistryManager) -> int:
+    """旧实现：对每个主文件重新读取并正则扫描"""
+    count = 0
+    for group in ("adapter", "workflow"):
+        group_dir = manager.repo_root / "mcp" / group
+        if not group_dir.exists():
+            continue
+        for mcp_dir in group_dir.iterdir():
+            if not (mcp_dir.is_dir() and mcp_dir.name.endswith('_mcp')):
+                continue
+            main_file = mcp_dir / f"{mcp_dir.name}.py"
+            if not main_file.exists():
+                main_file = next((f for f in mcp_dir.glob("*.py") if "mcp" in f.name.lower()), None)
+            if main_file:
+                manager._analyze_python_source_regex(main_file.read_text(encoding='utf-8', errors='replace'))
+                count += 1
+    return count
+
+
+def run_benchmark(repo_root: str, rounds: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        options = dict(registry_file=str(Path(tmp, "mcp_registry.json")),
+                       manifest_file=str(Path(tmp, "manifest.json")))
+
+        manager = MCPRegistryManager(repo_root, **options)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            legacy_count = legacy_discover(manager)
+        legacy_ms = (time.perf_counter() - start) * 1000 / rounds
+
+        start = time.perf_counter()
+        cold = manager.auto_discover_mcps()
+        cold_ms = (time.perf_counter() - start) * 1000
+        parsed = manager.manifest.stats["parsed"]
+
+        warm_times = []
+        for _ in range(rounds):
+            warm_manager = MCPRegistryManager(repo_root, **options)
+            start = time.perf_counter()
+            warm = warm_manager.auto_discover_mcps()
+            warm_times.append((time.perf_counter() - start) * 1000)
+        warm_stats = warm_manager.manifest.stats
+
+        mismatched = []
+        for info in cold["adapters"] + cold["workflows"]:
+            source = Path(repo_root, info["path"], info["main_file"]).read_text(encoding='utf-8', errors='replace')
+            regex_class = manager._analyze_python_source_regex(source).get("main_class")
+            if regex_class != info["class_name"]:
+                mismatched.append((info["name"], regex_class, info["class_name"]))
+
+    return {
+        "mcps": cold["total"],
+        "legacy_files": legacy_count,
+        "legacy_ms": legacy_ms,
+        "cold_ms": cold_ms,
+        "cold_parsed": parsed,
+        "warm_ms": sorted(warm_times)[len(warm_times) // 2],
+        "warm_parsed": warm_stats["parsed"],
+        "warm_total": warm["total"],
+        "mismatched": mismatched
+    }
+
+
+def format_report(result: Dict[str, Any]) -> str:
+    lines = [
+        f"发现MCP {result['mcps']} 个",
+        f"legacy 正则全量扫描: {result['legacy_ms']:8.2f} ms ({result['legacy_files']} 个文件)",
+        f"cold   AST+写清单:   {result['cold_ms']:8.2f} ms (解析 {result['cold_parsed']} 个文件)",
+        f"warm   读清单+stat:  {result['warm_ms']:8.2f} ms (解析 {result['warm_parsed']} 个文件)",
+    ]
+    if result["mismatched"]:
+        lines.append("主类与正则提取不一致:")
+        lines.extend(f"    {name}: 正则={regex} AST={parsed}" for name, regex, parsed in result["mismatched"])
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP自动发现基准")
+    parser.add_argument("--repo-root", default=str(Path(__file__).resolve().parents[4]), help="仓库根目录")
+    parser.add_argument("--rounds", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(format_report(run_benchmark(args.repo_root, args.rounds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+mcp_registry_manager 单元测试
+覆盖发现清单增量解析、注册表合并保存与后台预热导入
+"""
+
+import unittest
+import gc
+import json
+import weakref
+import os
+import tempfile
+import time
+from pathlib import Path
+import sys
+
+# 添加模块路径
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import mcp_registry_manager
+from mcp_registry_manager import MCPRegistryManager, MCPType
+
+MCP_SOURCE = '''"""Demo adapter"""
+
+class DemoMCP:
+    def get_status(self):
+        return {"status": "active"}
+
+    async def process(self, data):
+        return data
+
+    def _private(self):
+        pass
+'''
+
+
+class TestMCPRegistryManager(unittest.TestCase):
+    """MCPRegistryManager 测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.mcp_dir = self.root / "mcp" / "adapter" / "demo_mcp"
+        self.mcp_dir.mkdir(parents=True)
+        (self.mcp_dir / "demo_mcp.py").write_text(MCP_SOURCE, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_manifest_reparses_only_changed_files(self):
+        """TC001: AST提取结果写入清单，重新发现只解析变化的文件"""
+        manager = MCPRegistryManager(str(self.root), save_delay=0)
+        discovered = manager.auto_discover_mcps()
+        info = discovered["adapters"][0]
+        self.assertEqual(info["class_name"], "DemoMCP")
+        self.assertEqual(info["description"], "Demo adapter")
+        self.assertEqual(info["capabilities"], ["get_status", "process"])
+        self.assertEqual(manager.manifest.stats["parsed"], 1)
+
+        warm = MCPRegistryManager(str(self.root), save_delay=0)
+        self.assertEqual(warm.auto_discover_mcps()["adapters"], discovered["adapters"])
+        self.assertEqual(warm.manifest.stats, {"stat_hits": 1, "hash_hits": 0, "parsed": 0})
+
+        main_file = self.mcp_dir / "demo_mcp.py"
+        os.utime(main_file, ns=(time.time_ns(), time.time_ns() + 10**9))
+        warm.auto_discover_mcps()
+        self.assertEqual(warm.manifest.stats["hash_hits"], 1)
+
+        main_file.write_text(MCP_SOURCE + "\ndef extra():\n    pass\n", encoding="utf-8")
+        info = warm.auto_discover_mcps()["adapters"][0]
+        self.assertEqual(warm.manifest.stats["parsed"], 1)
+        self.assertIn("extra", info["capabilities"])
+
+    def test_registry_saves_are_coalesced(self):
+        """TC002: 防抖窗口内的多次注册只写一次，flush后内容完整"""
+        manager = MCPRegistryManager(str(self.root), save_delay=5)
+        for i in range(20):
+            manager.register_mcp(f"demo_{i}", MCPType.ADAPTER, "mcp/adapter/demo_mcp", "DemoMCP", [])
+        self.assertEqual(manager.save_count, 0)
+
+        manager.flush()
+        self.assertEqual(manager.save_count, 1)
+        with open(manager.registry_file, encoding="utf-8") as f:
+            self.assertEqual(len(json.load(f)), 20)
+
+    def test_warm_up_imports_once(self):
+        """TC003: 后台预热导入模块，load_mcp复用预热结果"""
+        manager = MCPRegistryManager(str(self.root), save_delay=0)
+        manager.register_mcp("demo_mcp", MCPType.ADAPTER, "mcp/adapter/demo_mcp", "DemoMCP", [])
+        futures = manager.warm_up(["demo_mcp", "missing_mcp"])
+        self.assertEqual(list(futures), ["demo_mcp"])
+        self.assertTrue(futures["demo_mcp"].result(timeout=10))
+
+        module = manager._modules["demo_mcp"]
+        instance = manager.load_mcp("demo_mcp")
+        self.assertIsInstance(instance, module.DemoMCP)
+        self.assertEqual(manager.get_registry_status()["by_status"]["active"], 1)
+
+    def test_exit_hook_does_not_keep_managers_alive(self):
+        """TC004: 进程退出钩子只弱引用实例，close后不再落盘该实例"""
+        manager = MCPRegistryManager(str(self.root), save_delay=5)
+        manager.register_mcp("demo_mcp", MCPType.ADAPTER, "mcp/adapter/demo_mcp", "DemoMCP", [])
+        self.assertIn(manager, mcp_registry_manager._live_managers)
+
+        mcp_registry_manager._flush_live_managers()
+        self.assertEqual(manager.save_count, 1)
+
+        manager.close()
+        self.assertNotIn(manager, mcp_registry_manager._live_managers)
+
+        released = MCPRegistryManager(str(self.root), save_delay=0)
+        ref = weakref.ref(released)
+        del released
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,502 @@
+"""
+PowerAutomation 测试管理工作流 - 分片并行测试执行器
+
+将各MCP的 unit_tests / integration_tests 用例按历史耗时分片，
+在独立的工作进程中并行执行，再合并为统一的JSON测试报告
+符合PowerAutomation目录规范v2.0
+
+作者: PowerAutomation Team
+版本: 2.0.0
+日期: 2025-06-18
+"""
+
+import ast
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import time
+import unittest
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 项目根目录
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+
+# 默认计时数据库位置
+DEFAULT_TIMING_DB = Path(__file__).parent / "config" / "test_timings.db"
+
+# 测试套件目录
+TEST_SUITES = ("unit_tests", "integration_tests")
+
+
+@dataclass
+class TestCaseSpec:
+    """单个测试用例定义"""
+    __test__ = False  # 避免被pytest当作测试类收集
+    
+    test_id: str
+    file_path: str
+    class_name: str
+    method_name: str
+    module_name: str
+    suite: str
+
+
+@dataclass
+class TestShard:
+    """测试分片"""
+    __test__ = False
+    
+    index: int
+    cases: List[TestCaseSpec] = field(default_factory=list)
+    estimated_duration: float = 0.0
+    files: set = field(default_factory=set)
+
+
+class TimingDatabase:
+    """
+    本地测试计时数据库 (SQLite)
+
+    记录每个测试用例与测试文件导入的历史耗时，
+    使用指数加权移动平均平滑单次波动。
+    """
+
+    def __init__(self, db_path: Optional[str] = None, smoothing: float = 0.5):
+        self.db_path = Path(db_path) if db_path else DEFAULT_TIMING_DB
+        self.smoothing = smoothing
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS test_timings ("
+            " test_id TEXT PRIMARY KEY,"
+            " avg_duration REAL NOT NULL,"
+            " last_duration REAL NOT NULL,"
+            " runs INTEGER NOT NULL,"
+            " updated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_durations(self, test_ids: Iterable[str]) -> Dict[str, float]:
+        """批量获取历史平均耗时"""
+        ids = list(test_ids)
+        durations = {}
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT test_id, avg_duration FROM test_timings WHERE test_id IN ({placeholders})",
+                chunk
+            )
+            durations.update(rows)
+        return durations
+
+    def record(self, timings: Dict[str, float]):
+        """批量写入本次耗时"""
+        now = datetime.now().isoformat()
+        existing = self.get_durations(timings.keys())
+        rows = []
+        for test_id, duration in timings.items():
+            previous = existing.get(test_id)
+            avg = duration if previous is None else (
+                self.smoothing * duration + (1 - self.smoothing) * previous
+            )
+            rows.append((test_id, avg, duration, now))
+        self._conn.executemany(
+            "INSERT INTO test_timings (test_id, avg_duration, last_duration, runs, updated_at)"
+            " VALUES (?, ?, ?, 1, ?)"
+            " ON CONFLICT(test_id) DO UPDATE SET"
+            " avg_duration = excluded.avg_duration,"
+            " last_duration = excluded.last_duration,"
+            " runs = runs + 1,"
+            " updated_at = excluded.updated_at",
+            rows
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def _import_key(file_path: str) -> str:
+    return f"import::{file_path}"
+
+
+def discover_test_cases(roots: Iterable[str],
+                        suites: Iterable[str] = TEST_SUITES,
+                        modules: Optional[Iterable[str]] = None) -> List[TestCaseSpec]:
+    """
+    静态发现测试用例
+
+    只解析语法树，不导入测试模块；无法解析的文件会被跳过并记录警告。
+    """
+    suites = tuple(suites)
+    module_filter = set(modules) if modules else None
+    cases = []
+
+    for root in roots:
+        for dir_path, dirs, files in os.walk(root):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__" and "backup" not in d)
+            suite = os.path.basename(dir_path)
+            if suite not in suites:
+                continue
+            module_name = os.path.basename(os.path.dirname(dir_path))
+            if module_filter and module_name not in module_filter:
+                continue
+
+            for file_name in sorted(files):
+                if not (file_name.startswith("test_") and file_name.endswith(".py")):
+                    continue
+                file_path = os.path.join(dir_path, file_name)
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        tree = ast.parse(f.read(), filename=file_path)
+                except Exception as e:
+                    logger.warning(f"测试文件解析失败, 已跳过: {file_path}, 错误: {e}")
+                    continue
+
+                rel_path = os.path.relpath(file_path, PROJECT_ROOT)
+                for node in tree.body:
+                    if not isinstance(node, ast.ClassDef):
+                        continue
+                    for item in node.body:
+                        if (isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+                                and item.name.startswith("test")):
+                            cases.append(TestCaseSpec(
+                                test_id=f"{rel_path}::{node.name}::{item.name}",
+                                file_path=file_path,
+                                class_name=node.name,
+                                method_name=item.name,
+                                module_name=module_name,
+                                suite=suite
+                            ))
+    return cases
+
+
+def partition_shards(cases: List[TestCaseSpec],
+                     shard_count: int,
+                     durations: Dict[str, float],
+                     default_duration: Optional[float] = None) -> List[TestShard]:
+    """
+    按历史耗时贪心分片 (最长处理时间优先)
+
+    用例按耗时降序依次放入预计负载最小的分片；
+    某个测试文件首次进入分片时额外计入该文件的导入耗时，
+    因此同一文件的用例倾向于留在同一分片。
+    """
+    shard_count = max(1, min(shard_count, len(cases) or 1))
+    known = [durations[c.test_id] for c in cases if c.test_id in durations]
+    if default_duration is None:
+        default_duration = statistics.median(known) if known else 0.1
+
+    def cost(case: TestCaseSpec) -> float:
+        return durations.get(case.test_id, default_duration)
+
+    shards = [TestShard(index=i) for i in range(shard_count)]
+
+    for case in sorted(cases, key=cost, reverse=True):
+        import_cost = durations.get(_import_key(case.file_path), 0.0)
+
+        def projected(shard: TestShard) -> float:
+            extra = 0.0 if case.file_path in shard.files else import_cost
+            return shard.estimated_duration + extra
+
+        shard = min(shards, key=lambda s: (projected(s), s.index))
+        shard.estimated_duration = projected(shard) + cost(case)
+        shard.files.add(case.file_path)
+        shard.cases.append(case)
+
+    return shards
+
+
+def _load_test_module(file_path: str):
+    """按文件路径加载测试模块，避免依赖所在目录的包初始化文件"""
+    module_name = "sharded_" + "_".join(Path(file_path).with_suffix("").parts[-4:])
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run_shard(shard_index: int, cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """工作进程入口：顺序执行分片内的用例"""
+    shard_start = time.perf_counter()
+    loader = unittest.TestLoader()
+    modules: Dict[str, Any] = {}
+    import_errors: Dict[str, str] = {}
+    import_timings: Dict[str, float] = {}
+    results = []
+
+    for case in cases:
+        file_path = case["file_path"]
+        if file_path not in modules and file_path not in import_errors:
+            t0 = time.perf_counter()
+            try:
+                modules[file_path] = _load_test_module(file_path)
+            except BaseException as e:
+                import_errors[file_path] = f"{type(e).__name__}: {e}"
+            import_timings[file_path] = time.perf_counter() - t0
+
+        record = {
+            "test_id": case["test_id"],
+            "test_case": f"{case['class_name']}.{case['method_name']}",
+            "module_name": case["module_name"],
+            "suite": case["suite"],
+            "timestamp": datetime.now().isoformat(),
+            "shard": shard_index
+        }
+
+        if file_path in import_errors:
+            record.update(status="ERROR", duration=0.0, message=import_errors[file_path])
+            results.append(record)
+            continue
+
+        t0 = time.perf_counter()
+        outcome = unittest.TestResult()
+        try:
+            suite = loader.loadTestsFromName(
+                f"{case['class_name']}.{case['method_name']}", modules[file_path]
+            )
+            suite.run(outcome)
+        except BaseException as e:
+            outcome.errors.append((None, f"{type(e).__name__}: {e}"))
+        duration = time.perf_counter() - t0
+
+        if outcome.errors:
+            status, message = "ERROR", outcome.errors[0][1]
+        elif outcome.failures or outcome.unexpectedSuccesses:
+            status = "FAIL"
+            message = outcome.failures[0][1] if outcome.failures else "unexpected success"
+        elif outcome.skipped:
+            status, message = "SKIP", outcome.skipped[0][1]
+        else:
+            status, message = "PASS", ""
+
+        record.update(status=status, duration=duration, message=message[-2000:])
+        results.append(record)
+
+    return {
+        "shard": shard_index,
+        "duration": time.perf_counter() - shard_start,
+        "import_timings": import_timings,
+        "results": results
+    }
+
+
+class ShardedTestRunner:
+    """
+    分片并行测试执行器
+
+    使用方法:
+        runner = ShardedTestRunner(shard_count=4)
+        report = runner.run()
+    """
+
+    def __init__(self,
+                 shard_count: int = None,
+                 roots: Optional[List[str]] = None,
+                 timing_db: Optional[str] = None,
+                 suites: Iterable[str] = TEST_SUITES,
+                 modules: Optional[Iterable[str]] = None,
+                 slowest_count: int = 10):
+        self.shard_count = shard_count or os.cpu_count() or 1
+        self.roots = roots or [str(PROJECT_ROOT / "mcp")]
+        self.timing_db_path = timing_db
+        self.suites = tuple(suites)
+        self.modules = list(modules) if modules else None
+        self.slowest_count = slowest_count
+
+    def plan(self) -> Tuple[List[TestShard], Dict[str, float]]:
+        """发现用例并生成分片计划"""
+        cases = discover_test_cases(self.roots, self.suites, self.modules)
+        db = TimingDatabase(self.timing_db_path)
+        try:
+            keys = [c.test_id for c in cases] + [_import_key(f) for f in {c.file_path for c in cases}]
+            durations = db.get_durations(keys)
+        finally:
+            db.close()
+        return partition_shards(cases, self.shard_count, durations), durations
+
+    def run(self) -> Dict[str, Any]:
+        """执行全部分片并返回合并后的报告"""
+        start_time = datetime.now()
+        wall_start = time.perf_counter()
+        shards, durations = self.plan()
+        shards = [s for s in shards if s.cases]
+        logger.info(f"共 {sum(len(s.cases) for s in shards)} 个测试用例，分为 {len(shards)} 个分片")
+
+        shard_outputs = []
+        if shards:
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+                futures = {
+                    executor.submit(_run_shard, shard.index, [asdict(c) for c in shard.cases]): shard
+                    for shard in shards
+                }
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    try:
+                        shard_outputs.append(future.result())
+                    except Exception as e:
+                        logger.error(f"分片执行失败: {shard.index}, 错误: {e}")
+                        shard_outputs.append({
+                            "shard": shard.index,
+                            "duration": 0.0,
+                            "import_timings": {},
+                            "results": [{
+                                "test_id": c.test_id,
+                                "test_case": f"{c.class_name}.{c.method_name}",
+                                "module_name": c.module_name,
+                                "suite": c.suite,
+                                "timestamp": datetime.now().isoformat(),
+                                "shard": shard.index,
+                                "status": "ERROR",
+                                "duration": 0.0,
+                                "message": f"分片进程异常: {e}"
+                            } for c in shard.cases]
+                        })
+
+        self._update_timings(shard_outputs)
+        return self._merge_report(shards, shard_outputs, start_time,
+                                  time.perf_counter() - wall_start)
+
+    def _update_timings(self, shard_outputs: List[Dict[str, Any]]):
+        """将本次耗时写回计时数据库"""
+        timings = {}
+        for output in shard_outputs:
+            for file_path, duration in output["import_timings"].items():
+                timings[_import_key(file_path)] = duration
+            for record in output["results"]:
+                if record["status"] != "ERROR" or record["duration"] > 0:
+                    timings[record["test_id"]] = record["duration"]
+        if not timings:
+            return
+        db = TimingDatabase(self.timing_db_path)
+        try:
+            db.record(timings)
+        finally:
+            db.close()
+
+    def _merge_report(self,
+                      shards: List[TestShard],
+                      shard_outputs: List[Dict[str, Any]],
+                      start_time: datetime,
+                      wall_duration: float) -> Dict[str, Any]:
+        """合并分片结果为统一的JSON测试报告格式"""
+        end_time = datetime.now()
+        results = sorted(
+            (r for output in shard_outputs for r in output["results"]),
+            key=lambda r: r["test_id"]
+        )
+
+        module_reports = {}
+        for record in results:
+            module_reports.setdefault(record["module_name"], []).append(record)
+
+        shard_durations = {o["shard"]: o["duration"] for o in shard_outputs}
+        estimated = {s.index: s.estimated_duration for s in shards}
+        busy = list(shard_durations.values())
+        mean_busy = statistics.mean(busy) if busy else 0.0
+
+        report = self._build_report(
+            "sharded_regression", "workflow", results, start_time, end_time, wall_duration
+        )
+        report["module_reports"] = {
+            name: self._build_report(name, records[0]["suite"], records, start_time, end_time,
+                                     sum(r["duration"] for r in records))
+            for name, records in module_reports.items()
+        }
+        report["sharding"] = {
+            "shard_count": len(shards),
+            "wall_duration": wall_duration,
+            "serial_duration": sum(r["duration"] for r in results),
+            "shards": [
+                {
+                    "shard": index,
+                    "test_count": len(next(s.cases for s in shards if s.index == index)),
+                    "estimated_duration": estimated.get(index, 0.0),
+                    "actual_duration": shard_durations[index]
+                }
+                for index in sorted(shard_durations)
+            ],
+            "imbalance": (max(busy) / mean_busy) if mean_busy > 0 else 1.0,
+            "slowest_tests": [
+                {"test_id": r["test_id"], "duration": r["duration"], "shard": r["shard"]}
+                for r in sorted(results, key=lambda r: r["duration"], reverse=True)[:self.slowest_count]
+            ]
+        }
+        return report
+
+    @staticmethod
+    def _build_report(name: str,
+                      module_type: str,
+                      results: List[Dict[str, Any]],
+                      start_time: datetime,
+                      end_time: datetime,
+                      duration: float) -> Dict[str, Any]:
+        """生成与各MCP单元测试一致的报告结构"""
+        passed = len([r for r in results if r["status"] == "PASS"])
+        failed = len([r for r in results if r["status"] in ("FAIL", "ERROR")])
+        return {
+            'test_id': f'MCP_{name}_{end_time.strftime("%Y%m%d_%H%M%S")}',
+            'test_name': name,
+            'module_name': name,
+            'module_type': module_type,
+            'test_start_time': start_time.isoformat(),
+            'test_end_time': end_time.isoformat(),
+            'test_duration': duration,
+            'test_results': results,
+            'test_summary': {
+                'total_tests': len(results),
+                'passed_tests': passed,
+                'failed_tests': failed,
+                'success_rate': passed / len(results) * 100 if results else 0
+            }
+        }
+
+
+def format_sharding_summary(report: Dict[str, Any]) -> str:
+    """生成分片执行摘要文本"""
+    summary = report["test_summary"]
+    sharding = report["sharding"]
+    lines = [
+        f"📊 总计: {summary['total_tests']}, 通过: {summary['passed_tests']}, 失败: {summary['failed_tests']}",
+        f"⏱️  墙钟耗时: {sharding['wall_duration']:.2f}秒 (串行累计 {sharding['serial_duration']:.2f}秒)",
+        f"🧩 分片数: {sharding['shard_count']}, 不均衡度: {sharding['imbalance']:.2f}"
+    ]
+    for shard in sharding["shards"]:
+        lines.append(
+            f"   分片 {shard['shard']}: {shard['test_count']} 个用例, "
+            f"预估 {shard['estimated_duration']:.2f}秒, 实际 {shard['actual_duration']:.2f}秒"
+        )
+    lines.append("🐢 最慢用例:")
+    for item in sharding["slowest_tests"]:
+        lines.append(f"   {item['duration']:.3f}秒  {item['test_id']}")
+    return "\n".join(lines)
+
+
+def run_sharded_regression(shard_count: int,
+                           output: Optional[str] = None,
+                           **kwargs) -> Dict[str, Any]:
+    """执行分片回归测试，打印摘要并保存报告"""
+    report = ShardedTestRunner(shard_count=shard_count, **kwargs).run()
+    print(format_sharding_summary(report))
+
+    report_path = Path(output) if output else Path.cwd() / (
+        f'test_report_sharded_regression_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    )
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 测试报告已保存: {report_path}")
+    return report
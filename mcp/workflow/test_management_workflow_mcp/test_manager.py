@@ -132,6 +132,13 @@ class WorkflowResult:
     duration: float
     results: Dict[str, Any]
     generated_at: datetime
+    skipped_steps: int = 0
+    critical_path: List[str] = None
+    critical_path_duration: float = 0.0
+    
+    def __post_init__(self):
+        if self.critical_path is None:
+            self.critical_path = []
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -141,9 +148,14 @@ class WorkflowResult:
                 'total_steps': self.total_steps,
                 'completed_steps': self.completed_steps,
                 'failed_steps': self.failed_steps,
+                'skipped_steps': self.skipped_steps,
                 'duration': self.duration,
                 'success_rate': self.completed_steps / self.total_steps if self.total_steps > 0 else 0
             },
+            'critical_path': {
+                'steps': self.critical_path,
+                'duration': self.critical_path_duration
+            },
             'results': self.results,
             'generated_at': self.generated_at.isoformat()
         }
@@ -198,6 +210,7 @@ class TestWorkflowManager:
             },
             'orchestration': {
                 'max_parallel_flows': 5,
+                'max_parallel_steps': 4,
                 'timeout': 3600,
                 'retry_policy': 'exponential_backoff'
             },
@@ -325,12 +338,13 @@ class TestWorkflowManager:
             }
         ))
         
-        # 测试执行步骤
+        # 测试执行步骤：并行执行时各阶段只依赖环境准备，否则按顺序串联
         test_phases = strategy.parameters.get('test_phases', ['unit', 'integration', 'functional'])
+        parallel = strategy.parameters.get('parallel_execution', True)
         
         for i, phase in enumerate(test_phases):
             step_id = f"step_test_{phase}"
-            dependencies = [steps[-1].id] if steps else []
+            dependencies = [steps[0].id if parallel else steps[-1].id]
             
             steps.append(WorkflowStep(
                 id=step_id,
@@ -406,7 +420,10 @@ class TestWorkflowManager:
                 failed_steps=result.get('failed_steps', 0),
                 duration=duration,
                 results=result,
-                generated_at=end_time
+                generated_at=end_time,
+                skipped_steps=len(result.get('skipped_steps', [])),
+                critical_path=result.get('critical_path', {}).get('steps', []),
+                critical_path_duration=result.get('critical_path', {}).get('duration', 0.0)
             )
             
             self.workflow_results[workflow_id] = workflow_result
@@ -528,10 +545,16 @@ class AIStrategyGenerator:
 
 
 class WorkflowEngine:
-    """工作流执行引擎"""
+    """
+    工作流执行引擎
+    
+    基于就绪集合调度：依赖全部完成的步骤立即进入就绪集合，
+    在 max_parallel_steps 上限内并发执行，每个步骤完成后重新计算就绪集合。
+    """
     
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        self.max_parallel_steps = max(1, config.get('max_parallel_steps', 4))
     
     async def execute(self, 
                      workflow: TestWorkflow, 
@@ -540,30 +563,129 @@ class WorkflowEngine:
         results = {
             'completed_steps': 0,
             'failed_steps': 0,
-            'step_results': {}
+            'skipped_steps': [],
+            'step_results': {},
+            'step_timings': {}
         }
         
-        # 按依赖关系执行步骤
-        executed_steps = set()
+        loop = asyncio.get_running_loop()
+        workflow_start = loop.time()
+        
+        steps = {step.id: step for step in workflow.steps}
+        pending_deps: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = {step_id: [] for step_id in steps}
+        ready: List[str] = []
         
         for step in workflow.steps:
-            # 检查依赖
-            if all(dep in executed_steps for dep in step.dependencies):
-                try:
-                    step_result = await self._execute_step(step, adapters)
-                    results['step_results'][step.id] = step_result
-                    results['completed_steps'] += 1
-                    executed_steps.add(step.id)
-                    
-                    logger.info(f"工作流步骤执行成功: {step.id}")
+            for dep in step.dependencies:
+                if dep in dependents:
+                    dependents[dep].append(step.id)
+        
+        for step in workflow.steps:
+            missing = [dep for dep in step.dependencies if dep not in steps]
+            if missing:
+                self._skip_step(step.id, f"依赖不存在: {missing}", results, dependents, steps)
+                continue
+            pending_deps[step.id] = len(step.dependencies)
+            if not step.dependencies:
+                ready.append(step.id)
+        
+        running: Dict[asyncio.Task, str] = {}
+        finished_at: Dict[str, float] = {}
+        
+        try:
+            while ready or running:
+                # 在并行上限内启动所有就绪步骤
+                while ready and len(running) < self.max_parallel_steps:
+                    step_id = ready.pop(0)
+                    if step_id in results['step_results']:
+                        continue
+                    results['step_timings'][step_id] = {'start': loop.time() - workflow_start}
+                    task = asyncio.create_task(self._execute_step(steps[step_id], adapters))
+                    running[task] = step_id
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    step_id = running.pop(task)
+                    end = loop.time() - workflow_start
+                    timing = results['step_timings'][step_id]
+                    timing['end'] = end
+                    timing['duration'] = end - timing['start']
+                    finished_at[step_id] = end
                     
-                except Exception as e:
-                    results['failed_steps'] += 1
-                    results['step_results'][step.id] = {'error': str(e)}
-                    logger.error(f"工作流步骤执行失败: {step.id}, 错误: {e}")
+                    error = task.exception()
+                    if error is None:
+                        results['step_results'][step_id] = task.result()
+                        results['completed_steps'] += 1
+                        logger.info(f"工作流步骤执行成功: {step_id}")
+                        
+                        # 重新计算就绪集合
+                        for dependent in dependents[step_id]:
+                            if dependent in pending_deps:
+                                pending_deps[dependent] -= 1
+                                if pending_deps[dependent] == 0:
+                                    ready.append(dependent)
+                    else:
+                        results['failed_steps'] += 1
+                        results['step_results'][step_id] = {'error': str(error)}
+                        logger.error(f"工作流步骤执行失败: {step_id}, 错误: {error}")
+                        for dependent in dependents[step_id]:
+                            self._skip_step(dependent, f"依赖步骤失败: {step_id}",
+                                            results, dependents, steps)
+        finally:
+            for task in running:
+                task.cancel()
         
+        # 存在环的步骤永远无法就绪
+        for step_id in steps:
+            if step_id not in results['step_results']:
+                self._skip_step(step_id, "检测到循环依赖", results, dependents, steps)
+        
+        results['critical_path'] = self._critical_path(steps, finished_at, results['step_timings'])
+        results['total_duration'] = loop.time() - workflow_start
         return results
     
+    def _skip_step(self, 
+                   step_id: str, 
+                   reason: str, 
+                   results: Dict[str, Any],
+                   dependents: Dict[str, List[str]],
+                   steps: Dict[str, WorkflowStep]):
+        """跳过步骤及其所有下游步骤"""
+        stack = [(step_id, reason)]
+        while stack:
+            current, current_reason = stack.pop()
+            if current in results['step_results']:
+                continue
+            results['step_results'][current] = {'status': 'skipped', 'reason': current_reason}
+            results['skipped_steps'].append(current)
+            logger.warning(f"工作流步骤已跳过: {current}, 原因: {current_reason}")
+            for dependent in dependents.get(current, []):
+                stack.append((dependent, f"依赖步骤被跳过: {current}"))
+    
+    def _critical_path(self, 
+                       steps: Dict[str, WorkflowStep],
+                       finished_at: Dict[str, float],
+                       timings: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """从最晚完成的步骤沿最晚完成的依赖回溯关键路径"""
+        if not finished_at:
+            return {'steps': [], 'duration': 0.0}
+        
+        path = []
+        current = max(finished_at, key=finished_at.get)
+        while current is not None:
+            path.append(current)
+            deps = [dep for dep in steps[current].dependencies if dep in finished_at]
+            current = max(deps, key=finished_at.get) if deps else None
+        path.reverse()
+        
+        return {
+            'steps': path,
+            'duration': finished_at[path[-1]] - timings[path[0]]['start'],
+            'step_durations': {step_id: timings[step_id]['duration'] for step_id in path}
+        }
+    
     async def _execute_step(self, 
                           step: WorkflowStep, 
                           adapters: Dict[str, Any]) -> Dict[str, Any]:
@@ -574,6 +696,8 @@ class WorkflowEngine:
             return await self._execute_tests(step, adapters)
         elif step.step_type == "report_generation":
             return await self._generate_reports(step, adapters)
+        elif step.step_type == "sharded_regression":
+            return await self._run_sharded_regression(step)
         else:
             raise ValueError(f"未知的步骤类型: {step.step_type}")
     
@@ -609,14 +733,61 @@ class WorkflowEngine:
             await test_adapter.execute_plan(plan_id)
             
             # 等待执行完成
-            while plan_id in test_adapter.running_executions:
-                await asyncio.sleep(0.5)
+            await self._wait_for_execution(test_adapter, plan_id, step.timeout)
             
             report = await test_adapter.get_execution_report(plan_id)
             return {'status': 'success', 'plan_id': plan_id, 'report': report}
         
         return {'status': 'success', 'message': '测试执行完成（模拟）'}
     
+    async def _wait_for_execution(self, test_adapter: Any, plan_id: str, timeout: float):
+        """
+        等待测试计划执行完成
+        
+        优先使用适配器提供的完成通知（wait_for_execution 协程，
+        或 running_executions 中保存的 Task/Future），仅在适配器
+        不支持时退回到退避轮询。
+        """
+        if hasattr(test_adapter, 'wait_for_execution'):
+            await asyncio.wait_for(test_adapter.wait_for_execution(plan_id), timeout)
+            return
+        
+        running = test_adapter.running_executions
+        execution = running.get(plan_id) if isinstance(running, dict) else None
+        if asyncio.isfuture(execution):
+            done, _ = await asyncio.wait({execution}, timeout=timeout)
+            if not done:
+                raise asyncio.TimeoutError(f"测试计划执行超时: {plan_id}")
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        delay = 0.01
+        while plan_id in test_adapter.running_executions:
+            if loop.time() >= deadline:
+                raise asyncio.TimeoutError(f"测试计划执行超时: {plan_id}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    
+    async def _run_sharded_regression(self, step: WorkflowStep) -> Dict[str, Any]:
+        """按历史耗时分片，在多个进程中并行执行全部MCP回归测试"""
+        try:
+            from .sharded_test_runner import ShardedTestRunner
+        except ImportError:
+            from sharded_test_runner import ShardedTestRunner
+        
+        runner = ShardedTestRunner(
+            shard_count=step.config.get('shards'),
+            modules=step.config.get('modules'),
+            suites=step.config.get('suites', ('unit_tests', 'integration_tests')),
+            timing_db=step.config.get('timing_db')
+        )
+        report = await asyncio.to_thread(runner.run)
+        return {
+            'status': 'success' if report['test_summary']['failed_tests'] == 0 else 'failed',
+            'report': report
+        }
+    
     async def _generate_reports(self, 
                               step: WorkflowStep, 
                               adapters: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+test_manager.WorkflowEngine 就绪集合调度单元测试
+覆盖并发执行、并行上限、依赖失败跳过、完成通知等待与关键路径
+"""
+
+import unittest
+import asyncio
+from datetime import datetime
+from pathlib import Path
+import sys
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.workflow.test_management_workflow_mcp.test_manager import (
+    WorkflowEngine, WorkflowStep, TestWorkflow, WorkflowStatus
+)
+
+
+class TimedEngine(WorkflowEngine):
+    """按 config['delay'] 模拟步骤耗时，记录并发峰值"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.active = 0
+        self.peak = 0
+        self.order = []
+
+    async def _execute_step(self, step, adapters):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        self.order.append(step.id)
+        try:
+            await asyncio.sleep(step.config.get('delay', 0.01))
+            if step.config.get('fail'):
+                raise RuntimeError("模拟失败")
+            return {'status': 'success'}
+        finally:
+            self.active -= 1
+
+
+def make_workflow(steps):
+    return TestWorkflow(
+        id="workflow_test",
+        name="测试工作流",
+        description="",
+        strategy_id="strategy_test",
+        steps=steps,
+        status=WorkflowStatus.PENDING,
+        created_at=datetime.now()
+    )
+
+
+class CompletionAdapter:
+    """通过 running_executions 中的 Future 通知完成的测试适配器"""
+
+    def __init__(self):
+        self.running_executions = {}
+
+    async def create_execution_plan(self, name, test_cases):
+        return "plan_001"
+
+    async def execute_plan(self, plan_id):
+        future = asyncio.get_running_loop().create_future()
+        self.running_executions[plan_id] = future
+
+        def finish():
+            del self.running_executions[plan_id]
+            future.set_result(True)
+
+        asyncio.get_running_loop().call_later(0.02, finish)
+
+    async def get_execution_report(self, plan_id):
+        return {'plan_id': plan_id, 'passed': 1}
+
+
+class TestDagWorkflowEngine(unittest.IsolatedAsyncioTestCase):
+    """就绪集合调度测试"""
+
+    async def test_independent_steps_run_concurrently(self):
+        """TC001: 相互独立的测试步骤并发执行，关键路径取最长分支"""
+        engine = TimedEngine({'max_parallel_steps': 4})
+        workflow = make_workflow([
+            WorkflowStep("step_env_setup", "环境", "environment_setup", {'delay': 0.01}),
+            WorkflowStep("step_test_unit", "单元", "test_execution", {'delay': 0.05}, ["step_env_setup"]),
+            WorkflowStep("step_test_integration", "集成", "test_execution", {'delay': 0.05}, ["step_env_setup"]),
+            WorkflowStep("step_test_performance", "性能", "test_execution", {'delay': 0.15}, ["step_env_setup"]),
+            WorkflowStep("step_report_generation", "报告", "report_generation", {'delay': 0.01},
+                         ["step_test_unit", "step_test_integration", "step_test_performance"]),
+        ])
+
+        results = await engine.execute(workflow, {})
+
+        self.assertEqual(results['completed_steps'], 5)
+        self.assertEqual(engine.peak, 3)
+        self.assertLess(results['total_duration'], 0.3)
+        self.assertEqual(results['critical_path']['steps'],
+                         ["step_env_setup", "step_test_performance", "step_report_generation"])
+
+    async def test_parallelism_cap(self):
+        """TC002: 并发数不超过 max_parallel_steps"""
+        engine = TimedEngine({'max_parallel_steps': 2})
+        workflow = make_workflow([
+            WorkflowStep(f"step_{i}", f"步骤{i}", "test_execution", {'delay': 0.02})
+            for i in range(6)
+        ])
+
+        results = await engine.execute(workflow, {})
+
+        self.assertEqual(results['completed_steps'], 6)
+        self.assertEqual(engine.peak, 2)
+
+    async def test_out_of_order_and_failed_dependencies(self):
+        """TC003: 依赖声明在后的步骤照常执行，失败步骤的下游被跳过"""
+        engine = TimedEngine({'max_parallel_steps': 4})
+        workflow = make_workflow([
+            WorkflowStep("step_b", "B", "test_execution", {}, ["step_a"]),
+            WorkflowStep("step_a", "A", "test_execution", {}),
+            WorkflowStep("step_c", "C", "test_execution", {'fail': True}, ["step_a"]),
+            WorkflowStep("step_d", "D", "test_execution", {}, ["step_c"]),
+            WorkflowStep("step_e", "E", "test_execution", {}, ["step_missing"]),
+        ])
+
+        results = await engine.execute(workflow, {})
+
+        self.assertEqual(engine.order[0], "step_a")
+        self.assertEqual(results['completed_steps'], 2)
+        self.assertEqual(results['failed_steps'], 1)
+        self.assertEqual(sorted(results['skipped_steps']), ["step_d", "step_e"])
+
+    async def test_waits_on_adapter_completion_future(self):
+        """TC004: 测试步骤等待适配器的完成Future而非轮询"""
+        engine = WorkflowEngine({})
+        workflow = make_workflow([
+            WorkflowStep("step_test_unit", "单元", "test_execution", {'test_type': 'unit'}),
+        ])
+
+        results = await engine.execute(workflow, {'test_management_mcp': CompletionAdapter()})
+
+        step_result = results['step_results']['step_test_unit']
+        self.assertEqual(step_result['report'], {'plan_id': 'plan_001', 'passed': 1})
+        self.assertLess(results['total_duration'], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+sharded_test_runner 单元测试
+覆盖用例发现、计时数据库、按耗时分片与多进程执行合并
+"""
+
+import unittest
+import tempfile
+from pathlib import Path
+import sys
+
+# 添加项目路径
+project_root = Path(__file__).parent.parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from mcp.workflow.test_management_workflow_mcp.sharded_test_runner import (
+    ShardedTestRunner, TimingDatabase, TestCaseSpec, discover_test_cases, partition_shards
+)
+
+
+SAMPLE_TESTS = '''
+import unittest
+
+class TestSample(unittest.TestCase):
+    def test_pass(self):
+        self.assertTrue(True)
+
+    def test_fail(self):
+        self.assertEqual(1, 2)
+
+    def helper(self):
+        pass
+'''
+
+
+def make_case(test_id, file_path="a.py"):
+    return TestCaseSpec(test_id, file_path, "TestX", test_id, "demo_mcp", "unit_tests")
+
+
+class TestShardedTestRunner(unittest.TestCase):
+    """分片执行器测试"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        for module in ("alpha_mcp", "beta_mcp"):
+            suite_dir = self.root / module / "unit_tests"
+            suite_dir.mkdir(parents=True)
+            (suite_dir / "__init__.py").write_text("这不是合法的Python\n", encoding="utf-8")
+            (suite_dir / f"test_{module}.py").write_text(SAMPLE_TESTS, encoding="utf-8")
+        self.db_path = str(self.root / "timings.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discover_test_cases(self):
+        """TC001: 静态发现测试方法，不导入模块"""
+        cases = discover_test_cases([str(self.root)])
+        self.assertEqual(len(cases), 4)
+        self.assertEqual({c.module_name for c in cases}, {"alpha_mcp", "beta_mcp"})
+        self.assertEqual({c.method_name for c in cases}, {"test_pass", "test_fail"})
+
+    def test_timing_database_smoothing(self):
+        """TC002: 计时数据库按指数加权平均更新"""
+        db = TimingDatabase(self.db_path, smoothing=0.5)
+        try:
+            db.record({"t1": 2.0})
+            db.record({"t1": 4.0, "t2": 1.0})
+            self.assertEqual(db.get_durations(["t1", "t2", "t3"]), {"t1": 3.0, "t2": 1.0})
+        finally:
+            db.close()
+
+    def test_partition_balances_by_duration(self):
+        """TC003: 按历史耗时贪心分片，长用例分散到不同分片"""
+        cases = [make_case(f"t{i}", f"f{i}.py") for i in range(6)]
+        durations = {"t0": 5.0, "t1": 4.0, "t2": 3.0, "t3": 3.0, "t4": 2.0, "t5": 1.0}
+        shards = partition_shards(cases, 2, durations)
+        loads = sorted(s.estimated_duration for s in shards)
+        self.assertEqual(loads, [9.0, 9.0])
+
+    def test_partition_keeps_files_together_when_import_is_costly(self):
+        """TC004: 文件导入耗时较高时，同一文件的用例留在同一分片"""
+        cases = [make_case(f"a{i}", "a.py") for i in range(4)] + [make_case("b1", "b.py")]
+        durations = {"a0": 0.5, "a1": 0.5, "a2": 0.5, "a3": 0.5, "b1": 3.0, "import::a.py": 3.0}
+        shards = partition_shards(cases, 2, durations)
+        holders = [s for s in shards if "a.py" in s.files]
+        self.assertEqual(len(holders), 1)
+
+    def test_run_merges_shards_into_report(self):
+        """TC005: 多进程执行分片并合并为统一报告，同时写回耗时"""
+        runner = ShardedTestRunner(shard_count=2, roots=[str(self.root)], timing_db=self.db_path)
+        report = runner.run()
+
+        summary = report["test_summary"]
+        self.assertEqual(summary["total_tests"], 4)
+        self.assertEqual(summary["passed_tests"], 2)
+        self.assertEqual(summary["failed_tests"], 2)
+        self.assertEqual(set(report["module_reports"]), {"alpha_mcp", "beta_mcp"})
+        self.assertEqual(report["sharding"]["shard_count"], 2)
+        self.assertGreaterEqual(report["sharding"]["imbalance"], 1.0)
+        self.assertEqual(len(report["sharding"]["slowest_tests"]), 4)
+
+        db = TimingDatabase(self.db_path)
+        try:
+            recorded = db.get_durations(r["test_id"] for r in report["test_results"])
+        finally:
+            db.close()
+        self.assertEqual(len(recorded), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -265,6 +265,8 @@ class WorkflowEngine:
             return await self._execute_test_step(step_id, adapters, context)
         elif step_id.startswith('step_report_'):
             return await self._execute_report_step(step_id, adapters, context)
+        elif step_id.startswith('step_regression'):
+            return await self._execute_regression_step(step_id, adapters, context)
         else:
             # 默认执行
             await asyncio.sleep(0.1)  # 模拟执行时间
@@ -354,6 +356,30 @@ class WorkflowEngine:
             'report': report
         }
     
+    async def _execute_regression_step(self, 
+                                     step_id: str, 
+                                     adapters: Dict[str, Any],
+                                     context: Dict[str, Any]) -> Dict[str, Any]:
+        """执行分片并行回归测试步骤"""
+        from .sharded_test_runner import ShardedTestRunner
+        
+        regression_config = context.get('regression', {})
+        logger.info(f"执行分片回归测试: {step_id}")
+        
+        runner = ShardedTestRunner(
+            shard_count=regression_config.get('shards', self.max_parallel),
+            modules=regression_config.get('modules'),
+            timing_db=regression_config.get('timing_db')
+        )
+        report = await asyncio.to_thread(runner.run)
+        
+        return {
+            'status': 'success' if report['test_summary']['failed_tests'] == 0 else 'failed',
+            'summary': report['test_summary'],
+            'sharding': report['sharding'],
+            'report': report
+        }
+    
     async def _execute_report_step(self, 
                                  step_id: str, 
                                  adapters: Dict[str, Any],
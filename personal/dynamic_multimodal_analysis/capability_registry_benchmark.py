@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+MCP 能力註冊中心意圖匹配基準
+
+向註冊中心追加大量工作流（每個工作流若干意圖關鍵詞，詞彙有重疊），對不同的註冊規模對比：
+- 舊實現：逐個工作流、逐個關鍵詞做子串判斷
+- 關鍵詞自動機：一次掃描輸入文本後按關鍵詞累計分數
+報告單次查詢耗時與註冊耗時，並校驗兩者的分數與選中的工作流完全一致。
+
+用法:
+    python capability_registry_benchmark.py --workflows 1000 5000 20000 --queries 200
+"""
+
+import argparse
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mcp_capability_registry import MCPCapabilityRegistry, WorkflowMCPConfig
+
+SYLLABLES = "需求分析架構設計系統開發測試部署監控運維性能代碼數據接口安全用戶界面流程管理智能自動"
+
+
+def make_vocabulary(size: int, rng: random.Random) -> List[str]:
+    """由常見字組合出 2~4 字的關鍵詞"""
+    vocabulary = set()
+    while len(vocabulary) < size:
+        vocabulary.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(vocabulary)
+
+
+def make_workflows(count: int, vocabulary: List[str], rng: random.Random) -> List[WorkflowMCPConfig]:
+    return [
+        WorkflowMCPConfig(
+            name=f"generated_workflow_{i}_mcp", port=9000 + i, capabilities=[f"生成能力{i}"],
+            adapters=[], description=f"生成的工作流 {i}",
+            intent_keywords=rng.sample(vocabulary, rng.randint(3, 8))
+        )
+        for i in range(count)
+    ]
+
+
+def make_inputs(count: int, vocabulary: List[str], rng: random.Random) -> List[str]:
+    """用戶輸入：若干關鍵詞與隨機文字拼接"""
+    return ["".join(rng.choice(vocabulary) if rng.random() < 0.5 else rng.choice(SYLLABLES)
+                    for _ in range(rng.randint(10, 40)))
+            for _ in range(count)]
+
+
+def legacy_scores(registry: MCPCapabilityRegistry, user_input: str) -> Dict[str, int]:
+    """舊實現的分數計算"""
+    user_input_lower = user_input.lower()
+    scores = {}
+    for name, config in registry.workflow_mcps.items():
+        score = 0
+        for keyword in config.intent_keywords:
+            if keyword in user_input_lower:
+                score += 1
+        scores[name] = score
+    return scores
+
+
+def legacy_find(registry: MCPCapabilityRegistry, user_input: str) -> Optional[WorkflowMCPConfig]:
+    """舊實現的 find_workflow_by_intent"""
+    scores = legacy_scores(registry, user_input)
+    if scores and max(scores.values()) > 0:
+        return registry.workflow_mcps[max(scores, key=scores.get)]
+    return None
+
+
+def run_size(workflow_count: int, query_count: int, seed: int = 7) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(max(2000, workflow_count), rng)
+    workflows = make_workflows(workflow_count, vocabulary, rng)
+    inputs = make_inputs(query_count, vocabulary, rng)
+
+    registry = MCPCapabilityRegistry()
+    start = time.perf_counter()
+    for config in workflows:
+        registry.register_workflow_mcp(config)
+    registry.intent_automaton.find_all("")  # 觸發失配鏈接重建，計入註冊耗時
+    register_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    legacy = [legacy_find(registry, text) for text in inputs]
+    legacy_ms = (time.perf_counter() - start) * 1000 / query_count
+
+    start = time.perf_counter()
+    found = [registry.find_workflow_by_intent(text) for text in inputs]
+    automaton_ms = (time.perf_counter() - start) * 1000 / query_count
+
+    for text, expected, actual in zip(inputs, legacy, found):
+        expected_scores = {name: score for name, score in legacy_scores(registry, text).items() if score}
+        if registry.score_workflows_by_intent(text) != expected_scores or expected is not actual:
+            raise AssertionError(f"匹配結果不一致: {text}")
+
+    keywords = sum(len(config.intent_keywords) for config in registry.workflow_mcps.values())
+    return {"workflows": len(registry.workflow_mcps), "keywords": keywords, "register_ms": register_ms,
+            "legacy_ms": legacy_ms, "automaton_ms": automaton_ms}
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'workflows':>10} {'keywords':>9} {'register ms':>12} {'legacy ms':>10} "
+             f"{'automaton ms':>13} {'speedup':>8}"]
+    for row in rows:
+        lines.append(f"{row['workflows']:>10,} {row['keywords']:>9,} {row['register_ms']:>12.1f} "
+                     f"{row['legacy_ms']:>10.3f} {row['automaton_ms']:>13.3f} "
+                     f"{row['legacy_ms'] / row['automaton_ms']:>7.1f}x")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP 能力註冊中心意圖匹配基準")
+    parser.add_argument("--workflows", type=int, nargs="+", default=[1000, 5000, 20000], help="追加註冊的工作流數")
+    parser.add_argument("--queries", type=int, default=200, help="每種規模的查詢數")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report([run_size(count, args.queries) for count in args.workflows]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+連接強化引擎規模基準
+
+構造指定規模的連接網路（預設100萬條連接），對比：
+- 最佳連接查詢：舊實現全表掃描+排序 vs 按源索引+堆取top-k
+- 權重衰減：舊實現逐條遍歷 vs 只推進衰減時間點
+- 統計查詢：舊實現全表掃描 vs 增量計數器
+
+用法:
+    python connection_reinforcement_benchmark.py --connections 1000000 --fanout 100
+"""
+
+import argparse
+import logging
+import math
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from connection_reinforcement_engine import ConnectionReinforcementEngine
+
+
+def build_engine(connection_count: int, fanout: int, seed: int = 7) -> ConnectionReinforcementEngine:
+    """按每個源 fanout 條出邊構造網路，並隨機記錄一部分交互"""
+    rng = random.Random(seed)
+    engine = ConnectionReinforcementEngine()
+    source_count = max(1, connection_count // fanout)
+    for i in range(connection_count):
+        engine.create_connection(f"node_{i % source_count}", f"node_{source_count + i}",
+                                 initial_weight=rng.uniform(0.3, 0.9))
+    for _ in range(min(connection_count, 50000)):
+        i = rng.randrange(connection_count)
+        engine.record_interaction(f"node_{i % source_count}", f"node_{source_count + i}",
+                                  rng.random() < 0.7, rng.uniform(0.1, 3.0))
+    return engine
+
+
+def legacy_best_connections(engine: ConnectionReinforcementEngine, source_id: str, limit: int = 5):
+    """舊實現：掃描全部連接後排序"""
+    source_connections = [
+        conn for conn in engine.connections.values()
+        if conn.source_id == source_id and conn.is_active
+    ]
+    source_connections.sort(key=lambda x: x.weight, reverse=True)
+    return source_connections[:limit]
+
+
+def legacy_weight_decay(engine: ConnectionReinforcementEngine):
+    """舊實現：逐條連接計算衰減（只計算不寫回，避免影響後續測量）"""
+    for connection in engine.connections.values():
+        if connection.is_active:
+            time_since_use = (datetime.now() - connection.last_used).total_seconds() / 3600
+            max(connection.weight * math.exp(-engine.decay_rate * time_since_use), engine.min_weight)
+
+
+def legacy_stats(engine: ConnectionReinforcementEngine) -> Dict[str, Any]:
+    """舊實現：全表掃描統計"""
+    active_connections = [conn for conn in engine.connections.values() if conn.is_active]
+    weights = [conn.weight for conn in active_connections]
+    success_rates = [engine.calculate_success_rate(f"{conn.source_id}->{conn.target_id}")
+                     for conn in active_connections]
+    return {
+        'avg_weight': sum(weights) / len(weights),
+        'avg_success_rate': sum(success_rates) / len(success_rates)
+    }
+
+
+def timed(func, repeat: int) -> float:
+    """返回平均每次耗時(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(connection_count: int, fanout: int, queries: int) -> List[Dict[str, Any]]:
+    """執行各項對比測量"""
+    start = time.perf_counter()
+    engine = build_engine(connection_count, fanout)
+    build_seconds = time.perf_counter() - start
+    source_count = max(1, connection_count // fanout)
+    rng = random.Random(11)
+    sources = [f"node_{rng.randrange(source_count)}" for _ in range(queries)]
+
+    legacy_queries = max(1, queries // 50)
+    for source in sources[:legacy_queries]:
+        expected = [c.weight for c in legacy_best_connections(engine, source)]
+        actual = [c.weight for c in engine.get_best_connections(source)]
+        if expected != actual:
+            raise AssertionError(f"top-k 結果不一致: {source}")
+
+    query_iter = iter(sources * 2)
+    rows = [
+        {"operation": "get_best_connections",
+         "legacy_ms": timed(lambda: legacy_best_connections(engine, next(query_iter)), legacy_queries),
+         "indexed_ms": timed(lambda: engine.get_best_connections(next(query_iter)), queries)},
+        {"operation": "apply_weight_decay",
+         "legacy_ms": timed(lambda: legacy_weight_decay(engine), 1),
+         "indexed_ms": timed(engine.apply_weight_decay, queries)},
+    ]
+
+    # 衰減推進後第一次統計會補算一次權重，之後走增量計數器
+    first_stats_ms = timed(engine.get_reinforcement_stats, 1)
+    rows.append({"operation": "get_reinforcement_stats",
+                 "legacy_ms": timed(lambda: legacy_stats(engine), 1),
+                 "indexed_ms": timed(engine.get_reinforcement_stats, queries),
+                 "note": f"衰減後首次 {first_stats_ms:.1f}ms"})
+
+    stats = engine.get_reinforcement_stats()
+    legacy = legacy_stats(engine)
+    if abs(stats["avg_weight"] - legacy["avg_weight"]) > 1e-6 or \
+            abs(stats["avg_success_rate"] - legacy["avg_success_rate"]) > 1e-6:
+        raise AssertionError("增量統計與全表掃描不一致")
+
+    for row in rows:
+        row["connections"] = connection_count
+        row["build_seconds"] = build_seconds
+    return rows
+
+
+def format_report(rows: List[Dict[str, Any]]) -> str:
+    """格式化基準結果"""
+    lines = [f"連接數 {rows[0]['connections']:,}，構建耗時 {rows[0]['build_seconds']:.1f}s",
+             f"{'operation':<26} {'legacy ms':>12} {'indexed ms':>12} {'speedup':>10}"]
+    for row in rows:
+        speedup = row["legacy_ms"] / row["indexed_ms"] if row["indexed_ms"] else float("inf")
+        line = f"{row['operation']:<26} {row['legacy_ms']:>12.3f} {row['indexed_ms']:>12.4f} {speedup:>9.0f}x"
+        if row.get("note"):
+            line += f"  ({row['note']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="連接強化引擎規模基準")
+    parser.add_argument("--connections", type=int, default=1000000, help="連接總數")
+    parser.add_argument("--fanout", type=int, default=100, help="每個源神經元的出邊數")
+    parser.add_argument("--queries", type=int, default=1000, help="查詢次數")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(run_benchmark(args.connections, args.fanout, args.queries)))
+
+
+if __name__ == "__main__":
+    main()
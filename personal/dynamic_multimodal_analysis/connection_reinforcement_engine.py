@@ -10,10 +10,11 @@ import asyncio
 import json
 import time
 import math
+import heapq
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, Counter
 import logging
 
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ class NeuralConnection:
     last_used: datetime
     metrics: ConnectionMetrics
     is_active: bool = True
+    decay_anchor: float = 0.0  # weight 已衰減到的時間點(time.time())，讀取時從此處惰性衰減
 
 class ConnectionReinforcementEngine:
     """
@@ -51,12 +53,32 @@ class ConnectionReinforcementEngine:
     2. 弱化或移除低效連接
     3. 動態調整連接權重
     4. 學習最佳連接模式
+    
+    連接按源神經元建立索引，最佳連接用堆取 top-k；
+    權重衰減只記錄衰減時間點，讀取權重時才按 decay_anchor 補算，衰減本身為O(1)；
+    拓撲節點和統計量隨連接變化增量維護。
     """
     
     def __init__(self):
         self.connections: Dict[str, NeuralConnection] = {}
         self.reinforcement_history: List[Dict] = []
         
+        # 按源神經元索引的鄰接表
+        self.source_index: Dict[str, Dict[str, NeuralConnection]] = defaultdict(dict)
+        
+        # 惰性衰減：衰減已應用到的時間點
+        self.decay_time = 0.0
+        
+        # 增量統計（僅活躍連接）
+        self.active_count = 0
+        self.node_degrees: Counter = Counter()
+        self._success_rate_sum = 0.0
+        self._weight_sum = 0.0
+        self._weight_max = None
+        self._weight_min = None
+        self._weights_stale = False
+        self._weights_decay_time = 0.0
+        
         # 強化學習參數
         self.learning_rate = 0.1
         self.reinforcement_threshold = 0.8
@@ -81,17 +103,21 @@ class ConnectionReinforcementEngine:
         connection_id = f"{source_id}->{target_id}"
         
         if connection_id not in self.connections:
+            now = datetime.now()
             connection = NeuralConnection(
                 source_id=source_id,
                 target_id=target_id,
                 weight=initial_weight,
                 connection_type=connection_type,
-                created_time=datetime.now(),
-                last_used=datetime.now(),
-                metrics=ConnectionMetrics()
+                created_time=now,
+                last_used=now,
+                metrics=ConnectionMetrics(),
+                decay_anchor=time.time()
             )
             
             self.connections[connection_id] = connection
+            self.source_index[source_id][target_id] = connection
+            self._on_activated(connection)
             logger.info(f"🔗 創建新連接: {connection_id} (權重: {initial_weight:.2f})")
             
         return connection_id
@@ -107,6 +133,7 @@ class ConnectionReinforcementEngine:
         
         connection = self.connections[connection_id]
         metrics = connection.metrics
+        old_success_rate = self.calculate_success_rate(connection_id)
         
         # 更新指標
         metrics.total_attempts += 1
@@ -118,6 +145,7 @@ class ConnectionReinforcementEngine:
             metrics.last_success_time = datetime.now()
             metrics.consecutive_successes += 1
             metrics.consecutive_failures = 0
+            self._update_success_rate_sum(connection, old_success_rate)
             
             # 強化連接
             self.reinforce_connection(connection_id, response_time)
@@ -127,6 +155,7 @@ class ConnectionReinforcementEngine:
             metrics.last_failure_time = datetime.now()
             metrics.consecutive_failures += 1
             metrics.consecutive_successes = 0
+            self._update_success_rate_sum(connection, old_success_rate)
             
             # 弱化連接
             self.weaken_connection(connection_id)
@@ -154,11 +183,11 @@ class ConnectionReinforcementEngine:
         reinforcement_factor = (time_factor + success_factor) / 2
         
         # 應用強化
+        old_weight = self.get_connection_weight(connection_id)
         weight_increase = self.learning_rate * reinforcement_factor
-        new_weight = min(connection.weight + weight_increase, self.max_weight)
+        new_weight = min(old_weight + weight_increase, self.max_weight)
         
-        old_weight = connection.weight
-        connection.weight = new_weight
+        self._set_weight(connection, new_weight)
         
         logger.debug(f"💪 強化連接: {connection_id} - 權重: {old_weight:.3f} -> {new_weight:.3f}")
         
@@ -187,11 +216,11 @@ class ConnectionReinforcementEngine:
         failure_factor = min(1.0, failure_rate + (consecutive_failures * 0.1))
         
         # 應用弱化
+        old_weight = self.get_connection_weight(connection_id)
         weight_decrease = self.learning_rate * failure_factor
-        new_weight = max(connection.weight - weight_decrease, self.min_weight)
+        new_weight = max(old_weight - weight_decrease, self.min_weight)
         
-        old_weight = connection.weight
-        connection.weight = new_weight
+        self._set_weight(connection, new_weight)
         
         logger.debug(f"🔻 弱化連接: {connection_id} - 權重: {old_weight:.3f} -> {new_weight:.3f}")
         
@@ -213,6 +242,8 @@ class ConnectionReinforcementEngine:
         """修剪（移除）低效連接"""
         if connection_id in self.connections:
             connection = self.connections[connection_id]
+            if connection.is_active:
+                self._on_deactivated(connection)
             connection.is_active = False
             
             logger.info(f"✂️ 修剪連接: {connection_id} (權重過低: {connection.weight:.3f})")
@@ -248,17 +279,104 @@ class ConnectionReinforcementEngine:
         
         return metrics.total_response_time / metrics.successful_attempts
     
-    def get_best_connections(self, source_id: str, limit: int = 5) -> List[NeuralConnection]:
-        """獲取從指定源神經元出發的最佳連接"""
-        source_connections = [
-            conn for conn in self.connections.values()
-            if conn.source_id == source_id and conn.is_active
-        ]
-        
-        # 按權重排序
-        source_connections.sort(key=lambda x: x.weight, reverse=True)
+    # ------------------------------------------------------------------
+    # 惰性衰減與增量統計
+    # ------------------------------------------------------------------
+    
+    def _decayed(self, connection: NeuralConnection) -> NeuralConnection:
+        """把衰減補算到當前衰減時間點（每個衰減週期對每個連接最多補算一次）"""
+        if connection.decay_anchor < self.decay_time:
+            hours = (self.decay_time - connection.decay_anchor) / 3600
+            old_weight = connection.weight
+            connection.weight = max(old_weight * math.exp(-self.decay_rate * hours), self.min_weight)
+            connection.decay_anchor = self.decay_time
+            if connection.is_active:
+                self._weight_sum += connection.weight - old_weight
+        return connection
+    
+    def get_connection_weight(self, connection_id: str) -> float:
+        """讀取連接的當前權重（含惰性衰減）"""
+        if connection_id not in self.connections:
+            return 0.0
+        return self._decayed(self.connections[connection_id]).weight
+    
+    def _set_weight(self, connection: NeuralConnection, new_weight: float):
+        """更新權重並維護統計；權重更新後從當前時刻重新開始計算衰減"""
+        old_weight = connection.weight
+        connection.weight = new_weight
+        connection.decay_anchor = max(time.time(), self.decay_time)
+        if not connection.is_active:
+            return
         
-        return source_connections[:limit]
+        self._weight_sum += new_weight - old_weight
+        if self._weight_max is None or new_weight >= self._weight_max:
+            self._weight_max = new_weight
+        elif old_weight >= self._weight_max:
+            self._weights_stale = True
+        if self._weight_min is None or new_weight <= self._weight_min:
+            self._weight_min = new_weight
+        elif old_weight <= self._weight_min:
+            self._weights_stale = True
+    
+    def _update_success_rate_sum(self, connection: NeuralConnection, old_success_rate: float):
+        if connection.is_active:
+            self._success_rate_sum += self.calculate_success_rate(
+                f"{connection.source_id}->{connection.target_id}") - old_success_rate
+    
+    def _on_activated(self, connection: NeuralConnection):
+        self.active_count += 1
+        self.node_degrees[connection.source_id] += 1
+        self.node_degrees[connection.target_id] += 1
+        self._success_rate_sum += self.calculate_success_rate(
+            f"{connection.source_id}->{connection.target_id}")
+        self._weight_sum += connection.weight
+        if self._weight_max is None or connection.weight > self._weight_max:
+            self._weight_max = connection.weight
+        if self._weight_min is None or connection.weight < self._weight_min:
+            self._weight_min = connection.weight
+    
+    def _on_deactivated(self, connection: NeuralConnection):
+        self.active_count -= 1
+        for node_id in (connection.source_id, connection.target_id):
+            self.node_degrees[node_id] -= 1
+            if self.node_degrees[node_id] <= 0:
+                del self.node_degrees[node_id]
+        self._success_rate_sum -= self.calculate_success_rate(
+            f"{connection.source_id}->{connection.target_id}")
+        self._weight_sum -= connection.weight
+        if connection.weight in (self._weight_max, self._weight_min):
+            self._weights_stale = True
+    
+    def _refresh_weight_stats(self):
+        """衰減週期推進或極值連接被修改後，重新掃描一次活躍連接的權重"""
+        total, high, low = 0.0, None, None
+        for connection in self.connections.values():
+            if not connection.is_active:
+                continue
+            weight = self._decayed(connection).weight
+            total += weight
+            high = weight if high is None or weight > high else high
+            low = weight if low is None or weight < low else low
+        self._weight_sum = total
+        self._weight_max = high
+        self._weight_min = low
+        self._weights_stale = False
+        self._weights_decay_time = self.decay_time
+    
+    def _weight_stats(self) -> Tuple[float, Optional[float], Optional[float]]:
+        if self._weights_stale or self._weights_decay_time != self.decay_time:
+            self._refresh_weight_stats()
+        return self._weight_sum, self._weight_max, self._weight_min
+    
+    def get_best_connections(self, source_id: str, limit: int = 5) -> List[NeuralConnection]:
+        """獲取從指定源神經元出發的最佳連接（只遍歷該源的鄰接表，堆取top-k）"""
+        source_connections = (
+            self._decayed(conn) for conn in self.source_index.get(source_id, {}).values()
+            if conn.is_active
+        )
+        
+        # 按權重取前 limit 個
+        return heapq.nlargest(limit, source_connections, key=lambda x: x.weight)
     
     def get_connection_score(self, connection_id: str) -> float:
         """計算連接的綜合評分"""
@@ -288,18 +406,12 @@ class ConnectionReinforcementEngine:
         return total_score
     
     def apply_weight_decay(self):
-        """應用權重衰減，防止過度強化"""
-        for connection in self.connections.values():
-            if connection.is_active:
-                # 計算自上次使用以來的時間
-                time_since_use = (datetime.now() - connection.last_used).total_seconds() / 3600  # 小時
-                
-                # 應用衰減
-                decay_factor = math.exp(-self.decay_rate * time_since_use)
-                new_weight = connection.weight * decay_factor
-                
-                # 確保權重不低於最小值
-                connection.weight = max(new_weight, self.min_weight)
+        """應用權重衰減，防止過度強化
+        
+        只推進衰減時間點（O(1)）；各連接在下次讀取權重時按
+        exp(-decay_rate * 自上次更新或上次衰減以來的小時數) 補算，且不低於最小權重。
+        """
+        self.decay_time = time.time()
     
     def adapt_parameters(self):
         """自適應調整強化學習參數"""
@@ -335,16 +447,16 @@ class ConnectionReinforcementEngine:
     
     def get_network_topology(self) -> Dict:
         """獲取網路拓撲結構"""
-        active_connections = [conn for conn in self.connections.values() if conn.is_active]
+        active_connections = [
+            self._decayed(conn) for conn in self.connections.values() if conn.is_active
+        ]
+        weight_sum, _, _ = self._weight_stats()
         
-        # 構建節點和邊的信息
-        nodes = set()
+        # 節點集合由活躍連接的度數增量維護
+        nodes = list(self.node_degrees)
         edges = []
         
         for conn in active_connections:
-            nodes.add(conn.source_id)
-            nodes.add(conn.target_id)
-            
             edges.append({
                 'source': conn.source_id,
                 'target': conn.target_id,
@@ -354,29 +466,26 @@ class ConnectionReinforcementEngine:
             })
         
         return {
-            'nodes': list(nodes),
+            'nodes': nodes,
             'edges': edges,
-            'total_connections': len(active_connections),
-            'avg_weight': sum(conn.weight for conn in active_connections) / len(active_connections) if active_connections else 0
+            'total_connections': self.active_count,
+            'avg_weight': weight_sum / self.active_count if self.active_count else 0
         }
     
     def get_reinforcement_stats(self) -> Dict:
-        """獲取強化學習統計信息"""
-        active_connections = [conn for conn in self.connections.values() if conn.is_active]
-        
-        if not active_connections:
+        """獲取強化學習統計信息（由增量計數器得出，不遍歷連接）"""
+        if not self.active_count:
             return {'message': '沒有活躍連接'}
         
-        weights = [conn.weight for conn in active_connections]
-        success_rates = [self.calculate_success_rate(f"{conn.source_id}->{conn.target_id}") for conn in active_connections]
+        weight_sum, weight_max, weight_min = self._weight_stats()
         
         return {
             'total_connections': len(self.connections),
-            'active_connections': len(active_connections),
-            'avg_weight': sum(weights) / len(weights),
-            'max_weight': max(weights),
-            'min_weight': min(weights),
-            'avg_success_rate': sum(success_rates) / len(success_rates),
+            'active_connections': self.active_count,
+            'avg_weight': weight_sum / self.active_count,
+            'max_weight': weight_max,
+            'min_weight': weight_min,
+            'avg_success_rate': self._success_rate_sum / self.active_count,
             'learning_rate': self.learning_rate,
             'reinforcement_events': len(self.reinforcement_history),
             'last_adaptation': self.last_adaptation
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+增量引擎結構哈希差異基準
+
+構造大型嵌套需求文檔（頂層分組 -> 模塊 -> 字段/標籤/子任務），每輪隨機修改少量深層字段，對比：
+- 建版本：舊實現整體 JSON 序列化計算校驗和 / 完整構建結構哈希樹 / derive_version 只重算修改路徑
+- 差異檢測：舊實現逐個頂層鍵整體比較 / 沿結構哈希樹跳過未變化子樹
+並校驗新實現報告的變更都落在舊實現報告的頂層組件之內，且派生版本的哈希與完整重建一致。
+
+用法:
+    python incremental_diff_benchmark.py --groups 20 --modules 100 --edits 1 10 100
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from incremental_engine import IncrementalEngine, ChangeRecord, ChangeType
+
+GROUP_NAMES = ["功能需求", "性能需求", "技術架構", "業務規則", "接口定義"]
+
+
+def build_document(groups: int, modules: int, seed: int = 7) -> Dict[str, Any]:
+    """每個模塊約50個葉子節點"""
+    rng = random.Random(seed)
+    document = {}
+    for g in range(groups):
+        document[f"{GROUP_NAMES[g % len(GROUP_NAMES)]}_{g}"] = {
+            f"module_{m}": {
+                "name": f"模塊 {g}-{m}",
+                "priority": rng.randrange(5),
+                "description": "".join(rng.choice("需求分析設計實現測試部署") for _ in range(80)),
+                "tags": [f"tag_{rng.randrange(50)}" for _ in range(5)],
+                "subtasks": [
+                    {"id": f"{g}-{m}-{t}", "estimate": rng.randrange(1, 20), "owner": f"user_{rng.randrange(30)}",
+                     "done": rng.random() < 0.5}
+                    for t in range(10)
+                ]
+            }
+            for m in range(modules)
+        }
+    return document
+
+
+def random_edits(document: Dict[str, Any], count: int, rng: random.Random) -> Dict[tuple, Any]:
+    """隨機選取深層葉子修改"""
+    edits = {}
+    groups = list(document)
+    while len(edits) < count:
+        group = rng.choice(groups)
+        module = rng.choice(list(document[group]))
+        kind = rng.random()
+        if kind < 0.5:
+            task = rng.randrange(len(document[group][module]["subtasks"]))
+            edits[(group, module, "subtasks", task, "estimate")] = rng.randrange(100, 200)
+        elif kind < 0.8:
+            edits[(group, module, "priority")] = rng.randrange(10, 20)
+        else:
+            edits[(group, module, "tags", rng.randrange(5))] = f"edited_{rng.randrange(1000)}"
+    return edits
+
+
+def apply_edits(document: Dict[str, Any], edits: Dict[tuple, Any]) -> Dict[str, Any]:
+    """舊的使用方式：深拷貝整個文檔後修改"""
+    edited = copy.deepcopy(document)
+    for path, value in edits.items():
+        target = edited
+        for segment in path[:-1]:
+            target = target[segment]
+        target[path[-1]] = value
+    return edited
+
+
+def legacy_checksum(content: Dict[str, Any]) -> str:
+    """舊實現的版本校驗和"""
+    return hashlib.sha256(json.dumps(content, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+def legacy_detect_changes(engine: IncrementalEngine, old_content: Dict[str, Any],
+                          new_content: Dict[str, Any]) -> List[ChangeRecord]:
+    """舊實現：只比較頂層鍵，值整體比較"""
+    changes = []
+    old_keys, new_keys = set(old_content), set(new_content)
+    for key in old_keys & new_keys:
+        if old_content[key] != new_content[key]:
+            change_type = engine._determine_change_type(old_content[key], new_content[key])
+            changes.append(ChangeRecord(
+                change_id=str(uuid.uuid4()), change_type=change_type, component=key,
+                old_value=old_content[key], new_value=new_content[key],
+                impact_level=engine._assess_change_impact(change_type, key, old_content[key], new_content[key]),
+                description=f"修改組件: {key}",
+                affected_components=engine._find_affected_components(key, new_content),
+                effort_impact=engine._calculate_effort_impact(change_type, key, old_content[key], new_content[key])
+            ))
+    return changes
+
+
+def timed(func, repeat: int) -> float:
+    """返回平均每次耗時(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def run_edit_size(engine: IncrementalEngine, base_id: str, edit_count: int, rounds: int) -> Dict[str, Any]:
+    rng = random.Random(edit_count)
+    document = engine.versions[base_id].content
+    legacy_ms = legacy_diff_ms = derive_ms = diff_ms = 0.0
+    legacy_changes = precise_changes = 0
+    for _ in range(rounds):
+        edits = random_edits(document, edit_count, rng)
+
+        elapsed, edited = timed(lambda: apply_edits(document, edits), 1)
+        legacy_ms += elapsed + timed(lambda: legacy_checksum(edited), 1)[0]
+        elapsed, derived_id = timed(lambda: engine.derive_version(base_id, edits), 1)
+        derive_ms += elapsed
+
+        derived = engine.versions[derived_id]
+        if derived.content != edited or engine._build_hash_tree(derived.content).digest != engine.hash_trees[derived_id].digest:
+            raise AssertionError("派生版本與完整重建不一致")
+
+        elapsed, legacy = timed(lambda: legacy_detect_changes(engine, document, edited), 1)
+        legacy_diff_ms += elapsed
+        elapsed, analysis = timed(lambda: asyncio.run(engine.analyze_incremental_changes(base_id, derived_id)), 1)
+        diff_ms += elapsed
+
+        legacy_roots = {change.component for change in legacy}
+        if {change.component.split(".")[0] for change in analysis.changes} != legacy_roots:
+            raise AssertionError("變更的頂層組件不一致")
+        if len(analysis.changes) != len(edits) or any(
+                change.change_type != ChangeType.MODIFICATION for change in analysis.changes):
+            raise AssertionError("深層變更數量不符")
+        legacy_changes += len(legacy)
+        precise_changes += len(analysis.changes)
+
+    return {"edits": edit_count, "legacy_version_ms": legacy_ms / rounds, "derive_ms": derive_ms / rounds,
+            "legacy_diff_ms": legacy_diff_ms / rounds, "diff_ms": diff_ms / rounds,
+            "legacy_changes": legacy_changes / rounds, "precise_changes": precise_changes / rounds}
+
+
+def run_benchmark(groups: int, modules: int, edit_sizes: List[int], rounds: int):
+    engine = IncrementalEngine()
+    document = build_document(groups, modules)
+    full_build_ms, tree = timed(lambda: engine._build_hash_tree(document), 1)
+    nodes = engine.diff_stats["hashed_nodes"]
+    legacy_ms = timed(lambda: legacy_checksum(document), 1)[0]
+    base_id = engine.create_version(document)
+    rows = [run_edit_size(engine, base_id, size, rounds) for size in edit_sizes]
+    return {"nodes": nodes, "full_build_ms": full_build_ms, "legacy_checksum_ms": legacy_ms}, rows
+
+
+def format_report(summary: Dict[str, Any], rows: List[Dict[str, Any]]) -> str:
+    lines = [f"節點數 {summary['nodes']:,}，完整構建哈希樹 {summary['full_build_ms']:.1f}ms，"
+             f"舊 JSON 校驗和 {summary['legacy_checksum_ms']:.1f}ms",
+             f"{'edits':>6} {'legacy ver ms':>14} {'derive ms':>10} {'legacy diff ms':>15} {'diff ms':>8} "
+             f"{'legacy chg':>11} {'deep chg':>9}"]
+    for row in rows:
+        lines.append(f"{row['edits']:>6} {row['legacy_version_ms']:>14.1f} {row['derive_ms']:>10.3f} "
+                     f"{row['legacy_diff_ms']:>15.2f} {row['diff_ms']:>8.3f} "
+                     f"{row['legacy_changes']:>11.1f} {row['precise_changes']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="增量引擎結構哈希差異基準")
+    parser.add_argument("--groups", type=int, default=20, help="頂層分組數")
+    parser.add_argument("--modules", type=int, default=100, help="每個分組的模塊數")
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 100], help="每輪修改的字段數")
+    parser.add_argument("--rounds", type=int, default=10, help="每種修改規模的輪數")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    print(format_report(*run_benchmark(args.groups, args.modules, args.edits, args.rounds)))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,10 @@ Incremental Engine
 
 import asyncio
 import json
+import re
 import uuid
 import hashlib
-from typing import Dict, Any, List, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Tuple, Set, Union, Sequence
 from datetime import datetime
 from enum import Enum
 import logging
@@ -52,6 +53,23 @@ class ChangeRecord:
     affected_components: List[str]
     effort_impact: float  # 工作量影響百分比
 
+# 扁平容器摘要使用的序列化器（複用實例，避免每次 json.dumps 重新構造編碼器）
+_FLAT_ENCODER = json.JSONEncoder(sort_keys=True, ensure_ascii=False, default=repr)
+
+class StructuralHashNode:
+    """
+    結構哈希樹節點（Merkle 風格）
+    字典節點的摘要由排序後的 (鍵, 子摘要) 組成，列表節點由有序的子摘要組成，
+    因此摘要相同的子樹內容必然相同，比較時可以整棵跳過。
+    只含標量的扁平容器整體序列化計算摘要，children 為 None，與標量葉子相同
+    """
+    
+    __slots__ = ("digest", "children")
+    
+    def __init__(self, digest: bytes, children: Optional[Union[Dict[Any, "StructuralHashNode"], List["StructuralHashNode"]]] = None):
+        self.digest = digest
+        self.children = children
+
 @dataclass
 class IncrementalAnalysis:
     """增量分析結果"""
@@ -79,6 +97,16 @@ class IncrementalEngine:
         self.change_patterns: Dict[str, Dict[str, Any]] = {}
         self.logger = logging.getLogger(self.name)
         
+        # 每個版本的結構哈希樹，版本間比較和派生新版本時複用
+        self.hash_trees: Dict[str, StructuralHashNode] = {}
+        self.rendered_components: Dict[bytes, str] = {}
+        self.max_rendered_components = self.config.get("max_rendered_components", 4096)
+        self.diff_stats = {
+            "hashed_nodes": 0,
+            "compared_nodes": 0,
+            "skipped_subtrees": 0
+        }
+        
         # 變更檢測規則
         self.detection_rules = {
             "functional_requirements": {
@@ -112,25 +140,168 @@ class IncrementalEngine:
             "enhancement": {"base_impact": 0.6, "complexity_factor": 1.3}
         }
     
+    # derive_version 中表示刪除路徑的標記
+    DELETED = object()
+    
     def create_version(self, content: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
         """創建新版本"""
+        tree = self._build_hash_tree(content)
+        return self._store_version(content, tree, metadata)
+    
+    def derive_version(self, base_version_id: str, updates: Dict[Union[str, Tuple], Any],
+                       metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        基於已有版本按路徑修改創建新版本
+        路徑格式與變更記錄的 component 相同（如 "modules.login[2].priority"），鍵中含 "." 時可傳元組；
+        只複製並重算被修改路徑上的節點，其餘子樹與源版本共享
+        """
+        if base_version_id not in self.versions:
+            raise ValueError(f"源版本 {base_version_id} 不存在")
+        
+        content = self.versions[base_version_id].content
+        tree = self.hash_trees[base_version_id]
+        for path, value in updates.items():
+            segments = self._parse_path(path) if isinstance(path, str) else tuple(path)
+            if not segments:
+                raise ValueError("更新路徑不能為空")
+            content, tree = self._apply_update(content, tree, segments, value)
+        
+        return self._store_version(content, tree, metadata)
+    
+    def _store_version(self, content: Dict[str, Any], tree: StructuralHashNode,
+                       metadata: Optional[Dict[str, Any]]) -> str:
         version_id = str(uuid.uuid4())
-        content_str = json.dumps(content, sort_keys=True, ensure_ascii=False)
-        checksum = hashlib.sha256(content_str.encode()).hexdigest()
-        
         version = VersionInfo(
             version_id=version_id,
             timestamp=datetime.now(),
             content=content,
             metadata=metadata or {},
-            checksum=checksum
+            checksum=tree.digest.hex()
         )
         
         self.versions[version_id] = version
+        self.hash_trees[version_id] = tree
         self.logger.info(f"版本已創建: {version_id}")
         
         return version_id
     
+    def _build_hash_tree(self, value: Any) -> StructuralHashNode:
+        """自底向上計算結構哈希樹"""
+        self.diff_stats["hashed_nodes"] += 1
+        if isinstance(value, dict):
+            if self._is_flat(value):
+                return StructuralHashNode(self._flat_digest(value))
+            children = {key: self._build_hash_tree(child) for key, child in value.items()}
+            return StructuralHashNode(self._dict_digest(children), children)
+        if isinstance(value, list):
+            if self._is_flat(value):
+                return StructuralHashNode(self._flat_digest(value))
+            children = [self._build_hash_tree(child) for child in value]
+            return StructuralHashNode(self._list_digest(children), children)
+        return StructuralHashNode(self._leaf_digest(value))
+    
+    @staticmethod
+    def _is_flat(value: Union[Dict[Any, Any], List[Any]]) -> bool:
+        """只含標量（字典鍵均為字符串）的容器"""
+        if isinstance(value, dict):
+            return (all(isinstance(key, str) for key in value)
+                    and not any(isinstance(child, (dict, list)) for child in value.values()))
+        return not any(isinstance(child, (dict, list)) for child in value)
+    
+    @staticmethod
+    def _flat_digest(value: Union[Dict[str, Any], List[Any]]) -> bytes:
+        serialized = _FLAT_ENCODER.encode(value)
+        return hashlib.blake2b(b"flat" + serialized.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    
+    @staticmethod
+    def _leaf_digest(value: Any) -> bytes:
+        # JSON 標量的 repr 已能區分類型（'1'、1、1.0、True、None）
+        return hashlib.blake2b(repr(value).encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    
+    @staticmethod
+    def _dict_digest(children: Dict[Any, StructuralHashNode]) -> bytes:
+        entries = sorted((repr(key), node.digest) for key, node in children.items())
+        return hashlib.blake2b(
+            b"dict" + b"".join(key.encode("utf-8", "surrogatepass") + digest for key, digest in entries),
+            digest_size=16
+        ).digest()
+    
+    @staticmethod
+    def _list_digest(children: List[StructuralHashNode]) -> bytes:
+        return hashlib.blake2b(b"list" + b"".join(node.digest for node in children), digest_size=16).digest()
+    
+    def _child_nodes(self, value: Any, node: StructuralHashNode) -> Union[Dict[Any, StructuralHashNode], List[StructuralHashNode]]:
+        """容器的子節點；扁平容器按需為每個標量生成葉子節點"""
+        if node.children is not None:
+            return node.children
+        if isinstance(value, dict):
+            return {key: StructuralHashNode(self._leaf_digest(child)) for key, child in value.items()}
+        return [StructuralHashNode(self._leaf_digest(child)) for child in value]
+    
+    def _container_node(self, value: Any, children: Union[Dict[Any, StructuralHashNode], List[StructuralHashNode]]) -> StructuralHashNode:
+        """修改後的容器節點，摘要規則與完整構建一致"""
+        if self._is_flat(value):
+            return StructuralHashNode(self._flat_digest(value))
+        if isinstance(value, dict):
+            return StructuralHashNode(self._dict_digest(children), children)
+        return StructuralHashNode(self._list_digest(children), children)
+    
+    def _apply_update(self, value: Any, node: StructuralHashNode, segments: Sequence, new_value: Any) -> Tuple[Any, StructuralHashNode]:
+        """路徑複製：返回修改後的值與哈希節點，只重算路徑上的摘要"""
+        key, rest = segments[0], segments[1:]
+        
+        if isinstance(value, dict):
+            value, children = dict(value), dict(self._child_nodes(value, node))
+            if not rest and new_value is self.DELETED:
+                value.pop(key, None)
+                children.pop(key, None)
+            elif rest:
+                child_value = value.get(key, {})
+                child_node = children.get(key) or self._build_hash_tree(child_value)
+                value[key], children[key] = self._apply_update(child_value, child_node, rest, new_value)
+            else:
+                value[key], children[key] = new_value, self._build_hash_tree(new_value)
+            return value, self._container_node(value, children)
+        
+        if isinstance(value, list):
+            if not isinstance(key, int) or not 0 <= key <= len(value):
+                raise ValueError(f"無效的列表索引: {key}")
+            value, children = list(value), list(self._child_nodes(value, node))
+            if not rest and new_value is self.DELETED:
+                if key < len(value):
+                    del value[key]
+                    del children[key]
+            elif key == len(value):
+                if rest:
+                    child_value, child_node = self._apply_update({}, self._build_hash_tree({}), rest, new_value)
+                else:
+                    child_value, child_node = new_value, self._build_hash_tree(new_value)
+                value.append(child_value)
+                children.append(child_node)
+            elif rest:
+                value[key], children[key] = self._apply_update(value[key], children[key], rest, new_value)
+            else:
+                value[key], children[key] = new_value, self._build_hash_tree(new_value)
+            return value, self._container_node(value, children)
+        
+        raise ValueError(f"路徑 {key} 的上級不是字典或列表")
+    
+    @staticmethod
+    def _parse_path(path: str) -> Tuple:
+        """把 "a.b[2].c" 解析為 ("a", "b", 2, "c")"""
+        return tuple(int(index) if index else name
+                     for index, name in re.findall(r"\[(\d+)\]|([^.\[\]]+)", path))
+    
+    @staticmethod
+    def _format_path(segments: Sequence) -> str:
+        path = ""
+        for segment in segments:
+            if isinstance(segment, int):
+                path += f"[{segment}]"
+            else:
+                path += f".{segment}" if path else str(segment)
+        return path
+    
     async def analyze_incremental_changes(self, from_version_id: str, to_version_id: str) -> IncrementalAnalysis:
         """分析增量變更"""
         if from_version_id not in self.versions:
@@ -141,8 +312,11 @@ class IncrementalEngine:
         from_version = self.versions[from_version_id]
         to_version = self.versions[to_version_id]
         
-        # 檢測變更
-        changes = await self._detect_changes(from_version.content, to_version.content)
+        # 檢測變更（複用兩個版本緩存的結構哈希樹）
+        changes = await self._detect_changes(
+            from_version.content, to_version.content,
+            self.hash_trees.get(from_version_id), self.hash_trees.get(to_version_id)
+        )
         
         # 評估影響
         overall_impact = self._assess_overall_impact(changes)
@@ -166,63 +340,117 @@ class IncrementalEngine:
         self.analyses[analysis.analysis_id] = analysis
         return analysis
     
-    async def _detect_changes(self, old_content: Dict[str, Any], new_content: Dict[str, Any]) -> List[ChangeRecord]:
-        """檢測變更"""
-        changes = []
-        
-        # 檢測結構變更
-        old_keys = set(old_content.keys())
-        new_keys = set(new_content.keys())
+    async def _detect_changes(self, old_content: Dict[str, Any], new_content: Dict[str, Any],
+                              old_tree: Optional[StructuralHashNode] = None,
+                              new_tree: Optional[StructuralHashNode] = None) -> List[ChangeRecord]:
+        """
+        檢測變更
+        沿結構哈希樹遞歸比較，摘要相同的子樹直接跳過，變更記錄的 component 為精確的深層路徑
+        """
+        old_tree = old_tree or self._build_hash_tree(old_content)
+        new_tree = new_tree or self._build_hash_tree(new_content)
+        
+        raw_changes: List[Tuple[ChangeType, Tuple, Any, Any]] = []
+        self._diff_nodes((), old_content, new_content, old_tree, new_tree, raw_changes)
         
-        # 新增的鍵
-        for key in new_keys - old_keys:
-            change = ChangeRecord(
-                change_id=str(uuid.uuid4()),
-                change_type=ChangeType.ADDITION,
-                component=key,
-                old_value=None,
-                new_value=new_content[key],
-                impact_level=self._assess_change_impact(ChangeType.ADDITION, key, None, new_content[key]),
-                description=f"新增組件: {key}",
-                affected_components=self._find_affected_components(key, new_content),
-                effort_impact=self._calculate_effort_impact(ChangeType.ADDITION, key, None, new_content[key])
-            )
-            changes.append(change)
-        
-        # 刪除的鍵
-        for key in old_keys - new_keys:
-            change = ChangeRecord(
+        changes = []
+        affected_cache: Dict[Tuple[str, bool], List[str]] = {}
+        for change_type, segments, old_value, new_value in raw_changes:
+            component = self._format_path(segments)
+            # 依賴檢測以頂層組件為單位，同一頂層組件只檢測一次
+            root = str(segments[0])
+            from_old = change_type == ChangeType.DELETION
+            cache_key = (root, from_old)
+            if cache_key not in affected_cache:
+                affected_cache[cache_key] = self._find_affected_components(
+                    root, old_content if from_old else new_content, old_tree if from_old else new_tree)
+            
+            description = {
+                ChangeType.ADDITION: "新增組件",
+                ChangeType.DELETION: "刪除組件"
+            }.get(change_type, "修改組件")
+            changes.append(ChangeRecord(
                 change_id=str(uuid.uuid4()),
-                change_type=ChangeType.DELETION,
-                component=key,
-                old_value=old_content[key],
-                new_value=None,
-                impact_level=self._assess_change_impact(ChangeType.DELETION, key, old_content[key], None),
-                description=f"刪除組件: {key}",
-                affected_components=self._find_affected_components(key, old_content),
-                effort_impact=self._calculate_effort_impact(ChangeType.DELETION, key, old_content[key], None)
-            )
-            changes.append(change)
-        
-        # 修改的鍵
-        for key in old_keys & new_keys:
-            if old_content[key] != new_content[key]:
-                change_type = self._determine_change_type(old_content[key], new_content[key])
-                change = ChangeRecord(
-                    change_id=str(uuid.uuid4()),
-                    change_type=change_type,
-                    component=key,
-                    old_value=old_content[key],
-                    new_value=new_content[key],
-                    impact_level=self._assess_change_impact(change_type, key, old_content[key], new_content[key]),
-                    description=f"修改組件: {key}",
-                    affected_components=self._find_affected_components(key, new_content),
-                    effort_impact=self._calculate_effort_impact(change_type, key, old_content[key], new_content[key])
-                )
-                changes.append(change)
+                change_type=change_type,
+                component=component,
+                old_value=old_value,
+                new_value=new_value,
+                impact_level=self._assess_change_impact(change_type, component, old_value, new_value),
+                description=f"{description}: {component}",
+                affected_components=affected_cache[cache_key],
+                effort_impact=self._calculate_effort_impact(change_type, component, old_value, new_value)
+            ))
         
         return changes
     
+    def _diff_nodes(self, path: Tuple, old_value: Any, new_value: Any,
+                    old_node: StructuralHashNode, new_node: StructuralHashNode,
+                    changes: List[Tuple[ChangeType, Tuple, Any, Any]]) -> None:
+        """遞歸比較兩個子樹，收集 (變更類型, 路徑, 舊值, 新值)"""
+        self.diff_stats["compared_nodes"] += 1
+        if old_node.digest == new_node.digest:
+            self.diff_stats["skipped_subtrees"] += 1
+            return
+        
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            # 鍵變化過半視為結構重組，不再細分
+            if path and self._determine_change_type(old_value, new_value) == ChangeType.RESTRUCTURE:
+                changes.append((ChangeType.RESTRUCTURE, path, old_value, new_value))
+                return
+            
+            for key in new_value.keys() - old_value.keys():
+                changes.append((ChangeType.ADDITION, path + (key,), None, new_value[key]))
+            for key in old_value.keys() - new_value.keys():
+                changes.append((ChangeType.DELETION, path + (key,), old_value[key], None))
+            old_children, new_children = self._child_nodes(old_value, old_node), self._child_nodes(new_value, new_node)
+            for key in old_value.keys() & new_value.keys():
+                self._diff_nodes(path + (key,), old_value[key], new_value[key],
+                                 old_children[key], new_children[key], changes)
+            return
+        
+        if isinstance(old_value, list) and isinstance(new_value, list):
+            self._diff_lists(path, old_value, new_value,
+                             self._child_nodes(old_value, old_node), self._child_nodes(new_value, new_node), changes)
+            return
+        
+        # 葉子：摘要不同但值相等（如 1 與 1.0）時不算變更
+        if old_value != new_value:
+            changes.append((self._determine_change_type(old_value, new_value), path, old_value, new_value))
+    
+    def _diff_lists(self, path: Tuple, old_list: List[Any], new_list: List[Any],
+                    old_children: List[StructuralHashNode], new_children: List[StructuralHashNode],
+                    changes: List[Tuple[ChangeType, Tuple, Any, Any]]) -> None:
+        """按子摘要對齊列表元素：去掉相同的首尾後，對中間部分做序列匹配"""
+        old_digests = [node.digest for node in old_children]
+        new_digests = [node.digest for node in new_children]
+        
+        prefix = 0
+        limit = min(len(old_digests), len(new_digests))
+        while prefix < limit and old_digests[prefix] == new_digests[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix
+               and old_digests[len(old_digests) - 1 - suffix] == new_digests[len(new_digests) - 1 - suffix]):
+            suffix += 1
+        self.diff_stats["skipped_subtrees"] += prefix + suffix
+        
+        old_end, new_end = len(old_digests) - suffix, len(new_digests) - suffix
+        matcher = difflib.SequenceMatcher(None, old_digests[prefix:old_end], new_digests[prefix:new_end], autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            i1, i2, j1, j2 = i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix
+            if tag == "equal":
+                self.diff_stats["skipped_subtrees"] += i2 - i1
+                continue
+            # 對應位置上的元素逐個遞歸比較，多出的部分記為新增/刪除
+            paired = min(i2 - i1, j2 - j1)
+            for offset in range(paired):
+                self._diff_nodes(path + (j1 + offset,), old_list[i1 + offset], new_list[j1 + offset],
+                                 old_children[i1 + offset], new_children[j1 + offset], changes)
+            for index in range(i1 + paired, i2):
+                changes.append((ChangeType.DELETION, path + (index,), old_list[index], None))
+            for index in range(j1 + paired, j2):
+                changes.append((ChangeType.ADDITION, path + (index,), None, new_list[index]))
+    
     def _determine_change_type(self, old_value: Any, new_value: Any) -> ChangeType:
         """確定變更類型"""
         if isinstance(old_value, dict) and isinstance(new_value, dict):
@@ -286,20 +514,33 @@ class IncrementalEngine:
         else:
             return 0.5
     
-    def _find_affected_components(self, component: str, content: Dict[str, Any]) -> List[str]:
+    def _find_affected_components(self, component: str, content: Dict[str, Any],
+                                  tree: Optional[StructuralHashNode] = None) -> List[str]:
         """查找受影響的組件"""
         affected = []
+        children = tree.children if tree is not None and isinstance(tree.children, dict) else {}
         
         # 簡單的依賴檢測邏輯
         for key, value in content.items():
             if key != component:
                 if isinstance(value, str) and component in value:
                     affected.append(key)
-                elif isinstance(value, dict) and component in str(value):
+                elif isinstance(value, dict) and component in self._render_component(value, children.get(key)):
                     affected.append(key)
         
         return affected
     
+    def _render_component(self, value: Dict[str, Any], node: Optional[StructuralHashNode]) -> str:
+        """組件值的字符串形式，按結構摘要緩存，未變化的組件在版本間不重複生成"""
+        if node is None:
+            return str(value)
+        rendered = self.rendered_components.get(node.digest)
+        if rendered is None:
+            if len(self.rendered_components) >= self.max_rendered_components:
+                self.rendered_components.clear()
+            rendered = self.rendered_components[node.digest] = str(value)
+        return rendered
+    
     def _assess_overall_impact(self, changes: List[ChangeRecord]) -> ImpactLevel:
         """評估整體影響"""
         if not changes:
@@ -430,6 +671,7 @@ class IncrementalEngine:
             "name": self.name,
             "total_versions": len(self.versions),
             "total_analyses": len(self.analyses),
+            "diff_stats": dict(self.diff_stats),
             "recent_versions": [v.version_id for v in sorted(self.versions.values(), key=lambda x: x.timestamp, reverse=True)[:5]],
             "recent_analyses": [a.analysis_id for a in sorted(self.analyses.values(), key=lambda x: x.timestamp, reverse=True)[:5]],
             "detection_rules": list(self.detection_rules.keys())
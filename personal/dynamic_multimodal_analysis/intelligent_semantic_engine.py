@@ -6,17 +6,190 @@
 
 import re
 import json
-from typing import Dict, List, Any, Optional
+import hashlib
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Iterable, Tuple, FrozenSet
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=65536)
+def _token_set(text: str) -> FrozenSet[str]:
+    """詞彙集合（小寫後按空白切分），重複出現的文本不再重新分詞"""
+    return frozenset(text.lower().split())
+
+
+def _jaccard(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+    """詞彙重疊度"""
+    if not tokens1 or not tokens2:
+        return 0.0
+    intersection = len(tokens1 & tokens2)
+    return intersection / (len(tokens1) + len(tokens2) - intersection)
+
+
+@lru_cache(maxsize=262144)
+def _token_hash(token: str) -> int:
+    """詞彙的64位哈希，跨進程穩定"""
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SemanticSimilarityIndex:
+    """文本相似度索引
+    
+    對每段文本的詞彙集合計算 MinHash 簽名並按段(band)做 LSH 分桶，
+    查詢時只取與查詢在最多段上同桶的候選，再用精確的詞彙重疊度重排。
+    文本數量不超過 candidate_limit 時直接精確比較全部文本。
+    """
+    
+    def __init__(self, num_perm: int = 128, bands: int = 64, candidate_limit: int = 256,
+                 seed: int = 1, chunk_size: int = 4096):
+        if num_perm % bands:
+            raise ValueError("num_perm 必須能被 bands 整除")
+        rng = np.random.default_rng(seed)
+        # 乘移位哈希族 h(x) = (a * x + b) mod 2^64 >> 32，a 為奇數
+        self._perm_a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._perm_b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._band_mix = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.candidate_limit = candidate_limit
+        self.chunk_size = chunk_size
+        
+        self.texts: List[str] = []
+        self.token_sets: List[FrozenSet[str]] = []
+        self._tokens: Dict[str, int] = {}
+        # 已排序的分桶鍵 (bands, n) 及對應文本編號；新文本先進入待合併區
+        self._band_keys = np.empty((bands, 0), dtype=np.uint32)
+        self._band_ids = np.empty((bands, 0), dtype=np.int32)
+        self._pending_keys: List[np.ndarray] = []
+        self._pending_ids: List[np.ndarray] = []
+        self._pending_count = 0
+        self.stats = {"queries": 0, "exact_scans": 0, "candidates": 0, "merges": 0}
+    
+    def __len__(self) -> int:
+        return len(self.texts)
+    
+    def add(self, text: str) -> int:
+        """加入一段文本，返回其編號"""
+        return self.add_many([text])[0]
+    
+    def add_many(self, texts: Iterable[str]) -> List[int]:
+        """批量加入文本，返回編號列表"""
+        ids = []
+        batch_ids, batch_sets = [], []
+        for text in texts:
+            tokens = frozenset(self._canonical_token(token) for token in text.lower().split())
+            text_id = len(self.texts)
+            self.texts.append(text)
+            self.token_sets.append(tokens)
+            ids.append(text_id)
+            if tokens:
+                batch_ids.append(text_id)
+                batch_sets.append(tokens)
+        
+        for start in range(0, len(batch_sets), self.chunk_size):
+            keys = self._band_keys_for(batch_sets[start:start + self.chunk_size])
+            self._pending_keys.append(keys)
+            self._pending_ids.append(np.asarray(batch_ids[start:start + self.chunk_size], dtype=np.int32))
+            self._pending_count += keys.shape[1]
+        # 待合併區超過已排序部分的 1/8 時才重新排序，批量加入時整體只排序一次
+        if self._pending_count > max(self.candidate_limit, self._band_keys.shape[1] // 8):
+            self._merge_pending()
+        return ids
+    
+    def query(self, text: str, top_k: int = 10, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """返回與 text 最相似的 top_k 段文本及相似度（只返回相似度大於 min_score 的結果）"""
+        self.stats["queries"] += 1
+        tokens = _token_set(text)
+        if not tokens or not self.texts:
+            return []
+        
+        if len(self.texts) <= self.candidate_limit:
+            self.stats["exact_scans"] += 1
+            candidates = range(len(self.texts))
+        else:
+            candidates = self._lsh_candidates(tokens)
+        self.stats["candidates"] += len(candidates)
+        
+        scored = []
+        for text_id in candidates:
+            score = _jaccard(tokens, self.token_sets[text_id])
+            if score > min_score:
+                scored.append((score, -text_id))
+        scored.sort(reverse=True)
+        return [(self.texts[-neg_id], score) for score, neg_id in scored[:top_k]]
+    
+    def _canonical_token(self, token: str) -> str:
+        """相同詞彙共用一個字符串對象，節省大量文本時的內存"""
+        return self._tokens.setdefault(token, token)
+    
+    def _band_keys_for(self, token_sets: List[FrozenSet[str]]) -> np.ndarray:
+        """計算一批詞彙集合的 MinHash 簽名並折疊為每段一個分桶鍵，返回 (bands, m)"""
+        hashes, offsets = [], []
+        for tokens in token_sets:
+            offsets.append(len(hashes))
+            hashes.extend(_token_hash(token) for token in tokens)
+        values = np.asarray(hashes, dtype=np.uint64)
+        permuted = (self._perm_a[:, None] * values[None, :] + self._perm_b[:, None]) >> np.uint64(32)
+        signatures = np.minimum.reduceat(permuted, np.asarray(offsets, dtype=np.int64), axis=1)
+        mixed = (signatures * self._band_mix[:, None]).reshape(self.bands, self.rows, -1)
+        return (mixed.sum(axis=1, dtype=np.uint64) >> np.uint64(32)).astype(np.uint32)
+    
+    def _merge_pending(self) -> None:
+        """把待合併區併入已排序的分桶鍵"""
+        if not self._pending_count:
+            return
+        pending_keys = np.concatenate(self._pending_keys, axis=1)
+        pending_ids = np.concatenate(self._pending_ids)
+        size = self._band_keys.shape[1] + len(pending_ids)
+        band_keys = np.empty((self.bands, size), dtype=np.uint32)
+        band_ids = np.empty((self.bands, size), dtype=np.int32)
+        # 逐段排序，避免一次性為所有段分配排序下標
+        for band in range(self.bands):
+            keys = np.concatenate([self._band_keys[band], pending_keys[band]])
+            order = np.argsort(keys, kind="stable")
+            band_keys[band] = keys[order]
+            band_ids[band] = np.concatenate([self._band_ids[band], pending_ids])[order]
+        self._band_keys, self._band_ids = band_keys, band_ids
+        self._pending_keys, self._pending_ids, self._pending_count = [], [], 0
+        self.stats["merges"] += 1
+    
+    def _lsh_candidates(self, tokens: FrozenSet[str]) -> List[int]:
+        """取同桶段數最多的 candidate_limit 個候選"""
+        keys = self._band_keys_for([tokens])[:, 0]
+        matches = []
+        for band, key in enumerate(keys):
+            row = self._band_keys[band]
+            start, end = np.searchsorted(row, key, "left"), np.searchsorted(row, key, "right")
+            if start != end:
+                matches.append(self._band_ids[band, start:end])
+        if self._pending_count:
+            pending_keys = np.concatenate(self._pending_keys, axis=1)
+            pending_ids = np.concatenate(self._pending_ids)
+            hit = (pending_keys == keys[:, None]).nonzero()[1]
+            matches.append(pending_ids[hit])
+        if not matches:
+            return []
+        
+        candidate_ids, counts = np.unique(np.concatenate(matches), return_counts=True)
+        if len(candidate_ids) > self.candidate_limit:
+            top = np.argpartition(-counts, self.candidate_limit - 1)[:self.candidate_limit]
+            candidate_ids = candidate_ids[top]
+        return candidate_ids.tolist()
+
+
 class IntelligentSemanticEngine:
     """智能語義理解引擎"""
     
     def __init__(self, ai_client=None):
         self.ai_client = ai_client
         self.domain_knowledge = self._load_domain_knowledge()
+        self.metric_index = SemanticSimilarityIndex()
+        self.metric_index.add_many(self.domain_knowledge["insurance_metrics"])
         
     def _load_domain_knowledge(self) -> Dict[str, Any]:
         """加載領域知識庫"""
@@ -121,8 +294,10 @@ class IntelligentSemanticEngine:
         found_metrics = []
         
         # 使用語義相似度而不是硬編碼匹配
+        matched = {metric for metric, _ in self.metric_index.query(
+            text, top_k=len(self.metric_index), min_score=0.3)}
         for metric in self.domain_knowledge["insurance_metrics"]:
-            if self._semantic_similarity(text, metric) > 0.3:
+            if metric in matched:
                 found_metrics.append(metric)
         
         # 提取數字相關的概念
@@ -174,17 +349,12 @@ class IntelligentSemanticEngine:
     def _semantic_similarity(self, text1: str, text2: str) -> float:
         """計算語義相似度（簡化版本）"""
         # 這裡可以使用更複雜的語義相似度算法
-        # 目前使用簡單的詞彙重疊度
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        # 目前使用簡單的詞彙重疊度，分詞結果緩存
+        return _jaccard(_token_set(text1), _token_set(text2))
+    
+    def find_similar_metrics(self, text: str, top_k: int = 3, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """從指標索引中查找與文本最相似的指標"""
+        return self.metric_index.query(text, top_k=top_k, min_score=min_score)
     
     def _classify_metric_from_context(self, context: str) -> Optional[str]:
         """從上下文分類指標類型"""
@@ -8,7 +8,8 @@ MCP Capability Registration and Configuration System
 
 import json
 import yaml
-from typing import Dict, List, Optional, Any
+from collections import deque
+from typing import Dict, List, Optional, Any, Set
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
@@ -55,6 +56,81 @@ class AdapterMCPConfig:
     auto_generated: bool = False
     source_code_path: Optional[str] = None
 
+class KeywordAutomaton:
+    """多關鍵詞匹配自動機 (Aho–Corasick)
+    
+    新關鍵詞直接插入字典樹，失配鏈接在下一次匹配前一次性重建；
+    一次掃描文本即可找出所有出現過的關鍵詞。
+    """
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Optional[str]] = [None]  # 在該節點結束的關鍵詞
+        self._output_link: List[int] = [0]  # 沿失配鏈最近的有輸出節點，0 表示沒有
+        self._dirty = False
+        self.keywords: Set[str] = set()
+    
+    def add(self, keyword: str):
+        """插入關鍵詞"""
+        if keyword in self.keywords:
+            return
+        self.keywords.add(keyword)
+        node = 0
+        for char in keyword:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._output_link.append(0)
+                self._goto[node][char] = next_node
+            node = next_node
+        if node:
+            self._output[node] = keyword
+        self._dirty = True
+    
+    def _build(self):
+        """按層次遍歷重建失配鏈接與輸出鏈接"""
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._output_link[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[child] = fail
+                self._output_link[child] = fail if self._output[fail] is not None else self._output_link[fail]
+                queue.append(child)
+        self._dirty = False
+    
+    def find_all(self, text: str) -> Set[str]:
+        """返回在文本中出現過的所有關鍵詞（空關鍵詞視為總是出現）"""
+        if self._dirty:
+            self._build()
+        goto, fail, output, output_link = self._goto, self._fail, self._output, self._output_link
+        found = {""} if "" in self.keywords else set()
+        visited = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            # 同一節點的輸出鏈只需收集一次
+            match = node if output[node] is not None else output_link[node]
+            while match and match not in visited:
+                visited.add(match)
+                found.add(output[match])
+                match = output_link[match]
+        return found
+
+
 class MCPCapabilityRegistry:
     """MCP 能力註冊中心"""
     
@@ -64,6 +140,11 @@ class MCPCapabilityRegistry:
         self.adapter_mcps: Dict[str, AdapterMCPConfig] = {}
         self.capability_index: Dict[str, List[str]] = {}  # 能力 -> MCP 列表
         
+        # 意圖關鍵詞自動機：關鍵詞 -> {工作流: 該關鍵詞在工作流中出現的次數}
+        self.intent_automaton = KeywordAutomaton()
+        self.keyword_workflows: Dict[str, Dict[str, int]] = {}
+        self.workflow_order: Dict[str, int] = {}
+        
         # 載入預設配置
         self.load_default_configurations()
     
@@ -167,7 +248,12 @@ class MCPCapabilityRegistry:
     
     def register_workflow_mcp(self, config: WorkflowMCPConfig):
         """註冊工作流 MCP"""
+        previous = self.workflow_mcps.get(config.name)
+        if previous is not None:
+            self._unindex_intent_keywords(previous)
         self.workflow_mcps[config.name] = config
+        self.workflow_order.setdefault(config.name, len(self.workflow_order))
+        self._index_intent_keywords(config)
         
         # 更新能力索引
         for capability in config.capabilities:
@@ -193,22 +279,38 @@ class MCPCapabilityRegistry:
         """根據能力查找 MCP"""
         return self.capability_index.get(capability, [])
     
+    def _index_intent_keywords(self, config: WorkflowMCPConfig):
+        """把工作流的意圖關鍵詞編入自動機"""
+        for keyword in config.intent_keywords:
+            owners = self.keyword_workflows.setdefault(keyword, {})
+            owners[config.name] = owners.get(config.name, 0) + 1
+            self.intent_automaton.add(keyword)
+    
+    def _unindex_intent_keywords(self, config: WorkflowMCPConfig):
+        """重新註冊同名工作流時移除舊關鍵詞的計數"""
+        for keyword in config.intent_keywords:
+            owners = self.keyword_workflows.get(keyword, {})
+            if owners.get(config.name, 0) > 1:
+                owners[config.name] -= 1
+            else:
+                owners.pop(config.name, None)
+    
+    def score_workflows_by_intent(self, user_input: str) -> Dict[str, int]:
+        """計算每個工作流命中的意圖關鍵詞數（只返回分數大於 0 的工作流）"""
+        scores: Dict[str, int] = {}
+        for keyword in self.intent_automaton.find_all(user_input.lower()):
+            for name, count in self.keyword_workflows.get(keyword, {}).items():
+                scores[name] = scores.get(name, 0) + count
+        return scores
+    
     def find_workflow_by_intent(self, user_input: str) -> Optional[WorkflowMCPConfig]:
         """根據用戶輸入的意圖查找合適的工作流"""
-        user_input_lower = user_input.lower()
-        
-        # 計算每個工作流的匹配分數
-        scores = {}
-        for name, config in self.workflow_mcps.items():
-            score = 0
-            for keyword in config.intent_keywords:
-                if keyword in user_input_lower:
-                    score += 1
-            scores[name] = score
+        # 一次掃描輸入文本，累計每個工作流的匹配分數
+        scores = self.score_workflows_by_intent(user_input)
         
-        # 返回分數最高的工作流
-        if scores and max(scores.values()) > 0:
-            best_workflow = max(scores, key=scores.get)
+        # 返回分數最高的工作流，同分時取先註冊的
+        if scores:
+            best_workflow = min(scores, key=lambda name: (-scores[name], self.workflow_order[name]))
             return self.workflow_mcps[best_workflow]
         
         return None
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+神經發現引擎端口掃描基準
+
+在一個 1000 端口的窗口內啟動本地樁服務（另一線程的事件循環中）：
+- MCP 樁：/api/health 返回 JSON 能力信息
+- 非 MCP 的 HTTP 服務：所有路徑返回 404
+- 靜默 TCP 服務：接受連接但從不響應
+對比舊實現（逐端口 TCP 檢查 + 阻塞 requests 探測）與併發掃描的冷掃描、緩存命中後的再次掃描耗時，
+以及流式產出第一個結果的延遲，並校驗兩者發現的端口一致。
+
+用法:
+    python neural_discovery_benchmark.py --ports 1000 --mcp 20 --http 5 --silent 3
+"""
+
+import argparse
+import asyncio
+import logging
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+import sys
+
+import requests
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from neural_discovery_engine import NeuralDiscoveryEngine
+
+
+class StubServers:
+    """在後台線程的事件循環中運行本地樁服務"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.runners: List[web.AppRunner] = []
+        self.servers: List[asyncio.AbstractServer] = []
+        self.mcp_ports: Set[int] = set()
+        self.http_ports: Set[int] = set()
+        self.silent_ports: Set[int] = set()
+
+    def start(self, window: int, mcp: int, http: int, silent: int) -> Tuple[int, int]:
+        """在一個從臨時端口開始的窗口內啟動樁服務，返回掃描範圍"""
+        self.thread.start()
+        probe = socket.socket()
+        probe.bind(('127.0.0.1', 0))
+        base = min(probe.getsockname()[1], 65535 - window + 1)
+        probe.close()
+
+        kinds = ['mcp'] * mcp + ['http'] * http + ['silent'] * silent
+        step = max(1, window // max(1, len(kinds)))
+        for index, kind in enumerate(kinds):
+            port = asyncio.run_coroutine_threadsafe(self._start_stub(kind, base + index * step), self.loop).result()
+            {'mcp': self.mcp_ports, 'http': self.http_ports, 'silent': self.silent_ports}[kind].add(port)
+        return base, base + window - 1
+
+    async def _start_stub(self, kind: str, port: int) -> int:
+        """從 port 開始嘗試綁定，端口被佔用時順延"""
+        while True:
+            try:
+                if kind == 'silent':
+                    self.servers.append(await asyncio.start_server(self._silent, '127.0.0.1', port))
+                else:
+                    app = web.Application()
+                    app.router.add_get('/{path:.*}', self._mcp_health if kind == 'mcp' else self._not_found)
+                    runner = web.AppRunner(app, access_log=None)
+                    await runner.setup()
+                    try:
+                        await web.TCPSite(runner, '127.0.0.1', port).start()
+                    except OSError:
+                        await runner.cleanup()
+                        raise
+                    self.runners.append(runner)
+                return port
+            except OSError:
+                port += 1
+
+    async def _mcp_health(self, request: web.Request) -> web.Response:
+        if request.path != '/api/health':
+            return web.Response(status=404)
+        port = request.transport.get_extra_info('sockname')[1]
+        return web.json_response({'service': f'stub_{port}', 'capabilities': ['stub', f'cap_{port}']})
+
+    async def _not_found(self, request: web.Request) -> web.Response:
+        return web.Response(status=404)
+
+    async def _silent(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await reader.read()
+        writer.close()
+
+    def stop(self):
+        async def shutdown():
+            for runner in self.runners:
+                await runner.cleanup()
+            for server in self.servers:
+                server.close()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+async def legacy_is_port_open(host: str, port: int, timeout: float = 1.0) -> bool:
+    """舊實現的端口檢查"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+        writer.close()
+        await writer.wait_closed()
+        return True
+    except Exception:
+        return False
+
+
+def legacy_probe(port: int) -> Optional[Dict]:
+    """舊實現的服務探測：阻塞 requests，每個端點各自等待超時"""
+    for endpoint in ['/api/health', '/health', '/status', '/']:
+        try:
+            response = requests.get(f"http://localhost:{port}{endpoint}", timeout=2)
+            if response.status_code == 200:
+                data = response.json() if response.headers.get('content-type', '').startswith('application/json') else {}
+                capabilities = data.get('capabilities', [data['service']] if 'service' in data else [])
+                return {'capabilities': capabilities, 'service_info': data, 'endpoint': endpoint}
+        except Exception:
+            continue
+    return None
+
+
+async def legacy_scan(scan_range: Tuple[int, int]) -> Set[int]:
+    """舊實現的 scan_port_range：逐個端口串行探測"""
+    found = set()
+    for port in range(scan_range[0], scan_range[1] + 1):
+        if await legacy_is_port_open('localhost', port) and legacy_probe(port):
+            found.add(port)
+    return found
+
+
+async def concurrent_scan(engine: NeuralDiscoveryEngine) -> Tuple[Set[int], float]:
+    """併發掃描，返回發現的端口與第一個結果的延遲(毫秒)"""
+    start = time.perf_counter()
+    first_ms = None
+    found = set()
+    async for port, _ in engine.iter_port_scan():
+        if first_ms is None:
+            first_ms = (time.perf_counter() - start) * 1000
+        found.add(port)
+    return found, first_ms or 0.0
+
+
+def timed(coro) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    result = asyncio.run(coro)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def run_benchmark(ports: int, mcp: int, http: int, silent: int, concurrency: int, skip_legacy: bool) -> Dict[str, Any]:
+    stubs = StubServers()
+    scan_range = stubs.start(ports, mcp, http, silent)
+    try:
+        engine = NeuralDiscoveryEngine(scan_range, max_concurrency=concurrency)
+        cold_ms, (cold_found, first_ms) = timed(concurrent_scan(engine))
+        warm_ms, (warm_found, _) = timed(concurrent_scan(engine))
+        if cold_found != stubs.mcp_ports or warm_found != stubs.mcp_ports:
+            raise AssertionError("併發掃描發現的端口不正確")
+
+        legacy_ms = None
+        if not skip_legacy:
+            legacy_ms, legacy_found = timed(legacy_scan(scan_range))
+            if legacy_found != stubs.mcp_ports:
+                raise AssertionError("舊實現發現的端口不正確")
+    finally:
+        stubs.stop()
+
+    return {"scan_range": scan_range, "legacy_ms": legacy_ms, "cold_ms": cold_ms, "first_ms": first_ms,
+            "warm_ms": warm_ms, "found": len(cold_found), "stats": engine.scan_stats}
+
+
+def format_report(result: Dict[str, Any], args) -> str:
+    legacy = f"{result['legacy_ms']:.0f}ms" if result['legacy_ms'] is not None else "skipped"
+    return "\n".join([
+        f"掃描範圍 {result['scan_range'][0]}-{result['scan_range'][1]} ({args.ports} 端口)，"
+        f"MCP 樁 {args.mcp}，非 MCP HTTP {args.http}，靜默 TCP {args.silent}，併發 {args.concurrency}",
+        f"舊實現串行掃描:        {legacy}",
+        f"併發冷掃描:            {result['cold_ms']:.0f}ms (首個結果 {result['first_ms']:.1f}ms)",
+        f"緩存命中後再次掃描:    {result['warm_ms']:.0f}ms",
+        f"發現服務 {result['found']}，統計 {result['stats']}",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="神經發現引擎端口掃描基準")
+    parser.add_argument("--ports", type=int, default=1000, help="掃描端口數")
+    parser.add_argument("--mcp", type=int, default=20, help="MCP 樁服務數")
+    parser.add_argument("--http", type=int, default=5, help="非 MCP HTTP 服務數")
+    parser.add_argument("--silent", type=int, default=3, help="接受連接但不響應的 TCP 服務數")
+    parser.add_argument("--concurrency", type=int, default=100, help="併發探測上限")
+    parser.add_argument("--skip-legacy", action="store_true", help="跳過舊實現")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    result = run_benchmark(args.ports, args.mcp, args.http, args.silent, args.concurrency, args.skip_legacy)
+    print(format_report(result, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+神經發現引擎測試 - 用臨時端口上的本地樁服務校驗併發掃描、流式結果與服務緩存
+"""
+
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from neural_discovery_engine import NeuralDiscoveryEngine
+from neural_discovery_benchmark import StubServers
+
+logging.disable(logging.INFO)
+
+
+def test_concurrent_scan_finds_mcp_stubs():
+    """測試只發現 MCP 樁，靜默端口最多等待一個探測超時"""
+    stubs = StubServers()
+    scan_range = stubs.start(window=60, mcp=3, http=2, silent=2)
+    try:
+        engine = NeuralDiscoveryEngine(scan_range, max_concurrency=20, probe_timeout=0.5)
+        start = time.perf_counter()
+        neurons = asyncio.run(engine.scan_port_range())
+        elapsed = time.perf_counter() - start
+    finally:
+        stubs.stop()
+
+    assert {neuron.port for neuron in neurons} == stubs.mcp_ports
+    for neuron in neurons:
+        assert neuron.capabilities == ['stub', f'cap_{neuron.port}']
+    assert elapsed < 1.5, elapsed
+    assert engine.scan_stats['open_ports'] == 7
+    print(f"✅ 併發掃描測試通過 ({elapsed * 1000:.0f}ms)")
+
+
+def test_results_stream_before_scan_completes():
+    """測試第一個結果在靜默端口超時前就產出，提前停止迭代會取消其餘探測"""
+    stubs = StubServers()
+    scan_range = stubs.start(window=40, mcp=1, http=0, silent=3)
+    try:
+        engine = NeuralDiscoveryEngine(scan_range, max_concurrency=10, probe_timeout=1.0)
+
+        async def first_result():
+            start = time.perf_counter()
+            async for neuron in engine.scan_port_range_stream():
+                return neuron, time.perf_counter() - start
+
+        neuron, first_elapsed = asyncio.run(first_result())
+    finally:
+        stubs.stop()
+
+    assert neuron.port in stubs.mcp_ports
+    assert first_elapsed < 0.5, first_elapsed
+    print(f"✅ 流式結果測試通過 (首個結果 {first_elapsed * 1000:.0f}ms)")
+
+
+def test_service_cache_and_expiry():
+    """測試緩存未過期時不重新探測，過期後重新探測並發現服務下線"""
+    stubs = StubServers()
+    scan_range = stubs.start(window=30, mcp=2, http=0, silent=0)
+    engine = NeuralDiscoveryEngine(scan_range, service_cache_ttl=60)
+    try:
+        first = asyncio.run(engine.scan_port_range())
+        probes = engine.scan_stats['http_probes']
+        second = asyncio.run(engine.scan_port_range())
+        assert engine.scan_stats['cache_hits'] == 2
+        assert engine.scan_stats['http_probes'] == probes
+        assert {n.port for n in first} == {n.port for n in second} == stubs.mcp_ports
+    finally:
+        stubs.stop()
+
+    # 服務已停止，但緩存未過期時仍視為可用
+    assert len(asyncio.run(engine.scan_port_range())) == 2
+    engine.service_cache = {port: (0.0, info) for port, (_, info) in engine.service_cache.items()}
+    assert asyncio.run(engine.scan_port_range()) == []
+    assert engine.service_cache == {}
+    print("✅ 服務緩存測試通過")
+
+
+def test_discover_cycle_registers_neurons():
+    """測試完整發現循環註冊神經元，再次循環只更新最後見到時間"""
+    stubs = StubServers()
+    scan_range = stubs.start(window=20, mcp=2, http=1, silent=0)
+    engine = NeuralDiscoveryEngine(scan_range)
+    try:
+        asyncio.run(engine.discover_cycle())
+        assert {neuron.port for neuron in engine.get_active_neurons().values()} == stubs.mcp_ports
+        assert asyncio.run(engine.scan_port_range()) == []
+        assert engine.get_discovery_stats()['active_neurons'] == 2
+    finally:
+        stubs.stop()
+    print("✅ 發現循環測試通過")
+
+
+if __name__ == "__main__":
+    test_concurrent_scan_finds_mcp_stubs()
+    test_results_stream_before_scan_completes()
+    test_service_cache_and_expiry()
+    test_discover_cycle_registers_neurons()
@@ -610,6 +610,15 @@ class PowerAutoSDLCTestCLI:
         
         self.generate_sdlc_report()
 
+def run_sharded_mode(args):
+    """分片回归模式"""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from mcp.workflow.test_management_workflow_mcp.sharded_test_runner import run_sharded_regression
+    
+    report = run_sharded_regression(args.shards, output=args.output, modules=args.modules)
+    if report["test_summary"]["failed_tests"]:
+        sys.exit(1)
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -630,6 +639,7 @@ def main():
   python3 sdlc_test_cli.py --workflow requirements # 测试需求分析工作流
   python3 sdlc_test_cli.py --workflow coding       # 测试编码实现工作流
   python3 sdlc_test_cli.py --verbose               # 详细输出模式
+  python3 sdlc_test_cli.py --shards 4              # 分片并行执行全部MCP单元/集成测试
         """
     )
     
@@ -653,8 +663,24 @@ def main():
         help="指定报告输出文件路径"
     )
     
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="分片回归模式: 按历史耗时将各MCP的unit_tests/integration_tests分为N片并行执行"
+    )
+    
+    parser.add_argument(
+        "--modules",
+        nargs="+",
+        help="分片回归模式下只运行指定MCP的测试"
+    )
+    
     args = parser.parse_args()
     
+    if args.shards:
+        run_sharded_mode(args)
+        return
+    
     # 创建SDLC测试CLI实例
     test_cli = PowerAutoSDLCTestCLI()
     